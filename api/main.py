@@ -2,6 +2,8 @@
 FastAPI main application entry point for Codiak (React version).
 Runs alongside the existing Streamlit app on port 8000.
 """
+import logging
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,6 +15,7 @@ from api.routers import tools, text_tools
 from api.routers.dragon_keeper import router as dk_router
 from api.routers.house import router as house_router
 from api.routers.home_assistant import router as ha_router
+from api.routers.smartthings import router as smartthings_router
 
 app = FastAPI(
     title="Codiak API",
@@ -34,6 +37,7 @@ app.include_router(text_tools.router, prefix="/api/tools")
 app.include_router(dk_router, prefix="/api/dragon-keeper")
 app.include_router(house_router, prefix="/api")
 app.include_router(ha_router, prefix="/api/home-assistant")
+app.include_router(smartthings_router, prefix="/api/smartthings")
 
 
 @app.on_event("startup")
@@ -42,6 +46,60 @@ def startup_event():
     run_migrations()
 
 
+@app.on_event("startup")
+async def warm_keeper_agent():
+    # Prebuild the Keeper prompt and tool schema so the first chat message
+    # doesn't pay for it; chat still works (and builds lazily) if this fails.
+    from api.services.dragon_keeper.keeper_agent import warm_agent_cache
+    try:
+        await warm_agent_cache()
+    except Exception:
+        logging.getLogger("codiak.api").exception("Keeper agent warm-up failed")
+
+
+@app.on_event("startup")
+def start_vault_watcher():
+    # Keep the vault index live so vault-backed endpoints never rescan;
+    # without a vault or watchdog the index just refreshes on demand.
+    from api.services.vault_watcher import start_vault_watcher as start
+    try:
+        start()
+    except Exception:
+        logging.getLogger("codiak.api").exception("Vault watcher failed to start")
+
+
+@app.on_event("shutdown")
+def stop_vault_watcher():
+    from api.services.vault_watcher import stop_vault_watcher as stop
+    stop()
+
+
+@app.on_event("startup")
+def start_ha_state_stream():
+    # Serve Home Assistant state from memory, kept current by its event stream;
+    # endpoints fall back to GET /states whenever the stream is down.
+    from api.services.home_assistant_state import start_state_stream
+    try:
+        start_state_stream()
+    except Exception:
+        logging.getLogger("codiak.api").exception("Home Assistant state stream failed to start")
+
+
+@app.on_event("shutdown")
+def stop_ha_state_stream():
+    from api.services.home_assistant_state import stop_state_stream
+    stop_state_stream()
+
+
 @app.get("/api/health")
 def health():
-    return {"status": "ok", "version": "0.1.0"}
+    from api.services.frontmatter_cache import cache_stats
+    from api.services.home_assistant_state import get_stream_status
+    from api.services.vault_watcher import get_watcher_status
+    return {
+        "status": "ok",
+        "version": "0.1.0",
+        "vault_index": get_watcher_status(),
+        "frontmatter_cache": cache_stats(),
+        "home_assistant_state": get_stream_status(),
+    }
@@ -0,0 +1,2 @@
+-- Lets caches fingerprint transaction changes with an indexed MAX(updated_at)
+CREATE INDEX IF NOT EXISTS idx_transactions_updated_at ON transactions(updated_at);
@@ -0,0 +1,8 @@
+-- Rolling summaries of older Keeper chat turns (bounded-context history)
+CREATE TABLE IF NOT EXISTS chat_summaries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    content TEXT NOT NULL,
+    covers_through_id INTEGER NOT NULL,
+    source_tokens INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL
+);
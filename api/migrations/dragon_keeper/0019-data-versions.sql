@@ -0,0 +1,53 @@
+-- Write counters for caches: every insert, update or delete bumps its table's
+-- version, including writes that don't touch updated_at
+CREATE TABLE IF NOT EXISTS data_versions (
+    table_name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO data_versions (table_name) VALUES ('transactions'), ('recurring_items'), ('recurring_item_aliases');
+
+CREATE TRIGGER IF NOT EXISTS trg_transactions_version_insert AFTER INSERT ON transactions
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE table_name = 'transactions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_transactions_version_update AFTER UPDATE ON transactions
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE table_name = 'transactions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_transactions_version_delete AFTER DELETE ON transactions
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE table_name = 'transactions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_recurring_items_version_insert AFTER INSERT ON recurring_items
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE table_name = 'recurring_items';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_recurring_items_version_update AFTER UPDATE ON recurring_items
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE table_name = 'recurring_items';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_recurring_items_version_delete AFTER DELETE ON recurring_items
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE table_name = 'recurring_items';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_recurring_item_aliases_version_insert AFTER INSERT ON recurring_item_aliases
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE table_name = 'recurring_item_aliases';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_recurring_item_aliases_version_update AFTER UPDATE ON recurring_item_aliases
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE table_name = 'recurring_item_aliases';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_recurring_item_aliases_version_delete AFTER DELETE ON recurring_item_aliases
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE table_name = 'recurring_item_aliases';
+END;
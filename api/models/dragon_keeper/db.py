@@ -3,7 +3,7 @@ import json
 import os
 import sqlite3
 import logging
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 
 logger = logging.getLogger("dragon_keeper.db")
 
@@ -185,6 +185,38 @@ def get_uncategorized_transactions(conn: sqlite3.Connection) -> list[dict]:
     return [dict(r) for r in rows]
 
 
+def get_unassigned_transactions(conn: sqlite3.Connection, budget_id: str) -> list[dict]:
+    """Non-transfer, non-deleted transactions of a budget with no category, newest first.
+
+    Rows are shaped like the YNAB SDK transactions the Streamlit tools use:
+    amounts in milliunits and dates as date objects.
+    """
+    rows = conn.execute("""
+        SELECT t.id, t.date, t.payee_name, t.memo, t.amount, t.account_id,
+               a.name AS account_name, t.cleared, t.approved, t.category_id, t.category_name
+        FROM transactions t
+        JOIN accounts a ON a.id = t.account_id
+        WHERE (t.category_id IS NULL OR t.category_id = '')
+        AND t.transfer_account_id IS NULL
+        AND t.deleted = 0
+        AND a.budget_id = ?
+        ORDER BY t.date DESC, t.id
+    """, (budget_id,)).fetchall()
+    return [{
+        "id": r["id"],
+        "date": date.fromisoformat(r["date"][:10]),
+        "payee_name": r["payee_name"] or "",
+        "memo": r["memo"] or "",
+        "amount": int(round(r["amount"] * 1000)),
+        "account_id": r["account_id"],
+        "account_name": r["account_name"] or "",
+        "cleared": r["cleared"],
+        "approved": bool(r["approved"]),
+        "category_id": r["category_id"],
+        "category_name": r["category_name"] or "",
+    } for r in rows]
+
+
 def get_categorization_rules(conn: sqlite3.Connection) -> list[dict]:
     rows = conn.execute("""
         SELECT id, payee_pattern, match_type, category_id, min_amount, max_amount,
@@ -677,8 +709,43 @@ def get_chat_history(conn: sqlite3.Connection, limit: int = 50) -> list[dict]:
     return [dict(r) for r in reversed(rows)]
 
 
+def get_chat_messages_after(conn: sqlite3.Connection, after_id: int) -> list[dict]:
+    """Chat messages newer than ``after_id``, oldest first."""
+    rows = conn.execute("""
+        SELECT id, role, content, tool_calls, created_at
+        FROM chat_messages
+        WHERE id > ?
+        ORDER BY id
+    """, (after_id,)).fetchall()
+    return [dict(r) for r in rows]
+
+
+def get_latest_chat_summary(conn: sqlite3.Connection) -> dict | None:
+    row = conn.execute("""
+        SELECT id, content, covers_through_id, source_tokens, created_at
+        FROM chat_summaries
+        ORDER BY id DESC
+        LIMIT 1
+    """).fetchone()
+    return dict(row) if row else None
+
+
+def chat_message_exists(conn: sqlite3.Connection, message_id: int) -> bool:
+    return conn.execute("SELECT 1 FROM chat_messages WHERE id = ?", (message_id,)).fetchone() is not None
+
+
+def save_chat_summary(conn: sqlite3.Connection, content: str, covers_through_id: int,
+                      source_tokens: int) -> int:
+    cursor = conn.execute("""
+        INSERT INTO chat_summaries (content, covers_through_id, source_tokens, created_at)
+        VALUES (?, ?, ?, ?)
+    """, (content, covers_through_id, source_tokens, _now_utc()))
+    return cursor.lastrowid
+
+
 def clear_chat_history(conn: sqlite3.Connection):
     conn.execute("DELETE FROM chat_messages")
+    conn.execute("DELETE FROM chat_summaries")
 
 
 def get_spending_summary(conn: sqlite3.Connection, payee_pattern: str | None = None,
@@ -1,8 +1,17 @@
 """Keeper Agent chat API endpoints."""
+import json
+
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from api.services.dragon_keeper.keeper_agent import chat, get_history, reset_chat
+from api.services.dragon_keeper.keeper_agent import (
+    chat,
+    chat_stream,
+    get_agent_metrics,
+    get_history,
+    reset_chat,
+)
 
 router = APIRouter(tags=["keeper-agent"])
 
@@ -17,11 +26,31 @@ async def keeper_chat(req: ChatRequest):
     return result
 
 
+@router.post("/chat/stream")
+async def keeper_chat_stream(req: ChatRequest):
+    """Same as POST /chat, but streams tool progress and answer tokens as SSE."""
+    async def event_source():
+        async for evt in chat_stream(req.message):
+            yield f"event: {evt['event']}\ndata: {json.dumps(evt['data'])}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/chat/history")
 def keeper_history():
     return {"messages": get_history()}
 
 
+@router.get("/chat/metrics")
+def keeper_metrics():
+    """Build counts and timings for the cached system prompt and tool schema."""
+    return get_agent_metrics()
+
+
 @router.delete("/chat/history")
 def keeper_clear():
     reset_chat()
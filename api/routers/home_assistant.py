@@ -1,4 +1,7 @@
+import json
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from api.services import home_assistant_service
@@ -26,13 +29,44 @@ def get_entities():
         raise HTTPException(status_code=502, detail=f"Home Assistant error: {e}")
 
 
+@router.get("/stream")
+def stream_entities(scope: str = "house", entity_filter: str = "", device_class: str = ""):
+    """Server-sent events: a "snapshot" of the scope's entities, then a
+    "change" event per state change. 503 while the HA state stream is down,
+    so clients fall back to polling."""
+    try:
+        if not home_assistant_service.stream_available():
+            raise HTTPException(status_code=503, detail="Home Assistant state stream is not live")
+        events = home_assistant_service.stream_entity_changes(scope, entity_filter, device_class)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def event_stream():
+        async for item in events:
+            if item is None:
+                yield ": keepalive\n\n"
+            else:
+                event, data = item
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 class ServiceCall(BaseModel):
-    entity_id: str
+    entity_id: str | list[str]
+    # For a list of entities: "single" call or "concurrent" per-entity calls
+    mode: str = "single"
 
 
 @router.post("/services/{domain}/{service}")
 def call_service(domain: str, service: str, body: ServiceCall):
     try:
+        if isinstance(body.entity_id, list):
+            return home_assistant_service.call_service_batch(domain, service, body.entity_id, mode=body.mode)
         return home_assistant_service.call_service(domain, service, body.entity_id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
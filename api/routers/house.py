@@ -1,9 +1,32 @@
-from fastapi import APIRouter
-from api.services.house_service import get_rooms
+from fastapi import APIRouter, HTTPException, Request, Response
+from api.services.house_service import get_rooms_with_etag, set_room_lights
 
 router = APIRouter()
 
 
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or any(t.removeprefix("W/") == etag.removeprefix("W/") for t in tags)
+
+
 @router.get("/rooms")
-def list_rooms():
-    return get_rooms()
+def list_rooms(request: Request, response: Response):
+    payload, etag = get_rooms_with_etag()
+    # no-cache: browsers keep the body but revalidate, getting a 304 while nothing changed
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return payload
+
+
+@router.post("/rooms/{room_id}/lights/{service}")
+def room_lights(room_id: str, service: str, mode: str = "single"):
+    try:
+        return set_room_lights(room_id, service, mode)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown room '{room_id}'")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Home Assistant error: {e}")
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException, Query
+
+from api.services import smartthings_client
+
+router = APIRouter()
+
+
+@router.get("/devices")
+async def list_devices(refresh: bool = False):
+    try:
+        client = smartthings_client.get_client()
+        return {"devices": await client.list_devices(refresh=refresh)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"SmartThings error: {e}")
+
+
+@router.get("/statuses")
+async def get_statuses(
+    capability: list[str] = Query(default=[]),
+    device_id: list[str] = Query(default=[]),
+    refresh: bool = False,
+):
+    """Statuses of all (or the given) devices, optionally only some capabilities."""
+    try:
+        client = smartthings_client.get_client()
+        devices = await client.list_devices()
+        if device_id:
+            wanted = set(device_id)
+            devices = [d for d in devices if d.get("deviceId") in wanted]
+        return await client.fetch_statuses(devices, capabilities=capability or None, refresh=refresh)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"SmartThings error: {e}")
@@ -0,0 +1,208 @@
+"""
+Local cache of AWS Cost Explorer daily costs.
+
+Costs are stored per (date, service, region) in AWS_COST_DB_PATH. A day
+older than SETTLE_DAYS is closed: once fetched it is served from SQLite for
+good. Recent (open) days are still being revised by AWS, so they are fetched
+again once they are older than OPEN_DAY_TTL_SECONDS or when the caller asks
+to refresh. Missing days are requested as contiguous ranges, so a month view
+on a warm cache costs at most one Cost Explorer call (which AWS bills per
+request) instead of one per render.
+
+Takes a boto3 Cost Explorer client (or anything with get_cost_and_usage), so
+boto3 itself is not imported here.
+"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, Union
+
+AWS_COST_DB_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "aws_costs.db",
+)
+SETTLE_DAYS = 3
+OPEN_DAY_TTL_SECONDS = 6 * 3600
+METRIC = "UnblendedCost"
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE daily_costs (
+    date TEXT NOT NULL,
+    service TEXT NOT NULL,
+    region TEXT NOT NULL,
+    amount REAL NOT NULL,
+    unit TEXT NOT NULL,
+    PRIMARY KEY (date, service, region)
+);
+CREATE TABLE fetched_days (
+    date TEXT PRIMARY KEY,
+    closed INTEGER NOT NULL,
+    fetched_at REAL NOT NULL
+);
+"""
+_TABLES = ("daily_costs", "fetched_days")
+
+_db_lock = threading.Lock()
+_db_ready: set[str] = set()
+
+
+def connect(db_path: Optional[str] = None) -> sqlite3.Connection:
+    db_path = db_path or AWS_COST_DB_PATH
+    with _db_lock:
+        if db_path not in _db_ready:
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            conn = sqlite3.connect(db_path)
+            try:
+                if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                    for table in _TABLES:
+                        conn.execute(f"DROP TABLE IF EXISTS {table}")
+                    conn.executescript(_SCHEMA)
+                    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                    conn.commit()
+            finally:
+                conn.close()
+            _db_ready.add(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def _as_date(value: Union[date, datetime, str]) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value[:10])
+
+
+def _utc_today() -> date:
+    # Cost Explorer days are UTC days
+    return datetime.now(timezone.utc).date()
+
+
+def _ranges(days: list[date]) -> list[tuple[date, date]]:
+    """Contiguous [start, end) ranges covering sorted ``days``."""
+    ranges = []
+    for day in days:
+        if ranges and ranges[-1][1] == day:
+            ranges[-1] = (ranges[-1][0], day + timedelta(days=1))
+        else:
+            ranges.append((day, day + timedelta(days=1)))
+    return ranges
+
+
+def _fetch_range(ce_client, start: date, end: date) -> tuple[dict[str, list[tuple]], int]:
+    """Daily costs by service and region for [start, end): ({day: [(service, region, amount, unit)]}, requests)."""
+    by_day: dict[str, list[tuple]] = {}
+    token = None
+    requests = 0
+    while True:
+        kwargs = dict(
+            TimePeriod={"Start": start.isoformat(), "End": end.isoformat()},
+            Granularity="DAILY",
+            Metrics=[METRIC],
+            GroupBy=[
+                {"Type": "DIMENSION", "Key": "SERVICE"},
+                {"Type": "DIMENSION", "Key": "REGION"},
+            ],
+        )
+        if token:
+            kwargs["NextPageToken"] = token
+        response = ce_client.get_cost_and_usage(**kwargs)
+        requests += 1
+        for result in response.get("ResultsByTime", []):
+            rows = by_day.setdefault(result["TimePeriod"]["Start"], [])
+            for group in result.get("Groups", []):
+                keys = group["Keys"]
+                metric = group["Metrics"][METRIC]
+                rows.append((
+                    keys[0] if len(keys) > 0 else "Unknown",
+                    keys[1] if len(keys) > 1 else "Unknown",
+                    float(metric["Amount"]),
+                    metric["Unit"],
+                ))
+        token = response.get("NextPageToken")
+        if not token:
+            return by_day, requests
+
+
+def get_daily_costs(ce_client, start_date: Union[date, datetime, str], end_date: Union[date, datetime, str],
+                    refresh: bool = False, db_path: Optional[str] = None) -> tuple[list[dict], dict]:
+    """Daily costs for [start_date, end_date), fetching only days the cache can't answer.
+
+    Returns (rows, stats). Rows match the tool's table: {Service, Region,
+    Cost, Unit, Start Date, End Date}, one per day, service and region with
+    a cost. ``refresh`` refetches open days regardless of age; closed days
+    are never refetched. Stats: {cached_days, fetched_days, requests}.
+    """
+    start, end = _as_date(start_date), _as_date(end_date)
+    days = [start + timedelta(days=i) for i in range((end - start).days)]
+    settled_before = _utc_today() - timedelta(days=SETTLE_DAYS)
+    now = time.time()
+
+    conn = connect(db_path)
+    try:
+        known = {r["date"]: r for r in conn.execute(
+            "SELECT date, closed, fetched_at FROM fetched_days WHERE date >= ? AND date < ?",
+            (start.isoformat(), end.isoformat()),
+        )}
+
+        def cached(day: date) -> bool:
+            entry = known.get(day.isoformat())
+            if entry is None:
+                return False
+            if entry["closed"]:
+                return True
+            return not refresh and now - entry["fetched_at"] < OPEN_DAY_TTL_SECONDS
+
+        missing = [d for d in days if not cached(d)]
+        requests = 0
+        for range_start, range_end in _ranges(missing):
+            by_day, calls = _fetch_range(ce_client, range_start, range_end)
+            requests += calls
+            fetched_at = time.time()
+            with conn:
+                for i in range((range_end - range_start).days):
+                    day = range_start + timedelta(days=i)
+                    iso = day.isoformat()
+                    conn.execute("DELETE FROM daily_costs WHERE date = ?", (iso,))
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO daily_costs (date, service, region, amount, unit) VALUES (?, ?, ?, ?, ?)",
+                        [(iso, *row) for row in by_day.get(iso, [])],
+                    )
+                    conn.execute(
+                        "INSERT OR REPLACE INTO fetched_days (date, closed, fetched_at) VALUES (?, ?, ?)",
+                        (iso, int(day < settled_before), fetched_at),
+                    )
+
+        rows = [{
+            "Service": r["service"],
+            "Region": r["region"],
+            "Cost": r["amount"],
+            "Unit": r["unit"],
+            "Start Date": r["date"],
+            "End Date": (date.fromisoformat(r["date"]) + timedelta(days=1)).isoformat(),
+        } for r in conn.execute(
+            "SELECT date, service, region, amount, unit FROM daily_costs "
+            "WHERE date >= ? AND date < ? ORDER BY date, service, region",
+            (start.isoformat(), end.isoformat()),
+        )]
+    finally:
+        conn.close()
+
+    return rows, {"cached_days": len(days) - len(missing), "fetched_days": len(missing), "requests": requests}
+
+
+def clear_cache(db_path: Optional[str] = None):
+    """Forget every cached day."""
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute("DELETE FROM daily_costs")
+            conn.execute("DELETE FROM fetched_days")
+    finally:
+        conn.close()
@@ -1,7 +1,7 @@
 """Chart data services — balance trends, category timelines, spending flows."""
 import logging
-from collections import defaultdict
 from api.models.dragon_keeper.db import get_db
+from api.services.spending_flow import build_flow_graph, flow_sql, month_bounds
 
 logger = logging.getLogger("dragon_keeper.charts")
 
@@ -58,6 +58,9 @@ def get_spending_flow(month: str | None = None, min_amount: float = 10.0,
                       max_payees: int = 30, account_id: str | None = None) -> dict:
     """Build Group → Category → Payee spending flow data for Sankey diagram.
 
+    Spending is summed per (group, category, payee) in SQLite and the top-N
+    cut happens on those sums (see api.services.spending_flow).
+
     Args:
         month: YYYY-MM format, or None for current month
         min_amount: minimum flow amount to include
@@ -70,98 +73,25 @@ def get_spending_flow(month: str | None = None, min_amount: float = 10.0,
             row = conn.execute("SELECT strftime('%Y-%m', 'now') as m").fetchone()
             month = row["m"]
 
-        date_start = f"{month}-01"
-        # End of month
-        parts = month.split("-")
-        y, m = int(parts[0]), int(parts[1])
-        if m == 12:
-            date_end = f"{y + 1}-01-01"
-        else:
-            date_end = f"{y}-{m + 1:02d}-01"
+        date_start, date_end = month_bounds(month)
 
-        rows = conn.execute("""
-            SELECT t.payee_name, t.amount, t.category_id,
-                   COALESCE(c.name, t.category_name) as category_name,
-                   c.category_group_id, cg.name as group_name
-            FROM transactions t
+        rows = conn.execute(flow_sql(
+            source="""transactions t
             LEFT JOIN categories c ON t.category_id = c.id
-            LEFT JOIN category_groups cg ON c.category_group_id = cg.id
-            WHERE t.date >= ? AND t.date < ?
+            LEFT JOIN category_groups cg ON c.category_group_id = cg.id""",
+            group="COALESCE(NULLIF(cg.name, ''), 'Ungrouped')",
+            category="COALESCE(NULLIF(COALESCE(c.name, t.category_name), ''), 'Uncategorized')",
+            payee="t.payee_name",
+            amount="ABS(t.amount)",
+            where="""t.date >= ? AND t.date < ?
             AND t.amount < 0 AND t.deleted = 0
             AND t.transfer_account_id IS NULL
             AND t.payee_name IS NOT NULL AND t.payee_name != ''
-            AND (? IS NULL OR t.account_id = ?)
-        """, (date_start, date_end, account_id, account_id)).fetchall()
-
-        group_totals: dict[str, float] = defaultdict(float)
-        category_totals: dict[str, float] = defaultdict(float)
-        payee_totals: dict[str, float] = defaultdict(float)
-
-        # group_name -> category_name -> amount
-        group_cat_flows: dict[str, dict[str, float]] = defaultdict(lambda: defaultdict(float))
-        # category_name -> payee_name -> amount
-        cat_payee_flows: dict[str, dict[str, float]] = defaultdict(lambda: defaultdict(float))
-
-        # Track which group each category belongs to
-        cat_to_group: dict[str, str] = {}
-
-        for r in rows:
-            amt = abs(r["amount"])
-            payee = r["payee_name"]
-            cat_name = r["category_name"] or "Uncategorized"
-            grp_name = r["group_name"] or "Ungrouped"
-
-            group_totals[grp_name] += amt
-            category_totals[cat_name] += amt
-            payee_totals[payee] += amt
-            group_cat_flows[grp_name][cat_name] += amt
-            cat_payee_flows[cat_name][payee] += amt
-            cat_to_group[cat_name] = grp_name
-
-        # Top N by total
-        top_groups = sorted(group_totals.keys(), key=lambda x: group_totals[x], reverse=True)[:max_groups]
-        top_categories = sorted(category_totals.keys(), key=lambda x: category_totals[x], reverse=True)[:max_categories]
-        top_payees = sorted(payee_totals.keys(), key=lambda x: payee_totals[x], reverse=True)[:max_payees]
-
-        top_categories_set = set(top_categories)
-        top_payees_set = set(top_payees)
-
-        # Build nodes
-        nodes = []
-        node_index: dict[str, int] = {}
-
-        for g in top_groups:
-            node_index[f"group:{g}"] = len(nodes)
-            nodes.append({"id": f"group:{g}", "name": g, "column": 0, "total": round(group_totals[g], 2)})
-        for c in top_categories:
-            node_index[f"cat:{c}"] = len(nodes)
-            nodes.append({"id": f"cat:{c}", "name": c, "column": 1, "total": round(category_totals[c], 2)})
-        for p in top_payees:
-            node_index[f"payee:{p}"] = len(nodes)
-            nodes.append({"id": f"payee:{p}", "name": p, "column": 2, "total": round(payee_totals[p], 2)})
-
-        # Build links
-        links = []
-
-        for grp in top_groups:
-            for cat, amt in group_cat_flows[grp].items():
-                if cat in top_categories_set and amt >= min_amount:
-                    links.append({
-                        "source": node_index[f"group:{grp}"],
-                        "target": node_index[f"cat:{cat}"],
-                        "value": round(amt, 2),
-                    })
-
-        for cat in top_categories:
-            for payee, amt in cat_payee_flows[cat].items():
-                if payee in top_payees_set and amt >= min_amount:
-                    links.append({
-                        "source": node_index[f"cat:{cat}"],
-                        "target": node_index[f"payee:{payee}"],
-                        "value": round(amt, 2),
-                    })
-
-        total_spending = sum(abs(r["amount"]) for r in rows)
+            AND (? IS NULL OR t.account_id = ?)""",
+        ), (date_start, date_end, account_id, account_id)).fetchall()
+
+        graph = build_flow_graph(rows, min_amount=min_amount, max_groups=max_groups,
+                                 max_categories=max_categories, max_payees=max_payees)
 
         # Available months
         month_rows = conn.execute("""
@@ -175,10 +105,10 @@ def get_spending_flow(month: str | None = None, min_amount: float = 10.0,
 
         return {
             "month": month,
-            "total_spending": round(total_spending, 2),
-            "transaction_count": len(rows),
-            "nodes": nodes,
-            "links": links,
+            "total_spending": graph["total_spending"],
+            "transaction_count": graph["transaction_count"],
+            "nodes": graph["nodes"],
+            "links": graph["links"],
             "available_months": available_months,
         }
     finally:
@@ -0,0 +1,189 @@
+"""Bounded-context chat history for the Keeper agent.
+
+Instead of replaying a fixed window of messages, each request sends a rolling
+summary of older turns (stored in chat_summaries) plus as many recent turns
+as fit in HISTORY_TOKEN_BUDGET. Once the unsummarized tail outgrows the
+budget, the oldest part of it is folded into a new summary.
+"""
+import asyncio
+import logging
+
+from api.models.dragon_keeper.db import (
+    get_db,
+    chat_message_exists,
+    get_chat_messages_after,
+    get_latest_chat_summary,
+    save_chat_summary,
+)
+
+logger = logging.getLogger("dragon_keeper.chat_history")
+
+# Tokens of summary + replayed turns sent with each request
+HISTORY_TOKEN_BUDGET = 3000
+# Tokens of recent turns kept verbatim after a compaction
+RECENT_TOKEN_TARGET = 1200
+# Per-message framing overhead in the chat completions format
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_MODEL = "gpt-4o-mini"
+
+_SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and the Keeper, "
+    "a financial assistant. Merge the existing summary with the new messages into one "
+    "updated summary. Keep concrete facts the user may refer back to: dollar amounts, "
+    "dates, payees, categories, accounts, decisions made and open questions. Drop "
+    "greetings and filler. Write plain prose under 250 words."
+)
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    """tiktoken encoding if it is installed and its BPE file is available locally."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoding = None
+    return _encoding
+
+
+def estimate_tokens(text: str | None) -> int:
+    """Local token estimate: tiktoken when available, ~4 chars per token otherwise."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def _message_tokens(msg: dict) -> int:
+    return estimate_tokens(msg["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _load_state() -> tuple[dict | None, list[dict]]:
+    """Latest summary and the conversational messages it does not cover yet."""
+    conn = get_db()
+    try:
+        summary = get_latest_chat_summary(conn)
+        after_id = summary["covers_through_id"] if summary else 0
+        tail = get_chat_messages_after(conn, after_id)
+    finally:
+        conn.close()
+    return summary, [m for m in tail if m["role"] in ("user", "assistant")]
+
+
+def load_history_context() -> dict:
+    """Summary plus the most recent turns that fit the token budget.
+
+    Returns summary (str | None), messages (oldest first) and token stats:
+    sent_tokens is what this request carries, full_tokens what replaying the
+    whole conversation verbatim would have cost.
+    """
+    summary, tail = _load_state()
+    summary_text = summary["content"] if summary else None
+    summary_tokens = estimate_tokens(summary_text)
+
+    budget = HISTORY_TOKEN_BUDGET - summary_tokens
+    kept: list[dict] = []
+    used = 0
+    for msg in reversed(tail):
+        tokens = _message_tokens(msg)
+        if kept and used + tokens > budget:
+            break
+        kept.append(msg)
+        used += tokens
+    kept.reverse()
+
+    tail_tokens = sum(_message_tokens(m) for m in tail)
+    return {
+        "summary": summary_text,
+        "messages": kept,
+        "dropped_messages": len(tail) - len(kept),
+        "sent_tokens": summary_tokens + used,
+        "full_tokens": (summary["source_tokens"] if summary else 0) + tail_tokens,
+    }
+
+
+def log_token_savings(context: dict) -> None:
+    saved = context["full_tokens"] - context["sent_tokens"]
+    logger.info(
+        "Chat history: sent ~%d tokens (%s + %d recent messages), saved ~%d vs full replay",
+        context["sent_tokens"],
+        "summary" if context["summary"] else "no summary",
+        len(context["messages"]),
+        max(saved, 0),
+    )
+    if context["dropped_messages"]:
+        logger.warning("Chat history: %d unsummarized messages did not fit the budget",
+                       context["dropped_messages"])
+
+
+_compact_lock = asyncio.Lock()
+# Bumped on every chat reset; a compaction started before one drops its summary
+_generation = 0
+
+
+def invalidate_compaction() -> None:
+    """Make any compaction in flight discard its result. Call when history is cleared."""
+    global _generation
+    _generation += 1
+
+
+async def compact_history(client) -> bool:
+    """Fold the oldest unsummarized turns into the rolling summary if over budget.
+
+    ``client`` is an AsyncOpenAI client. Returns True when a new summary was saved.
+    """
+    async with _compact_lock:
+        generation = _generation
+        summary, tail = _load_state()
+        if sum(_message_tokens(m) for m in tail) <= HISTORY_TOKEN_BUDGET:
+            return False
+
+        # Keep the newest turns verbatim, fold everything older
+        keep_from = len(tail)
+        kept_tokens = 0
+        while keep_from > 0:
+            tokens = _message_tokens(tail[keep_from - 1])
+            if kept_tokens + tokens > RECENT_TOKEN_TARGET:
+                break
+            kept_tokens += tokens
+            keep_from -= 1
+        fold = tail[:keep_from]
+        if not fold:
+            return False
+
+        transcript = "\n".join(f"{m['role']}: {m['content'] or ''}" for m in fold)
+        previous = summary["content"] if summary else "(none)"
+        response = await client.chat.completions.create(
+            model=SUMMARY_MODEL,
+            temperature=0,
+            messages=[
+                {"role": "system", "content": _SUMMARY_PROMPT},
+                {"role": "user", "content": f"Existing summary:\n{previous}\n\nNew messages:\n{transcript}"},
+            ],
+        )
+        new_summary = (response.choices[0].message.content or "").strip()
+        if not new_summary:
+            return False
+
+        source_tokens = (summary["source_tokens"] if summary else 0) + sum(_message_tokens(m) for m in fold)
+        conn = get_db()
+        try:
+            # The chat may have been reset while the model call was in flight
+            conn.execute("BEGIN IMMEDIATE")
+            if generation != _generation or not chat_message_exists(conn, fold[-1]["id"]):
+                conn.rollback()
+                logger.info("Chat history was reset during compaction, discarding the summary")
+                return False
+            save_chat_summary(conn, new_summary, fold[-1]["id"], source_tokens)
+            conn.commit()
+        finally:
+            conn.close()
+        logger.info("Folded %d chat messages into the rolling summary", len(fold))
+        return True
@@ -4,9 +4,14 @@ Tools are discovered dynamically from the MCP server (ynab_mcp.ynab_server) so t
 adding a new @mcp.tool() there automatically makes it available here — no manual
 TOOLS list or _run_tool dispatch needed.
 """
+import asyncio
+import inspect
 import json
 import logging
 import os
+import time
+from collections.abc import AsyncIterator, Callable
+from datetime import datetime, timezone
 
 from dotenv import load_dotenv
 from openai import AsyncOpenAI
@@ -17,6 +22,12 @@ from api.models.dragon_keeper.db import (
     save_chat_message,
     clear_chat_history,
 )
+from api.services.dragon_keeper.chat_history import (
+    compact_history,
+    invalidate_compaction,
+    load_history_context,
+    log_token_savings,
+)
 
 load_dotenv()
 
@@ -42,6 +53,72 @@ _SYSTEM_PROMPT_BASE = (
 )
 
 
+# ---------------------------------------------------------------------------
+# Versioned caches for per-message context (system prompt, tool schema)
+# ---------------------------------------------------------------------------
+
+class _VersionedBuild:
+    """Holds one derived artifact and the version of the inputs it was built from.
+
+    ``get`` returns the cached value while the version matches and rebuilds
+    (recording how long it took) when it does not.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._version: tuple | None = None
+        self._value = None
+        self._builds = 0
+        self._hits = 0
+        self._last_build_ms: float | None = None
+        self._built_at: str | None = None
+
+    def get(self, version: tuple, build: Callable):
+        if self._value is not None and version == self._version:
+            self._hits += 1
+            return self._value
+        start = time.perf_counter()
+        value = build()
+        self._last_build_ms = round((time.perf_counter() - start) * 1000, 2)
+        self._value, self._version = value, version
+        self._builds += 1
+        self._built_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        logger.info("Rebuilt Keeper %s in %.2fms", self.name, self._last_build_ms)
+        return value
+
+    def metrics(self) -> dict:
+        return {
+            "builds": self._builds,
+            "hits": self._hits,
+            "last_build_ms": self._last_build_ms,
+            "built_at": self._built_at,
+        }
+
+
+_system_prompt_cache = _VersionedBuild("system prompt")
+_tool_schema_cache = _VersionedBuild("tool schema")
+
+
+def _categories_version() -> tuple:
+    """Cheap signature of the category list baked into the system prompt."""
+    conn = get_db()
+    try:
+        row = conn.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM categories) as cat_count,
+                (SELECT MAX(updated_at) FROM categories) as cat_updated,
+                (SELECT COUNT(*) FROM category_groups) as group_count,
+                (SELECT MAX(updated_at) FROM category_groups) as group_updated
+        """).fetchone()
+        return tuple(row)
+    finally:
+        conn.close()
+
+
+def _get_system_prompt() -> str:
+    return _system_prompt_cache.get(_categories_version(), _build_system_prompt)
+
+
 def _build_system_prompt() -> str:
     """Build system prompt with the actual category names from the DB."""
     conn = get_db()
@@ -74,21 +151,14 @@ def _build_system_prompt() -> str:
 # MCP-backed tool discovery and execution
 # ---------------------------------------------------------------------------
 
-_mcp_tools_cache: dict | None = None
-
-
 async def _get_mcp_tools() -> dict:
-    """Return the FastMCP FunctionTool dict, loading once and caching."""
-    global _mcp_tools_cache
-    if _mcp_tools_cache is None:
-        from ynab_mcp.ynab_server import mcp
-        _mcp_tools_cache = await mcp.get_tools()
-    return _mcp_tools_cache
+    """Return the FastMCP FunctionTool dict from the in-process MCP server."""
+    from ynab_mcp.ynab_server import mcp
+    return await mcp.get_tools()
 
 
-async def _get_openai_tools() -> list[dict]:
+def _build_openai_tools(tools: dict) -> list[dict]:
     """Convert MCP tool schemas to OpenAI function-calling format."""
-    tools = await _get_mcp_tools()
     return [
         {
             "type": "function",
@@ -102,75 +172,270 @@ async def _get_openai_tools() -> list[dict]:
     ]
 
 
+async def _get_openai_tools() -> list[dict]:
+    """OpenAI tool schema, rebuilt only when a tool is registered or replaced."""
+    tools = await _get_mcp_tools()
+    version = tuple((name, id(tool)) for name, tool in tools.items())
+    return _tool_schema_cache.get(version, lambda: _build_openai_tools(tools))
+
+
+async def warm_agent_cache() -> None:
+    """Build the system prompt and tool schema ahead of the first message."""
+    await _get_openai_tools()
+    _get_system_prompt()
+
+
+def get_agent_metrics() -> dict:
+    """Build counts and timings for the cached per-message context."""
+    return {
+        "system_prompt": _system_prompt_cache.metrics(),
+        "tool_schema": _tool_schema_cache.metrics(),
+    }
+
+
+class _ToolResultCache:
+    """Memoizes read-only tool results for the current conversation.
+
+    Cleared whenever a mutating tool runs, when the chat is reset, and when
+    the underlying data changes outside the chat (a sync or a categorization
+    from the UI), which is checked once at the start of each turn.
+    """
+
+    def __init__(self):
+        self._results: dict[tuple[str, str], str] = {}
+        self._data_version: tuple | None = None
+
+    def begin_turn(self, data_version: tuple) -> None:
+        if data_version != self._data_version:
+            self._results.clear()
+            self._data_version = data_version
+
+    def get(self, name: str, args: dict) -> str | None:
+        return self._results.get(self._key(name, args))
+
+    def put(self, name: str, args: dict, result: str) -> None:
+        self._results[self._key(name, args)] = result
+
+    def clear(self) -> None:
+        self._results.clear()
+
+    @staticmethod
+    def _key(name: str, args: dict) -> tuple[str, str]:
+        return name, json.dumps(args, sort_keys=True, default=str)
+
+
+_tool_cache = _ToolResultCache()
+
+
+def _data_version() -> tuple:
+    """Signature of the data read-only tools depend on."""
+    conn = get_db()
+    try:
+        row = conn.execute("""
+            SELECT
+                (SELECT MAX(last_sync_at) FROM sync_state) as last_sync,
+                (SELECT MAX(updated_at) FROM transactions) as txn_updated
+        """).fetchone()
+        return tuple(row)
+    finally:
+        conn.close()
+
+
+def _is_read_only(tool) -> bool:
+    annotations = getattr(tool, "annotations", None)
+    return bool(annotations and annotations.readOnlyHint)
+
+
+async def _run_tool(tool, args: dict):
+    """Run an MCP tool; sync tools (blocking SQLite calls) go to a worker thread."""
+    if inspect.iscoroutinefunction(getattr(tool, "fn", None)):
+        return await tool.run(args)
+    return await asyncio.to_thread(asyncio.run, tool.run(args))
+
+
 async def _execute_tool(name: str, args: dict) -> str:
     """Call a tool via FastMCP in-process and return the result as a JSON string."""
     tools = await _get_mcp_tools()
     tool = tools.get(name)
     if not tool:
         return json.dumps({"error": f"Unknown tool: {name}"})
+
+    read_only = _is_read_only(tool)
+    if read_only:
+        cached = _tool_cache.get(name, args)
+        if cached is not None:
+            return cached
+    else:
+        _tool_cache.clear()
+
     try:
-        result = await tool.run(args)
-        if result.content:
-            return result.content[0].text
-        return json.dumps({"error": "No content returned"})
+        result = await _run_tool(tool, args)
+        if not result.content:
+            return json.dumps({"error": "No content returned"})
+        text = result.content[0].text
     except Exception as e:
         logger.exception("Tool execution error for %s", name)
         return json.dumps({"error": str(e)})
+    finally:
+        if not read_only:
+            _tool_cache.clear()
+
+    if read_only:
+        _tool_cache.put(name, args, text)
+    return text
+
+
+async def _dispatch_tool_calls(calls: list[dict]) -> AsyncIterator[tuple[str, dict, str | None]]:
+    """Execute one round of tool calls, yielding progress as it happens.
+
+    Yields ``("start", call, None)`` when a call is dispatched and
+    ``("end", call, result)`` when it finishes. Consecutive read-only calls
+    run concurrently; a mutating call waits for everything before it and
+    blocks everything after it, so reads never race the writes the model
+    asked for first.
+    """
+    tools = await _get_mcp_tools()
+
+    batch: list[dict] = []
+    for call in calls:
+        tool = tools.get(call["function"]["name"])
+        if tool is None or _is_read_only(tool):
+            batch.append(call)
+            continue
+        if batch:
+            async for evt in _gather_calls(batch):
+                yield evt
+            batch = []
+        async for evt in _gather_calls([call]):
+            yield evt
+    if batch:
+        async for evt in _gather_calls(batch):
+            yield evt
+
+
+async def _gather_calls(calls: list[dict]) -> AsyncIterator[tuple[str, dict, str | None]]:
+    # Identical calls in one batch share a single execution
+    tasks: dict[tuple[str, str], asyncio.Task] = {}
+    waiting: dict[asyncio.Task, list[dict]] = {}
+    for call in calls:
+        name = call["function"]["name"]
+        args = _parse_tool_args(call["function"]["arguments"])
+        key = _ToolResultCache._key(name, args)
+        if key not in tasks:
+            tasks[key] = asyncio.ensure_future(_execute_tool(name, args))
+        waiting.setdefault(tasks[key], []).append(call)
+        yield "start", call, None
+
+    pending = set(waiting)
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            for call in waiting[task]:
+                yield "end", call, task.result()
 
 
 # ---------------------------------------------------------------------------
 # Chat history helpers
 # ---------------------------------------------------------------------------
 
-HISTORY_WINDOW = 20
+def _build_openai_messages(history: dict, user_message: str) -> list[dict]:
+    """Convert the bounded history context + new user message into OpenAI messages format.
 
-
-def _build_openai_messages(history: list[dict], user_message: str) -> list[dict]:
-    """Convert DB chat history + new user message into OpenAI messages format.
-
-    Only user and assistant text messages are replayed — tool call details are
+    The rolling summary of older turns (if any) follows the system prompt;
+    only user and assistant text messages are replayed — tool call details are
     not included since the final assistant text captures the result.
     """
-    messages = [{"role": "system", "content": _build_system_prompt()}]
-    recent = [m for m in history if m["role"] in ("user", "assistant")][-HISTORY_WINDOW:]
-    for msg in recent:
+    messages = [{"role": "system", "content": _get_system_prompt()}]
+    if history["summary"]:
+        messages.append({
+            "role": "system",
+            "content": "Summary of the earlier conversation:\n" + history["summary"],
+        })
+    for msg in history["messages"]:
         messages.append({"role": msg["role"], "content": msg["content"] or ""})
     messages.append({"role": "user", "content": user_message})
     return messages
 
 
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _schedule_compaction(client: AsyncOpenAI) -> None:
+    """Fold old turns into the rolling summary after the reply has been sent."""
+    async def run():
+        try:
+            await compact_history(client)
+        except Exception:
+            logger.exception("Chat history compaction failed")
+
+    task = asyncio.create_task(run())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
 # ---------------------------------------------------------------------------
-# Main chat entry point
+# Turn helpers shared by the blocking and streaming entry points
 # ---------------------------------------------------------------------------
 
-async def chat(user_message: str) -> dict:
-    """Send a user message and get the Keeper's response, executing tool calls as needed."""
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return {
-            "role": "assistant",
-            "content": "I can't respond right now — the OpenAI API key is not configured. "
-                       "Please set the OPENAI_API_KEY environment variable and restart.",
-            "tool_calls_made": [],
-        }
+MODEL = "gpt-4o"
 
-    client = AsyncOpenAI(api_key=api_key)
+_NO_API_KEY_MESSAGE = (
+    "I can't respond right now — the OpenAI API key is not configured. "
+    "Please set the OPENAI_API_KEY environment variable and restart."
+)
 
+_FALLBACK_MESSAGE = "I needed more steps to answer that. Could you try a simpler question?"
+
+
+def _start_turn(user_message: str) -> list[dict]:
+    """Persist the user message and return the OpenAI messages for this turn."""
+    history = load_history_context()
+    log_token_savings(history)
     conn = get_db()
     try:
-        history = get_chat_history(conn)
         save_chat_message(conn, "user", user_message)
         conn.commit()
     finally:
         conn.close()
+    _tool_cache.begin_turn(_data_version())
+    return _build_openai_messages(history, user_message)
+
+
+def _finish_turn(client: AsyncOpenAI, content: str, tool_calls_made: list[str]) -> None:
+    """Persist the assistant reply and compact history in the background."""
+    conn = get_db()
+    try:
+        tc_json = json.dumps(tool_calls_made) if tool_calls_made else None
+        save_chat_message(conn, "assistant", content, tool_calls=tc_json)
+        conn.commit()
+    finally:
+        conn.close()
+    _schedule_compaction(client)
+
+
+def _parse_tool_args(arguments: str | None) -> dict:
+    return json.loads(arguments) if arguments else {}
+
+
+# ---------------------------------------------------------------------------
+# Main chat entry point
+# ---------------------------------------------------------------------------
 
-    messages = _build_openai_messages(history, user_message)
+async def chat(user_message: str) -> dict:
+    """Send a user message and get the Keeper's response, executing tool calls as needed."""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return {"role": "assistant", "content": _NO_API_KEY_MESSAGE, "tool_calls_made": []}
+
+    client = AsyncOpenAI(api_key=api_key)
+
+    messages = _start_turn(user_message)
     openai_tools = await _get_openai_tools()
     tool_calls_made: list[str] = []
 
     for _ in range(MAX_TOOL_ITERATIONS):
         response = await client.chat.completions.create(
-            model="gpt-4o",
+            model=MODEL,
             messages=messages,
             tools=openai_tools,
             tool_choice="auto",
@@ -191,34 +456,117 @@ async def chat(user_message: str) -> dict:
                 ]
             messages.append(assistant_msg)
 
-            for tc in choice.message.tool_calls:
-                fn_name = tc.function.name
-                fn_args = json.loads(tc.function.arguments) if tc.function.arguments else {}
-                tool_calls_made.append(fn_name)
-                result = await _execute_tool(fn_name, fn_args)
-                messages.append({"role": "tool", "tool_call_id": tc.id, "content": result})
+            calls = assistant_msg.get("tool_calls", [])
+            results: dict[str, str] = {}
+            async for kind, call, result in _dispatch_tool_calls(calls):
+                if kind == "end":
+                    results[call["id"]] = result
+            for call in calls:
+                tool_calls_made.append(call["function"]["name"])
+                messages.append({"role": "tool", "tool_call_id": call["id"], "content": results[call["id"]]})
 
             continue
 
         content = choice.message.content or ""
-        conn = get_db()
-        try:
-            tc_json = json.dumps(tool_calls_made) if tool_calls_made else None
-            save_chat_message(conn, "assistant", content, tool_calls=tc_json)
-            conn.commit()
-        finally:
-            conn.close()
-
+        _finish_turn(client, content, tool_calls_made)
         return {"role": "assistant", "content": content, "tool_calls_made": tool_calls_made}
 
-    fallback = "I needed more steps to answer that. Could you try a simpler question?"
-    conn = get_db()
+    _finish_turn(client, _FALLBACK_MESSAGE, [])
+    return {"role": "assistant", "content": _FALLBACK_MESSAGE, "tool_calls_made": tool_calls_made}
+
+
+# ---------------------------------------------------------------------------
+# Streaming chat entry point
+# ---------------------------------------------------------------------------
+
+async def chat_stream(user_message: str) -> AsyncIterator[dict]:
+    """Streaming variant of chat().
+
+    Yields ``{"event": ..., "data": {...}}`` dicts as the turn progresses:
+
+    - ``tool_start`` / ``tool_end`` around each tool execution
+    - ``token`` for each content delta from the model
+    - ``done`` with the assembled reply once it has been saved to chat_messages
+    - ``error`` if the model call fails mid-turn
+
+    Content streamed during a tool-calling round is provisional; ``done``
+    carries the final text that was persisted.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        yield {"event": "token", "data": {"delta": _NO_API_KEY_MESSAGE}}
+        yield {"event": "done", "data": {"role": "assistant", "content": _NO_API_KEY_MESSAGE, "tool_calls_made": []}}
+        return
+
+    client = AsyncOpenAI(api_key=api_key)
+
+    messages = _start_turn(user_message)
+    openai_tools = await _get_openai_tools()
+    tool_calls_made: list[str] = []
+
     try:
-        save_chat_message(conn, "assistant", fallback)
-        conn.commit()
-    finally:
-        conn.close()
-    return {"role": "assistant", "content": fallback, "tool_calls_made": tool_calls_made}
+        for _ in range(MAX_TOOL_ITERATIONS):
+            stream = await client.chat.completions.create(
+                model=MODEL,
+                messages=messages,
+                tools=openai_tools,
+                tool_choice="auto",
+                stream=True,
+            )
+
+            content_parts: list[str] = []
+            # Tool call fragments arrive keyed by index and must be stitched together
+            pending_calls: dict[int, dict] = {}
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    content_parts.append(delta.content)
+                    yield {"event": "token", "data": {"delta": delta.content}}
+                for tc in delta.tool_calls or []:
+                    call = pending_calls.setdefault(tc.index, {
+                        "id": "",
+                        "type": "function",
+                        "function": {"name": "", "arguments": ""},
+                    })
+                    if tc.id:
+                        call["id"] = tc.id
+                    if tc.function and tc.function.name:
+                        call["function"]["name"] += tc.function.name
+                    if tc.function and tc.function.arguments:
+                        call["function"]["arguments"] += tc.function.arguments
+
+            content = "".join(content_parts)
+
+            if pending_calls:
+                calls = [pending_calls[i] for i in sorted(pending_calls)]
+                messages.append({"role": "assistant", "content": content, "tool_calls": calls})
+
+                results: dict[str, str] = {}
+                async for kind, call, result in _dispatch_tool_calls(calls):
+                    data = {"id": call["id"], "name": call["function"]["name"]}
+                    if kind == "start":
+                        yield {"event": "tool_start", "data": data}
+                    else:
+                        results[call["id"]] = result
+                        yield {"event": "tool_end", "data": data}
+                for call in calls:
+                    tool_calls_made.append(call["function"]["name"])
+                    messages.append({"role": "tool", "tool_call_id": call["id"], "content": results[call["id"]]})
+
+                continue
+
+            _finish_turn(client, content, tool_calls_made)
+            yield {"event": "done", "data": {"role": "assistant", "content": content, "tool_calls_made": tool_calls_made}}
+            return
+    except Exception as e:
+        logger.exception("Streaming chat failed")
+        yield {"event": "error", "data": {"detail": str(e)}}
+        return
+
+    _finish_turn(client, _FALLBACK_MESSAGE, [])
+    yield {"event": "done", "data": {"role": "assistant", "content": _FALLBACK_MESSAGE, "tool_calls_made": tool_calls_made}}
 
 
 # ---------------------------------------------------------------------------
@@ -236,9 +584,11 @@ def get_history() -> list[dict]:
 
 def reset_chat() -> None:
     """Clear all chat history."""
+    invalidate_compaction()
     conn = get_db()
     try:
         clear_chat_history(conn)
         conn.commit()
     finally:
         conn.close()
+    _tool_cache.clear()
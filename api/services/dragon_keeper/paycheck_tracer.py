@@ -1,7 +1,8 @@
 """Paycheck Tracer — shows where each paycheck goes by category."""
 import calendar
+import copy
 import logging
-from collections import defaultdict
+import threading
 from datetime import datetime, timedelta
 from api.models.dragon_keeper.db import get_db
 from api.services.dragon_keeper.recurring_linking import get_payee_names_for_item
@@ -11,9 +12,18 @@ logger = logging.getLogger("dragon_keeper.paycheck_tracer")
 # Payee name fragments that indicate internal transfers, not wages
 _TRANSFER_NAME_MARKERS = ("deposit from", "transfer from", "transfer to", "share 00")
 
+# Cached traces keyed by call arguments; each entry holds the data fingerprint
+# it was computed against so any sync, recategorization or income edit misses.
+_trace_cache: dict[tuple, tuple[tuple, dict]] = {}
+_trace_cache_lock = threading.Lock()
+
 
 def get_current_period_remaining() -> dict:
-    """Return spent/remaining for the active pay period (used by dashboard card)."""
+    """Return spent/remaining for the active pay period (used by dashboard card).
+
+    Served from the cached default trace, so the dashboard cards and the
+    budget page share one computation until the underlying data changes.
+    """
     result = trace_paycheck()
     current = next((p for p in result.get("periods", []) if p.get("is_current")), None)
     if not current:
@@ -98,149 +108,262 @@ def _select_default_income_source(conn) -> dict | None:
 def trace_paycheck(income_item_id: int | None = None, num_periods: int = 6, account_id: str | None = None) -> dict:
     """Trace where paychecks went over recent pay periods.
 
+    Results are cached per (income_item_id, num_periods, account_id) and reused
+    until transactions, recurring items or the current date change.
+
     Returns:
         income_source, periods (list of pay period breakdowns),
         category_averages (average % per category across all periods)
     """
+    key = (income_item_id, num_periods, account_id)
     conn = get_db()
     try:
-        if income_item_id:
-            source = conn.execute(
-                "SELECT * FROM recurring_items WHERE id = ? AND type = 'income'",
-                (income_item_id,),
-            ).fetchone()
-        else:
-            source = _select_default_income_source(conn)
-
-        if not source:
-            return {"income_source": None, "periods": [], "category_averages": []}
-
-        source_dict = dict(source)
-        payee_names = get_payee_names_for_item(conn, source_dict["id"])
-
-        paycheck_rows = _get_paycheck_deposits(conn, payee_names)
-
-        if len(paycheck_rows) < 2:
-            return {
-                "income_source": _format_source(source_dict),
-                "periods": [],
-                "category_averages": [],
-            }
-
-        # Deduplicate same-day paychecks (sum them)
-        by_date: dict[str, float] = {}
-        for r in paycheck_rows:
-            by_date[r["date"]] = by_date.get(r["date"], 0) + r["amount"]
-
-        paycheck_dates = sorted(by_date.keys(), reverse=True)
-
-        periods = []
-        # Each period: [paycheck_date, next_paycheck_date)
-        # We need num_periods + 1 dates to form num_periods windows
-        dates_needed = min(num_periods + 1, len(paycheck_dates))
-
-        for i in range(dates_needed - 1):
-            period_start = paycheck_dates[i + 1]
-            period_end = paycheck_dates[i]
-            paycheck_amount = by_date[period_start]
-
-            breakdown = _get_period_spending(conn, period_start, period_end, account_id)
-
-            total_spent = sum(c["amount"] for c in breakdown)
-            total_saved = paycheck_amount - total_spent
-
-            periods.append({
-                "period_start": period_start,
-                "period_end": period_end,
-                "paycheck_amount": round(paycheck_amount, 2),
-                "total_spent": round(total_spent, 2),
-                "total_saved": round(total_saved, 2),
-                "save_rate": round((total_saved / paycheck_amount * 100) if paycheck_amount else 0, 1),
-                "categories": breakdown,
-                "is_current": False,
-                "is_projected": False,
-                "period_end_is_estimate": False,
-            })
-
-        # Reverse to chronological order
-        periods.reverse()
-
-        # Append the current active period (from last paycheck to estimated next)
-        today = datetime.now().strftime("%Y-%m-%d")
-        last_paycheck = paycheck_dates[0]
-        if last_paycheck <= today:
-            next_estimated = _estimate_next_paycheck(source_dict, last_paycheck, paycheck_dates)
-            current_breakdown = _get_period_spending(conn, last_paycheck, today, account_id)
-            current_spent = sum(c["amount"] for c in current_breakdown)
-            current_amount = by_date[last_paycheck]
-            periods.append({
-                "period_start": last_paycheck,
-                "period_end": next_estimated,
-                "paycheck_amount": round(current_amount, 2),
-                "total_spent": round(current_spent, 2),
-                "total_saved": round(current_amount - current_spent, 2),
-                "save_rate": round(((current_amount - current_spent) / current_amount * 100) if current_amount else 0, 1),
-                "categories": current_breakdown,
-                "is_current": True,
-                "is_projected": False,
-                "period_end_is_estimate": True,
-            })
-
-            projected_start = next_estimated
-            projected_end = _estimate_next_paycheck(source_dict, projected_start, paycheck_dates)
-            recent_amounts = [by_date[d] for d in paycheck_dates[:3]]
-            projected_amount = source_dict.get("expected_amount") or (
-                round(sum(recent_amounts) / len(recent_amounts), 2) if recent_amounts else 0
-            )
-            periods.append({
-                "period_start": projected_start,
-                "period_end": projected_end,
-                "paycheck_amount": round(projected_amount, 2),
-                "total_spent": 0,
-                "total_saved": 0,
-                "save_rate": 0,
-                "categories": [],
-                "is_current": False,
-                "is_projected": True,
-                "period_end_is_estimate": True,
-            })
-
-        category_averages = _compute_averages(periods)
+        fingerprint = _data_fingerprint(conn)
+        with _trace_cache_lock:
+            cached = _trace_cache.get(key)
+        if cached and cached[0] == fingerprint:
+            return copy.deepcopy(cached[1])
+
+        result = _build_trace(conn, income_item_id, num_periods, account_id)
+        with _trace_cache_lock:
+            _trace_cache[key] = (fingerprint, result)
+        return copy.deepcopy(result)
+    finally:
+        conn.close()
+
+
+def invalidate_trace_cache():
+    """Drop all cached traces."""
+    with _trace_cache_lock:
+        _trace_cache.clear()
+
+
+def _data_fingerprint(conn) -> tuple:
+    """Cheap signature of everything a trace depends on.
+
+    data_versions counters are bumped by triggers on every write to the
+    tables a trace reads (see migration 0019), so updates that leave
+    updated_at alone still invalidate the cache.
+    """
+    rows = conn.execute("""
+        SELECT table_name, version FROM data_versions
+        WHERE table_name IN ('transactions', 'recurring_items', 'recurring_item_aliases')
+        ORDER BY table_name
+    """).fetchall()
+    return (datetime.now().strftime("%Y-%m-%d"),) + tuple((r["table_name"], r["version"]) for r in rows)
+
+
+def _build_trace(conn, income_item_id: int | None, num_periods: int, account_id: str | None) -> dict:
+    if income_item_id:
+        source = conn.execute(
+            "SELECT * FROM recurring_items WHERE id = ? AND type = 'income'",
+            (income_item_id,),
+        ).fetchone()
+    else:
+        source = _select_default_income_source(conn)
+
+    if not source:
+        return {"income_source": None, "periods": [], "category_averages": []}
+
+    source_dict = dict(source)
+    payee_names = get_payee_names_for_item(conn, source_dict["id"])
 
+    paycheck_rows = _get_paycheck_deposits(conn, payee_names)
+
+    if len(paycheck_rows) < 2:
         return {
             "income_source": _format_source(source_dict),
-            "periods": periods,
-            "category_averages": category_averages,
+            "periods": [],
+            "category_averages": [],
         }
-    finally:
-        conn.close()
 
+    # Deduplicate same-day paychecks (sum them)
+    by_date: dict[str, float] = {}
+    for r in paycheck_rows:
+        by_date[r["date"]] = by_date.get(r["date"], 0) + r["amount"]
+
+    paycheck_dates = sorted(by_date.keys(), reverse=True)
+
+    # Each period: [paycheck_date, next_paycheck_date)
+    # We need num_periods + 1 dates to form num_periods windows
+    dates_needed = min(num_periods + 1, len(paycheck_dates))
+    windows = [
+        (paycheck_dates[i + 1], paycheck_dates[i])
+        for i in reversed(range(dates_needed - 1))
+    ]
+    complete_count = len(windows)
+
+    # The current active period (from last paycheck to today) rides along in
+    # the same query as the completed ones.
+    today = datetime.now().strftime("%Y-%m-%d")
+    last_paycheck = paycheck_dates[0]
+    has_current = last_paycheck <= today
+    if has_current:
+        windows.append((last_paycheck, today))
+
+    breakdowns, category_averages = _get_periods_spending(
+        conn, windows, complete_count, by_date, account_id
+    )
+
+    periods = []
+    for idx in range(complete_count):
+        period_start, period_end = windows[idx]
+        paycheck_amount = by_date[period_start]
+        breakdown = breakdowns[idx]
+        total_spent = sum(c["amount"] for c in breakdown)
+        total_saved = paycheck_amount - total_spent
+
+        periods.append({
+            "period_start": period_start,
+            "period_end": period_end,
+            "paycheck_amount": round(paycheck_amount, 2),
+            "total_spent": round(total_spent, 2),
+            "total_saved": round(total_saved, 2),
+            "save_rate": round((total_saved / paycheck_amount * 100) if paycheck_amount else 0, 1),
+            "categories": breakdown,
+            "is_current": False,
+            "is_projected": False,
+            "period_end_is_estimate": False,
+        })
+
+    if has_current:
+        next_estimated = _estimate_next_paycheck(source_dict, last_paycheck, paycheck_dates)
+        current_breakdown = breakdowns[complete_count]
+        current_spent = sum(c["amount"] for c in current_breakdown)
+        current_amount = by_date[last_paycheck]
+        periods.append({
+            "period_start": last_paycheck,
+            "period_end": next_estimated,
+            "paycheck_amount": round(current_amount, 2),
+            "total_spent": round(current_spent, 2),
+            "total_saved": round(current_amount - current_spent, 2),
+            "save_rate": round(((current_amount - current_spent) / current_amount * 100) if current_amount else 0, 1),
+            "categories": current_breakdown,
+            "is_current": True,
+            "is_projected": False,
+            "period_end_is_estimate": True,
+        })
+
+        projected_start = next_estimated
+        projected_end = _estimate_next_paycheck(source_dict, projected_start, paycheck_dates)
+        recent_amounts = [by_date[d] for d in paycheck_dates[:3]]
+        projected_amount = source_dict.get("expected_amount") or (
+            round(sum(recent_amounts) / len(recent_amounts), 2) if recent_amounts else 0
+        )
+        periods.append({
+            "period_start": projected_start,
+            "period_end": projected_end,
+            "paycheck_amount": round(projected_amount, 2),
+            "total_spent": 0,
+            "total_saved": 0,
+            "save_rate": 0,
+            "categories": [],
+            "is_current": False,
+            "is_projected": True,
+            "period_end_is_estimate": True,
+        })
+
+    return {
+        "income_source": _format_source(source_dict),
+        "periods": periods,
+        "category_averages": category_averages,
+    }
 
-def _get_period_spending(conn, start_date: str, end_date: str, account_id: str | None = None) -> list[dict]:
-    """Get spending breakdown by category for a pay period."""
+
+def _get_periods_spending(
+    conn,
+    windows: list[tuple[str, str]],
+    complete_count: int,
+    by_date: dict[str, float],
+    account_id: str | None = None,
+) -> tuple[list[list[dict]], list[dict]]:
+    """Category breakdown for every pay period plus averages, in one query.
+
+    Period bounds go into a temp table and a single range join groups
+    transactions by (period, category), so the transactions date index is
+    walked once instead of once per period. The first ``complete_count``
+    windows feed the category averages; any later window (the current
+    period) is broken down but not averaged.
+    """
+    conn.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS pay_periods (
+            idx INTEGER PRIMARY KEY,
+            period_start TEXT NOT NULL,
+            period_end TEXT NOT NULL
+        )
+    """)
+    conn.execute("DELETE FROM pay_periods")
+    conn.executemany(
+        "INSERT INTO pay_periods (idx, period_start, period_end) VALUES (?, ?, ?)",
+        [(i, start, end) for i, (start, end) in enumerate(windows)],
+    )
     rows = conn.execute("""
         SELECT
-            COALESCE(category_name, 'Uncategorized') as category,
-            SUM(ABS(amount)) as total,
+            p.idx,
+            COALESCE(t.category_name, 'Uncategorized') as category,
+            SUM(ABS(t.amount)) as total,
             COUNT(*) as txn_count
-        FROM transactions
-        WHERE date >= ? AND date < ?
-        AND amount < 0
-        AND deleted = 0
-        AND transfer_account_id IS NULL
-        AND (? IS NULL OR account_id = ?)
-        GROUP BY COALESCE(category_name, 'Uncategorized')
-        ORDER BY total DESC
-    """, (start_date, end_date, account_id, account_id)).fetchall()
-
-    return [
-        {
+        FROM pay_periods p
+        JOIN transactions t
+            ON t.date >= p.period_start AND t.date < p.period_end
+        WHERE t.amount < 0
+        AND t.deleted = 0
+        AND t.transfer_account_id IS NULL
+        AND (? IS NULL OR t.account_id = ?)
+        GROUP BY p.idx, COALESCE(t.category_name, 'Uncategorized')
+        ORDER BY p.idx, total DESC
+    """, (account_id, account_id)).fetchall()
+    conn.execute("DELETE FROM pay_periods")
+
+    breakdowns: list[list[dict]] = [[] for _ in windows]
+    # category -> [sum of amounts, index of first complete period it appeared in]
+    category_stats: dict[str, list] = {}
+    for r in rows:
+        amount = round(r["total"], 2)
+        breakdowns[r["idx"]].append({
             "category": r["category"],
-            "amount": round(r["total"], 2),
+            "amount": amount,
             "transaction_count": r["txn_count"],
-        }
-        for r in rows
-    ]
+        })
+        if r["idx"] < complete_count:
+            stats = category_stats.setdefault(r["category"], [0.0, r["idx"]])
+            stats[0] += amount
+
+    return breakdowns, _averages_from_stats(category_stats, windows, complete_count, by_date)
+
+
+def _averages_from_stats(
+    category_stats: dict[str, list],
+    windows: list[tuple[str, str]],
+    complete_count: int,
+    by_date: dict[str, float],
+) -> list[dict]:
+    """Average spend per category across complete periods.
+
+    A category counts zero for every complete period after it first appears,
+    so its average covers the periods from first appearance onward.
+    """
+    if not complete_count:
+        return []
+
+    avg_paycheck = sum(
+        round(by_date[windows[i][0]], 2) for i in range(complete_count)
+    ) / complete_count
+
+    averages = []
+    for cat, (total, first_idx) in category_stats.items():
+        period_count = complete_count - first_idx
+        avg = total / period_count
+        pct = (avg / avg_paycheck * 100) if avg_paycheck else 0
+        averages.append({
+            "category": cat,
+            "avg_amount": round(avg, 2),
+            "avg_percent": round(pct, 1),
+            "period_count": period_count,
+        })
+
+    averages.sort(key=lambda x: x["avg_amount"], reverse=True)
+    return averages
 
 
 def _estimate_next_paycheck(source: dict, last_paycheck: str, paycheck_dates: list[str]) -> str:
@@ -351,36 +474,3 @@ def _format_source(source: dict) -> dict:
         "expected_amount": source["expected_amount"],
         "occurrence_count": source["occurrence_count"],
     }
-
-
-def _compute_averages(periods: list[dict]) -> list[dict]:
-    """Compute average spend per category across all complete (non-current) periods."""
-    complete = [p for p in periods if not p["is_current"] and not p.get("is_projected")]
-    if not complete:
-        return []
-
-    category_totals: dict[str, list[float]] = defaultdict(list)
-    avg_paycheck = sum(p["paycheck_amount"] for p in complete) / len(complete)
-
-    for p in complete:
-        cats_in_period = set()
-        for c in p["categories"]:
-            category_totals[c["category"]].append(c["amount"])
-            cats_in_period.add(c["category"])
-        for cat in category_totals:
-            if cat not in cats_in_period:
-                category_totals[cat].append(0)
-
-    averages = []
-    for cat, amounts in category_totals.items():
-        avg = sum(amounts) / len(amounts)
-        pct = (avg / avg_paycheck * 100) if avg_paycheck else 0
-        averages.append({
-            "category": cat,
-            "avg_amount": round(avg, 2),
-            "avg_percent": round(pct, 1),
-            "period_count": len(amounts),
-        })
-
-    averages.sort(key=lambda x: x["avg_amount"], reverse=True)
-    return averages
@@ -3,6 +3,8 @@ import os
 from pathlib import Path
 import yaml
 from api.models.dragon_keeper.db import get_db
+from api.services.frontmatter_cache import invalidate, read_note
+from api.services.vault_index import folder_notes
 
 VAULT_PATH = os.getenv("OB_VAULT_PATH", "")
 PURCHASES_FOLDER = "1 Personal/3 Resources/Shopping"
@@ -14,21 +16,11 @@ def _purchases_dir() -> Path:
 
 def _parse_file(filepath: Path) -> dict | None:
     """Return a purchase dict from a vault .md file, or None if not a purchase note."""
-    try:
-        content = filepath.read_text(encoding="utf-8")
-    except OSError:
-        return None
-    if not content.startswith("---"):
-        return None
-    end = content.find("---", 3)
-    if end == -1:
-        return None
-    fm_str = content[3:end]
-    body = content[end + 3:].strip()
-    try:
-        fm = yaml.safe_load(fm_str) or {}
-    except yaml.YAMLError:
+    parsed = read_note(filepath)
+    if parsed is None:
         return None
+    fm, body = parsed
+    body = body.strip()
     tags = fm.get("tags", [])
     if isinstance(tags, str):
         tags = [tags]
@@ -72,7 +64,7 @@ def get_purchases() -> dict:
     folder = _purchases_dir()
     items: list[dict] = []
     if folder.exists():
-        for f in sorted(folder.glob("*.md")):
+        for f in folder_notes(VAULT_PATH, folder):
             if f.name.startswith("_"):
                 continue
             p = _parse_file(f)
@@ -114,6 +106,7 @@ def _rewrite_frontmatter(filepath: str, updates: dict) -> bool:
     fm.update(updates)
     new_fm = yaml.dump(fm, default_flow_style=False, allow_unicode=True, sort_keys=False)
     p.write_text(f"---\n{new_fm}---{body}", encoding="utf-8")
+    invalidate(p)
     return True
 
 
@@ -4,6 +4,8 @@ from datetime import date, datetime
 from pathlib import Path
 import yaml
 from api.services.dragon_keeper.purchases_service import get_max_cc_rate
+from api.services.frontmatter_cache import invalidate, read_note
+from api.services.vault_index import folder_notes
 
 SELLING_FOLDER = "1 Personal/3 Resources/Possessions (Thing and Stuff I own) Resource/Selling"
 
@@ -43,21 +45,11 @@ def _as_str_or_none(val) -> str | None:
 
 
 def _parse_file(filepath: Path) -> dict | None:
-    try:
-        content = filepath.read_text(encoding="utf-8")
-    except OSError:
-        return None
-    if not content.startswith("---"):
-        return None
-    end = content.find("---", 3)
-    if end == -1:
-        return None
-    fm_str = content[3:end]
-    body = content[end + 3:].strip()
-    try:
-        fm = yaml.safe_load(fm_str) or {}
-    except yaml.YAMLError:
+    parsed = read_note(filepath)
+    if parsed is None:
         return None
+    fm, body = parsed
+    body = body.strip()
     tags = fm.get("tags", [])
     if isinstance(tags, str):
         tags = [tags]
@@ -91,7 +83,7 @@ def get_selling_items() -> dict:
     folder = _selling_dir()
     items: list[dict] = []
     if folder.exists():
-        for f in sorted(folder.glob("*.md")):
+        for f in folder_notes(_vault_path(), folder):
             if f.name.startswith("_"):
                 continue
             item = _parse_file(f)
@@ -141,6 +133,7 @@ def _rewrite_frontmatter(filepath: str, updates: dict) -> bool:
     fm.update(updates)
     new_fm = yaml.dump(fm, default_flow_style=False, allow_unicode=True, sort_keys=False)
     p.write_text(f"---\n{new_fm}---{body}", encoding="utf-8")
+    invalidate(p)
     return True
 
 
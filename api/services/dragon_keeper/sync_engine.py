@@ -1,6 +1,7 @@
 """YNAB sync engine — fetches data from YNAB API and stores in local SQLite."""
 import os
 import logging
+import sqlite3
 from datetime import datetime, timezone
 from typing import Any
 
@@ -8,8 +9,8 @@ from dotenv import load_dotenv
 import ynab
 
 from api.models.dragon_keeper.db import (
-    get_db, upsert_accounts, upsert_category_groups, upsert_categories,
-    upsert_payees, upsert_transactions, get_setting, set_setting,
+    DB_PATH, get_db, upsert_accounts, upsert_category_groups, upsert_categories,
+    upsert_payees, get_unassigned_transactions, upsert_transactions, get_setting, set_setting,
     update_sync_state, log_sync_event,
 )
 from api.services.dragon_keeper.rate_limiter import ynab_limiter
@@ -59,6 +60,24 @@ def _enum_val(enum_obj) -> str | None:
     return str(enum_obj)
 
 
+def _transaction_row(t) -> dict:
+    return {
+        "id": str(t.id),
+        "account_id": str(t.account_id),
+        "date": t.var_date.isoformat() if hasattr(t.var_date, "isoformat") else str(t.var_date),
+        "amount": _millis_to_dollars(t.amount),
+        "payee_id": str(t.payee_id) if t.payee_id else None,
+        "payee_name": t.payee_name,
+        "category_id": str(t.category_id) if t.category_id else None,
+        "category_name": t.category_name,
+        "memo": t.memo,
+        "cleared": _enum_val(t.cleared) or "uncleared",
+        "approved": int(t.approved) if t.approved else 0,
+        "transfer_account_id": str(t.transfer_account_id) if t.transfer_account_id else None,
+        "deleted": int(t.deleted) if t.deleted else 0,
+    }
+
+
 def discover_budgets() -> list[dict]:
     config = _get_ynab_config()
     with ynab.ApiClient(config) as client:
@@ -166,24 +185,7 @@ def run_sync(budget_id: str | None = None) -> dict:
                 transactions_api.get_transactions, budget_id, **kwargs,
             )
 
-            txns_data = [
-                {
-                    "id": str(t.id),
-                    "account_id": str(t.account_id),
-                    "date": t.var_date.isoformat() if hasattr(t.var_date, "isoformat") else str(t.var_date),
-                    "amount": _millis_to_dollars(t.amount),
-                    "payee_id": str(t.payee_id) if t.payee_id else None,
-                    "payee_name": t.payee_name,
-                    "category_id": str(t.category_id) if t.category_id else None,
-                    "category_name": t.category_name,
-                    "memo": t.memo,
-                    "cleared": _enum_val(t.cleared) or "uncleared",
-                    "approved": int(t.approved) if t.approved else 0,
-                    "transfer_account_id": str(t.transfer_account_id) if t.transfer_account_id else None,
-                    "deleted": int(t.deleted) if t.deleted else 0,
-                }
-                for t in txns_resp.data.transactions
-            ]
+            txns_data = [_transaction_row(t) for t in txns_resp.data.transactions]
             upsert_transactions(conn, txns_data)
             new_sk = txns_resp.data.server_knowledge
             set_setting(conn, "ynab_server_knowledge", str(new_sk))
@@ -262,6 +264,90 @@ def run_sync(budget_id: str | None = None) -> dict:
         conn.close()
 
 
+def sync_transactions(budget_id: str) -> dict:
+    """Pull only the transactions changed since the last sync.
+
+    A single delta request against the stored server_knowledge, without the
+    accounts/categories/payees refresh or the post-sync pipeline of
+    run_sync(). Falls back to run_sync() when there is no knowledge yet for
+    this budget, or when a changed transaction references an account,
+    payee or category the database doesn't know yet.
+    """
+    conn = get_db()
+    try:
+        sk_str = get_setting(conn, "ynab_server_knowledge")
+        same_budget = get_setting(conn, "ynab_budget_id") == budget_id
+    finally:
+        conn.close()
+    if not sk_str or not same_budget:
+        return run_sync(budget_id)
+
+    conn = get_db()
+    try:
+        with ynab.ApiClient(_get_ynab_config()) as client:
+            transactions_api = ynab.api.transactions_api.TransactionsApi(client)
+            txns_resp = _rate_limited_call(
+                transactions_api.get_transactions, budget_id, last_knowledge_of_server=int(sk_str),
+            )
+        txns_data = [_transaction_row(t) for t in txns_resp.data.transactions]
+        new_sk = txns_resp.data.server_knowledge
+        try:
+            upsert_transactions(conn, txns_data)
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            logger.info("Delta references unknown accounts, payees or categories, running a full sync")
+        else:
+            set_setting(conn, "ynab_server_knowledge", str(new_sk))
+            log_sync_event(conn, None, "sync_completed", f"transactions={len(txns_data)} (transactions only)")
+            conn.commit()
+            logger.info("Synced %d transactions, server_knowledge=%s", len(txns_data), new_sk)
+            return {
+                "status": "success",
+                "sync_type": "transactions_delta",
+                "budget_id": budget_id,
+                "transactions_synced": len(txns_data),
+                "server_knowledge": new_sk,
+                "synced_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            }
+    except ynab.ApiException as e:
+        conn.rollback()
+        status_code = getattr(e, "status", 500)
+        if status_code == 429:
+            raise SyncError("YNAB_RATE_LIMITED", "YNAB rate limit exceeded. Try again later.")
+        raise SyncError(
+            "YNAB_API_ERROR",
+            f"YNAB API error (HTTP {status_code}): {e.reason if hasattr(e, 'reason') else str(e)}",
+        )
+    finally:
+        conn.close()
+    return run_sync(budget_id)
+
+
+def local_unassigned_transactions(budget_id: str) -> list[dict] | None:
+    """Unassigned transactions of ``budget_id`` from the local database, after a delta sync.
+
+    None when the Dragon Keeper database doesn't hold this budget (never
+    synced, or synced for another budget); callers then read the YNAB API.
+    """
+    if not os.path.exists(DB_PATH):
+        return None
+    conn = get_db()
+    try:
+        if get_setting(conn, "ynab_budget_id") != budget_id or not get_setting(conn, "ynab_server_knowledge"):
+            return None
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+
+    sync_transactions(budget_id)
+    conn = get_db()
+    try:
+        return get_unassigned_transactions(conn, budget_id)
+    finally:
+        conn.close()
+
+
 def _take_balance_snapshot(conn):
     """Record current account balances for trend tracking."""
     from api.models.dragon_keeper.db import _now_utc
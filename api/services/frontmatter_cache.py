@@ -0,0 +1,104 @@
+"""
+Shared cache of parsed note frontmatter for vault-backed services.
+
+Entries are keyed by absolute path and validated against (mtime_ns, size), so
+an edited note is re-parsed on its next read and an unchanged one costs a
+single stat(). The cache is LRU-bounded at FRONTMATTER_CACHE_SIZE notes.
+
+Returned frontmatter is shared between callers; treat it as read-only.
+"""
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Union
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+FRONTMATTER_CACHE_SIZE = 4096
+
+# path -> ((mtime_ns, size), (frontmatter, body) or None)
+_cache: "OrderedDict[str, tuple[tuple[int, int], tuple | None]]" = OrderedDict()
+_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+def _parse(content: str) -> tuple | None:
+    if not content.startswith("---"):
+        return None
+    end = content.find("---", 3)
+    if end == -1:
+        return None
+    try:
+        fm = yaml.load(content[3:end], Loader=_YamlLoader) or {}
+    except yaml.YAMLError:
+        return None
+    return fm, content[end + 3:]
+
+
+def read_note(filepath: Union[str, Path]) -> tuple | None:
+    """Return (frontmatter, body) for a note, or None if it is unreadable,
+    has no frontmatter block or the YAML is invalid.
+
+    ``body`` is everything after the closing '---', unstripped.
+    """
+    global _hits, _misses
+    path = os.path.abspath(filepath)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    sig = (st.st_mtime_ns, st.st_size)
+    with _lock:
+        entry = _cache.get(path)
+        if entry is not None and entry[0] == sig:
+            _cache.move_to_end(path)
+            _hits += 1
+            return entry[1]
+        _misses += 1
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+    parsed = _parse(content)
+    with _lock:
+        _cache[path] = (sig, parsed)
+        _cache.move_to_end(path)
+        while len(_cache) > FRONTMATTER_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return parsed
+
+
+def read_frontmatter(filepath: Union[str, Path]) -> dict | None:
+    """Parsed frontmatter of a note, or None (see read_note)."""
+    parsed = read_note(filepath)
+    return parsed[0] if parsed is not None else None
+
+
+def invalidate(filepath: Union[str, Path, None] = None):
+    """Drop one note (after writing it) or, with no argument, everything."""
+    with _lock:
+        if filepath is None:
+            _cache.clear()
+        else:
+            _cache.pop(os.path.abspath(filepath), None)
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters for /api/health."""
+    with _lock:
+        lookups = _hits + _misses
+        return {
+            "entries": len(_cache),
+            "max_entries": FRONTMATTER_CACHE_SIZE,
+            "hits": _hits,
+            "misses": _misses,
+            "hit_rate": round(_hits / lookups, 3) if lookups else None,
+        }
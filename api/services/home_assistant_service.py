@@ -1,15 +1,60 @@
+import asyncio
 import os
 import json
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import pytz
 
+from api.services.home_assistant_state import get_state_store
+
 HA_URL = os.getenv("HOME_ASSISTANT_API_URL", "")
 HA_TOKEN = os.getenv("HOME_ASSISTANT_TOKEN", "")
 
 _EST = pytz.timezone("US/Eastern")
 
+# (connect, read) seconds
+REQUEST_TIMEOUT = (3.05, 10)
+MAX_SERVICE_CALL_WORKERS = 8
+# Live entity stream: comment line sent when idle so proxies keep the
+# connection open, and per-client backlog before it is resynced with a snapshot
+STREAM_KEEPALIVE_SECONDS = 15
+STREAM_QUEUE_SIZE = 1000
+# How often an open stream re-reads /rooms so added rooms and entities show up
+STREAM_SCOPE_REFRESH_SECONDS = 10
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """Shared keep-alive session. GETs retry on connection errors and 502/503/504;
+    service calls (not idempotent, e.g. toggle) only retry if the connection
+    never opened."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=3,
+                connect=3,
+                read=2,
+                status=2,
+                backoff_factor=0.3,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset({"GET"}),
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_SERVICE_CALL_WORKERS, max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
 
 def _headers():
     return {
@@ -27,16 +72,24 @@ def _check_config():
 
 def _fetch_all_entities():
     _check_config()
-    resp = requests.get(
-        f"{HA_URL.rstrip('/')}/states", headers=_headers(), timeout=10
+    store = get_state_store()
+    if store.live:
+        return store.all()
+    resp = _get_session().get(
+        f"{HA_URL.rstrip('/')}/states", headers=_headers(), timeout=REQUEST_TIMEOUT
     )
     resp.raise_for_status()
     return resp.json()
 
 
 def get_sensors(entity_filter: str = "", device_class_filter: str = ""):
-    entities = _fetch_all_entities()
-    sensors = [e for e in entities if e.get("entity_id", "").startswith("sensor.")]
+    _check_config()
+    store = get_state_store()
+    if store.live:
+        # Served from the streamed state store via its domain/device_class indexes
+        sensors = store.query(domain="sensor", device_class=device_class_filter or None)
+    else:
+        sensors = [e for e in _fetch_all_entities() if e.get("entity_id", "").startswith("sensor.")]
     if entity_filter:
         sensors = [s for s in sensors if entity_filter.lower() in s["entity_id"].lower()]
     if device_class_filter:
@@ -45,20 +98,22 @@ def get_sensors(entity_filter: str = "", device_class_filter: str = ""):
             if s.get("attributes", {}).get("device_class", "") == device_class_filter
         ]
 
-    result = []
-    for s in sensors:
-        attrs = s.get("attributes", {})
-        result.append({
-            "entity_id": s.get("entity_id", ""),
-            "friendly_name": attrs.get("friendly_name", ""),
-            "state": s.get("state", ""),
-            "unit": attrs.get("unit_of_measurement", ""),
-            "device_class": attrs.get("device_class", ""),
-            "last_changed": s.get("last_changed", ""),
-        })
+    result = [_sensor_view(s) for s in sensors]
     return {"sensors": result, "total": len(result)}
 
 
+def _sensor_view(s: dict) -> dict:
+    attrs = s.get("attributes", {})
+    return {
+        "entity_id": s.get("entity_id", ""),
+        "friendly_name": attrs.get("friendly_name", ""),
+        "state": s.get("state", ""),
+        "unit": attrs.get("unit_of_measurement", ""),
+        "device_class": attrs.get("device_class", ""),
+        "last_changed": s.get("last_changed", ""),
+    }
+
+
 def _time_ago(last_changed: str, now: float):
     if not last_changed:
         return "", ""
@@ -79,70 +134,285 @@ def _time_ago(last_changed: str, now: float):
         return "", ""
 
 
-def get_grouped_entities():
-    entities = _fetch_all_entities()
-    now = datetime.now(timezone.utc).timestamp()
+def _entity_view(e: dict, now: float) -> tuple[str, dict]:
+    """(group, item) for one entity as laid out by get_grouped_entities."""
+    eid = e.get("entity_id", "")
+    domain = eid.split(".")[0] if "." in eid else ""
+    attrs = e.get("attributes", {})
+    device_class = attrs.get("device_class", "")
+    state = e.get("state", "")
 
-    motion_sensors = []
-    lights = []
-    switches = []
-    security = []
-    other = []
+    base = {
+        "entity_id": eid,
+        "friendly_name": attrs.get("friendly_name", eid),
+        "state": state,
+        "domain": domain,
+        "device_class": device_class,
+    }
 
-    for e in entities:
-        eid = e.get("entity_id", "")
-        domain = eid.split(".")[0] if "." in eid else ""
-        attrs = e.get("attributes", {})
-        device_class = attrs.get("device_class", "")
-        state = e.get("state", "")
-
-        base = {
-            "entity_id": eid,
-            "friendly_name": attrs.get("friendly_name", eid),
-            "state": state,
-            "domain": domain,
-            "device_class": device_class,
+    if domain == "binary_sensor" and device_class == "motion":
+        last_changed = e.get("last_changed", "")
+        motion_ago, motion_ts_est = _time_ago(last_changed, now)
+        return "motion_sensors", {
+            **base,
+            "last_changed": last_changed,
+            "motion_ago": motion_ago,
+            "motion_ts_est": motion_ts_est,
+            "battery": attrs.get("battery_level", ""),
+            "temperature": attrs.get("temperature", ""),
         }
+    if domain == "light":
+        return "lights", base
+    if domain == "switch":
+        return "switches", base
+    if domain == "lock" or (domain == "cover" and device_class == "garage"):
+        return "security", base
+    return "other", {**base, "last_changed": e.get("last_changed", "")}
 
-        if domain == "binary_sensor" and device_class == "motion":
-            last_changed = e.get("last_changed", "")
-            motion_ago, motion_ts_est = _time_ago(last_changed, now)
-            motion_sensors.append({
-                **base,
-                "last_changed": last_changed,
-                "motion_ago": motion_ago,
-                "motion_ts_est": motion_ts_est,
-                "battery": attrs.get("battery_level", ""),
-                "temperature": attrs.get("temperature", ""),
-            })
-        elif domain == "light":
-            lights.append(base)
-        elif domain == "switch":
-            switches.append(base)
-        elif domain == "lock" or (domain == "cover" and device_class == "garage"):
-            security.append(base)
-        else:
-            other.append({**base, "last_changed": e.get("last_changed", "")})
 
-    motion_sensors.sort(key=lambda x: x.get("last_changed", ""), reverse=True)
+def _group_entities(entities: list[dict]) -> dict:
+    now = datetime.now(timezone.utc).timestamp()
+    groups = {"motion_sensors": [], "lights": [], "switches": [], "security": [], "other": []}
+    for e in entities:
+        group, item = _entity_view(e, now)
+        groups[group].append(item)
+    groups["motion_sensors"].sort(key=lambda x: x.get("last_changed", ""), reverse=True)
+    return groups
+
 
-    return {
-        "motion_sensors": motion_sensors,
-        "lights": lights,
-        "switches": switches,
-        "security": security,
-        "other": other,
-    }
+def get_grouped_entities():
+    return _group_entities(_fetch_all_entities())
 
 
-def call_service(domain: str, service: str, entity_id: str):
-    _check_config()
+def _post_service(domain: str, service: str, entity_id) -> list:
     endpoint = f"{HA_URL.rstrip('/')}/services/{domain}/{service}"
-    resp = requests.post(
+    resp = _get_session().post(
         endpoint,
         headers=_headers(),
         data=json.dumps({"entity_id": entity_id}),
-        timeout=10,
+        timeout=REQUEST_TIMEOUT,
     )
     resp.raise_for_status()
+    try:
+        return resp.json() or []
+    except ValueError:
+        return []
+
+
+def call_service(domain: str, service: str, entity_id: str):
+    _check_config()
+    _post_service(domain, service, entity_id)
     return {"success": True}
+
+
+def call_service_batch(domain: str, service: str, entity_ids: list[str],
+                       mode: str = "single", max_workers: int = MAX_SERVICE_CALL_WORKERS):
+    """Call a service for many entities and report per-entity results.
+
+    mode "single" sends one call with the whole entity_id list (HA applies it
+    to each entity); "concurrent" sends one call per entity, at most
+    ``max_workers`` at a time, so one failing entity doesn't fail the rest.
+    Each result is {entity_id, success, state, error}; ``state`` is the new
+    state when HA reports the entity changed.
+    """
+    _check_config()
+    entity_ids = list(dict.fromkeys(entity_ids))
+    if not entity_ids:
+        return {"success": True, "results": []}
+
+    if mode == "single":
+        try:
+            changed = {s.get("entity_id"): s.get("state") for s in _post_service(domain, service, entity_ids)}
+        except Exception as e:
+            results = [{"entity_id": eid, "success": False, "state": None, "error": str(e)} for eid in entity_ids]
+        else:
+            results = [{"entity_id": eid, "success": True, "state": changed.get(eid), "error": None}
+                       for eid in entity_ids]
+    elif mode == "concurrent":
+        def call_one(eid):
+            try:
+                changed = {s.get("entity_id"): s.get("state") for s in _post_service(domain, service, eid)}
+                return {"entity_id": eid, "success": True, "state": changed.get(eid), "error": None}
+            except Exception as e:
+                return {"entity_id": eid, "success": False, "state": None, "error": str(e)}
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(entity_ids)))) as pool:
+            results = list(pool.map(call_one, entity_ids))
+    else:
+        raise ValueError(f"Unknown batch mode '{mode}' (expected 'single' or 'concurrent')")
+
+    return {"success": all(r["success"] for r in results), "results": results}
+
+
+def stream_available() -> bool:
+    """Whether entity changes can be pushed (the shared state stream is live)."""
+    _check_config()
+    return get_state_store().live
+
+
+def _house_entity_ids() -> tuple[str, frozenset[str] | None] | None:
+    """(ETag, motion sensor and light entities referenced by /rooms). The ids
+    are None if no room has any; returns None if /rooms can't be read."""
+    from api.services.house_service import get_rooms_with_etag
+
+    try:
+        payload, etag = get_rooms_with_etag()
+    except Exception:
+        return None
+    ids = set()
+    for room in payload.get("rooms", []):
+        if room.get("motion_entity_id"):
+            ids.add(room["motion_entity_id"])
+        ids.update(room.get("light_entity_ids") or [])
+    return etag, frozenset(ids) or None
+
+
+def _stream_scope(scope: str, entity_filter: str, device_class: str):
+    """(matches(state), snapshot(states), view(state), refresh()) for one stream scope.
+
+    "house" is what the house visualizer draws: motion sensors and lights,
+    limited to the ones /rooms references. "sensors" mirrors get_sensors().
+    refresh() re-reads whatever the scope depends on and returns True if the
+    set of matching entities may have changed. matches() is called from the
+    state stream thread, so the house ids are swapped under a lock.
+    """
+    if scope == "house":
+        house = {"etag": None, "ids": None}
+        house_lock = threading.Lock()
+
+        def refresh():
+            current = _house_entity_ids()
+            if current is None:
+                return False  # keep the last known scope
+            etag, ids = current
+            with house_lock:
+                if etag == house["etag"]:
+                    return False
+                changed = ids != house["ids"]
+                house.update(etag=etag, ids=ids)
+            return changed
+
+        refresh()
+
+        def matches(e):
+            eid = e.get("entity_id", "")
+            with house_lock:
+                house_ids = house["ids"]
+            if house_ids is not None:
+                return eid in house_ids
+            group, _ = _entity_view(e, 0)
+            return group in ("motion_sensors", "lights")
+
+        def snapshot(states):
+            groups = _group_entities(states)
+            return {"motion_sensors": groups["motion_sensors"], "lights": groups["lights"]}
+
+        def view(e):
+            group, item = _entity_view(e, datetime.now(timezone.utc).timestamp())
+            return {"group": group, "entity": item}
+
+    elif scope == "sensors":
+        needle = entity_filter.lower()
+
+        def matches(e):
+            eid = e.get("entity_id", "")
+            return (eid.startswith("sensor.")
+                    and needle in eid.lower()
+                    and (not device_class or e.get("attributes", {}).get("device_class", "") == device_class))
+
+        def snapshot(states):
+            sensors = [_sensor_view(e) for e in sorted(states, key=lambda e: e.get("entity_id", ""))]
+            return {"sensors": sensors, "total": len(sensors)}
+
+        def view(e):
+            return {"entity": _sensor_view(e)}
+
+        def refresh():
+            return False
+
+    else:
+        raise ValueError(f"Unknown stream scope '{scope}' (expected 'house' or 'sensors')")
+    return matches, snapshot, view, refresh
+
+
+def stream_entity_changes(scope: str = "house", entity_filter: str = "", device_class: str = ""):
+    """Async iterator of (event, data) for one browser: a "snapshot" of the matching
+    entities, then a "change" per matching state_changed event, and None
+    (keepalive) when idle.
+
+    Every client shares the one upstream HA subscription; the store's
+    listener hands each change to this client's queue on its event loop.
+    A client that falls STREAM_QUEUE_SIZE changes behind, or a store reseed
+    after an HA reconnect, gets a fresh snapshot instead, as does a change
+    to the scope itself (e.g. a room added to /rooms, checked every
+    STREAM_SCOPE_REFRESH_SECONDS). Raises ValueError for an unknown scope
+    before anything is streamed.
+    """
+    matches, snapshot, view, refresh = _stream_scope(scope, entity_filter, device_class)
+    return _stream_changes(matches, snapshot, view, refresh)
+
+
+async def _stream_changes(matches, snapshot, view, refresh):
+    store = get_state_store()
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+    # Entities this client has been sent; read by the listener on the stream thread
+    tracked: set[str] = set()
+    tracked_lock = threading.Lock()
+
+    def offer(item):
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+            item = ("reset", None, None)
+        queue.put_nowait(item)
+
+    def listener(kind, entity_id, state):
+        # Called on the stream thread; drop changes this client can't see
+        if kind == "state":
+            with tracked_lock:
+                seen = entity_id in tracked
+            if not seen and (state is None or not matches(state)):
+                return
+        try:
+            loop.call_soon_threadsafe(offer, (kind, entity_id, state))
+        except RuntimeError:
+            pass  # loop closed; the generator's finally removes the listener
+
+    def full_snapshot():
+        states = [e for e in store.all() if matches(e)]
+        with tracked_lock:
+            tracked.clear()
+            tracked.update(e["entity_id"] for e in states)
+        return snapshot(states)
+
+    store.add_listener(listener)
+    try:
+        yield "snapshot", full_snapshot()
+        next_refresh = loop.time() + STREAM_SCOPE_REFRESH_SECONDS
+        while True:
+            try:
+                kind, entity_id, state = await asyncio.wait_for(queue.get(), STREAM_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                kind, entity_id, state = "idle", None, None
+            if loop.time() >= next_refresh:
+                next_refresh = loop.time() + STREAM_SCOPE_REFRESH_SECONDS
+                if await asyncio.to_thread(refresh):
+                    # The snapshot reads the store, so it covers this change too
+                    yield "snapshot", full_snapshot()
+                    continue
+            if kind == "idle":
+                yield None
+            elif kind == "reset":
+                yield "snapshot", full_snapshot()
+            elif state is None or not matches(state):
+                # Removed, or no longer matches (e.g. device_class changed)
+                with tracked_lock:
+                    tracked.discard(entity_id)
+                yield "change", {"entity_id": entity_id, "removed": True}
+            else:
+                with tracked_lock:
+                    tracked.add(entity_id)
+                yield "change", {"entity_id": entity_id, "removed": False, **view(state)}
+    finally:
+        store.remove_listener(listener)
@@ -0,0 +1,306 @@
+"""
+In-process Home Assistant entity state store.
+
+A background thread opens HA's WebSocket API, subscribes to ``state_changed``
+events and seeds the store with ``get_states``, then applies every event as it
+arrives. Reads come from memory, indexed by domain and device_class, instead of
+downloading every entity from ``GET /states`` per request.
+
+While the stream is down (no websockets package, HA unreachable, or before the
+first seed) the store reports not live and callers fall back to REST.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
+
+try:
+    from websockets.sync.client import connect as ws_connect
+    WEBSOCKETS_AVAILABLE = True
+except ImportError:
+    ws_connect = None
+    WEBSOCKETS_AVAILABLE = False
+
+logger = logging.getLogger("codiak.home_assistant")
+
+RECONNECT_MIN_SECONDS = 1.0
+RECONNECT_MAX_SECONDS = 60.0
+RECV_TIMEOUT_SECONDS = 1.0
+
+
+def _domain(entity_id: str) -> str:
+    return entity_id.split(".")[0] if "." in entity_id else ""
+
+
+def _device_class(state: dict) -> str:
+    return (state.get("attributes") or {}).get("device_class", "") or ""
+
+
+class EntityStore:
+    """Current state of every HA entity, indexed by domain and device_class.
+
+    State dicts are replaced, never mutated, so readers may hold on to them.
+    Listeners are called from the stream thread with ("state", entity_id,
+    new_state) for each change (new_state None on removal) and ("reset",
+    None, None) after every (re)seed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: dict[str, dict] = {}
+        self._by_domain: dict[str, set[str]] = defaultdict(set)
+        self._by_device_class: dict[str, set[str]] = defaultdict(set)
+        self.live = False
+        self.seeded_at: Optional[float] = None
+        self.last_event_at: Optional[float] = None
+        self.events_applied = 0
+        self._listeners: list = []
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        try:
+            self._listeners.remove(listener)
+        except ValueError:
+            pass
+
+    def _notify(self, kind: str, entity_id: Optional[str], state: Optional[dict]):
+        for listener in list(self._listeners):
+            try:
+                listener(kind, entity_id, state)
+            except Exception:
+                logger.exception("Home Assistant state listener failed")
+
+    def _index(self, entity_id: str, state: dict):
+        self._by_domain[_domain(entity_id)].add(entity_id)
+        self._by_device_class[_device_class(state)].add(entity_id)
+
+    def _unindex(self, entity_id: str, state: dict):
+        self._by_domain[_domain(entity_id)].discard(entity_id)
+        self._by_device_class[_device_class(state)].discard(entity_id)
+
+    def seed(self, states: list[dict]):
+        with self._lock:
+            self._states = {}
+            self._by_domain = defaultdict(set)
+            self._by_device_class = defaultdict(set)
+            for state in states:
+                entity_id = state.get("entity_id")
+                if entity_id:
+                    self._states[entity_id] = state
+                    self._index(entity_id, state)
+            self.seeded_at = time.time()
+        self._notify("reset", None, None)
+
+    def apply(self, entity_id: str, new_state: Optional[dict]) -> bool:
+        """Apply one state_changed event; ``new_state`` None removes the entity.
+
+        Events older than the stored state (by last_updated) are ignored, so
+        replaying events buffered during seeding is safe. Returns whether the
+        store changed.
+        """
+        with self._lock:
+            old = self._states.get(entity_id)
+            if new_state is not None and old is not None and \
+                    new_state.get("last_updated", "") < old.get("last_updated", ""):
+                return False
+            if old is not None:
+                self._unindex(entity_id, old)
+                del self._states[entity_id]
+            if new_state is not None:
+                self._states[entity_id] = new_state
+                self._index(entity_id, new_state)
+            self.last_event_at = time.time()
+            self.events_applied += 1
+        self._notify("state", entity_id, new_state)
+        return True
+
+    def get(self, entity_id: str) -> Optional[dict]:
+        return self._states.get(entity_id)
+
+    def all(self) -> list[dict]:
+        with self._lock:
+            return list(self._states.values())
+
+    def query(self, domain: Optional[str] = None, device_class: Optional[str] = None) -> list[dict]:
+        """Entities in ``domain`` and/or with ``device_class``, sorted by entity_id."""
+        with self._lock:
+            ids = None
+            if domain is not None:
+                ids = set(self._by_domain.get(domain, ()))
+            if device_class is not None:
+                matching = self._by_device_class.get(device_class, set())
+                ids = set(matching) if ids is None else ids & matching
+            if ids is None:
+                ids = self._states.keys()
+            return [self._states[i] for i in sorted(ids)]
+
+    def status(self) -> dict:
+        def iso(ts):
+            return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ") if ts else None
+        return {
+            "live": self.live,
+            "entities": len(self._states),
+            "seeded_at": iso(self.seeded_at),
+            "last_event_at": iso(self.last_event_at),
+            "events_applied": self.events_applied,
+            "listeners": len(self._listeners),
+        }
+
+
+def websocket_url(api_url: str) -> str:
+    """http(s)://host:8123/api -> ws(s)://host:8123/api/websocket."""
+    parts = urlsplit(api_url.rstrip("/"))
+    scheme = "wss" if parts.scheme == "https" else "ws"
+    return urlunsplit((scheme, parts.netloc, parts.path + "/websocket", "", ""))
+
+
+class StateStream:
+    """Keeps an EntityStore current from HA's WebSocket event stream, reconnecting with backoff."""
+
+    def __init__(self, api_url: str, token: str, store: EntityStore):
+        self.url = websocket_url(api_url)
+        self.token = token
+        self.store = store
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._ws = None
+        self.connects = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="ha-state-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.store.live = False
+
+    def _run(self):
+        delay = RECONNECT_MIN_SECONDS
+        while not self._stop.is_set():
+            try:
+                self._session()
+                delay = RECONNECT_MIN_SECONDS
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                self.last_error = str(e)
+                logger.warning("Home Assistant event stream dropped (%s); reconnecting in %.0fs", e, delay)
+            finally:
+                self.store.live = False
+                self._ws = None
+            if self._stop.wait(delay):
+                break
+            delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+
+    def _session(self):
+        with ws_connect(self.url, open_timeout=10, max_size=None) as ws:
+            self._ws = ws
+            msg = json.loads(ws.recv(timeout=10))
+            if msg.get("type") == "auth_required":
+                ws.send(json.dumps({"type": "auth", "access_token": self.token}))
+                msg = json.loads(ws.recv(timeout=10))
+            if msg.get("type") != "auth_ok":
+                raise ConnectionError(f"Home Assistant auth failed: {msg.get('message') or msg.get('type')}")
+
+            # Subscribe before fetching states so no change falls between the two;
+            # events that arrive before the snapshot are replayed on top of it.
+            ws.send(json.dumps({"id": 1, "type": "subscribe_events", "event_type": "state_changed"}))
+            ws.send(json.dumps({"id": 2, "type": "get_states"}))
+            buffered: list[dict] = []
+            seeded = False
+            self.connects += 1
+
+            while not self._stop.is_set():
+                try:
+                    raw = ws.recv(timeout=RECV_TIMEOUT_SECONDS)
+                except TimeoutError:
+                    continue
+                msg = json.loads(raw)
+                kind = msg.get("type")
+                if kind == "event":
+                    data = (msg.get("event") or {}).get("data") or {}
+                    if not data.get("entity_id"):
+                        continue
+                    if seeded:
+                        self.store.apply(data["entity_id"], data.get("new_state"))
+                    else:
+                        buffered.append(data)
+                elif kind == "result" and msg.get("id") == 2:
+                    if not msg.get("success"):
+                        raise ConnectionError(f"get_states failed: {msg.get('error')}")
+                    self.store.seed(msg.get("result") or [])
+                    for data in buffered:
+                        self.store.apply(data["entity_id"], data.get("new_state"))
+                    buffered.clear()
+                    seeded = True
+                    self.store.live = True
+                    self.last_error = None
+                    logger.info("Home Assistant state store seeded with %d entities", len(self.store.all()))
+                elif kind == "result" and not msg.get("success"):
+                    raise ConnectionError(f"Home Assistant request {msg.get('id')} failed: {msg.get('error')}")
+
+
+_store = EntityStore()
+_stream: Optional[StateStream] = None
+_stream_lock = threading.Lock()
+
+
+def get_state_store() -> EntityStore:
+    return _store
+
+
+def start_state_stream(api_url: Optional[str] = None, token: Optional[str] = None) -> Optional[StateStream]:
+    """Start streaming HA state into the shared store. No-op without config or websockets."""
+    global _stream
+    api_url = api_url or os.getenv("HOME_ASSISTANT_API_URL", "")
+    token = token or os.getenv("HOME_ASSISTANT_TOKEN", "")
+    if not api_url or not token:
+        logger.info("Home Assistant not configured; state stream not started")
+        return None
+    if not WEBSOCKETS_AVAILABLE:
+        logger.warning("websockets not installed; Home Assistant state will be fetched per request. "
+                       "Run: pip install websockets")
+        return None
+    with _stream_lock:
+        if _stream is None or not _stream.running:
+            _stream = StateStream(api_url, token, _store)
+            _stream.start()
+        return _stream
+
+
+def stop_state_stream():
+    global _stream
+    with _stream_lock:
+        if _stream is not None:
+            _stream.stop()
+            _stream = None
+
+
+def get_stream_status() -> dict:
+    """State store health for /api/health."""
+    stream = _stream
+    status = {**_store.status(), "websockets_available": WEBSOCKETS_AVAILABLE, "running": False}
+    if stream is not None:
+        status.update(running=stream.running, url=stream.url, connects=stream.connects,
+                      last_error=stream.last_error)
+    return status
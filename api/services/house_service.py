@@ -1,8 +1,15 @@
 """House service — reads room notes from the Obsidian vault."""
+import hashlib
+import json
+import math
 import os
 import re
+import threading
 from pathlib import Path
-import yaml
+
+from api.services.frontmatter_cache import read_frontmatter
+from api.services.home_assistant_service import call_service_batch
+from api.services.vault_index import folder_notes
 
 
 ROOMS_FOLDER = "1 Personal/3 Resources/Property/Rooms"
@@ -41,20 +48,8 @@ def _coerce_float(val) -> float | None:
 
 
 def _parse_frontmatter(filepath: Path) -> dict | None:
-    """Parse YAML frontmatter from any vault note. Returns None on error."""
-    try:
-        content = filepath.read_text(encoding="utf-8")
-    except OSError:
-        return None
-    if not content.startswith("---"):
-        return None
-    end = content.find("---", 3)
-    if end == -1:
-        return None
-    try:
-        return yaml.safe_load(content[3:end]) or {}
-    except yaml.YAMLError:
-        return None
+    """Parse YAML frontmatter from any vault note (cached). Returns None on error."""
+    return read_frontmatter(filepath)
 
 
 def _strip_wikilink(val) -> str:
@@ -70,7 +65,7 @@ def _build_sensor_map() -> dict[str, str]:
     result: dict[str, str] = {}
     if not sensors_dir.exists():
         return result
-    for f in sensors_dir.glob("*.md"):
+    for f in folder_notes(_vault_path(), sensors_dir):
         fm = _parse_frontmatter(f)
         if fm is None:
             continue
@@ -86,7 +81,7 @@ def _build_lights_map() -> dict[str, list[str]]:
     result: dict[str, list[str]] = {}
     if not lights_dir.exists():
         return result
-    for f in lights_dir.glob("*.md"):
+    for f in folder_notes(_vault_path(), lights_dir):
         fm = _parse_frontmatter(f)
         if fm is None:
             continue
@@ -141,15 +136,105 @@ def _parse_room_file(filepath: Path) -> dict | None:
     }
 
 
+ADJACENCY_TOLERANCE = 0.05
+MIN_WALL_OVERLAP = 0.5
+
+
+def _link_pair(a: dict, b: dict, try_update) -> None:
+    """Record the nav links between two rooms if they share a wall."""
+    ax0, ax1 = a["x"], a["x"] + a["w"]
+    az0, az1 = a["z"], a["z"] + a["d"]
+    bx0, bx1 = b["x"], b["x"] + b["w"]
+    bz0, bz1 = b["z"], b["z"] + b["d"]
+
+    # East-west adjacency
+    if abs(ax1 - bx0) < ADJACENCY_TOLERANCE:
+        z_overlap = min(az1, bz1) - max(az0, bz0)
+        if z_overlap >= MIN_WALL_OVERLAP:
+            start = max(az0, bz0)
+            try_update(a["id"], "east", b["id"], start)
+            try_update(b["id"], "west", a["id"], start)
+    elif abs(bx1 - ax0) < ADJACENCY_TOLERANCE:
+        z_overlap = min(az1, bz1) - max(az0, bz0)
+        if z_overlap >= MIN_WALL_OVERLAP:
+            start = max(az0, bz0)
+            try_update(b["id"], "east", a["id"], start)
+            try_update(a["id"], "west", b["id"], start)
+
+    # North-south adjacency (south = increasing z)
+    if abs(az1 - bz0) < ADJACENCY_TOLERANCE:
+        x_overlap = min(ax1, bx1) - max(ax0, bx0)
+        if x_overlap >= MIN_WALL_OVERLAP:
+            start = max(ax0, bx0)
+            try_update(a["id"], "south", b["id"], start)
+            try_update(b["id"], "north", a["id"], start)
+    elif abs(bz1 - az0) < ADJACENCY_TOLERANCE:
+        x_overlap = min(ax1, bx1) - max(ax0, bx0)
+        if x_overlap >= MIN_WALL_OVERLAP:
+            start = max(ax0, bx0)
+            try_update(b["id"], "south", a["id"], start)
+            try_update(a["id"], "north", b["id"], start)
+
+
+def _wall_candidates(rooms: list[dict], indices: list[int], pos: str, size: str,
+                     span_pos: str, span_size: str) -> set[tuple[int, int]]:
+    """Pairs (i, j), i < j, where one room's far wall along ``pos`` meets the
+    other's near wall and their spans along ``span_pos`` may overlap enough.
+
+    Wall coordinates are swept in sorted order and split into lines wherever
+    consecutive values are ADJACENCY_TOLERANCE or more apart, so every
+    abutting pair lands on the same line. Each line is then swept along the
+    other axis, keeping only spans that can still overlap by MIN_WALL_OVERLAP.
+    """
+    edges = []
+    for i in indices:
+        r = rooms[i]
+        edges.append((r[pos] + r[size], 1, i))
+        edges.append((r[pos], 0, i))
+    edges.sort()
+
+    pairs: set[tuple[int, int]] = set()
+    line: list[tuple[float, int, int]] = []
+
+    def match_line():
+        if not any(side for _, side, _ in line) or all(side for _, side, _ in line):
+            return
+        spans = sorted(
+            (rooms[i][span_pos], rooms[i][span_pos] + rooms[i][span_size], side, i, value)
+            for value, side, i in line
+        )
+        active: tuple[list, list] = ([], [])
+        for s0, s1, side, i, value in spans:
+            for group in active:
+                group[:] = [e for e in group if e[0] - s0 >= MIN_WALL_OVERLAP]
+            for e1, j, other in active[1 - side]:
+                if i != j and abs(value - other) < ADJACENCY_TOLERANCE and min(s1, e1) - s0 >= MIN_WALL_OVERLAP:
+                    pairs.add((i, j) if i < j else (j, i))
+            active[side].append((s1, i, value))
+
+    prev = None
+    for edge in edges:
+        if line and edge[0] - prev >= ADJACENCY_TOLERANCE:
+            match_line()
+            line = []
+        line.append(edge)
+        prev = edge[0]
+    if line:
+        match_line()
+    return pairs
+
+
 def _compute_links(rooms: list[dict]) -> dict[str, dict[str, str]]:
     """Derive directional nav links from wall adjacency.
 
     When multiple rooms share a wall in the same direction, prefer the one
-    whose shared wall segment starts earliest (lowest coordinate value).
-    """
-    TOLERANCE = 0.05
-    MIN_OVERLAP = 0.5
+    whose shared wall segment starts earliest (lowest coordinate value); on a
+    tie the pair that comes first in ``rooms`` order wins.
 
+    Candidate pairs come from a sweep along x and z (O(n log n) plus the
+    number of abutting walls) instead of comparing every pair; they are
+    checked in the same order as a full pairwise scan, so results match it.
+    """
     # best[room_id][direction] = (target_id, overlap_start)
     best: dict[str, dict[str, tuple[str, float]]] = {r["id"]: {} for r in rooms}
 
@@ -158,40 +243,17 @@ def _compute_links(rooms: list[dict]) -> dict[str, dict[str, str]]:
         if existing is None or overlap_start < existing[1]:
             best[room_id][direction] = (target_id, overlap_start)
 
-    for i, a in enumerate(rooms):
-        for b in rooms[i + 1:]:
-            ax0, ax1 = a["x"], a["x"] + a["w"]
-            az0, az1 = a["z"], a["z"] + a["d"]
-            bx0, bx1 = b["x"], b["x"] + b["w"]
-            bz0, bz1 = b["z"], b["z"] + b["d"]
-
-            # East-west adjacency
-            if abs(ax1 - bx0) < TOLERANCE:
-                z_overlap = min(az1, bz1) - max(az0, bz0)
-                if z_overlap >= MIN_OVERLAP:
-                    start = max(az0, bz0)
-                    try_update(a["id"], "east", b["id"], start)
-                    try_update(b["id"], "west", a["id"], start)
-            elif abs(bx1 - ax0) < TOLERANCE:
-                z_overlap = min(az1, bz1) - max(az0, bz0)
-                if z_overlap >= MIN_OVERLAP:
-                    start = max(az0, bz0)
-                    try_update(b["id"], "east", a["id"], start)
-                    try_update(a["id"], "west", b["id"], start)
-
-            # North-south adjacency (south = increasing z)
-            if abs(az1 - bz0) < TOLERANCE:
-                x_overlap = min(ax1, bx1) - max(ax0, bx0)
-                if x_overlap >= MIN_OVERLAP:
-                    start = max(ax0, bx0)
-                    try_update(a["id"], "south", b["id"], start)
-                    try_update(b["id"], "north", a["id"], start)
-            elif abs(bz1 - az0) < TOLERANCE:
-                x_overlap = min(ax1, bx1) - max(ax0, bx0)
-                if x_overlap >= MIN_OVERLAP:
-                    start = max(ax0, bx0)
-                    try_update(b["id"], "south", a["id"], start)
-                    try_update(a["id"], "north", b["id"], start)
+    finite, other = [], []
+    for i, r in enumerate(rooms):
+        (finite if all(math.isfinite(r[k]) for k in ("x", "z", "w", "d")) else other).append(i)
+    pairs = _wall_candidates(rooms, finite, "x", "w", "z", "d")
+    pairs |= _wall_candidates(rooms, finite, "z", "d", "x", "w")
+    # NaN/inf coordinates don't sort; pair those rooms with everything
+    for i in other:
+        pairs.update((min(i, j), max(i, j)) for j in range(len(rooms)) if j != i)
+
+    for i, j in sorted(pairs):
+        _link_pair(rooms[i], rooms[j], try_update)
 
     return {
         room_id: {dir_: target for dir_, (target, _) in dirs.items()}
@@ -214,7 +276,7 @@ def get_rooms() -> dict:
     # Sort so emoji-prefixed files (higher Unicode) come last and win over slug duplicates
     seen_ids: set[str] = set()
     rooms: list[dict] = []
-    for f in sorted(folder.glob("*.md")):
+    for f in folder_notes(vault, folder):
         if f.name.startswith("_"):
             continue
         room = _parse_room_file(f)
@@ -232,3 +294,60 @@ def get_rooms() -> dict:
         room["light_entity_ids"] = lights_map.get(room["id"], [])
 
     return {"rooms": rooms, "source": "vault", "count": len(rooms)}
+
+
+# The assembled /rooms payload, rebuilt only when a room, sensor or light note
+# (or the folder layout) changes.
+_rooms_cache: dict = {"fingerprint": None, "payload": None, "etag": None}
+_rooms_cache_lock = threading.Lock()
+
+
+def _rooms_fingerprint() -> tuple:
+    """(mtime_ns, size) of every note get_rooms reads; a stat per note, no parsing."""
+    vault = _vault_path()
+    parts: list = [vault]
+    if not vault:
+        return tuple(parts)
+    for folder in (_rooms_dir(), _sensors_dir(), _lights_dir()):
+        parts.append(str(folder))
+        if not folder.exists():
+            parts.append(None)
+            continue
+        for f in folder_notes(vault, folder):
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            parts.append((f.name, st.st_mtime_ns, st.st_size))
+    return tuple(parts)
+
+
+def get_rooms_with_etag() -> tuple[dict, str]:
+    """Return (get_rooms() payload, ETag), reusing the last payload if no note changed.
+
+    The ETag hashes the payload itself, so touching a note without changing
+    what it contributes still yields the same tag. The payload is shared;
+    don't mutate it.
+    """
+    fingerprint = _rooms_fingerprint()
+    with _rooms_cache_lock:
+        if _rooms_cache["fingerprint"] == fingerprint:
+            return _rooms_cache["payload"], _rooms_cache["etag"]
+        payload = get_rooms()
+        digest = hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:20]
+        etag = f'W/"{digest}"'
+        _rooms_cache.update(fingerprint=fingerprint, payload=payload, etag=etag)
+        return payload, etag
+
+
+def set_room_lights(room_id: str, service: str = "toggle", mode: str = "single") -> dict:
+    """Call light.<service> for every light in a room as one batch.
+
+    Raises KeyError for an unknown room; see call_service_batch for ``mode``
+    and the per-entity results.
+    """
+    payload, _ = get_rooms_with_etag()
+    room = next((r for r in payload["rooms"] if r["id"] == room_id), None)
+    if room is None:
+        raise KeyError(room_id)
+    return {"room_id": room_id, **call_service_batch("light", service, room["light_entity_ids"], mode=mode)}
@@ -0,0 +1,302 @@
+"""
+Sharded nmap scans with SQLite history.
+
+A target network is split into SHARD_PREFIX-sized blocks that are scanned in
+parallel, one nmap subprocess per shard (at most MAX_SCAN_WORKERS at once).
+run_scan() yields each host's result as soon as its shard finishes and stores
+it in NMAP_DB_PATH keyed by (host, port set, timestamp), so past scans reload
+without re-running nmap and diffs between scans are plain SQL reads.
+
+Host results keep python-nmap's per-host layout ({"status", "tcp", ...}).
+With ``loopback_only`` every target must resolve to 127.0.0.0/8, which makes
+the whole pipeline safe to exercise on a dev machine.
+"""
+import ipaddress
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterator, Optional
+
+try:
+    import nmap
+    NMAP_AVAILABLE = True
+except ImportError:
+    nmap = None
+    NMAP_AVAILABLE = False
+
+logger = logging.getLogger("codiak.nmap_scans")
+
+NMAP_DB_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "nmap_scans.db",
+)
+# Networks larger than this are split into blocks of this prefix length
+SHARD_PREFIX = 28
+MAX_SCAN_WORKERS = 4
+SCHEMA_VERSION = 1
+
+# profile -> (nmap arguments, port set label)
+SCAN_PROFILES = {
+    "quick": ("-T4 --top-ports 20", "top20"),
+    "full": ("-T4 -p 1-1024", "1-1024"),
+    "os": ("-O -sV -T4", "os+version"),
+    "traceroute": ("--traceroute -T4", "traceroute"),
+}
+
+_SCHEMA = """
+CREATE TABLE scans (
+    id INTEGER PRIMARY KEY,
+    target TEXT NOT NULL,
+    arguments TEXT NOT NULL,
+    port_set TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    shards INTEGER NOT NULL,
+    hosts INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL
+);
+CREATE TABLE host_results (
+    host TEXT NOT NULL,
+    port_set TEXT NOT NULL,
+    scanned_at REAL NOT NULL,
+    scan_id INTEGER NOT NULL REFERENCES scans(id) ON DELETE CASCADE,
+    state TEXT NOT NULL,
+    open_ports TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (host, port_set, scanned_at)
+);
+CREATE INDEX idx_host_results_scan ON host_results(scan_id, host);
+"""
+_TABLES = ("host_results", "scans")
+
+_db_lock = threading.Lock()
+_db_ready: set[str] = set()
+
+
+def connect(db_path: Optional[str] = None) -> sqlite3.Connection:
+    db_path = db_path or NMAP_DB_PATH
+    with _db_lock:
+        if db_path not in _db_ready:
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            conn = sqlite3.connect(db_path)
+            try:
+                if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                    for table in _TABLES:
+                        conn.execute(f"DROP TABLE IF EXISTS {table}")
+                    conn.executescript(_SCHEMA)
+                    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                    conn.commit()
+            finally:
+                conn.close()
+            _db_ready.add(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+def is_loopback_target(target: str) -> bool:
+    """Whether every address ``target`` (IP, CIDR or hostname) covers is loopback."""
+    try:
+        return ipaddress.ip_network(target, strict=False).is_loopback
+    except ValueError:
+        pass
+    try:
+        return all(ipaddress.ip_address(info[4][0]).is_loopback
+                   for info in socket.getaddrinfo(target, None))
+    except (OSError, ValueError):
+        return False
+
+
+def shard_targets(target: str, prefix: int = SHARD_PREFIX) -> list[str]:
+    """Split a CIDR into /``prefix`` blocks; hosts, names and nmap ranges stay whole."""
+    try:
+        network = ipaddress.ip_network(target, strict=False)
+    except ValueError:
+        return [target]
+    if network.version != 4 or network.prefixlen >= prefix:
+        return [str(network)]
+    return [str(n) for n in network.subnets(new_prefix=prefix)]
+
+
+def port_set_for(profile: str, ports: Optional[str] = None) -> tuple[str, str]:
+    """(nmap arguments, port set label) for a profile, or for an explicit port list."""
+    if ports:
+        return f"-T4 -p {ports}", ports.replace(" ", "")
+    if profile not in SCAN_PROFILES:
+        raise ValueError(f"Unknown scan profile '{profile}' (expected one of {', '.join(SCAN_PROFILES)})")
+    return SCAN_PROFILES[profile]
+
+
+def nmap_shard(hosts: str, arguments: str) -> dict[str, dict]:
+    """Scan one shard with its own nmap subprocess; {host: python-nmap host dict}."""
+    if not NMAP_AVAILABLE:
+        raise RuntimeError("python-nmap not installed. Run: pip install python-nmap")
+    result = nmap.PortScanner().scan(hosts=hosts, arguments=arguments)
+    return result.get("scan", {})
+
+
+def open_ports(host_data: dict) -> list[str]:
+    """Sorted "port/proto" entries with state open."""
+    found = []
+    for proto in ("tcp", "udp"):
+        for port, info in (host_data.get(proto) or {}).items():
+            if info.get("state") == "open":
+                found.append((int(port), proto))
+    return [f"{port}/{proto}" for port, proto in sorted(found)]
+
+
+def run_scan(target: str, profile: str = "quick", ports: Optional[str] = None,
+             max_workers: int = MAX_SCAN_WORKERS, shard_prefix: int = SHARD_PREFIX,
+             loopback_only: bool = False, scan_fn: Optional[Callable[[str, str], dict]] = None,
+             db_path: Optional[str] = None) -> Iterator[dict]:
+    """Scan ``target`` shard by shard, yielding events as results arrive:
+
+    {"type": "start", "scan_id", "shards", "port_set"}
+    {"type": "host", "host", "data", "open_ports"}   (per host, as its shard completes)
+    {"type": "shard", "shard", "hosts", "done"}      (a shard finished; done = shards so far)
+    {"type": "error", "shard", "error", "done"}      (a shard failed; others continue)
+    {"type": "done", "scan_id", "hosts", "status", "elapsed"}
+
+    ``scan_fn(hosts, arguments)`` replaces nmap_shard (e.g. for tests). Closing
+    the generator early cancels pending shards and marks the scan cancelled.
+    """
+    target = target.strip()
+    if not target:
+        raise ValueError("No scan target given")
+    if loopback_only and not is_loopback_target(target):
+        raise ValueError(f"Loopback test mode only scans 127.0.0.0/8, not '{target}'")
+    arguments, port_set = port_set_for(profile, ports)
+    scan_fn = scan_fn or nmap_shard
+    shards = shard_targets(target, shard_prefix)
+
+    conn = connect(db_path)
+    start = time.time()
+    scan_id = conn.execute(
+        "INSERT INTO scans (target, arguments, port_set, started_at, shards, status) VALUES (?, ?, ?, ?, ?, 'running')",
+        (target, arguments, port_set, start, len(shards)),
+    ).lastrowid
+    conn.commit()
+
+    hosts = failed = 0
+    status = "cancelled"
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(shards))), thread_name_prefix="nmap-shard")
+    try:
+        yield {"type": "start", "scan_id": scan_id, "shards": len(shards), "port_set": port_set}
+        pending = {pool.submit(scan_fn, shard, arguments): shard for shard in shards}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                shard = pending.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    failed += 1
+                    logger.warning("nmap shard %s failed: %s", shard, e)
+                    yield {"type": "error", "shard": shard, "error": str(e), "done": len(shards) - len(pending)}
+                    continue
+                scanned_at = time.time()
+                found = {host: open_ports(data) for host, data in results.items()}
+                conn.executemany(
+                    "INSERT OR REPLACE INTO host_results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(host, port_set, scanned_at, scan_id, (data.get("status") or {}).get("state", "unknown"),
+                      json.dumps(found[host]), json.dumps(data)) for host, data in results.items()],
+                )
+                conn.commit()
+                for host, data in results.items():
+                    hosts += 1
+                    yield {"type": "host", "host": host, "data": data, "open_ports": found[host]}
+                yield {"type": "shard", "shard": shard, "hosts": len(results), "done": len(shards) - len(pending)}
+        status = "complete" if not failed else ("failed" if failed == len(shards) else "partial")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        conn.execute("UPDATE scans SET finished_at = ?, hosts = ?, status = ? WHERE id = ?",
+                     (time.time(), hosts, status, scan_id))
+        conn.commit()
+        conn.close()
+    yield {"type": "done", "scan_id": scan_id, "hosts": hosts, "status": status,
+           "elapsed": round(time.time() - start, 2)}
+
+
+def list_scans(limit: int = 50, port_set: Optional[str] = None,
+               db_path: Optional[str] = None) -> list[dict]:
+    """Most recent scans first, optionally only those of one port set."""
+    conn = connect(db_path)
+    try:
+        sql = "SELECT * FROM scans"
+        params: list = []
+        if port_set:
+            sql += " WHERE port_set = ?"
+            params.append(port_set)
+        sql += " ORDER BY started_at DESC LIMIT ?"
+        return [dict(r) for r in conn.execute(sql, params + [limit])]
+    finally:
+        conn.close()
+
+
+def _load_host_data(text: str) -> dict:
+    """A stored host result with python-nmap's int port keys restored (JSON made them strings)."""
+    data = json.loads(text)
+    for proto in ("tcp", "udp", "sctp", "ip"):
+        ports = data.get(proto)
+        if isinstance(ports, dict):
+            data[proto] = {int(port) if str(port).isdigit() else port: info for port, info in ports.items()}
+    return data
+
+
+def load_scan(scan_id: int, db_path: Optional[str] = None) -> Optional[dict]:
+    """{"scan": row, "hosts": {host: data}} for a stored scan, or None."""
+    conn = connect(db_path)
+    try:
+        scan = conn.execute("SELECT * FROM scans WHERE id = ?", (scan_id,)).fetchone()
+        if scan is None:
+            return None
+        hosts = {r["host"]: _load_host_data(r["data"]) for r in conn.execute(
+            "SELECT host, data FROM host_results WHERE scan_id = ? ORDER BY host", (scan_id,))}
+        return {"scan": dict(scan), "hosts": hosts}
+    finally:
+        conn.close()
+
+
+def latest_host_result(host: str, port_set: str, db_path: Optional[str] = None) -> Optional[dict]:
+    """Most recent stored result for ``host`` with ``port_set``: {"scanned_at", "data"}."""
+    conn = connect(db_path)
+    try:
+        row = conn.execute(
+            "SELECT scanned_at, data FROM host_results WHERE host = ? AND port_set = ? "
+            "ORDER BY scanned_at DESC LIMIT 1",
+            (host, port_set),
+        ).fetchone()
+        return {"scanned_at": row["scanned_at"], "data": _load_host_data(row["data"])} if row else None
+    finally:
+        conn.close()
+
+
+def diff_scans(old_id: int, new_id: int, db_path: Optional[str] = None) -> dict:
+    """Hosts and open ports that appeared or disappeared between two scans."""
+    conn = connect(db_path)
+    try:
+        def ports(scan_id):
+            return {r["host"]: set(json.loads(r["open_ports"])) for r in conn.execute(
+                "SELECT host, open_ports FROM host_results WHERE scan_id = ?", (scan_id,))}
+        old, new = ports(old_id), ports(new_id)
+    finally:
+        conn.close()
+    opened, closed = {}, {}
+    for host in old.keys() & new.keys():
+        if new[host] - old[host]:
+            opened[host] = sorted(new[host] - old[host], key=lambda p: int(p.split("/")[0]))
+        if old[host] - new[host]:
+            closed[host] = sorted(old[host] - new[host], key=lambda p: int(p.split("/")[0]))
+    return {
+        "new_hosts": sorted(new.keys() - old.keys()),
+        "gone_hosts": sorted(old.keys() - new.keys()),
+        "opened": opened,
+        "closed": closed,
+    }
@@ -6,6 +6,8 @@ import os
 import json
 from typing import Optional
 
+from api.services.vault_index import SKIP_DIRS, get_vault_index
+
 try:
     import openai
     from openai import OpenAI
@@ -31,7 +33,7 @@ def build_tree(root_path: str, max_depth: int, current_depth: int = 0) -> Option
 
     nodes = []
     for entry in entries:
-        if entry in (".obsidian", ".trash"):
+        if entry in SKIP_DIRS:
             continue
         full_path = os.path.join(root_path, entry)
         if os.path.isdir(full_path):
@@ -76,13 +78,9 @@ def find_note_path(vault_path: str, note_query: str) -> Optional[str]:
     if os.path.isfile(candidate + ".md"):
         return os.path.abspath(candidate + ".md")
 
-    target_lower = note_query.lower().removesuffix(".md")
-    for dirpath, dirnames, filenames in os.walk(vault_path):
-        dirnames[:] = [d for d in dirnames if d not in (".obsidian", ".trash")]
-        for fname in filenames:
-            if os.path.splitext(fname)[0].lower() == target_lower:
-                return os.path.join(dirpath, fname)
-    return None
+    index = get_vault_index(vault_path)
+    rel_path = index.find_by_title(note_query.removesuffix(".md"))
+    return index.full_path(rel_path) if rel_path else None
 
 
 # ---------------------------------------------------------------------------
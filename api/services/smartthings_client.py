@@ -0,0 +1,250 @@
+"""
+SmartThings REST client shared by the Streamlit dashboard and the API.
+
+Device statuses are fetched with async HTTP, at most ``max_concurrency``
+requests in flight, and cached per device for STATUS_TTL_SECONDS. Once an
+entry expires it is revalidated with If-None-Match when SmartThings sent an
+ETag, so an unchanged device costs a 304 instead of its full status.
+
+Passing ``capabilities`` (e.g. ["switch"]) fetches only those capabilities of
+each device's main component, skipping ones the device doesn't have; a fresh
+full-status entry also satisfies a capability request.
+
+Clients are shared per (api_url, token) via get_client(), so the caches
+survive Streamlit reruns. Each call opens its own httpx.AsyncClient, which
+keeps the client usable from asyncio.run() in Streamlit and from FastAPI's
+event loop alike.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Optional
+
+import httpx
+
+DEFAULT_API_URL = "https://api.smartthings.com"
+STATUS_TTL_SECONDS = 30
+HEALTH_TTL_SECONDS = 60
+DEVICES_TTL_SECONDS = 300
+MAX_CONCURRENCY = 10
+REQUEST_TIMEOUT = httpx.Timeout(10.0, connect=3.05)
+
+
+def device_capabilities(device: dict) -> set[str]:
+    """Capability ids of a device's main (first) component."""
+    comps = device.get("components") or []
+    if not comps:
+        return set()
+    return {c.get("id", "") for c in comps[0].get("capabilities") or []}
+
+
+def summarize_status(status: Optional[dict]) -> str:
+    """'switch: on, level: 80'-style summary of a status payload's main component."""
+    if not status:
+        return "Unavailable"
+    main = (status.get("components") or {}).get("main")
+    if main is None:
+        return "Unavailable"
+    cap_states = []
+    for cap, val in main.items():
+        if isinstance(val, dict) and "value" in val:
+            cap_states.append(f"{cap}: {val['value']}")
+        elif isinstance(val, dict):
+            for k, v in val.items():
+                if isinstance(v, dict) and "value" in v:
+                    cap_states.append(f"{cap}.{k}: {v['value']}")
+    return ", ".join(cap_states) if cap_states else "OK"
+
+
+class SmartThingsClient:
+    def __init__(self, api_url: str, token: str, max_concurrency: int = MAX_CONCURRENCY,
+                 status_ttl: float = STATUS_TTL_SECONDS, health_ttl: float = HEALTH_TTL_SECONDS):
+        self.api_url = api_url.rstrip("/")
+        self.token = token
+        self.max_concurrency = max_concurrency
+        self.status_ttl = status_ttl
+        self.health_ttl = health_ttl
+        self._lock = threading.Lock()
+        # (kind, device_id, capability or None) -> {"data", "etag", "fetched_at"}
+        self._cache: dict[tuple, dict] = {}
+        self._devices: Optional[dict] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(max_connections=self.max_concurrency,
+                              max_keepalive_connections=self.max_concurrency)
+        return httpx.AsyncClient(
+            base_url=self.api_url,
+            headers={"Authorization": f"Bearer {self.token}", "Content-Type": "application/json"},
+            timeout=REQUEST_TIMEOUT,
+            limits=limits,
+        )
+
+    def _cached(self, key: tuple, ttl: float) -> tuple[Optional[dict], bool]:
+        """(entry, fresh) for a cache key."""
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is None:
+            return None, False
+        return entry, time.monotonic() - entry["fetched_at"] < ttl
+
+    async def _get(self, http: httpx.AsyncClient, sem: asyncio.Semaphore, key: tuple,
+                   path: str, ttl: float, refresh: bool) -> tuple[dict, str]:
+        """Cached GET of one resource; returns (data, "cached" | "revalidated" | "fresh")."""
+        entry, fresh = self._cached(key, ttl)
+        if fresh and not refresh:
+            return entry["data"], "cached"
+        headers = {"If-None-Match": entry["etag"]} if entry and entry["etag"] and not refresh else {}
+        async with sem:
+            resp = await http.get(path, headers=headers)
+        if resp.status_code == 304 and entry is not None:
+            with self._lock:
+                self._cache[key] = {**entry, "fetched_at": time.monotonic()}
+            return entry["data"], "revalidated"
+        resp.raise_for_status()
+        data = resp.json()
+        with self._lock:
+            self._cache[key] = {"data": data, "etag": resp.headers.get("etag"), "fetched_at": time.monotonic()}
+        return data, "fresh"
+
+    async def list_devices(self, refresh: bool = False) -> list[dict]:
+        """All devices, following pagination, cached for DEVICES_TTL_SECONDS."""
+        with self._lock:
+            cached = self._devices
+        if cached and not refresh and time.monotonic() - cached["fetched_at"] < DEVICES_TTL_SECONDS:
+            return cached["items"]
+        items = []
+        async with self._http() as http:
+            url = "/v1/devices"
+            while url:
+                resp = await http.get(url)
+                resp.raise_for_status()
+                data = resp.json()
+                items.extend(data.get("items", []))
+                url = ((data.get("_links") or {}).get("next") or {}).get("href")
+        with self._lock:
+            self._devices = {"items": items, "fetched_at": time.monotonic()}
+        return items
+
+    async def _device_status(self, http, sem, device: dict, capabilities: Optional[list[str]],
+                             refresh: bool) -> tuple[dict, list[str]]:
+        device_id = device["deviceId"]
+        full_key = ("status", device_id, None)
+        if not capabilities:
+            data, source = await self._get(http, sem, full_key, f"/v1/devices/{device_id}/status",
+                                           self.status_ttl, refresh)
+            return data, [source]
+
+        entry, fresh = self._cached(full_key, self.status_ttl)
+        if fresh and not refresh:
+            main = (entry["data"].get("components") or {}).get("main") or {}
+            return {"components": {"main": {c: main[c] for c in capabilities if c in main}}}, ["cached"]
+
+        wanted = [c for c in capabilities if c in device_capabilities(device)]
+        results = await asyncio.gather(*(
+            self._get(http, sem, ("status", device_id, cap),
+                      f"/v1/devices/{device_id}/components/main/capabilities/{cap}/status",
+                      self.status_ttl, refresh)
+            for cap in wanted
+        ))
+        main = {cap: data for cap, (data, _) in zip(wanted, results)}
+        return {"components": {"main": main}}, [source for _, source in results] or ["cached"]
+
+    async def fetch_statuses(self, devices: list[dict], capabilities: Optional[list[str]] = None,
+                             refresh: bool = False) -> dict:
+        """Statuses for ``devices`` (device dicts from list_devices).
+
+        Returns {statuses: {device_id: status}, errors: {device_id: message},
+        cached, revalidated, fresh, elapsed}. A device counts as cached only
+        if nothing was requested for it, and as fresh if any part was
+        downloaded. ``refresh`` bypasses the cache.
+        """
+        start = time.perf_counter()
+        sem = asyncio.Semaphore(self.max_concurrency)
+        devices = [d for d in devices if d.get("deviceId")]
+        counts = {"cached": 0, "revalidated": 0, "fresh": 0}
+        statuses: dict[str, dict] = {}
+        errors: dict[str, str] = {}
+
+        async with self._http() as http:
+            results = await asyncio.gather(
+                *(self._device_status(http, sem, d, capabilities, refresh) for d in devices),
+                return_exceptions=True,
+            )
+        for device, result in zip(devices, results):
+            device_id = device["deviceId"]
+            if isinstance(result, httpx.HTTPStatusError):
+                errors[device_id] = f"HTTP {result.response.status_code}"
+                continue
+            if isinstance(result, Exception):
+                errors[device_id] = str(result) or type(result).__name__
+                continue
+            data, sources = result
+            statuses[device_id] = data
+            if "fresh" in sources:
+                counts["fresh"] += 1
+            elif "revalidated" in sources:
+                counts["revalidated"] += 1
+            else:
+                counts["cached"] += 1
+
+        return {"statuses": statuses, "errors": errors, **counts,
+                "elapsed": round(time.perf_counter() - start, 3)}
+
+    async def fetch_health(self, devices: list[dict], refresh: bool = False) -> dict[str, str]:
+        """{device_id: "online" | "offline" | ... | "unknown"}, cached for HEALTH_TTL_SECONDS."""
+        sem = asyncio.Semaphore(self.max_concurrency)
+        ids = [d["deviceId"] for d in devices if d.get("deviceId")]
+        async with self._http() as http:
+            results = await asyncio.gather(*(
+                self._get(http, sem, ("health", device_id, None), f"/v1/devices/{device_id}/health",
+                          self.health_ttl, refresh)
+                for device_id in ids
+            ), return_exceptions=True)
+        return {
+            device_id: "unknown" if isinstance(r, Exception) else (r[0].get("state") or "unknown").lower()
+            for device_id, r in zip(ids, results)
+        }
+
+    async def send_command(self, device_id: str, capability: str, command: str,
+                           arguments: Optional[list] = None, component: str = "main") -> dict:
+        """Run one device command and drop the device's cached status."""
+        body = {"commands": [{"component": component, "capability": capability, "command": command,
+                              **({"arguments": arguments} if arguments else {})}]}
+        async with self._http() as http:
+            resp = await http.post(f"/v1/devices/{device_id}/commands", json=body)
+        resp.raise_for_status()
+        self.invalidate(device_id)
+        return resp.json()
+
+    def invalidate(self, device_id: Optional[str] = None):
+        """Drop cached status/health for one device or, with no argument, everything."""
+        with self._lock:
+            if device_id is None:
+                self._cache.clear()
+                self._devices = None
+            else:
+                for key in [k for k in self._cache if k[1] == device_id]:
+                    del self._cache[key]
+
+
+_clients: dict[tuple[str, str], SmartThingsClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_url: Optional[str] = None, token: Optional[str] = None) -> SmartThingsClient:
+    """Shared client for (api_url, token), defaulting to SMARTTHINGS_API_URL / SMARTTHINGS_TOKEN."""
+    api_url = (api_url or os.getenv("SMARTTHINGS_API_URL", "") or DEFAULT_API_URL).rstrip("/")
+    token = token or os.getenv("SMARTTHINGS_TOKEN", "")
+    if not token:
+        raise ValueError("SMARTTHINGS_TOKEN not configured in .env")
+    with _clients_lock:
+        client = _clients.get((api_url, token))
+        if client is None:
+            client = _clients[(api_url, token)] = SmartThingsClient(api_url, token)
+        return client
+
+
+def run(coro):
+    """Run a client coroutine from synchronous code (Streamlit scripts, CLI)."""
+    return asyncio.run(coro)
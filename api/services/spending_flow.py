@@ -0,0 +1,112 @@
+"""
+Group → Category → Payee spending flows.
+
+Shared by the Dragon Keeper spending-flow chart and the YNAB alluvial diagram
+tool. Spending is first reduced to one row per (group, category, payee):
+flow_sql() builds that GROUP BY for SQLite sources, and aggregate_frame()
+does the same with a pandas groupby for transactions from an export file or
+the YNAB API. build_flow_graph() then applies the top-N cut to those sums
+and only builds Sankey nodes and links for what survives.
+"""
+from collections import defaultdict
+from typing import Iterable
+
+FLOW_COLUMNS = ("group_name", "category_name", "payee_name")
+
+
+def month_bounds(month: str) -> tuple[str, str]:
+    """[first day, first day of the next month) for a YYYY-MM month."""
+    y, m = (int(p) for p in month.split("-")[:2])
+    date_end = f"{y + 1}-01-01" if m == 12 else f"{y}-{m + 1:02d}-01"
+    return f"{y}-{m:02d}-01", date_end
+
+
+def flow_sql(source: str, group: str, category: str, payee: str, amount: str, where: str) -> str:
+    """SELECT one row per (group, category, payee) with its amount and txn_count.
+
+    ``source`` is the FROM clause (with joins); ``group``, ``category``,
+    ``payee`` and ``amount`` are SQL expressions over it. Grouping is
+    positional: SQLite would resolve the aliases to same-named source
+    columns (e.g. t.category_name) instead.
+    """
+    return f"""
+        SELECT {group} AS group_name, {category} AS category_name, {payee} AS payee_name,
+               SUM({amount}) AS amount, COUNT(*) AS txn_count
+        FROM {source}
+        WHERE {where}
+        GROUP BY 1, 2, 3
+    """
+
+
+def aggregate_frame(df) -> list[dict]:
+    """Flow rows from a DataFrame with group_name, category_name, payee_name and amount columns."""
+    if df.empty:
+        return []
+    grouped = df.groupby(list(FLOW_COLUMNS), sort=False)["amount"].agg(amount="sum", txn_count="size")
+    return grouped.reset_index().to_dict("records")
+
+
+def build_flow_graph(rows: Iterable, min_amount: float = 0.0, max_groups: int = 15,
+                     max_categories: int = 25, max_payees: int = 30) -> dict:
+    """Sankey nodes and links for the top groups, categories and payees.
+
+    ``rows`` are flow rows (mappings with group_name, category_name,
+    payee_name, amount and optionally txn_count). Node totals cover all
+    spending; links below ``min_amount`` are dropped. Nodes are ordered
+    groups, categories, payees, each by total descending, with "column"
+    0, 1 and 2.
+    """
+    rows = [(r["group_name"], r["category_name"], r["payee_name"], r["amount"],
+             r["txn_count"] if "txn_count" in r.keys() else 1) for r in rows]
+
+    group_totals: dict[str, float] = defaultdict(float)
+    category_totals: dict[str, float] = defaultdict(float)
+    payee_totals: dict[str, float] = defaultdict(float)
+    for grp, cat, payee, amt, _ in rows:
+        group_totals[grp] += amt
+        category_totals[cat] += amt
+        payee_totals[payee] += amt
+
+    # Top N by total, before any node or link exists
+    top_groups = sorted(group_totals, key=group_totals.get, reverse=True)[:max_groups]
+    top_categories = sorted(category_totals, key=category_totals.get, reverse=True)[:max_categories]
+    top_payees = sorted(payee_totals, key=payee_totals.get, reverse=True)[:max_payees]
+
+    nodes = []
+    node_index: dict[str, int] = {}
+    for column, (prefix, names, totals) in enumerate((
+        ("group", top_groups, group_totals),
+        ("cat", top_categories, category_totals),
+        ("payee", top_payees, payee_totals),
+    )):
+        for name in names:
+            node_index[f"{prefix}:{name}"] = len(nodes)
+            nodes.append({"id": f"{prefix}:{name}", "name": name, "column": column,
+                          "total": round(totals[name], 2)})
+
+    group_cat: dict[tuple[int, int], float] = defaultdict(float)
+    cat_payee: dict[tuple[int, int], float] = defaultdict(float)
+    for grp, cat, payee, amt, _ in rows:
+        cat_node = node_index.get(f"cat:{cat}")
+        if cat_node is None:
+            continue
+        grp_node = node_index.get(f"group:{grp}")
+        payee_node = node_index.get(f"payee:{payee}")
+        if grp_node is not None:
+            group_cat[(grp_node, cat_node)] += amt
+        if payee_node is not None:
+            cat_payee[(cat_node, payee_node)] += amt
+
+    links = [
+        {"source": source, "target": target, "value": round(amt, 2)}
+        for flows in (group_cat, cat_payee)
+        for (source, target), amt in sorted(flows.items())
+        if amt >= min_amount
+    ]
+
+    return {
+        "total_spending": round(sum(r[3] for r in rows), 2),
+        "transaction_count": sum(r[4] for r in rows),
+        "nodes": nodes,
+        "links": links,
+    }
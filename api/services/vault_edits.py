@@ -0,0 +1,532 @@
+"""
+Transactional batch edits to an Obsidian vault.
+
+plan_edits() uses the vault index to find the notes a set of tag renames, link
+renames and note renames touches, reads each of them once and computes every
+change in a single pass. The resulting EditPlan can be previewed as unified
+diffs without touching the vault.
+
+apply_plan() writes the plan as one batch: files are written in parallel, each
+atomically (temp file + rename in the same directory), after a journal of the
+original contents is saved under JOURNAL_DIR. If any write fails the files
+already written are restored from the journal; rollback() undoes a committed
+batch later. The index is updated once at the end. Only the newest
+JOURNAL_KEEP journals (none older than JOURNAL_MAX_AGE_DAYS) are kept per
+vault.
+"""
+import difflib
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
+from api.services.vault_index import get_vault_index
+
+logger = logging.getLogger("codiak.vault_edits")
+
+JOURNAL_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "vault_edits",
+)
+MAX_IO_WORKERS = 8
+# Journals kept per vault for rollback(); older ones are pruned after each commit
+JOURNAL_KEEP = 20
+JOURNAL_MAX_AGE_DAYS = 30
+
+
+class VaultEditError(Exception):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Edit patterns
+# ---------------------------------------------------------------------------
+
+def _tag_pattern(tags: Iterable[str]) -> re.Pattern:
+    """Match whole #tags: #tag but not #tagged, #tag-x or a#tag (#tag/child is a match)."""
+    alternation = "|".join(re.escape(t) for t in sorted(tags, key=len, reverse=True))
+    return re.compile(r"(?<!\w)(" + alternation + r")(?![\w-])")
+
+
+# One frontmatter tag entry: indent, optional quote and '#', the tag, closing quote
+_YAML_TAG_ENTRY_RE = re.compile(r"""^(\s*)(["']?)(#?)(.*?)(["']?)(\s*)$""")
+
+
+def _rename_yaml_tag(entry: str, renames: dict[str, str], allowed) -> str:
+    """Rename one frontmatter tag list entry (foo, "foo", #foo; foo/child too)."""
+    m = _YAML_TAG_ENTRY_RE.match(entry)
+    tag = m.group(4)
+    for old in sorted(renames, key=len, reverse=True):
+        if (tag == old or tag.startswith(old + "/")) and allowed():
+            return m.group(1) + m.group(2) + m.group(3) + renames[old] + tag[len(old):] + m.group(5) + m.group(6)
+    return entry
+
+
+def _rename_frontmatter_tags(head: str, renames: dict[str, str], allowed) -> str:
+    """Rename tags in a frontmatter block's ``tags:`` key, read the way parse_yaml_tags reads it."""
+    out = []
+    in_tags = False
+    for line in head.splitlines(keepends=True):
+        body = line.rstrip("\r\n")
+        ending = line[len(body):]
+        stripped = body.strip()
+        if stripped.startswith("tags:"):
+            key, _, value = body.partition(":")
+            if "[" in value and "]" in value:
+                before, _, rest = value.partition("[")
+                inner, _, after = rest.partition("]")
+                inner = ",".join(_rename_yaml_tag(e, renames, allowed) for e in inner.split(","))
+                body = f"{key}:{before}[{inner}]{after}"
+                in_tags = False
+            elif stripped.endswith(":"):
+                in_tags = True
+            else:
+                if value.strip():
+                    body = f"{key}:{_rename_yaml_tag(value, renames, allowed)}"
+                in_tags = False
+        elif in_tags:
+            if stripped.startswith("- "):
+                dash = body.index("- ") + 2
+                body = body[:dash] + _rename_yaml_tag(body[dash:], renames, allowed)
+            else:
+                in_tags = False
+        out.append(body + ending)
+    return "".join(out)
+
+
+def _frontmatter_end(content: str) -> int:
+    """Offset just past the closing '---' of a leading frontmatter block, 0 if there is none."""
+    if content.startswith("---"):
+        yaml_end = content.find("---", 3)
+        if yaml_end != -1:
+            return yaml_end + 3
+    return 0
+
+
+def _sub_outside_fences(text: str, fn) -> str:
+    """Apply ``fn`` to each line of ``text`` that is not inside a fenced (```) code block."""
+    out = []
+    in_code = False
+    for line in text.splitlines(keepends=True):
+        if line.strip().startswith("```"):
+            in_code = not in_code
+        elif not in_code:
+            line = fn(line)
+        out.append(line)
+    return "".join(out)
+
+
+def _rename_tags(content: str, tags: dict[str, str], pattern: re.Pattern, allowed) -> str:
+    """Apply #tag renames to frontmatter tags and to body #tags outside fenced code blocks."""
+    body_start = _frontmatter_end(content)
+    head = ""
+    if body_start:
+        renames = {old.lstrip("#"): new.lstrip("#") for old, new in tags.items()}
+        head = _rename_frontmatter_tags(content[:body_start - 3], renames, allowed) + "---"
+    return head + _sub_outside_fences(
+        content[body_start:],
+        lambda line: pattern.sub(lambda m: tags[m.group(1)] if allowed() else m.group(0), line)
+        if "#" in line else line)
+
+
+def _rewrite_links(content: str, links: dict[str, str], pattern: re.Pattern, allowed) -> str:
+    """Point [[old]] links at their new targets in the frontmatter and outside fenced code blocks."""
+    def sub(text: str) -> str:
+        if "[[" not in text:
+            return text
+        return pattern.sub(
+            lambda m: m.group(1) + links[m.group(2)] + m.group(3) if allowed() else m.group(0), text)
+
+    body_start = _frontmatter_end(content)
+    return sub(content[:body_start]) + _sub_outside_fences(content[body_start:], sub)
+
+
+def _link_pattern(targets: Iterable[str]) -> re.Pattern:
+    """Match the target part of [[target]], [[target|...]] and [[target#...]]."""
+    alternation = "|".join(re.escape(t) for t in sorted(targets, key=len, reverse=True))
+    return re.compile(r"(\[\[\s*)(" + alternation + r")(\s*(?:#|\||\]\]))")
+
+
+def _title(rel_path: str) -> str:
+    return os.path.splitext(os.path.basename(rel_path))[0]
+
+
+def _sha1(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Planning
+# ---------------------------------------------------------------------------
+
+class EditPlan:
+    """Planned content changes and note renames for one vault.
+
+    ``files`` maps each note to edit to {original, content, changes, matches,
+    mtime_ns, size}; ``renames`` maps note paths to their new paths.
+    """
+
+    def __init__(self, vault_path: str):
+        self.vault_path = os.path.abspath(vault_path)
+        self.files: dict[str, dict] = {}
+        self.renames: dict[str, str] = {}
+
+    @property
+    def changes(self) -> int:
+        return sum(f["changes"] for f in self.files.values())
+
+    def __bool__(self) -> bool:
+        return bool(self.files or self.renames)
+
+    def summary(self) -> dict:
+        """{"files": {rel_path: changes}, "changes": total, "renames": {old: new}}."""
+        return {
+            "files": {rel: f["changes"] for rel, f in self.files.items()},
+            "changes": self.changes,
+            "renames": dict(self.renames),
+        }
+
+    def diff(self, context: int = 3) -> dict[str, str]:
+        """Unified diff per affected note (renames included), for preview."""
+        previews = {}
+        for rel in sorted(set(self.files) | set(self.renames)):
+            new_rel = self.renames.get(rel, rel)
+            planned = self.files.get(rel)
+            lines = []
+            if planned:
+                lines = list(difflib.unified_diff(
+                    planned["original"].splitlines(keepends=True),
+                    planned["content"].splitlines(keepends=True),
+                    fromfile=f"a/{rel}", tofile=f"b/{new_rel}", n=context,
+                ))
+            if new_rel != rel:
+                lines = [f"rename from {rel}\n", f"rename to {new_rel}\n"] + lines
+            previews[rel] = "".join(lines)
+        return previews
+
+
+def _read(full_path: str) -> tuple[str, os.stat_result]:
+    st = os.stat(full_path)
+    with open(full_path, "r", encoding="utf-8", newline="") as f:
+        return f.read(), st
+
+
+def plan_edits(
+    vault_path: str,
+    tags: Optional[dict[str, str]] = None,
+    links: Optional[dict[str, str]] = None,
+    note_renames: Optional[dict[str, str]] = None,
+    paths: Optional[Iterable[str]] = None,
+    limit: Optional[int] = None,
+    update_links: bool = True,
+) -> EditPlan:
+    """Plan a batch of edits without touching the vault.
+
+    ``tags`` maps #old -> #new (the '#' is optional); #old/child becomes
+    #new/child. Frontmatter ``tags:`` entries are renamed too; body tags
+    inside fenced code blocks are left alone, as the index skips them.
+    ``links`` maps old -> new link targets, keeping headings, block refs and
+    display text; links in fenced code blocks are left alone too.
+    ``note_renames`` maps note paths (relative to the vault) to new paths;
+    with ``update_links``, [[old title]] links are pointed at the new title
+    in the same batch.
+
+    Only notes the index lists as carrying an old tag or linking to an old
+    target are read; ``paths`` narrows that further and ``limit`` caps the
+    number of tag and link changes, applied in path order.
+    """
+    index = get_vault_index(vault_path)
+    plan = EditPlan(index.vault_path)
+
+    tags = {"#" + old.lstrip("#"): "#" + new.lstrip("#")
+            for old, new in (tags or {}).items() if old.lstrip("#") and old.lstrip("#") != new.lstrip("#")}
+    links = {old: new for old, new in (links or {}).items() if old and old != new}
+    for old_rel, new_rel in (note_renames or {}).items():
+        if new_rel and new_rel != old_rel:
+            plan.renames[old_rel] = new_rel
+            if update_links and _title(old_rel) != _title(new_rel):
+                links.setdefault(_title(old_rel), _title(new_rel))
+
+    candidates: set[str] = set()
+    if tags:
+        candidates.update(n["path"] for n in index.notes_with_tags(tags, include_nested=True))
+    if links:
+        candidates.update(p for sources in index.linking_notes(links).values() for p in sources)
+    if paths is not None:
+        candidates &= set(paths)
+    if not candidates:
+        return plan
+
+    tag_pattern = _tag_pattern(tags) if tags else None
+    link_pattern = _link_pattern(links) if links else None
+    ordered = sorted(candidates)
+    with ThreadPoolExecutor(max_workers=min(MAX_IO_WORKERS, len(ordered))) as pool:
+        contents = list(pool.map(lambda rel: _read(index.full_path(rel)), ordered))
+
+    total = 0
+    for rel, (content, st) in zip(ordered, contents):
+        if limit is not None and total >= limit:
+            break
+        matches = changes = 0
+
+        def allowed() -> bool:
+            nonlocal matches, changes
+            matches += 1
+            if limit is not None and total + changes >= limit:
+                return False
+            changes += 1
+            return True
+
+        new_content = content
+        if tag_pattern:
+            new_content = _rename_tags(new_content, tags, tag_pattern, allowed)
+        if link_pattern:
+            new_content = _rewrite_links(new_content, links, link_pattern, allowed)
+        if changes:
+            plan.files[rel] = {
+                "original": content,
+                "content": new_content,
+                "changes": changes,
+                "matches": matches,
+                "mtime_ns": st.st_mtime_ns,
+                "size": st.st_size,
+            }
+            total += changes
+    return plan
+
+
+# ---------------------------------------------------------------------------
+# Applying
+# ---------------------------------------------------------------------------
+
+def _atomic_write(full_path: str, content: str):
+    """Replace ``full_path`` with ``content`` via a temp file in the same directory."""
+    directory = os.path.dirname(full_path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(full_path).st_mode & 0o7777)
+        except OSError:
+            pass
+        os.replace(tmp_path, full_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _journal_dir(index) -> str:
+    return os.path.join(JOURNAL_DIR, index.key)
+
+
+def _save_journal(journal_path: str, journal: dict):
+    os.makedirs(os.path.dirname(journal_path), exist_ok=True)
+    _atomic_write(journal_path, json.dumps(journal, ensure_ascii=False))
+
+
+def _load_journal(journal_path: str) -> dict:
+    with open(journal_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _prune_journals(current: str):
+    """Delete journals past the newest JOURNAL_KEEP or older than JOURNAL_MAX_AGE_DAYS.
+
+    ``current`` (the batch just committed) and pending journals (a batch
+    interrupted mid-apply) are kept for rollback().
+    """
+    directory = os.path.dirname(current)
+    cutoff = time.time() - JOURNAL_MAX_AGE_DAYS * 86400
+    paths = [os.path.join(directory, n) for n in os.listdir(directory) if n.endswith(".json")]
+    paths.sort(key=lambda p: (p == current, os.stat(p).st_mtime_ns, p), reverse=True)
+    for i, path in enumerate(paths):
+        try:
+            journal = _load_journal(path)
+            if i < JOURNAL_KEEP and journal["created"] >= cutoff:
+                continue
+            if journal["status"] != "pending":
+                os.remove(path)
+        except (OSError, ValueError, KeyError):
+            continue
+
+
+def _check_stale(plan: EditPlan):
+    for rel, planned in plan.files.items():
+        try:
+            st = os.stat(os.path.join(plan.vault_path, rel))
+        except OSError:
+            raise VaultEditError(f"{rel} no longer exists; re-plan the edits")
+        if (st.st_mtime_ns, st.st_size) != (planned["mtime_ns"], planned["size"]):
+            raise VaultEditError(f"{rel} changed since the edits were planned; re-plan the edits")
+    targets = set()
+    for old_rel, new_rel in plan.renames.items():
+        if not os.path.isfile(os.path.join(plan.vault_path, old_rel)):
+            raise VaultEditError(f"{old_rel} no longer exists; re-plan the edits")
+        if new_rel in targets or os.path.exists(os.path.join(plan.vault_path, new_rel)):
+            raise VaultEditError(f"Cannot rename {old_rel}: {new_rel} already exists")
+        targets.add(new_rel)
+
+
+def _restore(vault_path: str, journal: dict, written: Iterable[str], renamed: Iterable[str]) -> list[str]:
+    """Undo renames then content writes; returns paths that could not be restored."""
+    failed = []
+    for old_rel in reversed(list(renamed)):
+        new_rel = journal["renames"][old_rel]
+        try:
+            os.rename(os.path.join(vault_path, new_rel), os.path.join(vault_path, old_rel))
+        except OSError as e:
+            logger.error("Could not undo rename %s -> %s: %s", old_rel, new_rel, e)
+            failed.append(new_rel)
+    for rel in written:
+        try:
+            _atomic_write(os.path.join(vault_path, rel), journal["files"][rel]["original"])
+        except OSError as e:
+            logger.error("Could not restore %s: %s", rel, e)
+            failed.append(rel)
+    return failed
+
+
+def apply_plan(plan: EditPlan) -> dict:
+    """Write a plan to the vault as one batch.
+
+    Raises VaultEditError (with nothing changed) if a planned note was modified
+    after planning, or if a write fails and the batch was rolled back. Returns
+    the plan summary plus the journal path for rollback().
+    """
+    result = plan.summary()
+    if not plan:
+        return {**result, "journal": None}
+    _check_stale(plan)
+    index = get_vault_index(plan.vault_path, refresh=False)
+
+    journal = {
+        "vault_path": plan.vault_path,
+        "created": time.time(),
+        "status": "pending",
+        "files": {rel: {"original": f["original"], "sha1": _sha1(f["content"])}
+                  for rel, f in plan.files.items()},
+        "renames": dict(plan.renames),
+    }
+    journal_path = os.path.join(
+        _journal_dir(index), f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.json")
+    _save_journal(journal_path, journal)
+
+    written: list[str] = []
+    renamed: list[str] = []
+    error = None
+
+    def write(rel):
+        _atomic_write(index.full_path(rel), plan.files[rel]["content"])
+        return rel
+
+    with ThreadPoolExecutor(max_workers=min(MAX_IO_WORKERS, max(1, len(plan.files)))) as pool:
+        futures = [pool.submit(write, rel) for rel in plan.files]
+        for future in futures:
+            try:
+                written.append(future.result())
+            except OSError as e:
+                error = error or e
+    if error is None:
+        for old_rel, new_rel in plan.renames.items():
+            try:
+                os.makedirs(os.path.dirname(index.full_path(new_rel)), exist_ok=True)
+                os.rename(index.full_path(old_rel), index.full_path(new_rel))
+                renamed.append(old_rel)
+            except OSError as e:
+                error = e
+                break
+
+    touched = set(written) | set(renamed) | {plan.renames[r] for r in renamed}
+    if error is not None:
+        failed = _restore(plan.vault_path, journal, written, renamed)
+        journal["status"] = "failed" if failed else "rolled_back"
+        _save_journal(journal_path, journal)
+        index.apply_changes(touched)
+        raise VaultEditError(f"Vault edit failed and was rolled back: {error}"
+                             + (f" (could not restore {', '.join(failed)})" if failed else ""))
+
+    journal["status"] = "committed"
+    _save_journal(journal_path, journal)
+    _prune_journals(journal_path)
+    index.apply_changes(touched)
+    logger.info("Applied vault edit %s: %d changes in %d notes, %d renames",
+                os.path.basename(journal_path), result["changes"], len(written), len(renamed))
+    return {**result, "journal": journal_path}
+
+
+def rollback(journal_path: str) -> dict:
+    """Undo a committed batch, or finish undoing one interrupted mid-apply.
+
+    Notes edited again since the batch are left alone and reported as
+    conflicts. Returns {"restored": [...], "conflicts": [...]}.
+    """
+    journal = _load_journal(journal_path)
+    if journal["status"] not in ("committed", "pending"):
+        raise VaultEditError(f"Journal is {journal['status']}; nothing to roll back")
+    vault_path = journal["vault_path"]
+    renames = journal["renames"]
+    conflicts = []
+
+    renamed = []
+    for old_rel, new_rel in renames.items():
+        old_exists = os.path.exists(os.path.join(vault_path, old_rel))
+        if os.path.isfile(os.path.join(vault_path, new_rel)) and not old_exists:
+            renamed.append(old_rel)
+        elif not old_exists:
+            conflicts.append(new_rel)
+    written = []
+    for rel, entry in journal["files"].items():
+        moved = rel in renamed
+        try:
+            with open(os.path.join(vault_path, renames[rel] if moved else rel), "r",
+                      encoding="utf-8", newline="") as f:
+                current = f.read()
+        except OSError:
+            conflicts.append(rel)
+            continue
+        if _sha1(current) == entry["sha1"]:
+            written.append(rel)
+        elif current != entry["original"]:
+            conflicts.append(rel)
+
+    failed = _restore(vault_path, journal, written, renamed)
+    journal["status"] = "rolled_back"
+    _save_journal(journal_path, journal)
+    get_vault_index(vault_path, refresh=False).apply_changes(
+        set(written) | set(renamed) | {renames[r] for r in renamed})
+    restored = sorted(set(written) | set(renamed))
+    return {"restored": [r for r in restored if r not in failed], "conflicts": sorted(set(conflicts + failed))}
+
+
+def recent_journals(vault_path: str, limit: int = 20) -> list[dict]:
+    """Most recent edit batches for a vault as {path, created, status, files, renames}."""
+    directory = _journal_dir(get_vault_index(vault_path, refresh=False))
+    if not os.path.isdir(directory):
+        return []
+    entries = []
+    for name in sorted(os.listdir(directory), reverse=True)[:limit]:
+        path = os.path.join(directory, name)
+        try:
+            journal = _load_journal(path)
+        except (OSError, ValueError):
+            continue
+        entries.append({
+            "path": path,
+            "created": journal["created"],
+            "status": journal["status"],
+            "files": sorted(journal["files"]),
+            "renames": journal["renames"],
+        })
+    return entries
@@ -0,0 +1,1023 @@
+"""
+Persistent SQLite index of an Obsidian vault.
+
+Holds one row per note (path, mtime, size, parsed frontmatter) plus its tags,
+wikilinks, headings and tasks, and a date index over daily/weekly note titles,
+dated headings and tasks so date-range queries are B-tree range scans. refresh() stats the vault and re-parses only the
+notes whose mtime or size changed, so vault tools query the index instead of
+walking and reading every file on every run.
+
+No Streamlit imports — callable from FastAPI, the MCP tools or Streamlit.
+"""
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sqlite3
+import stat
+import threading
+import time
+from datetime import date, timedelta
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+logger = logging.getLogger("codiak.vault_index")
+
+INDEX_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "vault_index",
+)
+SKIP_DIRS = (".obsidian", ".trash")
+# Parsing fans out to a process pool only for batches at least this large
+PARALLEL_MIN_FILES = 2000
+PARSE_CHUNK_SIZE = 250
+MAX_PARSE_WORKERS = 8
+# Bump when the schema or parse rules change; indexes are rebuilt from scratch.
+SCHEMA_VERSION = 6
+# A watcher heartbeat younger than this marks the index as live (see vault_watcher).
+LIVE_HEARTBEAT_SECONDS = 30.0
+
+_SCHEMA = """
+CREATE TABLE index_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE notes (
+    path        TEXT PRIMARY KEY,
+    title       TEXT NOT NULL,
+    title_fold  TEXT NOT NULL,
+    path_fold   TEXT NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    size        INTEGER NOT NULL,
+    frontmatter TEXT,
+    indexed_at  REAL NOT NULL,
+    note_date   TEXT,
+    note_week   TEXT
+);
+CREATE INDEX idx_notes_title_fold ON notes(title_fold);
+CREATE INDEX idx_notes_path_fold ON notes(path_fold);
+CREATE INDEX idx_notes_date ON notes(note_date) WHERE note_date IS NOT NULL;
+CREATE INDEX idx_notes_week ON notes(note_week) WHERE note_week IS NOT NULL;
+
+CREATE TABLE note_tags (
+    path   TEXT NOT NULL REFERENCES notes(path) ON DELETE CASCADE,
+    tag    TEXT NOT NULL,
+    source TEXT NOT NULL
+);
+CREATE INDEX idx_note_tags_tag ON note_tags(tag);
+CREATE INDEX idx_note_tags_path ON note_tags(path);
+
+CREATE TABLE note_links (
+    path    TEXT NOT NULL REFERENCES notes(path) ON DELETE CASCADE,
+    line    INTEGER NOT NULL,
+    target  TEXT NOT NULL,
+    target_fold TEXT NOT NULL,
+    subpath TEXT,
+    display TEXT
+);
+CREATE INDEX idx_note_links_target ON note_links(target);
+CREATE INDEX idx_note_links_target_fold ON note_links(target_fold);
+CREATE INDEX idx_note_links_path ON note_links(path);
+
+CREATE TABLE note_aliases (
+    path  TEXT NOT NULL REFERENCES notes(path) ON DELETE CASCADE,
+    alias TEXT NOT NULL,
+    alias_fold TEXT NOT NULL
+);
+CREATE INDEX idx_note_aliases_alias_fold ON note_aliases(alias_fold);
+
+CREATE TABLE note_headings (
+    path  TEXT NOT NULL REFERENCES notes(path) ON DELETE CASCADE,
+    line  INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    text  TEXT NOT NULL
+);
+CREATE INDEX idx_note_headings_path ON note_headings(path, line);
+
+CREATE TABLE heading_dates (
+    path TEXT NOT NULL REFERENCES notes(path) ON DELETE CASCADE,
+    line INTEGER NOT NULL,
+    date TEXT NOT NULL
+);
+CREATE INDEX idx_heading_dates_date ON heading_dates(date);
+CREATE INDEX idx_heading_dates_path ON heading_dates(path);
+
+CREATE TABLE note_tasks (
+    path      TEXT NOT NULL REFERENCES notes(path) ON DELETE CASCADE,
+    line      INTEGER NOT NULL,
+    status    TEXT NOT NULL,
+    text      TEXT NOT NULL,
+    section   TEXT,
+    completed TEXT
+);
+CREATE INDEX idx_note_tasks_path ON note_tasks(path, line);
+CREATE INDEX idx_note_tasks_completed ON note_tasks(status, completed);
+
+-- kind: 'note' (dated note title), 'section' (dated heading above the task),
+-- 'linked' ([[date]] in the task text) or 'completed' (✅ date)
+CREATE TABLE task_dates (
+    path TEXT NOT NULL REFERENCES notes(path) ON DELETE CASCADE,
+    line INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    kind TEXT NOT NULL
+);
+CREATE INDEX idx_task_dates_date ON task_dates(date, kind);
+CREATE INDEX idx_task_dates_path ON task_dates(path);
+"""
+
+def fold_case(text: str) -> str:
+    """Case-insensitive key for titles, paths, aliases and link targets.
+
+    SQLite's lower() and NOCASE only fold ASCII, so folded copies are stored
+    in *_fold columns and lookups compare against them.
+    """
+    return text.casefold()
+
+
+_TABLES = ("task_dates", "heading_dates", "note_tasks", "note_headings", "note_aliases", "note_links", "note_tags", "notes", "index_meta")
+
+
+# ---------------------------------------------------------------------------
+# Note parsing
+# ---------------------------------------------------------------------------
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*\S)")
+_TASK_RE = re.compile(r"^[-*+] \[(.)\]")
+_DONE_RE = re.compile(r"✅ (\d{4}-\d{2}-\d{2})")
+_TAG_RE = re.compile(r"(?<!\w)#([\w/-]+)")
+_WIKILINK_RE = re.compile(r"\[\[([^\[\]|]+?)(?:\|([^\[\]]*))?\]\]")
+_DATE_PREFIX_RE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+# Weekly notes are titled YYYY-WW; "2026-10-05" is a daily note, not week 10
+_WEEK_PREFIX_RE = re.compile(r"(\d{4})-(\d{2})(?!-?\d)")
+
+
+def parse_yaml_tags(yaml_block: str) -> list[str]:
+    """Extract tags from a frontmatter block (inline list, block list or scalar)."""
+    tags = []
+    in_tags = False
+    for line in yaml_block.splitlines():
+        line = line.strip()
+        if line.startswith('tags:'):
+            if '[' in line and ']' in line:
+                tag_list = line.split('[', 1)[1].split(']', 1)[0]
+                tags += [t.strip().strip('"\'') for t in tag_list.split(',')]
+                in_tags = False
+            elif line.endswith(':'):
+                in_tags = True
+            else:
+                tag_val = line.split(':', 1)[1].strip()
+                if tag_val:
+                    tags.append(tag_val.strip('"\''))
+                in_tags = False
+        elif in_tags:
+            if line.startswith('- '):
+                tags.append(line[2:].strip('"\''))
+            else:
+                in_tags = False
+    return tags
+
+
+def remove_code_blocks(text: str) -> str:
+    """Drop fenced (```) code blocks from markdown text."""
+    result = []
+    in_code = False
+    for line in text.splitlines():
+        if line.strip().startswith('```'):
+            in_code = not in_code
+            continue
+        if not in_code:
+            result.append(line)
+    return '\n'.join(result)
+
+
+def _links_in(text: str, line: int) -> list[tuple]:
+    links = []
+    for m in _WIKILINK_RE.finditer(text):
+        target, _, subpath = m.group(1).partition("#")
+        display = m.group(2)
+        links.append((line, target.strip(), subpath.strip() or None,
+                      display.strip() if display else None))
+    return links
+
+
+def _date_prefix(text: str) -> Optional[str]:
+    """The YYYY-MM-DD that ``text`` starts with, if it is a real date."""
+    m = _DATE_PREFIX_RE.match(text)
+    if not m:
+        return None
+    try:
+        date.fromisoformat(m.group(1))
+    except ValueError:
+        return None
+    return m.group(1)
+
+
+def _week_prefix(title: str) -> Optional[str]:
+    """The YYYY-WW ISO week a weekly note title starts with."""
+    m = _WEEK_PREFIX_RE.match(title)
+    if not m or not 1 <= int(m.group(2)) <= 53:
+        return None
+    return f"{m.group(1)}-{m.group(2)}"
+
+
+def _linked_dates(text: str) -> list[str]:
+    """Dates that [[wikilinks]] in ``text`` start with."""
+    if "[[" not in text:
+        return []
+    found = (_date_prefix(m.group(1).strip()) for m in _WIKILINK_RE.finditer(text))
+    return list(dict.fromkeys(d for d in found if d))
+
+
+def _heading_dates(text: str) -> list[str]:
+    """Dates a heading is about: a leading YYYY-MM-DD and any [[date]] links."""
+    leading = _date_prefix(text)
+    return list(dict.fromkeys(([leading] if leading else []) + _linked_dates(text)))
+
+
+def note_dates(title: str) -> tuple[Optional[str], Optional[str]]:
+    """(YYYY-MM-DD, YYYY-WW) for daily and weekly note titles; None where not dated."""
+    day = _date_prefix(title)
+    return day, None if day else _week_prefix(title)
+
+
+def parse_note(content: str) -> dict:
+    """Parse a note into frontmatter, aliases, tags, wikilinks, headings and tasks.
+
+    Tags are stored without '#'. Body tags, headings and tasks skip fenced code
+    blocks; wikilinks are collected from the frontmatter too. Line numbers are
+    1-based over the whole file. Headings and tasks also yield the dates they
+    refer to (heading_dates, task_dates) for the date index.
+    """
+    frontmatter = None
+    tags: dict[str, str] = {}
+    body_start = 0
+    if content.startswith("---"):
+        yaml_end = content.find("---", 3)
+        if yaml_end != -1:
+            yaml_block = content[3:yaml_end]
+            for tag in parse_yaml_tags(yaml_block.strip()):
+                tag = tag.lstrip("#")
+                if tag:
+                    tags.setdefault(tag, "frontmatter")
+            try:
+                data = yaml.load(yaml_block, Loader=_YamlLoader)
+            except yaml.YAMLError:
+                data = None
+            if isinstance(data, dict):
+                frontmatter = data
+            body_start = yaml_end + 3
+
+    head = content[:body_start]
+    links = []
+    for lineno, line in enumerate(head.split("\n"), 1):
+        if "[[" in line:
+            links.extend(_links_in(line, lineno))
+
+    headings = []
+    tasks = []
+    heading_dates = []
+    task_dates = []
+    section = None
+    section_dates: list[str] = []
+    in_code = False
+    for lineno, line in enumerate(content[body_start:].split("\n"), head.count("\n") + 1):
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            in_code = not in_code
+            continue
+        if in_code or not stripped:
+            continue
+        heading = _HEADING_RE.match(stripped)
+        if heading:
+            section = heading.group(2)
+            headings.append((lineno, len(heading.group(1)), section))
+            section_dates = _heading_dates(section)
+            heading_dates.extend((lineno, d) for d in section_dates)
+        task = _TASK_RE.match(stripped)
+        if task:
+            done = _DONE_RE.search(stripped)
+            tasks.append((lineno, task.group(1), stripped, section, done.group(1) if done else None))
+            task_dates.extend((lineno, d, "section") for d in section_dates)
+            task_dates.extend((lineno, d, "linked") for d in _linked_dates(stripped))
+            if done:
+                task_dates.append((lineno, done.group(1), "completed"))
+        if "#" in stripped:
+            for m in _TAG_RE.finditer(stripped):
+                tag = m.group(1).rstrip("/-")
+                if tag:
+                    tags.setdefault(tag, "body")
+        if "[[" in stripped:
+            links.extend(_links_in(stripped, lineno))
+
+    aliases = []
+    if frontmatter:
+        raw = frontmatter.get("aliases", frontmatter.get("alias"))
+        if isinstance(raw, str):
+            raw = [raw]
+        if isinstance(raw, list):
+            aliases = list(dict.fromkeys(str(a).strip() for a in raw if a is not None and str(a).strip()))
+
+    return {
+        "frontmatter": frontmatter,
+        "aliases": aliases,
+        "tags": list(tags.items()),
+        "links": links,
+        "headings": headings,
+        "tasks": tasks,
+        "heading_dates": heading_dates,
+        "task_dates": task_dates,
+    }
+
+
+def _parse_file(full_path: str) -> dict:
+    try:
+        with open(full_path, "r", encoding="utf-8", errors="replace") as f:
+            return parse_note(f.read())
+    except OSError as e:
+        logger.warning("Could not read %s: %s", full_path, e)
+        return parse_note("")
+
+
+def _parse_chunk(vault_path: str, rels: list[str]) -> list[tuple[str, dict]]:
+    """Process-pool worker: parse a chunk of notes."""
+    return [(rel, _parse_file(os.path.join(vault_path, rel))) for rel in rels]
+
+
+# ---------------------------------------------------------------------------
+# Tag queries
+# ---------------------------------------------------------------------------
+
+class TagQueryError(ValueError):
+    pass
+
+
+_QUERY_TOKEN_RE = re.compile(r"\(|\)|,|[^\s(),]+")
+
+
+def parse_tag_query(query: str) -> tuple:
+    """Parse a boolean tag query into a tree of ("tag"|"not"|"and"|"or", ...) nodes.
+
+    Terms are tags with or without '#'. Operators are AND, OR and NOT
+    (uppercase), '-tag' is shorthand for NOT, ',' means OR and parentheses
+    group. Adjacent terms without an operator are ANDed, so
+    "person work -archived" means person AND work AND NOT archived.
+    """
+    tokens = _QUERY_TOKEN_RE.findall(query)
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def take():
+        nonlocal pos
+        pos += 1
+        return tokens[pos - 1]
+
+    def parse_or():
+        terms = [parse_and()]
+        while peek() in ("OR", ","):
+            take()
+            terms.append(parse_and())
+        return terms[0] if len(terms) == 1 else ("or", terms)
+
+    def parse_and():
+        terms = [parse_not()]
+        while peek() not in (None, ")", "OR", ","):
+            if peek() == "AND":
+                take()
+            terms.append(parse_not())
+        return terms[0] if len(terms) == 1 else ("and", terms)
+
+    def parse_not():
+        token = peek()
+        if token == "NOT":
+            take()
+            return ("not", parse_not())
+        if token is not None and token.startswith("-") and len(token) > 1:
+            take()
+            return ("not", _tag_node(token[1:]))
+        return parse_atom()
+
+    def parse_atom():
+        token = peek()
+        if token is None:
+            raise TagQueryError("Tag query ended unexpectedly")
+        take()
+        if token == "(":
+            node = parse_or()
+            if peek() != ")":
+                raise TagQueryError("Unbalanced parentheses in tag query")
+            take()
+            return node
+        if token in (")", "AND", "OR", "NOT", ","):
+            raise TagQueryError(f"Unexpected '{token}' in tag query")
+        return _tag_node(token)
+
+    if not tokens:
+        raise TagQueryError("Empty tag query")
+    tree = parse_or()
+    if pos != len(tokens):
+        raise TagQueryError(f"Unexpected '{tokens[pos]}' in tag query")
+    return tree
+
+
+def _tag_node(token: str) -> tuple:
+    tag = token.lstrip("#")
+    if not tag:
+        raise TagQueryError(f"Invalid tag '{token}'")
+    return ("tag", tag)
+
+
+def _query_tags(node: tuple, positive: bool = True) -> tuple[set[str], set[str]]:
+    """(tags that can make a note match, tags that only exclude)."""
+    kind = node[0]
+    if kind == "tag":
+        return ({node[1]}, set()) if positive else (set(), {node[1]})
+    if kind == "not":
+        return _query_tags(node[1], not positive)
+    pos_tags, neg_tags = set(), set()
+    for child in node[1]:
+        p, n = _query_tags(child, positive)
+        pos_tags |= p
+        neg_tags |= n
+    return pos_tags, neg_tags
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+class VaultIndex:
+    """SQLite index for one vault, stored under INDEX_DIR keyed by vault path."""
+
+    def __init__(self, vault_path: str):
+        self.vault_path = os.path.abspath(vault_path)
+        self.key = hashlib.sha1(self.vault_path.encode("utf-8")).hexdigest()[:16]
+        self.db_path = os.path.join(INDEX_DIR, f"{self.key}.db")
+        self._refresh_lock = threading.Lock()
+        self._init_db()
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def _init_db(self):
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        conn = self.connect()
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                for table in _TABLES:
+                    conn.execute(f"DROP TABLE IF EXISTS {table}")
+                conn.executescript(_SCHEMA)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                conn.commit()
+        finally:
+            conn.close()
+
+    def full_path(self, rel_path: str) -> str:
+        return os.path.join(self.vault_path, rel_path)
+
+    # -- refresh -------------------------------------------------------------
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        """Map of relative path -> (mtime_ns, size) for every note on disk."""
+        found = {}
+        stack = [self.vault_path]
+        while stack:
+            current = stack.pop()
+            try:
+                entries = list(os.scandir(current))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            stack.append(entry.path)
+                    elif entry.name.endswith(".md"):
+                        st = entry.stat()
+                        rel = os.path.relpath(entry.path, self.vault_path)
+                        found[rel] = (st.st_mtime_ns, st.st_size)
+                except OSError:
+                    continue
+        return found
+
+    def refresh(self, workers: Optional[int] = None) -> dict:
+        """Re-parse new and changed notes and drop deleted ones.
+
+        Large batches are parsed across ``workers`` processes (default: CPU
+        count, capped at MAX_PARSE_WORKERS). Returns counts of
+        scanned/added/updated/removed notes and elapsed seconds.
+        """
+        with self._refresh_lock:
+            start = time.perf_counter()
+            on_disk = self._scan()
+            conn = self.connect()
+            try:
+                known = {
+                    row["path"]: (row["mtime_ns"], row["size"])
+                    for row in conn.execute("SELECT path, mtime_ns, size FROM notes")
+                }
+                removed = [p for p in known if p not in on_disk]
+                changed = [p for p, sig in on_disk.items() if known.get(p) != sig]
+                if removed:
+                    conn.executemany("DELETE FROM notes WHERE path = ?", [(p,) for p in removed])
+                for rel, parsed in self._parse_many(changed, workers):
+                    mtime_ns, size = on_disk[rel]
+                    self._store(conn, rel, mtime_ns, size, parsed)
+                conn.commit()
+            finally:
+                conn.close()
+            stats = {
+                "scanned": len(on_disk),
+                "added": sum(1 for p in changed if p not in known),
+                "updated": sum(1 for p in changed if p in known),
+                "removed": len(removed),
+                "seconds": round(time.perf_counter() - start, 3),
+            }
+            if changed or removed:
+                logger.info("Vault index %s: %s", self.vault_path, stats)
+            return stats
+
+    def _parse_many(self, rels: list[str], workers: Optional[int] = None) -> Iterator[tuple[str, dict]]:
+        """Yield (rel, parsed) for each note, as soon as each is parsed.
+
+        Batches of PARALLEL_MIN_FILES or more are sharded into chunks across a
+        process pool (YAML and regex parsing hold the GIL); smaller batches, or
+        a pool that fails to start, parse in this process.
+        """
+        if workers is None:
+            workers = min(os.cpu_count() or 1, MAX_PARSE_WORKERS)
+        pending = list(rels)
+        if workers > 1 and len(pending) >= PARALLEL_MIN_FILES:
+            chunks = [pending[i:i + PARSE_CHUNK_SIZE] for i in range(0, len(pending), PARSE_CHUNK_SIZE)]
+            done: set[str] = set()
+            try:
+                # spawn, not fork: the API process runs watcher and server threads
+                with ProcessPoolExecutor(max_workers=min(workers, len(chunks)),
+                                         mp_context=multiprocessing.get_context("spawn")) as pool:
+                    futures = [pool.submit(_parse_chunk, self.vault_path, chunk) for chunk in chunks]
+                    for future in as_completed(futures):
+                        for rel, parsed in future.result():
+                            done.add(rel)
+                            yield rel, parsed
+                return
+            except (OSError, BrokenProcessPool) as e:
+                logger.warning("Parallel vault parse failed (%s); continuing in-process", e)
+                pending = [rel for rel in pending if rel not in done]
+        for rel in pending:
+            yield rel, _parse_file(self.full_path(rel))
+
+    def apply_changes(self, rel_paths: Iterable[str]) -> dict:
+        """Bring specific notes up to date without walking the vault.
+
+        Paths that no longer exist (or are not notes) are dropped from the
+        index; the rest are re-parsed if their mtime or size changed.
+        """
+        with self._refresh_lock:
+            start = time.perf_counter()
+            updated = removed = 0
+            conn = self.connect()
+            try:
+                for rel in set(rel_paths):
+                    try:
+                        st = os.stat(self.full_path(rel))
+                    except OSError:
+                        st = None
+                    if st is None or not stat.S_ISREG(st.st_mode) or not rel.endswith(".md"):
+                        removed += conn.execute("DELETE FROM notes WHERE path = ?", (rel,)).rowcount
+                        continue
+                    row = conn.execute("SELECT mtime_ns, size FROM notes WHERE path = ?", (rel,)).fetchone()
+                    if row and (row["mtime_ns"], row["size"]) == (st.st_mtime_ns, st.st_size):
+                        continue
+                    self._store(conn, rel, st.st_mtime_ns, st.st_size, _parse_file(self.full_path(rel)))
+                    updated += 1
+                conn.commit()
+            finally:
+                conn.close()
+            return {"updated": updated, "removed": removed,
+                    "seconds": round(time.perf_counter() - start, 3)}
+
+    # -- liveness ------------------------------------------------------------
+
+    def heartbeat(self):
+        """Record that a watcher is keeping this index current."""
+        self._set_meta("watcher_heartbeat", str(time.time()))
+
+    def clear_heartbeat(self):
+        conn = self.connect()
+        try:
+            conn.execute("DELETE FROM index_meta WHERE key = 'watcher_heartbeat'")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def is_live(self) -> bool:
+        """True while a watcher (in any process) is applying vault events."""
+        rows = self._query("SELECT value FROM index_meta WHERE key = 'watcher_heartbeat'")
+        return bool(rows) and time.time() - float(rows[0]["value"]) < LIVE_HEARTBEAT_SECONDS
+
+    def _set_meta(self, key: str, value: str):
+        conn = self.connect()
+        try:
+            conn.execute(
+                "INSERT INTO index_meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _store(conn: sqlite3.Connection, rel: str, mtime_ns: int, size: int, parsed: dict):
+        conn.execute("DELETE FROM notes WHERE path = ?", (rel,))
+        frontmatter = parsed["frontmatter"]
+        title = os.path.splitext(os.path.basename(rel))[0]
+        day, week = note_dates(title)
+        conn.execute(
+            "INSERT INTO notes (path, title, title_fold, path_fold, mtime_ns, size, frontmatter, indexed_at, "
+            "note_date, note_week) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (rel, title, fold_case(title), fold_case(os.path.splitext(rel)[0].replace(os.sep, "/")), mtime_ns, size,
+             json.dumps(frontmatter, default=str) if frontmatter is not None else None, time.time(),
+             day, week),
+        )
+        conn.executemany("INSERT INTO note_aliases (path, alias, alias_fold) VALUES (?, ?, ?)",
+                         [(rel, alias, fold_case(alias)) for alias in parsed["aliases"]])
+        conn.executemany("INSERT INTO note_tags (path, tag, source) VALUES (?, ?, ?)",
+                         [(rel, tag, source) for tag, source in parsed["tags"]])
+        conn.executemany(
+            "INSERT INTO note_links (path, line, target, target_fold, subpath, display) VALUES (?, ?, ?, ?, ?, ?)",
+            [(rel, line, target, fold_case(target), subpath, display)
+             for line, target, subpath, display in parsed["links"]])
+        conn.executemany("INSERT INTO note_headings (path, line, level, text) VALUES (?, ?, ?, ?)",
+                         [(rel, *heading) for heading in parsed["headings"]])
+        conn.executemany("INSERT INTO note_tasks (path, line, status, text, section, completed) VALUES (?, ?, ?, ?, ?, ?)",
+                         [(rel, *task) for task in parsed["tasks"]])
+        conn.executemany("INSERT INTO heading_dates (path, line, date) VALUES (?, ?, ?)",
+                         [(rel, *d) for d in parsed["heading_dates"]])
+        task_dates = parsed["task_dates"]
+        if day:
+            task_dates = task_dates + [(task[0], day, "note") for task in parsed["tasks"]]
+        conn.executemany("INSERT INTO task_dates (path, line, date, kind) VALUES (?, ?, ?, ?)",
+                         [(rel, *d) for d in task_dates])
+
+    # -- queries -------------------------------------------------------------
+
+    def _query(self, sql: str, params: Iterable = ()) -> list[dict]:
+        conn = self.connect()
+        try:
+            return [dict(row) for row in conn.execute(sql, tuple(params))]
+        finally:
+            conn.close()
+
+    def notes(self) -> list[dict]:
+        """All notes as {path, title}, ordered by path."""
+        return self._query("SELECT path, title FROM notes ORDER BY path")
+
+    def paths_in_folder(self, folder: str) -> list[str]:
+        """Relative paths of notes directly inside ``folder`` (relative to the vault)."""
+        prefix = folder.rstrip(os.sep) + os.sep
+        rows = self._query(
+            "SELECT path FROM notes WHERE substr(path, 1, ?) = ? ORDER BY path",
+            (len(prefix), prefix),
+        )
+        return [r["path"] for r in rows if os.sep not in r["path"][len(prefix):]]
+
+    def notes_with_tags(self, tags: Iterable[str], include_nested: bool = False) -> list[dict]:
+        """Notes carrying any of ``tags`` (with or without '#') in frontmatter or body.
+
+        With ``include_nested``, #parent also matches #parent/child.
+        """
+        wanted = sorted({t.lstrip("#") for t in tags if t.lstrip("#")})
+        if not wanted:
+            return []
+        clause = f"tag IN ({','.join('?' * len(wanted))})"
+        params = list(wanted)
+        if include_nested:
+            clause += "".join(" OR tag GLOB ?" for _ in wanted)
+            params += [f"{t}/*" for t in wanted]
+        return self._query(
+            f"""SELECT n.path, n.title FROM notes n
+                WHERE n.path IN (SELECT path FROM note_tags WHERE {clause})
+                ORDER BY n.path""",
+            params,
+        )
+
+    def search_tags(self, query) -> list[dict]:
+        """Notes matching a boolean tag query, as {path, title, matched_tags}.
+
+        ``query`` is a query string (see parse_tag_query) or an already parsed
+        tree. Only the tags named in the query are read from the index, and
+        each result lists which of its positive terms the note carries.
+        """
+        tree = parse_tag_query(query) if isinstance(query, str) else query
+        positive, negative = _query_tags(tree)
+        wanted = sorted(positive | negative)
+        by_tag: dict[str, set[str]] = {t: set() for t in wanted}
+        by_path: dict[str, set[str]] = {}
+        rows = self._query(
+            f"SELECT path, tag FROM note_tags WHERE tag IN ({','.join('?' * len(wanted))})", wanted
+        )
+        for row in rows:
+            by_tag[row["tag"]].add(row["path"])
+            by_path.setdefault(row["path"], set()).add(row["tag"])
+
+        universe = None
+
+        def evaluate(node) -> set[str]:
+            nonlocal universe
+            kind = node[0]
+            if kind == "tag":
+                return by_tag[node[1]]
+            if kind == "not":
+                if universe is None:
+                    universe = {r["path"] for r in self._query("SELECT path FROM notes")}
+                return universe - evaluate(node[1])
+            sets = [evaluate(child) for child in node[1]]
+            return set.intersection(*sets) if kind == "and" else set.union(*sets)
+
+        return [
+            {
+                "path": path,
+                "title": os.path.splitext(os.path.basename(path))[0],
+                "matched_tags": sorted(by_path.get(path, set()) & positive),
+            }
+            for path in sorted(evaluate(tree))
+        ]
+
+    def tags_for(self, path: str) -> list[str]:
+        return [r["tag"] for r in self._query("SELECT tag FROM note_tags WHERE path = ?", (path,))]
+
+    def find_by_title(self, title: str) -> Optional[str]:
+        """Relative path of the first note whose title matches (case-insensitive)."""
+        rows = self._query(
+            "SELECT path FROM notes WHERE title_fold = ? ORDER BY path LIMIT 1", (fold_case(title),)
+        )
+        return rows[0]["path"] if rows else None
+
+    def notes_linking_to(self, target: str) -> list[str]:
+        """Relative paths of notes containing a [[target]] wikilink (exact target text)."""
+        return self.linking_notes([target])[target]
+
+    def linking_notes(self, targets: Iterable[str]) -> dict[str, list[str]]:
+        """Map each exact link target to the notes linking to it, in one query."""
+        wanted = list(dict.fromkeys(targets))
+        result: dict[str, list[str]] = {t: [] for t in wanted}
+        if not wanted:
+            return result
+        rows = self._query(
+            f"""SELECT DISTINCT target, path FROM note_links
+                WHERE target IN ({','.join('?' * len(wanted))})
+                ORDER BY path""",
+            wanted,
+        )
+        for row in rows:
+            if row["target"] in result:
+                result[row["target"]].append(row["path"])
+        return result
+
+    def links_from(self, path: str) -> list[dict]:
+        """Forward links of a note as {line, target, subpath, display}."""
+        return self._query(
+            "SELECT line, target, subpath, display FROM note_links WHERE path = ? ORDER BY line",
+            (path,),
+        )
+
+    def links_where_target_startswith(self, prefix: str) -> list[dict]:
+        """Every link whose target starts with ``prefix``, as {path, line, target, subpath, display}."""
+        return self._query(
+            """SELECT path, line, target, subpath, display FROM note_links
+               WHERE substr(target, 1, ?) = ? ORDER BY path, line""",
+            (len(prefix), prefix),
+        )
+
+    def link_names(self, path: str) -> list[str]:
+        """Names a wikilink can use for this note: title, vault path without .md, aliases."""
+        names = [os.path.splitext(os.path.basename(path))[0],
+                 os.path.splitext(path)[0].replace(os.sep, "/")]
+        names += [r["alias"] for r in self._query("SELECT alias FROM note_aliases WHERE path = ?", (path,))]
+        return list(dict.fromkeys(names))
+
+    def backlinks(self, path: str) -> list[dict]:
+        """Links pointing at a note by title, path or alias (case-insensitive).
+
+        Returns {path, line, target, subpath, display} for each linking note.
+        """
+        names = self.link_names(path)
+        return self._query(
+            f"""SELECT path, line, target, subpath, display FROM note_links
+                WHERE target_fold IN ({','.join('?' * len(names))})
+                ORDER BY path, line""",
+            list(dict.fromkeys(fold_case(n) for n in names)),
+        )
+
+    def resolve_links(self, targets: Iterable[str]) -> dict[str, Optional[str]]:
+        """Resolve link targets to note paths the way Obsidian does: by title,
+        then alias, then vault-relative path (all case-insensitive); None if
+        the link would be unresolved."""
+        wanted = list(dict.fromkeys(t for t in targets if t))
+        resolved: dict[str, Optional[str]] = {t: None for t in wanted}
+        if not wanted:
+            return resolved
+        folded: dict[str, list[str]] = {}
+        for t in wanted:
+            folded.setdefault(fold_case(t), []).append(t)
+        placeholders = ",".join("?" * len(folded))
+        keys = list(folded)
+        by_path = self._query(
+            f"SELECT path_fold AS name, path FROM notes WHERE path_fold IN ({placeholders})", keys,
+        )
+        by_alias = self._query(
+            f"SELECT alias_fold AS name, path FROM note_aliases WHERE alias_fold IN ({placeholders}) ORDER BY path",
+            keys,
+        )
+        by_title = self._query(
+            f"SELECT title_fold AS name, path FROM notes WHERE title_fold IN ({placeholders}) ORDER BY path",
+            keys,
+        )
+        # Later sources overwrite earlier ones, so title wins over alias over path
+        for rows in (by_path, by_alias, by_title):
+            for row in reversed(rows):
+                for original in folded.get(row["name"], ()):
+                    resolved[original] = row["path"]
+        return resolved
+
+    def headings(self) -> list[dict]:
+        """Every heading as {path, title, line, level, text}."""
+        return self._query(
+            """SELECT h.path, n.title, h.line, h.level, h.text
+               FROM note_headings h JOIN notes n ON n.path = h.path
+               ORDER BY h.path, h.line"""
+        )
+
+    def tasks(self, status: Optional[str] = None,
+              completed_from: Optional[str] = None,
+              completed_to: Optional[str] = None) -> list[dict]:
+        """Tasks as {path, title, line, status, text, section, completed}.
+
+        ``status`` is the checkbox character (' ' open, 'x' done). Completion
+        bounds are inclusive YYYY-MM-DD strings matched against the ✅ date.
+        """
+        where, params = [], []
+        if status is not None:
+            where.append("t.status = ?")
+            params.append(status)
+        if completed_from is not None:
+            where.append("t.completed >= ?")
+            params.append(completed_from)
+        if completed_to is not None:
+            where.append("t.completed <= ?")
+            params.append(completed_to)
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        return self._query(
+            f"""SELECT t.path, n.title, t.line, t.status, t.text, t.section, t.completed
+                FROM note_tasks t JOIN notes n ON n.path = t.path
+                {clause}
+                ORDER BY t.path, t.line""",
+            params,
+        )
+
+    # -- date index ----------------------------------------------------------
+
+    def dated_notes(self, start, end, include_weeks: bool = True) -> list[dict]:
+        """Daily notes titled with a date in [start, end], plus (with
+        ``include_weeks``) weekly notes for any ISO week overlapping it.
+
+        Bounds are dates or YYYY-MM-DD strings. Returns {path, title, date, week}
+        ordered by path.
+        """
+        start, end = _iso_date(start), _iso_date(end)
+        sql = "SELECT path, title, note_date AS date, note_week AS week FROM notes WHERE note_date BETWEEN ? AND ?"
+        params = [start.isoformat(), end.isoformat()]
+        weeks = _iso_weeks(start, end) if include_weeks else []
+        if weeks:
+            sql += f" UNION SELECT path, title, note_date, note_week FROM notes WHERE note_week IN ({','.join('?' * len(weeks))})"
+            params += weeks
+        return self._query(sql + " ORDER BY path", params)
+
+    def notes_in_week(self, iso_year: int, week: int) -> list[dict]:
+        """Daily notes for each day of an ISO week, plus that week's weekly note."""
+        monday = date.fromisocalendar(iso_year, week, 1)
+        return self.dated_notes(monday, monday + timedelta(days=6))
+
+    def dated_sections(self, start, end) -> list[dict]:
+        """Headings starting with or linking to a date in [start, end], as
+        {path, title, line, level, text, date}."""
+        start, end = _iso_date(start), _iso_date(end)
+        return self._query(
+            """SELECT h.path, n.title, h.line, h.level, h.text, MIN(d.date) AS date
+               FROM heading_dates d
+               JOIN note_headings h ON h.path = d.path AND h.line = d.line
+               JOIN notes n ON n.path = d.path
+               WHERE d.date BETWEEN ? AND ?
+               GROUP BY h.path, h.line
+               ORDER BY h.path, h.line""",
+            (start.isoformat(), end.isoformat()),
+        )
+
+    def tasks_in_range(self, start, end, status: Optional[str] = None,
+                       kinds: Iterable[str] = ("note", "section", "linked", "completed")) -> list[dict]:
+        """Tasks tied to a date in [start, end], as {path, title, line, status,
+        text, section, completed, matched_kinds}.
+
+        A task is tied to a date by its note title ('note'), the nearest heading
+        above it ('section'), a [[date]] link in its text ('linked') or its ✅
+        date ('completed'); ``kinds`` picks which count and matched_kinds says
+        which did.
+        """
+        start, end = _iso_date(start), _iso_date(end)
+        kinds = list(kinds)
+        if not kinds:
+            return []
+        params = [start.isoformat(), end.isoformat(), *kinds]
+        status_clause = ""
+        if status is not None:
+            status_clause = "AND t.status = ?"
+            params.append(status)
+        rows = self._query(
+            f"""SELECT t.path, n.title, t.line, t.status, t.text, t.section, t.completed,
+                       group_concat(DISTINCT d.kind) AS matched_kinds
+                FROM task_dates d
+                JOIN note_tasks t ON t.path = d.path AND t.line = d.line
+                JOIN notes n ON n.path = d.path
+                WHERE d.date BETWEEN ? AND ? AND d.kind IN ({','.join('?' * len(kinds))}) {status_clause}
+                GROUP BY t.path, t.line
+                ORDER BY t.path, t.line""",
+            params,
+        )
+        for row in rows:
+            row["matched_kinds"] = sorted(row["matched_kinds"].split(","))
+        return rows
+
+
+def _iso_date(value) -> date:
+    """A date from a date, datetime or YYYY-MM-DD string."""
+    if isinstance(value, date):
+        return date(value.year, value.month, value.day)
+    return date.fromisoformat(str(value)[:10])
+
+
+def _iso_weeks(start: date, end: date) -> list[str]:
+    """YYYY-WW keys of every ISO week overlapping [start, end]."""
+    if start > end:
+        return []
+    weeks = {}
+    day = start
+    while day <= end:
+        year, week, _ = day.isocalendar()
+        weeks[f"{year}-{week:02d}"] = None
+        day += timedelta(days=7)
+    year, week, _ = end.isocalendar()
+    weeks[f"{year}-{week:02d}"] = None
+    return list(weeks)
+
+
+_indexes: dict[str, VaultIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_vault_index(vault_path: str, refresh: bool = True) -> VaultIndex:
+    """Shared VaultIndex for ``vault_path``.
+
+    By default the index is incrementally refreshed first, unless a watcher is
+    already keeping it live.
+    """
+    key = os.path.abspath(vault_path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = VaultIndex(key)
+    if refresh and not index.is_live():
+        index.refresh()
+    return index
+
+
+def folder_notes(vault_path: str, folder: Path) -> list[Path]:
+    """Notes directly inside ``folder``, sorted.
+
+    Served from the index while a watcher keeps it live, otherwise globbed.
+    """
+    if vault_path:
+        rel = os.path.relpath(folder, vault_path)
+        if not rel.startswith(os.pardir):
+            index = get_vault_index(vault_path, refresh=False)
+            if index.is_live():
+                return [Path(index.full_path(p)) for p in index.paths_in_folder(rel)]
+    return sorted(Path(folder).glob("*.md"))
@@ -0,0 +1,40 @@
+"""
+Bulk wikilink maintenance on top of the vault index's link graph.
+
+The index already knows which notes link to which targets, so a rename only
+opens the files that actually contain an affected link. Rewrites go through
+the vault edit engine, so each batch is atomic and journaled.
+"""
+from typing import Iterable, Optional
+
+from api.services.vault_edits import apply_plan, plan_edits
+from api.services.vault_index import get_vault_index
+
+
+def rewrite_links(
+    vault_path: str,
+    renames: dict[str, str],
+    paths: Optional[Iterable[str]] = None,
+    limit: Optional[int] = None,
+    dry_run: bool = False,
+) -> dict:
+    """Point every [[old]] link at [[new]] for each old -> new in ``renames``.
+
+    Headings, block refs and display text are kept. Only notes the index lists
+    as linking to an old target are read; ``paths`` narrows that further and
+    ``limit`` caps the number of links changed.
+
+    Returns {"files": {rel_path: links_changed}, "links": total, "diff":
+    {rel_path: unified diff}, "journal": path or None}.
+    """
+    plan = plan_edits(vault_path, links=renames, paths=paths, limit=limit)
+    result = {"files": plan.summary()["files"], "links": plan.changes, "diff": plan.diff(), "journal": None}
+    if plan and not dry_run:
+        result["journal"] = apply_plan(plan)["journal"]
+    return result
+
+
+def unresolved_links(vault_path: str, targets: Iterable[str]) -> list[str]:
+    """Targets that would not resolve to any note in the vault."""
+    resolved = get_vault_index(vault_path).resolve_links(targets)
+    return [target for target, path in resolved.items() if path is None]
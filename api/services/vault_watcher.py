@@ -0,0 +1,225 @@
+"""
+Live vault index updates from filesystem events.
+
+A watchdog observer feeds create/modify/move/delete events for notes into a
+pending set. A flusher thread applies them to the VaultIndex once the vault has
+been quiet for DEBOUNCE_SECONDS (or MAX_DELAY_SECONDS after the first pending
+event), so a burst of editor saves becomes one re-parse per note. Directory
+moves and deletes fall back to an incremental refresh().
+
+While running, the watcher heartbeats into the index so other processes
+(Streamlit, the MCP server) skip their own stat walk too.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    FileSystemEventHandler = object
+    WATCHDOG_AVAILABLE = False
+
+from api.services.vault_index import LIVE_HEARTBEAT_SECONDS, SKIP_DIRS, get_vault_index
+
+logger = logging.getLogger("codiak.vault_watcher")
+
+DEBOUNCE_SECONDS = 0.5
+MAX_DELAY_SECONDS = 5.0
+HEARTBEAT_SECONDS = LIVE_HEARTBEAT_SECONDS / 3
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher: "VaultWatcher"):
+        self._watcher = watcher
+
+    def on_any_event(self, event):
+        if event.event_type not in ("created", "modified", "moved", "deleted"):
+            return
+        paths = [event.src_path]
+        if getattr(event, "dest_path", ""):
+            paths.append(event.dest_path)
+        self._watcher.enqueue(paths, event.is_directory, event.event_type)
+
+
+class VaultWatcher:
+    """Watches one vault and keeps its index current."""
+
+    def __init__(self, vault_path: str):
+        self.vault_path = os.path.abspath(vault_path)
+        self.index = get_vault_index(self.vault_path, refresh=False)
+        self._cond = threading.Condition()
+        self._pending: dict[str, float] = {}
+        self._full_refresh = False
+        self._first_pending: Optional[float] = None
+        self._last_event = 0.0
+        self._stop = threading.Event()
+        self._observer = None
+        self._thread: Optional[threading.Thread] = None
+        self._last_beat = 0.0
+        # Metrics
+        self._batches = 0
+        self._events_applied = 0
+        self._last_batch_lag: Optional[float] = None
+        self._last_applied_at: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._observer = Observer()
+        self._observer.schedule(_EventHandler(self), self.vault_path, recursive=True)
+        self._observer.start()
+        self._thread = threading.Thread(target=self._run, name="vault-watcher", daemon=True)
+        self._thread.start()
+        # Catch up on anything that changed while nobody was watching
+        with self._cond:
+            now = time.monotonic()
+            self._full_refresh = True
+            self._first_pending = now
+            self._last_event = now - DEBOUNCE_SECONDS
+            self._cond.notify()
+        logger.info("Watching vault %s", self.vault_path)
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.index.clear_heartbeat()
+
+    # -- event intake --------------------------------------------------------
+
+    def _relative(self, path: str) -> Optional[str]:
+        rel = os.path.relpath(path, self.vault_path)
+        if rel.startswith(os.pardir) or not rel.endswith(".md"):
+            return None
+        if any(part in SKIP_DIRS for part in rel.split(os.sep)):
+            return None
+        return rel
+
+    def enqueue(self, paths: list[str], is_directory: bool, event_type: str):
+        now = time.monotonic()
+        with self._cond:
+            if is_directory:
+                # Directory mtimes change with every child edit; only structural
+                # changes need a walk, and those are coalesced into one refresh.
+                if event_type == "modified":
+                    return
+                self._full_refresh = True
+            else:
+                rels = [r for r in map(self._relative, paths) if r]
+                if not rels:
+                    return
+                for rel in rels:
+                    self._pending.setdefault(rel, now)
+            if self._first_pending is None:
+                self._first_pending = now
+            self._last_event = now
+            self._cond.notify()
+
+    # -- flushing ------------------------------------------------------------
+
+    def _seconds_until_flush(self) -> Optional[float]:
+        if self._first_pending is None:
+            return None
+        due = min(self._last_event + DEBOUNCE_SECONDS, self._first_pending + MAX_DELAY_SECONDS)
+        return max(0.0, due - time.monotonic())
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = None
+            with self._cond:
+                wait = self._seconds_until_flush()
+                if wait != 0.0:
+                    self._cond.wait(HEARTBEAT_SECONDS if wait is None else min(wait, HEARTBEAT_SECONDS))
+                    wait = self._seconds_until_flush()
+                if wait == 0.0 and not self._stop.is_set():
+                    batch, full, first = self._pending, self._full_refresh, self._first_pending
+                    self._pending, self._full_refresh, self._first_pending = {}, False, None
+            if batch is not None:
+                self._apply(batch, full, first)
+            self._beat()
+
+    def _apply(self, batch: dict[str, float], full: bool, first: float):
+        try:
+            stats = self.index.refresh() if full else self.index.apply_changes(batch)
+        except Exception:
+            logger.exception("Applying %d vault events failed", len(batch))
+            return
+        self._batches += 1
+        self._events_applied += len(batch)
+        self._last_batch_lag = time.monotonic() - first
+        self._last_applied_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        logger.debug("Applied %d vault events (full=%s): %s", len(batch), full, stats)
+
+    def _beat(self):
+        now = time.monotonic()
+        if now - self._last_beat >= HEARTBEAT_SECONDS:
+            try:
+                self.index.heartbeat()
+                self._last_beat = now
+            except Exception:
+                logger.exception("Vault index heartbeat failed")
+
+    def status(self) -> dict:
+        with self._cond:
+            pending = len(self._pending) + (1 if self._full_refresh else 0)
+            lag = time.monotonic() - self._first_pending if self._first_pending is not None else 0.0
+        return {
+            "running": self.running,
+            "vault_path": self.vault_path,
+            "pending_events": pending,
+            "index_lag_seconds": round(lag, 3),
+            "last_batch_lag_seconds": round(self._last_batch_lag, 3) if self._last_batch_lag is not None else None,
+            "batches_applied": self._batches,
+            "events_applied": self._events_applied,
+            "last_applied_at": self._last_applied_at,
+        }
+
+
+_watcher: Optional[VaultWatcher] = None
+_watcher_lock = threading.Lock()
+
+
+def start_vault_watcher(vault_path: Optional[str] = None) -> Optional[VaultWatcher]:
+    """Start watching ``vault_path`` (default OB_VAULT_PATH). No-op if unavailable."""
+    global _watcher
+    vault_path = vault_path or os.getenv("OB_VAULT_PATH", "")
+    if not WATCHDOG_AVAILABLE:
+        logger.warning("watchdog not installed; vault index will refresh on demand. Run: pip install watchdog")
+        return None
+    if not vault_path or not os.path.isdir(vault_path):
+        logger.info("No vault configured (OB_VAULT_PATH); vault watcher not started")
+        return None
+    with _watcher_lock:
+        if _watcher is None or not _watcher.running:
+            _watcher = VaultWatcher(vault_path)
+            _watcher.start()
+        return _watcher
+
+
+def stop_vault_watcher():
+    global _watcher
+    with _watcher_lock:
+        if _watcher is not None:
+            _watcher.stop()
+            _watcher = None
+
+
+def get_watcher_status() -> dict:
+    """Watcher health for /api/health; index_lag_seconds is the age of the oldest unapplied event."""
+    watcher = _watcher
+    if watcher is None:
+        return {"running": False, "watchdog_available": WATCHDOG_AVAILABLE}
+    return {**watcher.status(), "watchdog_available": WATCHDOG_AVAILABLE}
@@ -0,0 +1,174 @@
+"""
+Streaming YNAB export files.
+
+An export is newline-delimited JSON: a metadata line first, then one line per
+record, {"entity": "transactions", "record": {...}}. Lines are serialized one
+at a time with orjson (dates and datetimes natively, no converted copy of the
+budget) and written through a zstd stream, so neither the encoded document nor
+a second copy of the data is ever held in memory. Reading streams the same
+way, and the metadata line alone is enough to list files.
+
+Files are ``.ndjson.zst``, or plain ``.ndjson`` when zstandard isn't
+installed. Legacy ``.json`` exports (one indented document) still load.
+"""
+import io
+import json
+import os
+from contextlib import closing
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+FORMAT_VERSION = 1
+ZSTD_LEVEL = 6
+EXPORT_PREFIX = "ynab_data_"
+EXPORT_SUFFIXES = (".ndjson.zst", ".ndjson", ".json")
+# Record lists of an export, in file order
+ENTITIES = ("budgets", "categories", "accounts", "transactions")
+
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def export_suffix() -> str:
+    """Suffix for new exports: compressed when zstandard is available."""
+    return ".ndjson.zst" if ZSTD_AVAILABLE else ".ndjson"
+
+
+def _dumps(obj: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(obj, default=str, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def _loads(line: bytes) -> Any:
+    return orjson.loads(line) if ORJSON_AVAILABLE else json.loads(line)
+
+
+def write_export(filename: str, metadata: Dict[str, Any],
+                 records: Iterable[Tuple[str, Dict[str, Any]]]) -> Dict[str, int]:
+    """Stream (entity, record) pairs to ``filename`` after a metadata line.
+
+    Compresses with zstd when the name ends in ``.zst``. Writes to a temp
+    file and renames it, so a failed export never leaves a truncated file.
+    Returns {entity: count, "bytes": file size}.
+    """
+    compressed = filename.endswith(".zst")
+    if compressed and not ZSTD_AVAILABLE:
+        raise RuntimeError("zstandard not installed. Run: pip install zstandard")
+    counts: Dict[str, int] = {}
+    tmp = f"{filename}.tmp"
+    try:
+        with open(tmp, "wb") as raw:
+            out = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw) if compressed else raw
+            out.write(_dumps({"entity": "metadata", "format_version": FORMAT_VERSION, "record": metadata}))
+            for entity, record in records:
+                out.write(_dumps({"entity": entity, "record": record}))
+                counts[entity] = counts.get(entity, 0) + 1
+            if compressed:
+                out.flush(zstandard.FLUSH_FRAME)
+        os.replace(tmp, filename)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    counts["bytes"] = os.path.getsize(filename)
+    return counts
+
+
+def iter_records(data: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(entity, record) pairs of an export dict, as write_export takes them."""
+    for entity in ENTITIES:
+        for record in data.get(entity) or []:
+            yield entity, record
+
+
+def save_export(data: Dict[str, Any], filename: str) -> Dict[str, int]:
+    """Write an export dict ({budgets, categories, accounts, transactions, metadata})."""
+    return write_export(filename, data.get("metadata") or {}, iter_records(data))
+
+
+def _open_lines(filename: str) -> io.BufferedIOBase:
+    raw = open(filename, "rb")
+    if raw.read(4) == _ZSTD_MAGIC:
+        raw.seek(0)
+        if not ZSTD_AVAILABLE:
+            raw.close()
+            raise RuntimeError("zstandard not installed. Run: pip install zstandard")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True))
+    raw.seek(0)
+    return raw
+
+
+def is_ndjson(filename: str) -> bool:
+    """Whether ``filename`` is a streaming export rather than a legacy JSON document."""
+    with open(filename, "rb") as f:
+        if f.read(4) == _ZSTD_MAGIC:
+            return True
+        f.seek(0)
+        first = f.readline()
+    try:
+        item = _loads(first)
+    except ValueError:
+        return False
+    return isinstance(item, dict) and item.get("entity") == "metadata"
+
+
+def iter_export(filename: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Stream (entity, record) pairs from an export, metadata first.
+
+    Legacy ``.json`` files are loaded whole and replayed in the same shape.
+    """
+    if not is_ndjson(filename):
+        with open(filename, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        yield "metadata", data.get("metadata") or {}
+        yield from iter_records(data)
+        return
+    with _open_lines(filename) as f:
+        for line in f:
+            if line.strip():
+                item = _loads(line)
+                yield item["entity"], item["record"]
+
+
+def read_metadata(filename: str) -> Dict[str, Any]:
+    """An export's metadata, reading only its first line for streaming files."""
+    with closing(iter_export(filename)) as items:
+        for entity, record in items:
+            return record if entity == "metadata" else {}
+    return {}
+
+
+def load_export(filename: str) -> Dict[str, Any]:
+    """The whole export as a dict: {budgets, categories, accounts, transactions, metadata}."""
+    data: Dict[str, Any] = {entity: [] for entity in ENTITIES}
+    for entity, record in iter_export(filename):
+        if entity == "metadata":
+            data["metadata"] = record
+        else:
+            data.setdefault(entity, []).append(record)
+    return data
+
+
+def list_export_files(directory: str = ".") -> List[str]:
+    """YNAB export files in ``directory``, newest name first."""
+    files = [f for f in os.listdir(directory)
+             if f.startswith(EXPORT_PREFIX) and f.endswith(EXPORT_SUFFIXES)]
+    return sorted(files, reverse=True)
+
+
+def export_mime(filename: str) -> str:
+    if filename.endswith(".zst"):
+        return "application/zstd"
+    return "application/x-ndjson" if filename.endswith(".ndjson") else "application/json"
@@ -1,16 +1,26 @@
 import os
 from typing import Dict, List
-from tools.tag_search_util import find_notes_with_tags
+from api.services.vault_index import TagQueryError
+from tools.tag_search_util import build_tag_query, search_notes_by_tags
 
 async def search_tags_mcp(input_dict: Dict) -> Dict:
     """
     MCP tool for searching notes by tags.
-    Input: {"tags": [..], "vault_path": ...}
-    Output: {"results": [{"title": ..., "path": ...}, ...]}
+    Input: {"vault_path": ..., plus either
+            "query": "person AND (work OR home) NOT archived"  (AND/OR/NOT, -tag, parentheses), or
+            "tags": [..], "match": "any"|"all", "exclude": [..]}
+    Output: {"results": [{"title": ..., "path": ..., "matched_tags": [...]}, ...]}
     """
-    tags = input_dict.get("tags", [])
     vault_path = input_dict.get("vault_path")
-    if not tags or not vault_path or not os.path.isdir(vault_path):
+    query = input_dict.get("query") or build_tag_query(
+        input_dict.get("tags", []),
+        match=input_dict.get("match", "any"),
+        exclude=input_dict.get("exclude", []),
+    )
+    if not query or not vault_path or not os.path.isdir(vault_path):
         return {"results": []}
-    results = find_notes_with_tags(vault_path, tags)
-    return {"results": results}
\ No newline at end of file
+    try:
+        results = search_notes_by_tags(vault_path, query)
+    except TagQueryError as e:
+        return {"results": [], "error": str(e)}
+    return {"results": results}
@@ -0,0 +1,112 @@
+"""Measure Keeper chat time-to-first-byte, blocking vs streaming.
+
+Runs both entry points against a local stub of the OpenAI chat completions
+API (no network, no API key spend) and a throwaway Dragon Keeper database.
+
+Usage:
+    python -m scripts.bench_keeper_stream [--tokens 40] [--token-delay 0.02]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import api.models.dragon_keeper.db as dk_db
+
+
+def _make_handler(tokens: int, token_delay: float):
+    words = [f"word{i} " for i in range(tokens)]
+
+    class StubCompletions(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            base = {"id": "stub", "object": "chat.completion", "created": 0, "model": body["model"]}
+            if not body.get("stream"):
+                time.sleep(token_delay * tokens)
+                payload = dict(base, choices=[{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": "".join(words)},
+                }])
+                data = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for i, word in enumerate(words):
+                time.sleep(token_delay)
+                chunk = dict(base, object="chat.completion.chunk", choices=[{
+                    "index": 0,
+                    "delta": {"role": "assistant", "content": word} if i == 0 else {"content": word},
+                    "finish_reason": None,
+                }])
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+            done = dict(base, object="chat.completion.chunk",
+                        choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}])
+            self.wfile.write(f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n".encode())
+            self.wfile.flush()
+
+    return StubCompletions
+
+
+async def _measure(question: str) -> dict:
+    from api.services.dragon_keeper.keeper_agent import _get_openai_tools, chat, chat_stream
+
+    # Load the MCP tool registry up front so neither path pays the import cost
+    await _get_openai_tools()
+
+    start = time.perf_counter()
+    await chat(question)
+    blocking_total = time.perf_counter() - start
+
+    start = time.perf_counter()
+    first_token = None
+    async for evt in chat_stream(question):
+        if first_token is None and evt["event"] == "token":
+            first_token = time.perf_counter() - start
+    stream_total = time.perf_counter() - start
+
+    return {
+        "blocking_ttfb_ms": round(blocking_total * 1000, 1),
+        "stream_ttfb_ms": round((first_token or stream_total) * 1000, 1),
+        "stream_total_ms": round(stream_total * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(args.tokens, args.token_delay))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dk_db.DB_DIR = tmp
+        dk_db.DB_PATH = os.path.join(tmp, "dragon_keeper.db")
+        dk_db.run_migrations()
+        os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+        os.environ.setdefault("OPENAI_API_KEY", "stub")
+        try:
+            print(json.dumps(asyncio.run(_measure("How much did I spend on dining?")), indent=2))
+        finally:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
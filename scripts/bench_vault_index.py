@@ -0,0 +1,84 @@
+"""Measure cold vault-index throughput, single process vs process pool.
+
+Generates a synthetic vault (frontmatter, tags, wikilinks, headings, tasks,
+code fences) in a temp directory and indexes it from scratch once per worker
+count, then times a warm no-change refresh.
+
+Usage:
+    python -m scripts.bench_vault_index [--notes 50000] [--workers 1 4 8]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+
+import api.services.vault_index as vault_index
+
+TAGS = ["person", "work", "home", "idea", "project/alpha", "project/beta", "todo", "reading"]
+
+
+def _make_note(rng: random.Random, i: int) -> str:
+    day = f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    lines = [
+        "---",
+        f"tags: [{', '.join(rng.sample(TAGS, 2))}]",
+        f"created: {day}",
+        f"related: \"[[Note {rng.randrange(i + 1)}]]\"",
+        "---",
+        f"# {day} Note {i}",
+        "",
+    ]
+    for section in range(rng.randint(2, 5)):
+        lines.append(f"## Section {section} [[{day}]]")
+        for _ in range(rng.randint(3, 10)):
+            kind = rng.random()
+            if kind < 0.3:
+                lines.append(f"- [ ] Follow up with [[Person {rng.randrange(500)}]] #{rng.choice(TAGS)}")
+            elif kind < 0.5:
+                lines.append(f"- [x] Finished item {rng.randrange(1000)} ✅ {day}")
+            else:
+                lines.append(f"Some prose about [[Note {rng.randrange(i + 1)}|a note]] and #{rng.choice(TAGS)} here.")
+        if rng.random() < 0.2:
+            lines += ["```python", "x = '#not-a-tag [[not a link]]'", "```"]
+    return "\n".join(lines) + "\n"
+
+
+def _make_vault(root: str, notes: int):
+    rng = random.Random(42)
+    for i in range(notes):
+        folder = os.path.join(root, f"Area {i % 20}", f"Topic {i % 97}")
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"Note {i}.md"), "w", encoding="utf-8") as f:
+            f.write(_make_note(rng, i))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=50000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=[1, min(os.cpu_count() or 1, vault_index.MAX_PARSE_WORKERS)])
+    args = parser.parse_args()
+
+    results = {"notes": args.notes, "cpu_count": os.cpu_count(), "cold": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        vault = os.path.join(tmp, "vault")
+        _make_vault(vault, args.notes)
+
+        for workers in dict.fromkeys(args.workers):
+            vault_index.INDEX_DIR = os.path.join(tmp, f"index-{workers}")
+            index = vault_index.VaultIndex(vault)
+            stats = index.refresh(workers=workers)
+            results["cold"].append({
+                "workers": workers,
+                "seconds": stats["seconds"],
+                "notes_per_second": round(stats["added"] / stats["seconds"]),
+            })
+
+        results["warm_refresh_seconds"] = index.refresh()["seconds"]
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
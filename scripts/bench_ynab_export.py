@@ -0,0 +1,168 @@
+"""Compare the legacy indented-JSON YNAB export with the streaming format.
+
+Builds a synthetic budget export (transactions with subtransactions, accounts
+with datetime fields) and, each in a fresh subprocess, writes and reads it
+back with the legacy json.dump(indent=2) path and with the streaming NDJSON
+writer (zstd when installed). Reports time, peak RSS above the in-memory
+data, and file size.
+
+Usage:
+    python -m scripts.bench_ynab_export [--transactions 100000]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from api.services import ynab_export_files
+
+PAYEES = [f"Payee {i}" for i in range(400)]
+
+
+def make_export(transactions: int) -> dict:
+    rng = random.Random(7)
+    groups = [(f"g{g}", f"Group {g}") for g in range(12)]
+    categories = [{
+        "id": f"c{i}", "name": f"Category {i}", "category_group_id": groups[i % 12][0],
+        "category_group_name": groups[i % 12][1], "hidden": False, "original_category_group_id": None,
+        "note": None, "budgeted": rng.randrange(10**6), "activity": -rng.randrange(10**6),
+        "balance": rng.randrange(10**6), "goal_type": None, "goal_creation_month": None,
+        "goal_target": 0, "goal_target_month": None, "goal_percentage_complete": None, "deleted": False,
+    } for i in range(120)]
+    accounts = [{
+        "id": f"a{i}", "name": f"Account {i}", "type": "checking", "on_budget": True, "closed": False,
+        "note": None, "balance": rng.randrange(10**8), "cleared_balance": 0, "uncleared_balance": 0,
+        "transfer_payee_id": f"tp{i}", "direct_import_linked": True, "direct_import_in_error": False,
+        "last_reconciled_at": datetime(2026, 1, 1, 12, 30) + timedelta(days=i),
+        "debt_interest_rates": {date(2025, 1, 1): 0}, "debt_minimum_payments": None,
+        "debt_escrow_amounts": None, "deleted": False,
+    } for i in range(15)]
+    start = date(2018, 1, 1)
+    txns = []
+    for i in range(transactions):
+        cat = rng.choice(categories)
+        payee = rng.choice(PAYEES)
+        subs = [{
+            "id": f"s{i}-{j}", "transaction_id": f"t{i}", "amount": -rng.randrange(10**5), "memo": None,
+            "payee_id": None, "payee_name": None, "category_id": cat["id"], "category_name": cat["name"],
+            "transfer_account_id": None, "deleted": False,
+        } for j in range(2)] if rng.random() < 0.05 else []
+        txns.append({
+            "id": f"t{i}", "date": (start + timedelta(days=i * 3000 // transactions)).isoformat(),
+            "amount": -rng.randrange(10**6), "memo": rng.choice([None, "", "groceries", "monthly bill"]),
+            "cleared": "cleared", "approved": True, "flag_color": None, "flag_name": None,
+            "account_id": f"a{i % 15}", "account_name": f"Account {i % 15}", "payee_id": f"p{PAYEES.index(payee)}",
+            "payee_name": payee, "category_id": cat["id"], "category_name": cat["name"],
+            "transfer_account_id": None, "transfer_transaction_id": None, "matched_transaction_id": None,
+            "import_id": f"YNAB:{i}:2026-01-01:1", "import_payee_name": payee,
+            "import_payee_name_original": payee.upper(), "debt_transaction_type": None, "deleted": False,
+            "subtransactions": subs,
+        })
+    return {
+        "budgets": [{"id": "b1", "name": "Bench", "last_modified_on": datetime(2026, 10, 1).isoformat(),
+                     "first_month": "2018-01-01", "last_month": "2026-10-01",
+                     "date_format": {"format": "YYYY-MM-DD"}, "currency_format": {"iso_code": "USD"}}],
+        "categories": categories,
+        "transactions": txns,
+        "accounts": accounts,
+        "metadata": {"export_timestamp": datetime(2026, 10, 1, 9, 0).isoformat(), "budget_id": "b1",
+                     "total_budgets": 1, "total_categories": len(categories),
+                     "total_transactions": transactions, "total_accounts": len(accounts),
+                     "ynab_api_version": "1.0"},
+    }
+
+
+def _convert(obj):
+    # The legacy path: a full converted copy before json.dump
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, dict):
+        return {(k.isoformat() if isinstance(k, (datetime, date)) else k): _convert(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_convert(v) for v in obj]
+    return obj
+
+
+def legacy_save(data: dict, filename: str):
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(_convert(data), f, indent=2, ensure_ascii=False)
+
+
+def legacy_load(filename: str) -> dict:
+    with open(filename, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run(mode: str, transactions: int, filename: str, phase: str, queue):
+    if phase == "write":
+        data = make_export(transactions)
+        base = _peak_rss_mb()
+        start = time.perf_counter()
+        if mode == "legacy":
+            legacy_save(data, filename)
+        else:
+            ynab_export_files.save_export(data, filename)
+    else:
+        base = _peak_rss_mb()
+        start = time.perf_counter()
+        data = legacy_load(filename) if mode == "legacy" else ynab_export_files.load_export(filename)
+        assert len(data["transactions"]) == transactions
+    queue.put({"seconds": round(time.perf_counter() - start, 2),
+               "peak_rss_mb_over_base": round(_peak_rss_mb() - base, 1)})
+
+
+def measure(mode: str, transactions: int, filename: str, phase: str) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run, args=(mode, transactions, filename, phase, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=100000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    files = {
+        "legacy": os.path.join(workdir, "ynab_data_bench.json"),
+        "streaming": os.path.join(workdir, f"ynab_data_bench{ynab_export_files.export_suffix()}"),
+    }
+    report = {"transactions": args.transactions, "orjson": ynab_export_files.ORJSON_AVAILABLE,
+              "zstd": ynab_export_files.ZSTD_AVAILABLE}
+    for mode, filename in files.items():
+        report[mode] = {
+            "file": os.path.basename(filename),
+            "write": measure(mode, args.transactions, filename, "write"),
+            "read": measure(mode, args.transactions, filename, "read"),
+            "size_mb": round(os.path.getsize(filename) / (1024 * 1024), 2),
+        }
+
+    # Both formats must hold the same data
+    legacy = legacy_load(files["legacy"])
+    streamed = ynab_export_files.load_export(files["streaming"])
+    assert all(legacy[k] == streamed[k] for k in ("budgets", "categories", "transactions", "accounts", "metadata"))
+    legacy_meta = ynab_export_files.read_metadata(files["legacy"])
+    assert ynab_export_files.read_metadata(files["streaming"]) == legacy_meta
+    start = time.perf_counter()
+    ynab_export_files.read_metadata(files["streaming"])
+    report["streaming"]["metadata_only_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
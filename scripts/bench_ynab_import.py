@@ -0,0 +1,131 @@
+"""Time the bulk YNAB import against a row-by-row load of the same rows.
+
+Creates an accounts.db stand-in in a temp directory (the YNAB tables with the
+columns the importer writes, a few indexes, and linked accounts for balance
+snapshots), generates a synthetic export and imports it with
+import_ynab_data_to_db. The baseline inserts the same rows one execute() at a
+time with the indexes in place, as the importer used to.
+
+Usage:
+    python -m scripts.bench_ynab_import [--transactions 100000]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+from scripts.bench_ynab_export import make_export
+from tools import ynab_export_data
+
+_SCHEMA = """
+CREATE TABLE ynab_budgets (
+    id TEXT PRIMARY KEY, name TEXT, last_modified_on TEXT, first_month TEXT, last_month TEXT,
+    date_format_format TEXT, currency_format_iso_code TEXT, currency_format_example_format TEXT,
+    currency_format_decimal_digits INTEGER, currency_format_decimal_separator TEXT,
+    currency_format_symbol_first INTEGER, currency_format_group_separator TEXT,
+    currency_format_currency_symbol TEXT, currency_format_display_symbol INTEGER, updated_at TEXT
+);
+CREATE TABLE ynab_categories (
+    id TEXT PRIMARY KEY, name TEXT, category_group_id TEXT, category_group_name TEXT, full_name TEXT,
+    hidden INTEGER, original_category_group_id TEXT, note TEXT, budgeted INTEGER, activity INTEGER,
+    balance INTEGER, goal_type TEXT, goal_creation_month TEXT, goal_target INTEGER,
+    goal_target_month TEXT, goal_percentage_complete INTEGER, deleted INTEGER, updated_at TEXT
+);
+CREATE TABLE ynab_category_groups (id TEXT PRIMARY KEY, name TEXT, updated_at TEXT);
+CREATE TABLE ynab_transactions (
+    id TEXT PRIMARY KEY, date TEXT, amount INTEGER, memo TEXT, cleared TEXT, approved INTEGER,
+    flag_color TEXT, flag_name TEXT, account_id TEXT, account_name TEXT, payee_id TEXT,
+    payee_name TEXT, category_id TEXT, category_name TEXT, transfer_account_id TEXT,
+    transfer_transaction_id TEXT, matched_transaction_id TEXT, import_id TEXT,
+    import_payee_name TEXT, import_payee_name_original TEXT, debt_transaction_type TEXT,
+    deleted INTEGER, updated_at TEXT
+);
+CREATE TABLE ynab_subtransactions (
+    id TEXT PRIMARY KEY, transaction_id TEXT, amount INTEGER, memo TEXT, payee_id TEXT,
+    payee_name TEXT, category_id TEXT, category_name TEXT, transfer_account_id TEXT,
+    deleted INTEGER, updated_at TEXT
+);
+CREATE TABLE ynab_payees (id TEXT PRIMARY KEY, name TEXT, updated_at TEXT);
+CREATE TABLE ynab_account (
+    budget_id TEXT, ynab_account_id TEXT PRIMARY KEY, name TEXT, type TEXT, on_budget INTEGER,
+    closed INTEGER, note TEXT, balance INTEGER, cleared_balance INTEGER, uncleared_balance INTEGER,
+    transfer_payee_id TEXT, direct_import_linked INTEGER, direct_import_in_error INTEGER,
+    last_reconciled_at TEXT, deleted INTEGER, updated_at_utc TEXT
+);
+CREATE INDEX idx_ynab_transactions_date ON ynab_transactions(date);
+CREATE INDEX idx_ynab_transactions_category ON ynab_transactions(category_id, date);
+CREATE INDEX idx_ynab_transactions_payee ON ynab_transactions(payee_name);
+CREATE INDEX idx_ynab_transactions_account ON ynab_transactions(account_id, date);
+CREATE INDEX idx_ynab_subtransactions_txn ON ynab_subtransactions(transaction_id);
+CREATE TABLE account (id INTEGER PRIMARY KEY, name TEXT, side TEXT, currency TEXT);
+CREATE TABLE account_link_ynab (account_id INTEGER, ynab_account_id TEXT);
+CREATE TABLE balance_snapshot (
+    id INTEGER PRIMARY KEY, account_id INTEGER, amount_cents INTEGER, as_of_date TEXT,
+    source TEXT, notes TEXT
+);
+"""
+
+
+def make_db(path: str, accounts: int):
+    conn = sqlite3.connect(path)
+    conn.executescript(_SCHEMA)
+    for i in range(accounts):
+        conn.execute("INSERT INTO account VALUES (?, ?, ?, 'USD')",
+                     (i + 1, f"Account {i}", "credit" if i % 3 == 0 else "debit"))
+        conn.execute("INSERT INTO account_link_ynab VALUES (?, ?)", (i + 1, f"a{i}"))
+    conn.commit()
+    conn.close()
+
+
+def row_by_row(data: dict, budget_id: str):
+    """The old load: one execute() per row, indexes maintained throughout."""
+    rows = ynab_export_data.build_import_rows(data, budget_id)
+    conn = ynab_export_data.get_db_connection()
+    for table in ynab_export_data.YNAB_IMPORT_TABLES:
+        conn.execute(f"DELETE FROM {table}")
+    for table, insert_sql in ynab_export_data.YNAB_IMPORT_TABLES.items():
+        for row in rows[table]:
+            conn.execute(insert_sql, row)
+    conn.commit()
+    conn.close()
+
+
+def table_counts() -> dict:
+    conn = ynab_export_data.get_db_connection()
+    try:
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ynab_export_data.YNAB_IMPORT_TABLES}
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=100000)
+    args = parser.parse_args()
+
+    data = make_export(args.transactions)
+    os.chdir(tempfile.mkdtemp())
+    make_db("accounts.db", len(data["accounts"]))
+    report = {"transactions": args.transactions}
+
+    start = time.perf_counter()
+    row_by_row(data, "b1")
+    report["row_by_row_seconds"] = round(time.perf_counter() - start, 2)
+    expected = table_counts()
+
+    stats = ynab_export_data.import_ynab_data_to_db(data, "b1")
+    assert stats and table_counts() == expected, (stats, expected)
+    assert stats["balance_snapshot"] == len(data["accounts"])
+    conn = ynab_export_data.get_db_connection()
+    indexes = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL").fetchone()[0]
+    conn.close()
+    assert indexes == 5, indexes
+    report["bulk"] = stats
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Check the Cost Explorer cache against a stubbed boto3 client.
+
+The stub answers get_cost_and_usage like Cost Explorer (daily results grouped
+by service and region, paginated with NextPageToken) and records every call.
+The script checks that warm views make no calls, that overlapping views only
+fetch the missing days, that only open days are refetched (and pick up
+revised amounts), and that every view matches an uncached fetch.
+
+Usage:
+    python -m scripts.check_aws_cost_cache
+"""
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+
+from api.services import aws_cost_cache
+
+SERVICES = ["Amazon EC2", "Amazon S3", "AWS Lambda", "Amazon RDS"]
+REGIONS = ["us-east-1", "us-west-2", "global"]
+
+
+class StubCostExplorer:
+    """Deterministic stand-in for boto3.client("ce")."""
+
+    def __init__(self, page_days: int = 7):
+        self.page_days = page_days
+        self.calls: list[dict] = []
+        # AWS keeps revising recent days; amounts from this day on change
+        self.revised_from = None
+
+    def amount(self, day: date, service: str, region: str) -> float:
+        seed = day.toordinal() * 31 + SERVICES.index(service) * 7 + REGIONS.index(region)
+        revision = 1 if self.revised_from and day >= self.revised_from else 0
+        return 0.0 if seed % 5 == 0 else round((seed % 97) * 0.37 + revision, 4)
+
+    def get_cost_and_usage(self, TimePeriod, Granularity, Metrics, GroupBy, NextPageToken=None):
+        assert Granularity == "DAILY" and Metrics == ["UnblendedCost"] and len(GroupBy) == 2
+        self.calls.append({"Start": TimePeriod["Start"], "End": TimePeriod["End"], "Token": NextPageToken})
+        start, end = date.fromisoformat(TimePeriod["Start"]), date.fromisoformat(TimePeriod["End"])
+        assert start < end, TimePeriod
+        page_start = date.fromisoformat(NextPageToken) if NextPageToken else start
+        page_end = min(end, page_start + timedelta(days=self.page_days))
+        results = []
+        day = page_start
+        while day < page_end:
+            groups = [
+                {"Keys": [service, region],
+                 "Metrics": {"UnblendedCost": {"Amount": str(self.amount(day, service, region)), "Unit": "USD"}}}
+                for service in SERVICES for region in REGIONS if self.amount(day, service, region)
+            ]
+            results.append({"TimePeriod": {"Start": day.isoformat(), "End": (day + timedelta(days=1)).isoformat()},
+                            "Total": {}, "Groups": groups, "Estimated": True})
+            day += timedelta(days=1)
+        response = {"ResultsByTime": results}
+        if page_end < end:
+            response["NextPageToken"] = page_end.isoformat()
+        return response
+
+
+def expected_rows(stub: StubCostExplorer, start: date, end: date) -> list[dict]:
+    rows = []
+    day = start
+    while day < end:
+        for service in sorted(SERVICES):
+            for region in sorted(REGIONS):
+                amount = stub.amount(day, service, region)
+                if amount:
+                    rows.append({"Service": service, "Region": region, "Cost": amount, "Unit": "USD",
+                                 "Start Date": day.isoformat(),
+                                 "End Date": (day + timedelta(days=1)).isoformat()})
+        day += timedelta(days=1)
+    return rows
+
+
+def main():
+    db = os.path.join(tempfile.mkdtemp(), "aws_costs.db")
+    stub = StubCostExplorer()
+    today = aws_cost_cache._utc_today()
+    report = {}
+
+    def view(name, start, end, **kwargs):
+        before = len(stub.calls)
+        rows, stats = aws_cost_cache.get_daily_costs(stub, start, end, db_path=db, **kwargs)
+        assert rows == expected_rows(stub, start, end), name
+        assert stats["requests"] == len(stub.calls) - before, (name, stats)
+        report[name] = stats
+        return stats
+
+    last_30 = (today - timedelta(days=30), today)
+    month = (today.replace(day=1), today + timedelta(days=1))
+    stats = view("last_30_cold", *last_30)
+    assert stats["fetched_days"] == 30 and stats["requests"] == 5  # 7-day pages
+    stats = view("last_30_warm", *last_30)
+    assert stats["requests"] == 0 and stats["cached_days"] == 30
+    stats = view("current_month", *month)
+    assert stats["fetched_days"] == 1 and stats["requests"] == 1  # only today was missing
+    stats = view("custom_overlapping", today - timedelta(days=45), today - timedelta(days=20))
+    assert stats["fetched_days"] == 15 and stats["requests"] == 3
+
+    # Open days go stale: only they are fetched again, and revised amounts show up
+    stub.revised_from = today - timedelta(days=aws_cost_cache.SETTLE_DAYS)
+    aws_cost_cache.OPEN_DAY_TTL_SECONDS = 0
+    stats = view("last_30_open_days_stale", *last_30)
+    assert stats["fetched_days"] == aws_cost_cache.SETTLE_DAYS, stats
+    assert all(c["Start"] >= (today - timedelta(days=aws_cost_cache.SETTLE_DAYS)).isoformat()
+               for c in stub.calls[-stats["requests"]:])
+    aws_cost_cache.OPEN_DAY_TTL_SECONDS = 6 * 3600
+    stats = view("last_30_refresh", *last_30, refresh=True)
+    assert stats["fetched_days"] == aws_cost_cache.SETTLE_DAYS
+    report["total_calls"] = len(stub.calls)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Exercise the sharded nmap scan pipeline against loopback only.
+
+Opens a few TCP listeners on 127.0.0.1, scans 127.0.0.0/29 in loopback test
+mode, then closes one listener and rescans, checking streamed results, the
+stored history and the diff between the two scans. Uses nmap when it is
+installed, otherwise (or with --connect) a plain TCP connect scan stands in
+for each shard.
+
+Usage:
+    python -m scripts.check_nmap_scans [--connect] [--db /tmp/nmap_check.db]
+"""
+import argparse
+import ipaddress
+import json
+import os
+import shutil
+import socket
+import tempfile
+import time
+
+from api.services import nmap_scans
+
+
+def connect_shard(hosts: str, arguments: str) -> dict[str, dict]:
+    """Stand-in for nmap_shard: TCP connect to each "-p" port of each host."""
+    ports = [int(p) for p in arguments.split("-p", 1)[1].split()[0].split(",")]
+    result = {}
+    for ip in ipaddress.ip_network(hosts, strict=False):
+        tcp = {}
+        for port in ports:
+            with socket.socket() as s:
+                s.settimeout(0.5)
+                state = "open" if s.connect_ex((str(ip), port)) == 0 else "closed"
+            tcp[port] = {"state": state, "name": "", "product": "", "version": ""}
+        result[str(ip)] = {"status": {"state": "up"}, "tcp": tcp}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connect", action="store_true", help="use the TCP connect stand-in even if nmap exists")
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "nmap_scans_check.db"))
+    args = parser.parse_args()
+
+    use_nmap = not args.connect and nmap_scans.NMAP_AVAILABLE and shutil.which("nmap")
+    scan_fn = None if use_nmap else connect_shard
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    nmap_scans._db_ready.discard(args.db)
+
+    listeners = []
+    for _ in range(3):
+        s = socket.socket()
+        s.bind(("127.0.0.1", 0))
+        s.listen()
+        listeners.append(s)
+    ports = [s.getsockname()[1] for s in listeners]
+    port_list = ",".join(map(str, ports))
+
+    def scan():
+        events = list(nmap_scans.run_scan("127.0.0.0/29", ports=port_list, shard_prefix=30,
+                                          loopback_only=True, scan_fn=scan_fn, db_path=args.db))
+        assert events[0]["type"] == "start" and events[0]["shards"] == 2, events[0]
+        assert events[-1]["type"] == "done" and events[-1]["status"] == "complete", events[-1]
+        return events
+
+    first = scan()
+    hosts = {e["host"]: e for e in first if e["type"] == "host"}
+    expected = [f"{p}/tcp" for p in sorted(ports)]
+    assert hosts["127.0.0.1"]["open_ports"] == expected, hosts["127.0.0.1"]["open_ports"]
+    first_id = first[-1]["scan_id"]
+    stored = nmap_scans.load_scan(first_id, db_path=args.db)
+    assert set(stored["hosts"]) == set(hosts)
+    assert nmap_scans.open_ports(stored["hosts"]["127.0.0.1"]) == expected
+    # Reloaded results keep python-nmap's int port keys, so ports sort numerically
+    assert all(isinstance(p, int) for p in stored["hosts"]["127.0.0.1"]["tcp"]), stored["hosts"]["127.0.0.1"]["tcp"]
+
+    listeners.pop().close()
+    second = scan()
+    diff = nmap_scans.diff_scans(first_id, second[-1]["scan_id"], db_path=args.db)
+    assert diff["closed"] == {"127.0.0.1": [f"{ports[-1]}/tcp"]}, diff
+    assert not diff["opened"] and not diff["new_hosts"] and not diff["gone_hosts"], diff
+
+    try:
+        next(nmap_scans.run_scan("192.168.1.0/24", loopback_only=True, scan_fn=scan_fn, db_path=args.db))
+        raise AssertionError("loopback mode scanned a non-loopback target")
+    except ValueError:
+        pass
+
+    # Shards run concurrently, and closing the stream early cancels the rest
+    def slow_shard(hosts, arguments):
+        time.sleep(0.2)
+        return {hosts.split("/")[0]: {"status": {"state": "up"}}}
+    start = time.perf_counter()
+    events = list(nmap_scans.run_scan("127.0.0.0/27", ports="1", shard_prefix=30, max_workers=4,
+                                      loopback_only=True, scan_fn=slow_shard, db_path=args.db))
+    parallel_seconds = time.perf_counter() - start
+    stream = nmap_scans.run_scan("127.0.0.0/27", ports="1", shard_prefix=30, max_workers=1,
+                                 loopback_only=True, scan_fn=slow_shard, db_path=args.db)
+    cancelled_id = next(stream)["scan_id"]
+    next(stream)
+    stream.close()
+    assert nmap_scans.load_scan(cancelled_id, db_path=args.db)["scan"]["status"] == "cancelled"
+
+    for s in listeners:
+        s.close()
+    print(json.dumps({
+        "scanner": "nmap" if use_nmap else "connect",
+        "hosts": len(hosts),
+        "open_on_127.0.0.1": hosts["127.0.0.1"]["open_ports"],
+        "diff": diff,
+        "8_shards_x_0.2s_with_4_workers": round(parallel_seconds, 2),
+        "history": len(nmap_scans.list_scans(db_path=args.db)),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Property-check the sweep-line room adjacency against the pairwise scan.
+
+Generates random layouts (grids of abutting rooms with jitter inside the
+tolerance, duplicate walls, ties, overlapping and degenerate rooms) and asserts
+house_service._compute_links matches the original O(n^2) comparison, then times
+both on a large site.
+
+Usage:
+    python -m scripts.check_room_adjacency [--cases 500] [--rooms 5000]
+"""
+import argparse
+import json
+import random
+import time
+
+from api.services.house_service import ADJACENCY_TOLERANCE, MIN_WALL_OVERLAP, _compute_links
+
+
+def brute_force_links(rooms: list[dict]) -> dict[str, dict[str, str]]:
+    """The original pairwise implementation, kept as the reference."""
+    best: dict[str, dict[str, tuple[str, float]]] = {r["id"]: {} for r in rooms}
+
+    def try_update(room_id, direction, target_id, overlap_start):
+        existing = best[room_id].get(direction)
+        if existing is None or overlap_start < existing[1]:
+            best[room_id][direction] = (target_id, overlap_start)
+
+    for i, a in enumerate(rooms):
+        for b in rooms[i + 1:]:
+            ax0, ax1 = a["x"], a["x"] + a["w"]
+            az0, az1 = a["z"], a["z"] + a["d"]
+            bx0, bx1 = b["x"], b["x"] + b["w"]
+            bz0, bz1 = b["z"], b["z"] + b["d"]
+            if abs(ax1 - bx0) < ADJACENCY_TOLERANCE:
+                z_overlap = min(az1, bz1) - max(az0, bz0)
+                if z_overlap >= MIN_WALL_OVERLAP:
+                    start = max(az0, bz0)
+                    try_update(a["id"], "east", b["id"], start)
+                    try_update(b["id"], "west", a["id"], start)
+            elif abs(bx1 - ax0) < ADJACENCY_TOLERANCE:
+                z_overlap = min(az1, bz1) - max(az0, bz0)
+                if z_overlap >= MIN_WALL_OVERLAP:
+                    start = max(az0, bz0)
+                    try_update(b["id"], "east", a["id"], start)
+                    try_update(a["id"], "west", b["id"], start)
+            if abs(az1 - bz0) < ADJACENCY_TOLERANCE:
+                x_overlap = min(ax1, bx1) - max(ax0, bx0)
+                if x_overlap >= MIN_WALL_OVERLAP:
+                    start = max(ax0, bx0)
+                    try_update(a["id"], "south", b["id"], start)
+                    try_update(b["id"], "north", a["id"], start)
+            elif abs(bz1 - az0) < ADJACENCY_TOLERANCE:
+                x_overlap = min(ax1, bx1) - max(ax0, bx0)
+                if x_overlap >= MIN_WALL_OVERLAP:
+                    start = max(ax0, bx0)
+                    try_update(b["id"], "south", a["id"], start)
+                    try_update(a["id"], "north", b["id"], start)
+
+    return {room_id: {d: t for d, (t, _) in dirs.items()} for room_id, dirs in best.items()}
+
+
+def _grid_site(rng: random.Random, rooms: int, jitter: float) -> list[dict]:
+    """Rows of abutting rooms with random widths, split into buildings."""
+    result = []
+    z = 0.0
+    while len(result) < rooms:
+        depth = rng.choice([2.0, 3.0, 3.5, 4.0])
+        x = rng.choice([0.0, 0.5, 1.0])
+        for _ in range(rng.randint(3, 40)):
+            w = rng.choice([0.3, 1.0, 2.5, 3.0, 4.0, rng.uniform(0.1, 6.0)])
+            result.append({
+                "id": f"r{len(result)}",
+                "x": x + rng.uniform(-jitter, jitter),
+                "z": z + rng.uniform(-jitter, jitter),
+                "w": w,
+                "d": depth if rng.random() < 0.8 else rng.uniform(0.2, depth * 2),
+            })
+            x += w + (0.0 if rng.random() < 0.85 else rng.choice([0.03, 0.05, 0.2, 1.0]))
+        z += depth + (0.0 if rng.random() < 0.7 else rng.choice([0.04, 0.05, 5.0]))
+    return result[:rooms]
+
+
+def _random_rooms(rng: random.Random, rooms: int) -> list[dict]:
+    """Small coordinates on a coarse lattice: lots of ties and overlaps."""
+    return [{
+        "id": f"r{i}" if rng.random() < 0.9 else f"r{rng.randrange(i + 1)}",
+        "x": rng.randrange(8) * 0.5 + rng.choice([0.0, 0.0, 0.02, -0.03, 0.05]),
+        "z": rng.randrange(8) * 0.5 + rng.choice([0.0, 0.0, 0.02, -0.03, 0.05]),
+        "w": rng.choice([0.0, 0.02, 0.5, 1.0, 1.5, 2.0, -1.0]),
+        "d": rng.choice([0.0, 0.04, 0.5, 1.0, 1.5, 2.0, -0.5]),
+    } for i in range(rooms)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=500)
+    parser.add_argument("--rooms", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for case in range(args.cases):
+        if case % 2:
+            rooms = _random_rooms(rng, rng.randint(0, 40))
+        else:
+            rooms = _grid_site(rng, rng.randint(1, 120), rng.choice([0.0, 0.01, 0.03]))
+        if case % 50 == 3 and rooms:
+            rooms[rng.randrange(len(rooms))]["w"] = float("nan")
+        expected, actual = brute_force_links(rooms), _compute_links(rooms)
+        assert actual == expected, f"case {case}: {json.dumps(rooms)}"
+
+    site = _grid_site(random.Random(args.seed), args.rooms, 0.01)
+    start = time.perf_counter()
+    actual = _compute_links(site)
+    sweep_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    expected = brute_force_links(site)
+    brute_seconds = time.perf_counter() - start
+    assert actual == expected, "large site mismatch"
+
+    print(json.dumps({
+        "cases": args.cases,
+        "rooms": args.rooms,
+        "links": sum(len(d) for d in actual.values()),
+        "sweep_seconds": round(sweep_seconds, 3),
+        "pairwise_seconds": round(brute_seconds, 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Check tag and link renames in the vault edit engine against a small temp vault.
+
+Covers inline #tags (with nested #tag/child), frontmatter tags as an inline
+list, a block list and a scalar, notes whose only tag is in the
+frontmatter, fenced code blocks (left alone) and look-alike tags (#tagged,
+#tag-x). Applies the plan and checks the index sees the new tags, then
+rolls it back. Link rewrites must also leave fenced code blocks alone and
+count only the links outside them.
+
+Usage:
+    python -m scripts.check_vault_edits
+"""
+import json
+import os
+import tempfile
+
+import api.services.vault_edits as vault_edits
+import api.services.vault_index as vault_index
+
+NOTES = {
+    "inline.md": "# Inline\n\nSome #foo and #foo/bar, not #food or #foo-x.\n",
+    "frontmatter_list.md": "---\ntags: [foo, \"foo/bar\", other]\n---\n# Only frontmatter tags\n",
+    "frontmatter_block.md": "---\ntitle: Block\ntags:\n  - other\n  - '#foo'\n  - foo/baz\nstatus: open\n---\nBody.\n",
+    "frontmatter_scalar.md": "---\ntags: foo\n---\nBody.\n",
+    "code.md": "Real #foo here.\n\n```\n#foo in code\n```\n",
+}
+
+EXPECTED = {
+    "inline.md": "# Inline\n\nSome #baz and #baz/bar, not #food or #foo-x.\n",
+    "frontmatter_list.md": "---\ntags: [baz, \"baz/bar\", other]\n---\n# Only frontmatter tags\n",
+    "frontmatter_block.md": "---\ntitle: Block\ntags:\n  - other\n  - '#baz'\n  - baz/baz\nstatus: open\n---\nBody.\n",
+    "frontmatter_scalar.md": "---\ntags: baz\n---\nBody.\n",
+    "code.md": "Real #baz here.\n\n```\n#foo in code\n```\n",
+}
+
+
+def _read(vault: str, rel: str) -> str:
+    with open(os.path.join(vault, rel), "r", encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def main():
+    workdir = tempfile.mkdtemp()
+    vault_index.INDEX_DIR = os.path.join(workdir, "index")
+    vault_edits.JOURNAL_DIR = os.path.join(workdir, "journal")
+    vault = os.path.join(workdir, "vault")
+    os.makedirs(vault)
+    for rel, content in NOTES.items():
+        with open(os.path.join(vault, rel), "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+
+    plan = vault_edits.plan_edits(vault, tags={"#foo": "#baz"})
+    summary = plan.summary()
+    assert set(summary["files"]) == set(EXPECTED), summary
+    assert {rel: f["content"] for rel, f in plan.files.items()} == EXPECTED, plan.diff()
+    assert summary["files"]["frontmatter_list.md"] == 2 and summary["files"]["code.md"] == 1, summary
+
+    # limit counts frontmatter changes like body ones
+    limited = vault_edits.plan_edits(vault, tags={"foo": "baz"}, limit=3)
+    assert limited.changes == 3, limited.summary()
+
+    result = vault_edits.apply_plan(plan)
+    assert all(_read(vault, rel) == content for rel, content in EXPECTED.items())
+    index = vault_index.get_vault_index(vault)
+    assert not index.notes_with_tags(["foo"], include_nested=True)
+    assert {n["path"] for n in index.notes_with_tags(["baz"])} == set(EXPECTED)
+
+    rolled = vault_edits.rollback(result["journal"])
+    assert not rolled["conflicts"] and all(_read(vault, rel) == content for rel, content in NOTES.items())
+
+    # Fenced [[Old]] links stay; a note whose only [[Old]] is fenced isn't touched
+    with open(os.path.join(vault, "links.md"), "w", encoding="utf-8", newline="") as f:
+        f.write("---\nup: \"[[Old]]\"\n---\nSee [[Old|the old note]].\n\n```md\nexample [[Old]] link\n```\n")
+    with open(os.path.join(vault, "fenced_only.md"), "w", encoding="utf-8", newline="") as f:
+        f.write("```\n[[Old]]\n```\n")
+    links = vault_edits.plan_edits(vault, links={"Old": "New"})
+    assert links.summary()["files"] == {"links.md": 2}, links.summary()
+    assert links.files["links.md"]["content"] == (
+        "---\nup: \"[[New]]\"\n---\nSee [[New|the old note]].\n\n```md\nexample [[Old]] link\n```\n")
+    print(json.dumps({"planned": summary, "rolled_back": rolled["restored"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""Local fake Home Assistant for developing and checking the HA integration.
+
+Serves the parts of HA's API the backend uses on one port: REST
+``GET /api/states`` and ``POST /api/services/<domain>/<service>``, and the
+WebSocket API at ``/api/websocket`` (auth, subscribe_events for
+state_changed, get_states, call_service). Service calls and set_state() push
+state_changed events to every subscriber.
+
+Run it standalone (motion sensors flip every few seconds) and point the
+backend at it:
+
+    python -m scripts.fake_home_assistant [--port 8123] [--entities 300]
+    HOME_ASSISTANT_API_URL=http://127.0.0.1:8123/api HOME_ASSISTANT_TOKEN=fake-token
+
+or use FakeHomeAssistant(...).start() from a script.
+"""
+import argparse
+import asyncio
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+
+TOKEN = "fake-token"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def sample_states(count: int = 300) -> list[dict]:
+    """A house-sized mix: motion sensors, lights, switches, locks and lots of sensors."""
+    states = []
+
+    def add(entity_id, state, **attributes):
+        ts = _now()
+        states.append({"entity_id": entity_id, "state": state, "attributes": attributes,
+                       "last_changed": ts, "last_updated": ts})
+
+    for i in range(8):
+        add(f"binary_sensor.motion_{i}", "off", device_class="motion", friendly_name=f"Motion {i}",
+            battery_level=90, temperature=21.5)
+    for i in range(12):
+        add(f"light.light_{i}", "off", friendly_name=f"Light {i}")
+    for i in range(4):
+        add(f"switch.switch_{i}", "on", friendly_name=f"Switch {i}")
+    add("lock.front_door", "locked", friendly_name="Front Door")
+    add("cover.garage", "closed", device_class="garage", friendly_name="Garage")
+    i = 0
+    while len(states) < count:
+        kind = ("temperature", "°C") if i % 3 == 0 else ("humidity", "%") if i % 3 == 1 else ("power", "W")
+        add(f"sensor.{kind[0]}_{i}", str(round(random.uniform(10, 60), 1)),
+            device_class=kind[0], unit_of_measurement=kind[1], friendly_name=f"{kind[0].title()} {i}")
+        i += 1
+    return states
+
+
+class FakeHomeAssistant:
+    def __init__(self, states: Optional[list[dict]] = None, port: int = 0, token: str = TOKEN):
+        self.token = token
+        self.port = port or self._free_port()
+        self.states = {s["entity_id"]: s for s in (states if states is not None else sample_states())}
+        self.service_calls: list[dict] = []
+        self.rest_requests = 0
+        self._subscribers: dict[WebSocket, int] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self.app = self._build_app()
+
+    @staticmethod
+    def _free_port() -> int:
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            return s.getsockname()[1]
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/api"
+
+    # -- state changes -------------------------------------------------------
+
+    async def _broadcast(self, old: Optional[dict], new: Optional[dict], entity_id: str):
+        for ws, sub_id in list(self._subscribers.items()):
+            try:
+                await ws.send_json({"id": sub_id, "type": "event", "event": {
+                    "event_type": "state_changed", "time_fired": _now(),
+                    "data": {"entity_id": entity_id, "old_state": old, "new_state": new},
+                }})
+            except Exception:
+                self._subscribers.pop(ws, None)
+
+    async def _set_state(self, entity_id: str, state: Optional[str], attributes: Optional[dict] = None) -> Optional[dict]:
+        old = self.states.get(entity_id)
+        if state is None:
+            self.states.pop(entity_id, None)
+            await self._broadcast(old, None, entity_id)
+            return None
+        ts = _now()
+        new = {
+            "entity_id": entity_id,
+            "state": state,
+            "attributes": {**(old or {}).get("attributes", {}), **(attributes or {})},
+            "last_changed": ts if old is None or old["state"] != state else old["last_changed"],
+            "last_updated": ts,
+        }
+        self.states[entity_id] = new
+        await self._broadcast(old, new, entity_id)
+        return new
+
+    def set_state(self, entity_id: str, state: Optional[str], attributes: Optional[dict] = None):
+        """Change (or with state None, remove) an entity from another thread."""
+        future = asyncio.run_coroutine_threadsafe(self._set_state(entity_id, state, attributes), self._loop)
+        return future.result(timeout=5)
+
+    async def _call_service(self, domain: str, service: str, data: dict) -> list[dict]:
+        entity_ids = data.get("entity_id") or []
+        if isinstance(entity_ids, str):
+            entity_ids = [entity_ids]
+        self.service_calls.append({"domain": domain, "service": service, "entity_ids": list(entity_ids)})
+        changed = []
+        for entity_id in entity_ids:
+            current = self.states.get(entity_id)
+            if current is None:
+                continue
+            if service == "turn_on":
+                state = "on"
+            elif service == "turn_off":
+                state = "off"
+            elif service == "toggle":
+                state = "off" if current["state"] == "on" else "on"
+            else:
+                continue
+            changed.append(await self._set_state(entity_id, state))
+        return changed
+
+    # -- app -----------------------------------------------------------------
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        def authorized(request: Request) -> bool:
+            return request.headers.get("authorization") == f"Bearer {self.token}"
+
+        @app.get("/api/states")
+        async def states(request: Request):
+            if not authorized(request):
+                return JSONResponse({"message": "Unauthorized"}, status_code=401)
+            self.rest_requests += 1
+            return list(self.states.values())
+
+        @app.post("/api/services/{domain}/{service}")
+        async def services(domain: str, service: str, request: Request):
+            if not authorized(request):
+                return JSONResponse({"message": "Unauthorized"}, status_code=401)
+            self.rest_requests += 1
+            return await self._call_service(domain, service, await request.json())
+
+        @app.websocket("/api/websocket")
+        async def websocket(ws: WebSocket):
+            await ws.accept()
+            await ws.send_json({"type": "auth_required", "ha_version": "fake"})
+            auth = await ws.receive_json()
+            if auth.get("access_token") != self.token:
+                await ws.send_json({"type": "auth_invalid", "message": "Invalid access token"})
+                await ws.close()
+                return
+            await ws.send_json({"type": "auth_ok", "ha_version": "fake"})
+            try:
+                while True:
+                    msg = await ws.receive_json()
+                    kind, msg_id = msg.get("type"), msg.get("id")
+                    if kind == "subscribe_events":
+                        self._subscribers[ws] = msg_id
+                        await ws.send_json({"id": msg_id, "type": "result", "success": True, "result": None})
+                    elif kind == "get_states":
+                        await ws.send_json({"id": msg_id, "type": "result", "success": True,
+                                            "result": list(self.states.values())})
+                    elif kind == "call_service":
+                        data = {**(msg.get("service_data") or {}), **(msg.get("target") or {})}
+                        await self._call_service(msg["domain"], msg["service"], data)
+                        await ws.send_json({"id": msg_id, "type": "result", "success": True,
+                                            "result": {"context": {}}})
+                    else:
+                        await ws.send_json({"id": msg_id, "type": "result", "success": False,
+                                            "error": {"code": "unknown_command", "message": kind}})
+            except WebSocketDisconnect:
+                pass
+            finally:
+                self._subscribers.pop(ws, None)
+
+        return app
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def start(self) -> "FakeHomeAssistant":
+        config = uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning")
+        self._server = uvicorn.Server(config)
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self._server.serve())
+
+        self._thread = threading.Thread(target=run, name="fake-home-assistant", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Fake Home Assistant did not start")
+            time.sleep(0.02)
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def disconnect_clients(self):
+        """Drop every WebSocket client (to exercise reconnects)."""
+        async def close_all():
+            for ws in list(self._subscribers):
+                await ws.close()
+        asyncio.run_coroutine_threadsafe(close_all(), self._loop).result(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8123)
+    parser.add_argument("--entities", type=int, default=300)
+    parser.add_argument("--interval", type=float, default=3.0, help="seconds between motion changes")
+    args = parser.parse_args()
+
+    fake = FakeHomeAssistant(sample_states(args.entities), port=args.port).start()
+    print(f"HOME_ASSISTANT_API_URL={fake.url}")
+    print(f"HOME_ASSISTANT_TOKEN={fake.token}")
+    motion = [e for e in fake.states if e.startswith("binary_sensor.motion_")]
+    try:
+        while True:
+            time.sleep(args.interval)
+            entity_id = random.choice(motion)
+            fake.set_state(entity_id, "off" if fake.states[entity_id]["state"] == "on" else "on")
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ import pandas as pd
 from datetime import datetime, timedelta
 import time
 
+from api.services import aws_cost_cache
+
 def get_ce_client():
     """Get Cost Explorer client with error handling for credentials."""
     try:
@@ -18,79 +20,40 @@ def get_ce_client():
         st.error(f"Error creating Cost Explorer client with 'codiak' profile: {str(e)}")
         return None
 
-def get_cost_data(ce_client, start_date, end_date, granularity='MONTHLY'):
-    """Get cost data from AWS Cost Explorer."""
+def get_cost_data(ce_client, start_date, end_date, refresh=False):
+    """Daily costs by service and region, answered from the local cost cache.
+
+    Only days the cache can't answer (never fetched, or open days gone
+    stale / ``refresh``) are requested from Cost Explorer. Returns
+    (costs, stats) or (None, None) on error.
+    """
     try:
-        response = ce_client.get_cost_and_usage(
-            TimePeriod={
-                'Start': start_date.strftime('%Y-%m-%d'),
-                'End': end_date.strftime('%Y-%m-%d')
-            },
-            Granularity=granularity,
-            Metrics=['UnblendedCost'],
-            GroupBy=[
-                {'Type': 'DIMENSION', 'Key': 'SERVICE'},
-                {'Type': 'DIMENSION', 'Key': 'REGION'}
-            ]
-        )
-        return response
+        return aws_cost_cache.get_daily_costs(ce_client, start_date, end_date, refresh=refresh)
     except ClientError as e:
         st.error(f"Error getting cost data: {str(e)}")
-        return None
+        return None, None
     except Exception as e:
         st.error(f"Unexpected error: {str(e)}")
-        return None
+        return None, None
 
-def parse_cost_data(response):
-    """Parse the cost data response into a more usable format."""
-    if not response:
-        return []
-
-    costs = []
-    for result in response.get('ResultsByTime', []):
-        time_period = result['TimePeriod']
-        start_date = time_period['Start']
-        end_date = time_period['End']
-
-        for group in result.get('Groups', []):
-            keys = group['Keys']
-            service = keys[0] if len(keys) > 0 else 'Unknown'
-            region = keys[1] if len(keys) > 1 else 'Unknown'
-
-            # Get the cost amount
-            metrics = group['Metrics']
-            cost_amount = float(metrics['UnblendedCost']['Amount'])
-            cost_unit = metrics['UnblendedCost']['Unit']
-
-            costs.append({
-                'Service': service,
-                'Region': region,
-                'Cost': cost_amount,
-                'Unit': cost_unit,
-                'Start Date': start_date,
-                'End Date': end_date
-            })
-
-    return costs
-
-def get_current_month_costs(ce_client):
+def get_current_month_costs(ce_client, refresh=False):
     """Get costs for the current month."""
     today = datetime.now()
     start_date = today.replace(day=1)
     end_date = today + timedelta(days=1)  # Include today
 
-    return get_cost_data(ce_client, start_date, end_date, 'DAILY')
+    return get_cost_data(ce_client, start_date, end_date, refresh)
 
-def get_last_30_days_costs(ce_client):
+def get_last_30_days_costs(ce_client, refresh=False):
     """Get costs for the last 30 days."""
     end_date = datetime.now()
     start_date = end_date - timedelta(days=30)
 
-    return get_cost_data(ce_client, start_date, end_date, 'DAILY')
+    return get_cost_data(ce_client, start_date, end_date, refresh)
 
-def get_custom_period_costs(ce_client, start_date, end_date):
+def get_custom_period_costs(ce_client, start_date, end_date, refresh=False):
     """Get costs for a custom period."""
-    return get_cost_data(ce_client, start_date, end_date, 'DAILY')
+    return get_cost_data(ce_client, start_date, end_date, refresh)
 
 def render():
     st.write("Monitor your AWS costs and spending patterns using AWS Cost Explorer.")
@@ -143,27 +106,27 @@ def render():
     # Refresh button
     col1, col2 = st.columns([1, 4])
     with col1:
-        if st.button("🔄 Refresh Costs", use_container_width=True):
-            st.rerun()
+        refresh = st.button("🔄 Refresh Costs", use_container_width=True)
 
     with col2:
-        st.write("Click refresh to update the cost data")
+        st.write(f"Days older than {aws_cost_cache.SETTLE_DAYS} days are cached for good; "
+                 "click refresh to re-fetch the recent ones")
 
     # Get cost data based on selection
-    cost_data = None
+    costs, cache_stats = None, None
     if selected_period == "Current Month":
-        cost_data = get_current_month_costs(ce_client)
+        costs, cache_stats = get_current_month_costs(ce_client, refresh)
     elif selected_period == "Last 30 Days":
-        cost_data = get_last_30_days_costs(ce_client)
+        costs, cache_stats = get_last_30_days_costs(ce_client, refresh)
     elif selected_period == "Custom Period":
-        cost_data = get_custom_period_costs(ce_client, start_date, end_date)
+        costs, cache_stats = get_custom_period_costs(ce_client, start_date, end_date, refresh)
 
-    if not cost_data:
+    if costs is None:
         st.info("No cost data available for the selected period or no access to Cost Explorer.")
         return
 
-    # Parse the cost data
-    costs = parse_cost_data(cost_data)
+    st.caption(f"{cache_stats['cached_days']} day(s) from the local cache, {cache_stats['fetched_days']} "
+               f"fetched with {cache_stats['requests']} Cost Explorer request(s)")
 
     if not costs:
         st.info("No cost data found for the selected period.")
@@ -3,35 +3,16 @@ import os
 import re
 from datetime import datetime, timedelta, date
 from tools.llm_utils import get_llm_suggestion
+from api.services.vault_index import get_vault_index
 
-# Helper: get all dates between two dates (inclusive)
-def daterange(start_date, end_date):
-    for n in range(int((end_date - start_date).days) + 1):
-        yield start_date + timedelta(n)
-
-# Helper: get all (year, week) tuples between two dates (inclusive)
-def weekrange(start_date, end_date):
-    weeks = set()
-    for d in daterange(start_date, end_date):
-        iso = d.isocalendar()
-        weeks.add((iso[0], iso[1]))
-    return sorted(list(weeks))
-
-# Helper: find notes by date or week prefix
-def find_notes_in_range(vault_path, date_prefixes, week_prefixes):
-    notes = []
-    for root, _, files in os.walk(vault_path):
-        for file in files:
-            if not file.endswith('.md'):
-                continue
-            title = os.path.splitext(file)[0]
-            if any(title.startswith(p) for p in date_prefixes) or any(title.startswith(w) for w in week_prefixes):
-                notes.append({
-                    'title': title,
-                    'full_path': os.path.join(root, file),
-                    'rel_path': os.path.relpath(os.path.join(root, file), vault_path)
-                })
-    return notes
+# Helper: find daily notes in range and weekly notes for the weeks it covers
+def find_notes_in_range(vault_path, start_date, end_date):
+    index = get_vault_index(vault_path)
+    return [{
+        'title': n['title'],
+        'full_path': index.full_path(n['path']),
+        'rel_path': n['path']
+    } for n in index.dated_notes(start_date, end_date)]
 
 # Helper: generate LLM summary of selected notes
 def generate_notes_summary(notes, selected_paths, summary_type="general", max_tokens=500):
@@ -102,29 +83,16 @@ Please provide a structured summary in bullet points."""
 
     return summary, error
 
-# Helper: find completed tasks in notes within range
-def find_completed_tasks(notes, start_date, end_date):
-    completed = []
-    date_re = re.compile(r'- \[x\].*?✅ (\d{4}-\d{2}-\d{2})')
-    for note in notes:
-        # DEBUG: Show note rel_path
-        print(f"DEBUG: find_completed_tasks note rel_path: {note.get('rel_path', '')}")
-        try:
-            with open(note['full_path'], 'r', encoding='utf-8') as f:
-                for line in f:
-                    m = date_re.search(line)
-                    if m:
-                        task_date = datetime.strptime(m.group(1), '%Y-%m-%d').date()
-                        if start_date <= task_date <= end_date:
-                            completed.append({
-                                'task': line.strip(),
-                                'note': note['title'],
-                                'rel_path': note['rel_path'],
-                                'date': task_date
-                            })
-        except Exception:
-            continue
-    return completed
+# Helper: find completed tasks (✅ YYYY-MM-DD) anywhere in the vault within range
+def find_completed_tasks(vault_path, start_date, end_date):
+    index = get_vault_index(vault_path)
+    tasks = index.tasks(status='x', completed_from=start_date.isoformat(), completed_to=end_date.isoformat())
+    return [{
+        'task': t['text'],
+        'note': t['title'],
+        'rel_path': t['path'],
+        'date': datetime.strptime(t['completed'], '%Y-%m-%d').date()
+    } for t in tasks]
 
 def render(vault_path_default):
     # Do NOT include st.header or st.write for the tool title/description here!
@@ -144,25 +112,13 @@ def render(vault_path_default):
         if not os.path.isdir(vault_path):
             st.error(f"Vault path '{vault_path}' does not exist.")
             return
-        # Prepare prefixes
-        date_prefixes = [(start_date + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((end_date - start_date).days + 1)]
-        week_tuples = weekrange(start_date, end_date)
-        week_prefixes = [f"{y}-{str(w).zfill(2)}" for y, w in week_tuples]
-        notes = find_notes_in_range(vault_path, date_prefixes, week_prefixes)
+        notes = find_notes_in_range(vault_path, start_date, end_date)
         st.session_state['changes_in_range_notes'] = notes
         st.session_state['changes_in_range_selected'] = set()
         st.session_state['changes_in_range_start'] = start_date
         st.session_state['changes_in_range_end'] = end_date
-        # Find completed tasks in all notes in vault (could optimize to just notes in range)
-        all_notes = []
-        for root, _, files in os.walk(vault_path):
-            for file in files:
-                if file.endswith('.md'):
-                    rel_path = os.path.relpath(os.path.join(root, file), vault_path)
-                    # DEBUG: Show rel_path for each note
-                    print(f"DEBUG: all_notes rel_path: {rel_path}")
-                    all_notes.append({'title': os.path.splitext(file)[0], 'full_path': os.path.join(root, file), 'rel_path': rel_path})
-        completed = find_completed_tasks(all_notes, start_date, end_date)
+        # Completed tasks come from the whole vault, not just notes in range
+        completed = find_completed_tasks(vault_path, start_date, end_date)
         st.session_state['changes_in_range_tasks'] = completed
     notes = st.session_state.get('changes_in_range_notes', [])
     selected = st.session_state.get('changes_in_range_selected', set())
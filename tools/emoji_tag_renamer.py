@@ -1,6 +1,7 @@
 import streamlit as st
 import os
-import re
+from api.services.vault_edits import VaultEditError, apply_plan, plan_edits
+from api.services.vault_index import get_vault_index
 
 def render(vault_path_default):
     st.write("Identify notes with a specific tag that do not start with a specified emoji.")
@@ -23,75 +24,17 @@ def render(vault_path_default):
             notes = []
             notes_with_emoji = []
             with st.spinner("Searching for notes..."):
-                for root, _, files in os.walk(vault_path):
-                    for file in files:
-                        # Ignore files whose filename contains the ignore_string
-                        if ignore_string and ignore_string in file:
-                            continue
-                        if file.endswith(".md"):
-                            file_path = os.path.join(root, file)
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                            # Check for tag in YAML frontmatter or body
-                            has_tag = False
-                            yaml_end = -1
-                            if content.startswith('---'):
-                                yaml_end = content.find('---', 3)
-                                if yaml_end != -1:
-                                    yaml_block = content[3:yaml_end].strip()
-                                    lines = yaml_block.splitlines()
-                                    in_tags = False
-                                    tags_found = []
-                                    for line in lines:
-                                        line = line.strip()
-                                        if line.startswith('tags:'):
-                                            # tags: [person, friend] or tags:
-                                            if '[' in line and ']' in line:
-                                                # Inline list
-                                                tag_list = line.split('[',1)[1].split(']',1)[0]
-                                                tags_found = [t.strip().strip('"\'') for t in tag_list.split(',')]
-                                                in_tags = False
-                                            elif line.endswith(':'):
-                                                in_tags = True
-                                            else:
-                                                # Single tag
-                                                tag_val = line.split(':',1)[1].strip()
-                                                if tag_val:
-                                                    tags_found = [tag_val.strip('"\'')]
-                                                in_tags = False
-                                        elif in_tags:
-                                            if line.startswith('- '):
-                                                tags_found.append(line[2:].strip('"\''))
-                                            else:
-                                                in_tags = False
-                                    # Remove # if present in tag input
-                                    tag_clean = tag.lstrip('#')
-                                    if tag_clean in tags_found:
-                                        has_tag = True
-                            # Check for tag in body (excluding code blocks)
-                            if not has_tag:
-                                # Get body after YAML frontmatter
-                                body = content[yaml_end+3:] if yaml_end != -1 else content
-                                # Remove code blocks (```...```)
-                                def remove_code_blocks(text):
-                                    result = []
-                                    in_code = False
-                                    for line in text.splitlines():
-                                        if line.strip().startswith('```'):
-                                            in_code = not in_code
-                                            continue
-                                        if not in_code:
-                                            result.append(line)
-                                    return '\n'.join(result)
-                                body_no_code = remove_code_blocks(body)
-                                if tag in body_no_code:
-                                    has_tag = True
-                            if has_tag:
-                                rel_path = os.path.relpath(file_path, vault_path)
-                                if file.startswith(emoji):
-                                    notes_with_emoji.append(rel_path)
-                                else:
-                                    notes.append(rel_path)
+                index = get_vault_index(vault_path)
+                for note in index.notes_with_tags([tag]):
+                    rel_path = note['path']
+                    file = os.path.basename(rel_path)
+                    # Ignore files whose filename contains the ignore_string
+                    if ignore_string and ignore_string in file:
+                        continue
+                    if file.startswith(emoji):
+                        notes_with_emoji.append(rel_path)
+                    else:
+                        notes.append(rel_path)
             # Store results and params in session_state
             st.session_state['notes'] = notes
             st.session_state['notes_with_emoji'] = notes_with_emoji
@@ -124,18 +67,25 @@ def render(vault_path_default):
                     st.write(note)
             update_limit = st.number_input("Limit number of files to update", min_value=1, value=params['update_limit'], step=1, key="update_limit_input")
             params['update_limit'] = update_limit
+            update_links = st.checkbox("Also update [[links]] to renamed notes", value=True, key="update_links_emoji_renamer")
             button_label = f"Prepend emoji to up to {update_limit} filenames"
             if st.button(button_label):
-                renamed_count = 0
+                renames = {}
                 for rel_path in notes[:params['update_limit']]:
-                    old_path = os.path.join(params['vault_path'], rel_path)
-                    dir_name, file_name = os.path.split(old_path)
+                    dir_name, file_name = os.path.split(rel_path)
                     if not file_name.startswith(params['emoji']):
-                        new_file_name = params['emoji'] + file_name
-                        new_path = os.path.join(dir_name, new_file_name)
-                        os.rename(old_path, new_path)
-                        renamed_count += 1
-                st.session_state['success_message'] = f"Renamed {renamed_count} files by prepending '{params['emoji']}' to the filename."
+                        renames[rel_path] = os.path.join(dir_name, params['emoji'] + file_name)
+                # Renames and link updates are applied as one journaled batch
+                plan = plan_edits(params['vault_path'], note_renames=renames, update_links=update_links)
+                try:
+                    result = apply_plan(plan)
+                except VaultEditError as e:
+                    st.error(str(e))
+                    return
+                message = f"Renamed {len(result['renames'])} files by prepending '{params['emoji']}' to the filename."
+                if update_links:
+                    message += f" Updated {result['changes']} links in {len(result['files'])} notes."
+                st.session_state['success_message'] = message
                 # After renaming, clear session_state to force a new search
                 st.session_state.pop('notes', None)
                 st.session_state.pop('notes_with_emoji', None)
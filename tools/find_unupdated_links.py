@@ -1,6 +1,7 @@
 import streamlit as st
 import os
-import re
+from api.services.vault_index import get_vault_index
+from api.services.vault_links import rewrite_links
 
 def render(vault_path_default):
     st.write("Identify all #person notes that begin with the emoji, and find files that link to them without the emoji in the link.")
@@ -17,73 +18,20 @@ def render(vault_path_default):
         if not os.path.isdir(vault_path):
             st.error(f"Vault path '{vault_path}' does not exist.")
         else:
+            index = get_vault_index(vault_path)
+
+            def not_ignored(rel_path):
+                return not (ignore_string and ignore_string in os.path.basename(rel_path))
+
             # Count total number of markdown notes in the vault
-            total_md_notes = 0
-            for root, _, files in os.walk(vault_path):
-                for file in files:
-                    if file.endswith(".md") and not (ignore_string and ignore_string in file):
-                        total_md_notes += 1
+            total_md_notes = sum(1 for n in index.notes() if not_ignored(n['path']))
             st.write(f"There are {total_md_notes} total markdown notes in the vault.")
             # Step 1: Find all #person notes that begin with the emoji
-            person_notes = []
-            for root, _, files in os.walk(vault_path):
-                for file in files:
-                    if ignore_string and ignore_string in file:
-                        continue
-                    if file.endswith(".md") and file.startswith(emoji):
-                        file_path = os.path.join(root, file)
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        # Check for tag in YAML frontmatter or body (reuse logic)
-                        has_tag = False
-                        yaml_end = -1
-                        if content.startswith('---'):
-                            yaml_end = content.find('---', 3)
-                            if yaml_end != -1:
-                                yaml_block = content[3:yaml_end].strip()
-                                lines = yaml_block.splitlines()
-                                in_tags = False
-                                tags_found = []
-                                for line in lines:
-                                    line = line.strip()
-                                    if line.startswith('tags:'):
-                                        if '[' in line and ']' in line:
-                                            tag_list = line.split('[',1)[1].split(']',1)[0]
-                                            tags_found = [t.strip().strip('"\'') for t in tag_list.split(',')]
-                                            in_tags = False
-                                        elif line.endswith(':'):
-                                            in_tags = True
-                                        else:
-                                            tag_val = line.split(':',1)[1].strip()
-                                            if tag_val:
-                                                tags_found = [tag_val.strip('"\'')]
-                                            in_tags = False
-                                    elif in_tags:
-                                        if line.startswith('- '):
-                                            tags_found.append(line[2:].strip('"\''))
-                                        else:
-                                            in_tags = False
-                                tag_clean = tag.lstrip('#')
-                                if tag_clean in tags_found:
-                                    has_tag = True
-                        if not has_tag:
-                            body = content[yaml_end+3:] if yaml_end != -1 else content
-                            def remove_code_blocks(text):
-                                result = []
-                                in_code = False
-                                for line in text.splitlines():
-                                    if line.strip().startswith('```'):
-                                        in_code = not in_code
-                                        continue
-                                    if not in_code:
-                                        result.append(line)
-                                return '\n'.join(result)
-                            body_no_code = remove_code_blocks(body)
-                            if tag in body_no_code:
-                                has_tag = True
-                        if has_tag:
-                            rel_path = os.path.relpath(file_path, vault_path)
-                            person_notes.append((file, rel_path))
+            person_notes = [
+                (os.path.basename(n['path']), n['path'])
+                for n in index.notes_with_tags([tag])
+                if not_ignored(n['path']) and os.path.basename(n['path']).startswith(emoji)
+            ]
             st.write(f"Found {len(person_notes)} #person notes starting with '{emoji}' to validate for links.")
 
             # Step 2: For each, search all files for links to the note without the emoji
@@ -97,52 +45,31 @@ def render(vault_path_default):
             summary_text = st.empty()
             links_list_text = st.empty()
             fixes_done = 0
+            # Fixes are collected and applied as one journaled batch after validation
+            fix_renames = {}
+            fix_paths = set()
+            # One backlink lookup covers both link forms for every person note
+            base_names = {note_file: note_file[len(emoji):].rsplit('.md', 1)[0] for note_file, _ in person_notes}
+            backlinks = index.linking_notes(
+                [n for base in base_names.values() for n in (base, emoji + base)]
+            )
             for idx, (note_file, rel_path) in enumerate(person_notes):
                 status_text.write(f"Validating {idx+1} of {total_notes}: {note_file}")
                 st.toast(f"Checking links for: {note_file}")
                 progress_bar.progress((idx+1)/total_notes)
                 # The note name without the emoji
-                base_name = note_file[len(emoji):].rsplit('.md', 1)[0]
-                # Possible link forms: [[Name]] or [[Name|...]]
-                pattern_invalid = re.compile(rf'\[\[({re.escape(base_name)})(\||\]\])')
-                pattern_valid = re.compile(rf'\[\[({re.escape(emoji + base_name)})(\||\]\])')
-                found_in = []
-                valid_count = 0
-                for root, _, files in os.walk(vault_path):
-                    for file in files:
-                        if ignore_string and ignore_string in file:
-                            continue
-                        if file.endswith(".md"):
-                            file_path = os.path.join(root, file)
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                            if pattern_invalid.search(content):
-                                rel_link_path = os.path.relpath(file_path, vault_path)
-                                found_in.append(rel_link_path)
-                            if pattern_valid.search(content):
-                                valid_count += 1
+                base_name = base_names[note_file]
+                # Backlinks to [[Name]], [[Name|...]] or [[Name#...]] come from the link graph
+                found_in = [f for f in backlinks[base_name] if not_ignored(f)]
+                valid_count = sum(1 for f in backlinks[emoji + base_name] if not_ignored(f))
                 total_valid_links += valid_count
                 total_invalid_links += len(found_in)
                 status_text.write(f"Validating {idx+1} of {total_notes}: {note_file} — {valid_count} valid links found")
                 if found_in:
                     unupdated_links[rel_path] = found_in
-                # If fixing is enabled and we haven't reached the max, fix links
-                if fix_links and fixes_done < max_fixes:
-                    for f in found_in:
-                        if fixes_done >= max_fixes:
-                            break
-                        file_path = os.path.join(vault_path, f)
-                        with open(file_path, 'r', encoding='utf-8') as file:
-                            content = file.read()
-                        # Replace [[Name]] or [[Name|...]] with [[emojiName]] or [[emojiName|...]]
-                        base_name = note_file[len(emoji):].rsplit('.md', 1)[0]
-                        pattern = re.compile(rf'\[\[({re.escape(base_name)})(\||\]\])')
-                        # Replace only up to max_fixes
-                        new_content, n = pattern.subn(lambda m: f'[[{emoji}{base_name}{m.group(2)}', content, count=max_fixes-fixes_done)
-                        if n > 0:
-                            with open(file_path, 'w', encoding='utf-8') as file:
-                                file.write(new_content)
-                            fixes_done += n
+                if fix_links and found_in:
+                    fix_renames[base_name] = emoji + base_name
+                    fix_paths.update(found_in)
                 # Update the realtime list
                 with realtime_container:
                     summary_text.markdown(f"**Total valid links found:** {total_valid_links}\n\n**Total invalid links found:** {total_invalid_links}")
@@ -159,6 +86,10 @@ def render(vault_path_default):
                         links_list_text.empty()
             progress_bar.empty()
             status_text.empty()
+            # Rewrite only the files the graph says link to an old name, in one pass
+            if fix_renames:
+                result = rewrite_links(vault_path, fix_renames, paths=fix_paths, limit=max_fixes)
+                fixes_done = result['links']
             # Final summary (in case nothing found)
             with realtime_container:
                 summary_text.markdown(f"**Total valid links found:** {total_valid_links}\n\n**Total invalid links found:** {total_invalid_links}")
@@ -1,141 +1,50 @@
 import streamlit as st
 import os
 import re
-from datetime import datetime, timedelta, date
-
-# Helper: get all dates between two dates (inclusive) - reused from changes_in_range.py
-def daterange(start_date, end_date):
-    for n in range(int((end_date - start_date).days) + 1):
-        yield start_date + timedelta(n)
-
-# Helper: find notes by date prefix - reused from changes_in_range.py
-def find_notes_in_range(vault_path, date_prefixes):
-    notes = []
-    for root, _, files in os.walk(vault_path):
-        for file in files:
-            if not file.endswith('.md'):
-                continue
-            title = os.path.splitext(file)[0]
-            if any(title.startswith(p) for p in date_prefixes):
-                notes.append({
-                    'title': title,
-                    'full_path': os.path.join(root, file),
-                    'rel_path': os.path.relpath(os.path.join(root, file), vault_path)
-                })
-    return notes
-
-# Helper: find notes with sections starting with date prefixes
-def find_notes_with_date_sections(vault_path, date_prefixes):
-    notes = []
-    for root, _, files in os.walk(vault_path):
-        for file in files:
-            if not file.endswith('.md'):
-                continue
-            file_path = os.path.join(root, file)
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    # Look for sections starting with date prefixes
-                    lines = content.split('\n')
-                    has_date_section = False
-                    for line in lines:
-                        line = line.strip()
-                        if line.startswith('#'):  # Section header
-                            # Remove # symbols and check if it starts with a date prefix
-                            header_text = line.lstrip('#').strip()
-
-                            # Check if header starts with a date prefix
-                            if any(header_text.startswith(p) for p in date_prefixes):
-                                has_date_section = True
-                                break
-
-                            # Check if header contains a date prefix within wiki-style links [[YYYY-MM-DD]]
-                            import re
-                            wiki_links = re.findall(r'\[\[([^\]]+)\]\]', header_text)
-                            for link in wiki_links:
-                                if any(link.startswith(p) for p in date_prefixes):
-                                    has_date_section = True
-                                    break
-                            if has_date_section:
-                                break
-                    if has_date_section:
-                        notes.append({
-                            'title': os.path.splitext(file)[0],
-                            'full_path': file_path,
-                            'rel_path': os.path.relpath(file_path, vault_path)
-                        })
-            except Exception as e:
-                continue
-    return notes
-
-# Helper: find incomplete tasks in notes
-def find_incomplete_tasks(notes, start_date, end_date):
+from datetime import timedelta, date
+from api.services.vault_index import get_vault_index
+
+# Helper: find notes titled with a date in range (indexed on note date)
+def find_notes_in_range(vault_path, start_date, end_date):
+    index = get_vault_index(vault_path)
+    return [{
+        'title': n['title'],
+        'full_path': index.full_path(n['path']),
+        'rel_path': n['path']
+    } for n in index.dated_notes(start_date, end_date, include_weeks=False)]
+
+# Helper: find notes with sections starting with, or linking to, a date in range
+def find_notes_with_date_sections(vault_path, start_date, end_date):
+    index = get_vault_index(vault_path)
+    notes = {}
+    for h in index.dated_sections(start_date, end_date):
+        if h['path'] not in notes:
+            notes[h['path']] = {
+                'title': h['title'],
+                'full_path': index.full_path(h['path']),
+                'rel_path': h['path']
+            }
+    return list(notes.values())
+
+# Helper: find incomplete tasks under a dated section or in a dated note
+def find_incomplete_tasks(vault_path, start_date, end_date):
     incomplete_tasks = []
 
-    for note in notes:
-        try:
-            with open(note['full_path'], 'r', encoding='utf-8') as f:
-                content = f.read()
-                lines = content.split('\n')
-
-                current_section = None
-                in_relevant_section = False
-
-                for line_num, line in enumerate(lines, 1):
-                    line = line.strip()
-
-                    # Check if this is a section header
-                    if line.startswith('#'):
-                        header_text = line.lstrip('#').strip()
-                        current_section = header_text
-
-                        # Check if this section starts with a date in our range
-                        in_relevant_section = False
-                        for date_prefix in [(start_date + timedelta(days=i)).strftime('%Y-%m-%d')
-                                          for i in range((end_date - start_date).days + 1)]:
-                            if header_text.startswith(date_prefix):
-                                in_relevant_section = True
-                                break
-
-                        # Check if this section contains a date in our range within wiki-style links
-                        if not in_relevant_section:
-                            import re
-                            wiki_links = re.findall(r'\[\[([^\]]+)\]\]', header_text)
-                            for link in wiki_links:
-                                if any(link.startswith(date_prefix) for date_prefix in [(start_date + timedelta(days=i)).strftime('%Y-%m-%d')
-                                                                                      for i in range((end_date - start_date).days + 1)]):
-                                    in_relevant_section = True
-                                    break
-
-                    # Look for incomplete tasks (lines starting with "- [ ]")
-                    if line.startswith('- [ ]'):
-                        # If we're in a relevant section or the note title itself is in range
-                        note_title_in_range = any(note['title'].startswith(
-                            (start_date + timedelta(days=i)).strftime('%Y-%m-%d')
-                        ) for i in range((end_date - start_date).days + 1))
-
-                        if in_relevant_section or note_title_in_range:
-                            # Extract task text (remove the checkbox)
-                            task_text = line[4:].strip()
-
-                            # Strip leading ']' if present
-                            if task_text.startswith(']'):
-                                task_text = task_text[1:].strip()
-
-                            # Process wiki-style links [[link]] -> _link_
-                            import re
-                            task_text = re.sub(r'\[\[([^\]]+)\]\]', r'_\1_', task_text)
-
-                            incomplete_tasks.append({
-                                'task': task_text,
-                                'note': note['title'],
-                                'rel_path': note['rel_path'],
-                                'section': current_section if in_relevant_section else 'Note Title',
-                                'line_number': line_num
-                            })
-
-        except Exception as e:
-            continue
+    index = get_vault_index(vault_path)
+    for task in index.tasks_in_range(start_date, end_date, status=' ', kinds=('note', 'section')):
+        in_relevant_section = 'section' in task['matched_kinds']
+        # Extract task text (remove the checkbox)
+        task_text = task['text'][5:].strip()
+        # Process wiki-style links [[link]] -> _link_
+        task_text = re.sub(r'\[\[([^\]]+)\]\]', r'_\1_', task_text)
+
+        incomplete_tasks.append({
+            'task': task_text,
+            'note': task['title'],
+            'rel_path': task['path'],
+            'section': task['section'] if in_relevant_section else 'Note Title',
+            'line_number': task['line']
+        })
 
     return incomplete_tasks
 
@@ -162,10 +71,6 @@ def render(vault_path_default):
             st.error(f"Vault path '{vault_path}' does not exist.")
             return
 
-        # Prepare date prefixes
-        date_prefixes = [(start_date + timedelta(days=i)).strftime('%Y-%m-%d')
-                        for i in range((end_date - start_date).days + 1)]
-
         # Show progress container
         progress_container = st.container()
         with progress_container:
@@ -175,12 +80,12 @@ def render(vault_path_default):
 
         # Find notes with titles in range
         status_text.text("📝 Finding notes with date-prefixed titles...")
-        title_notes = find_notes_in_range(vault_path, date_prefixes)
+        title_notes = find_notes_in_range(vault_path, start_date, end_date)
         progress_bar.progress(25)
 
         # Find notes with sections in range
         status_text.text("📋 Finding notes with date-prefixed sections...")
-        section_notes = find_notes_with_date_sections(vault_path, date_prefixes)
+        section_notes = find_notes_with_date_sections(vault_path, start_date, end_date)
         progress_bar.progress(50)
 
         # Combine and deduplicate notes
@@ -196,7 +101,7 @@ def render(vault_path_default):
 
         # Find incomplete tasks
         status_text.text("✅ Scanning notes for incomplete tasks...")
-        incomplete_tasks = find_incomplete_tasks(unique_notes, start_date, end_date)
+        incomplete_tasks = find_incomplete_tasks(vault_path, start_date, end_date)
         progress_bar.progress(100)
 
         # Clear progress indicators
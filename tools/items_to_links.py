@@ -5,8 +5,10 @@
 # 4. The tool must be added to RENDER_FUNC_MAP in app.py, mapping the tool's id to the module's render function (e.g., 'ItemsToLinks': tools.items_to_links.render).
 # This ensures the UI loader can dynamically import and call the render function without errors.
 
+import os
 import streamlit as st
 import re
+from api.services.vault_links import unresolved_links
 
 def items_to_links(input_text: str, exclude_numbers: bool = False) -> str:
     """
@@ -81,7 +83,7 @@ def links_to_items(input_text: str) -> str:
     lines = input_text.strip().splitlines()
     return '\n'.join(re.sub(r'^\[\[(.*)\]\]$', r'\1', line.strip()) for line in lines if line.strip())
 
-def render():
+def render(vault_path_default=""):
     st.write("Paste your list of items (one per line) below. Use the buttons to add or remove Obsidian-style links.")
     st.info("Blank lines will be ignored. Output is suitable for Obsidian or similar markdown apps.")
 
@@ -108,6 +110,16 @@ def render():
             help="Convert only **bold** or __bold__ text to [[links]]"
         )
 
+    validate = st.checkbox(
+        "Check links against the vault",
+        value=False,
+        key="items_to_links_validate",
+        help="Flag links that don't match an existing note title, alias or path"
+    )
+    vault_path = vault_path_default
+    if validate:
+        vault_path = st.text_input("Obsidian Vault Path", value=vault_path_default, key="vault_path_items_to_links")
+
     col1, col2, col3 = st.columns([2, 2, 2])
     with col2:
         add_links = st.button("Add Links", key="add_links_btn")
@@ -131,6 +143,18 @@ def render():
             key="items_to_links_output",
         )
 
+    if add_links and validate and output:
+        if not os.path.isdir(vault_path):
+            st.error(f"Vault path '{vault_path}' does not exist.")
+        else:
+            targets = [t.strip() for t in re.findall(r'\[\[([^\]|#]+)', output)]
+            missing = unresolved_links(vault_path, targets)
+            if missing:
+                st.warning(f"{len(missing)} of {len(set(targets))} links don't match an existing note:")
+                st.write("\n".join(f"- [[{t}]]" for t in missing))
+            else:
+                st.success(f"All {len(set(targets))} links match existing notes.")
+
 if __name__ == "__main__":
     import sys
     if len(sys.argv) > 1:
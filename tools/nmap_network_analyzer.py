@@ -10,6 +10,12 @@ import ipaddress
 import subprocess
 import re
 import requests
+from datetime import datetime
+from functools import lru_cache
+
+from api.services import nmap_scans
+
+SCAN_TYPES = {"Quick (top ports)": "quick", "Full (all ports)": "full"}
 
 def get_all_networks():
     networks = []
@@ -76,6 +82,7 @@ def run_arp_scan():
     except Exception as e:
         return []
 
+@lru_cache(maxsize=1024)
 def lookup_mac_vendor(mac):
     # Use macvendors.co API (free, public, but rate-limited)
     try:
@@ -89,6 +96,19 @@ def lookup_mac_vendor(mac):
     except Exception:
         return 'Unknown'
 
+def run_host_scan(host, profile, loopback_only=False):
+    """Run a single-host scan into the scan history; returns an error message or None."""
+    try:
+        for event in nmap_scans.run_scan(host, profile=profile, loopback_only=loopback_only):
+            if event["type"] == "error":
+                return event["error"]
+    except Exception as e:
+        return str(e)
+    return None
+
+def format_scanned_at(ts):
+    return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+
 def get_arp_by_ip(arp_entries):
     return {entry['IP']: entry for entry in arp_entries} if arp_entries else {}
 
@@ -152,35 +172,91 @@ def render():
         st.error("nmap is not installed or not found in PATH. Please install nmap from https://nmap.org/download.html.")
         return
 
-    # Session state for scan results
-    if 'nmap_scan_results' not in st.session_state:
-        st.session_state['nmap_scan_results'] = None
-    if 'nmap_scan_hosts' not in st.session_state:
-        st.session_state['nmap_scan_hosts'] = []
+    # The scan being viewed; its results are reloaded from the scan history DB
+    if 'nmap_scan_id' not in st.session_state:
+        st.session_state['nmap_scan_id'] = None
 
-    target = st.text_input("Target network or host (CIDR or IP)", value=default_cidr)
-    scan_type = st.selectbox("Scan type", ["Quick (top ports)", "Full (all ports)"])
+    loopback_mode = st.checkbox(
+        "Loopback test mode",
+        value=False,
+        help="Only allow 127.0.0.0/8 targets, to try the scanner without touching the network",
+    )
+    target = st.text_input("Target network or host (CIDR or IP)",
+                           value="127.0.0.1/29" if loopback_mode else default_cidr)
+    scan_type = st.selectbox("Scan type", list(SCAN_TYPES))
     scan_btn = st.button("Start Scan", type="primary")
 
     if scan_btn and target:
-        st.info(f"Scanning {target}... This may take a while.")
-        nm = nmap.PortScanner()
+        import pandas as pd
+        live_rows = {}
+        progress = st.progress(0.0, text=f"Scanning {target}...")
+        live_table = st.empty()
         try:
-            if scan_type == "Quick (top ports)":
-                args = "-T4 --top-ports 20"
-            else:
-                args = "-T4 -p 1-1024"
-            with st.spinner("Running nmap scan..."):
-                scan_result = nm.scan(hosts=target, arguments=args)
-            hosts = nm.all_hosts()
-            st.session_state['nmap_scan_results'] = scan_result
-            st.session_state['nmap_scan_hosts'] = hosts
-            if not hosts:
-                st.warning("No hosts found.")
-                return
+            for event in nmap_scans.run_scan(target, profile=SCAN_TYPES[scan_type], loopback_only=loopback_mode):
+                if event["type"] == "start":
+                    shards_total = event["shards"]
+                    st.session_state['nmap_scan_id'] = event["scan_id"]
+                elif event["type"] == "host":
+                    live_rows[event["host"]] = {
+                        'IP': event["host"],
+                        'State': event["data"].get('status', {}).get('state', 'unknown'),
+                        'Open Ports': ', '.join(event["open_ports"]),
+                    }
+                    live_table.dataframe(pd.DataFrame(list(live_rows.values())))
+                elif event["type"] in ("shard", "error"):
+                    if event["type"] == "error":
+                        st.warning(f"Shard {event['shard']} failed: {event['error']}")
+                    progress.progress(event["done"] / shards_total,
+                                      text=f"Scanning {target}... {event['done']}/{shards_total} shards, "
+                                           f"{len(live_rows)} hosts so far")
+                elif event["type"] == "done":
+                    st.caption(f"Scan {event['status']}: {event['hosts']} hosts in {event['elapsed']}s "
+                               f"across {shards_total} shard(s)")
         except Exception as e:
             st.error(f"Error running nmap scan: {e}")
             return
+        finally:
+            progress.empty()
+            live_table.empty()
+        if not live_rows:
+            st.warning("No hosts found.")
+            return
+
+    # Scan history of this scan type: view any past scan or diff two without re-running nmap
+    history = nmap_scans.list_scans(limit=25, port_set=nmap_scans.SCAN_PROFILES[SCAN_TYPES[scan_type]][1])
+    if history:
+        import pandas as pd
+        def scan_label(scan):
+            started = datetime.fromtimestamp(scan['started_at']).strftime('%Y-%m-%d %H:%M:%S')
+            return f"#{scan['id']} {scan['target']} [{scan['port_set']}] {started} — {scan['hosts']} hosts ({scan['status']})"
+        ids = [scan['id'] for scan in history]
+        labels = {scan['id']: scan_label(scan) for scan in history}
+        current = st.session_state['nmap_scan_id']
+        col1, col2 = st.columns(2)
+        with col1:
+            viewed = st.selectbox("View scan", ids, format_func=labels.get,
+                                  index=ids.index(current) if current in ids else 0)
+            st.session_state['nmap_scan_id'] = viewed
+        with col2:
+            others = [i for i in ids if i != viewed]
+            compare = st.selectbox("Compare with", [None] + others,
+                                   format_func=lambda i: "—" if i is None else labels[i])
+        if compare is not None:
+            older, newer = sorted((compare, viewed))
+            diff = nmap_scans.diff_scans(older, newer)
+            st.subheader(f"Changes from scan #{older} to #{newer}")
+            diff_rows = [{'Host': h, 'Change': 'New host', 'Ports': ''} for h in diff['new_hosts']]
+            diff_rows += [{'Host': h, 'Change': 'Host gone', 'Ports': ''} for h in diff['gone_hosts']]
+            diff_rows += [{'Host': h, 'Change': 'Opened', 'Ports': ', '.join(p)} for h, p in diff['opened'].items()]
+            diff_rows += [{'Host': h, 'Change': 'Closed', 'Ports': ', '.join(p)} for h, p in diff['closed'].items()]
+            if diff_rows:
+                st.dataframe(pd.DataFrame(diff_rows))
+            else:
+                st.write("No differences.")
+
+    stored = nmap_scans.load_scan(st.session_state['nmap_scan_id']) if st.session_state['nmap_scan_id'] else None
+    st.session_state['nmap_scan_results'] = {'scan': stored['hosts']} if stored else None
+    st.session_state['nmap_scan_hosts'] = list(stored['hosts']) if stored else []
 
     # Display nmap results with ARP info in expanders
     scan_result = st.session_state.get('nmap_scan_results')
@@ -270,64 +346,63 @@ def render():
                         st.write("No TCP port information available.")
                 else:
                     st.write("No nmap data available.")
-                # --- Host-level nmap actions ---
-                os_key = f"os_scan_{host}"
-                if st.button("Run OS Detection & Version Scan", key=os_key):
-                    try:
-                        with st.spinner(f"Running OS and version scan for {host}..."):
-                            os_nm = nmap.PortScanner()
-                            os_result = os_nm.scan(hosts=host, arguments="-O -sV -T4")
-                            host_data = os_nm[host]
-                            # OS Guess
-                            os_guess = "Unknown"
-                            if 'osmatch' in host_data and host_data['osmatch']:
-                                os_guess = host_data['osmatch'][0]['name']
-                            st.write(f"**OS Guess:** {os_guess}")
-                            # Service versions
-                            if 'tcp' in host_data:
-                                version_df = []
-                                for port, portdata in host_data['tcp'].items():
-                                    version_state = portdata.get('state', '')
-                                    version_icon = '🟢' if version_state == 'open' else '🔴'
-                                    version_df.append({
-                                        'Port': port,
-                                        'State': f"{version_icon} {version_state}",
-                                        'Service': portdata.get('name', ''),
-                                        'Product': portdata.get('product', ''),
-                                        'Version': portdata.get('version', ''),
-                                        'Extra Info': portdata.get('extrainfo', ''),
-                                    })
-                                if version_df:
-                                    st.dataframe(pd.DataFrame(version_df))
-                                else:
-                                    st.write("No service version info found.")
-                            else:
-                                st.write("No TCP service version info available.")
-                            # Traceroute (if supported)
-                            traceroute_key = f"traceroute_{host}"
-                            if st.button("Run Traceroute", key=traceroute_key):
-                                try:
-                                    with st.spinner(f"Running traceroute for {host}..."):
-                                        tr_nm = nmap.PortScanner()
-                                        tr_result = tr_nm.scan(hosts=host, arguments="--traceroute -T4")
-                                        tr_data = tr_nm[host]
-                                        if 'traceroute' in tr_data:
-                                            hops = tr_data['traceroute'].get('hops', [])
-                                            if hops:
-                                                hop_df = []
-                                                for hop in hops:
-                                                    hop_df.append({
-                                                        'Hop': hop.get('hop', ''),
-                                                        'IP': hop.get('ipaddr', ''),
-                                                        'RTT': hop.get('rtt', '')
-                                                    })
-                                                st.dataframe(pd.DataFrame(hop_df))
-                                            else:
-                                                st.write("No traceroute hops found.")
-                                        else:
-                                            st.write("Traceroute data not available.")
-                                except Exception as e:
-                                    st.error(f"Error running traceroute for {host}: {e}")
-                    except Exception as e:
-                        st.error(f"Error running OS/Version scan for {host}: {e}")
-                st.divider()
\ No newline at end of file
+                # --- Host-level nmap actions (latest results come from the scan history) ---
+                if st.button("Run OS Detection & Version Scan", key=f"os_scan_{host}"):
+                    with st.spinner(f"Running OS and version scan for {host}..."):
+                        error = run_host_scan(host, "os", loopback_mode)
+                    if error:
+                        st.error(f"Error running OS/Version scan for {host}: {error}")
+                os_result = nmap_scans.latest_host_result(host, nmap_scans.SCAN_PROFILES["os"][1])
+                if os_result:
+                    host_data = os_result['data']
+                    st.caption(f"OS/version scan from {format_scanned_at(os_result['scanned_at'])}")
+                    # OS Guess
+                    os_guess = "Unknown"
+                    if 'osmatch' in host_data and host_data['osmatch']:
+                        os_guess = host_data['osmatch'][0]['name']
+                    st.write(f"**OS Guess:** {os_guess}")
+                    # Service versions
+                    if 'tcp' in host_data:
+                        version_df = []
+                        for port, portdata in host_data['tcp'].items():
+                            version_state = portdata.get('state', '')
+                            version_icon = '🟢' if version_state == 'open' else '🔴'
+                            version_df.append({
+                                'Port': port,
+                                'State': f"{version_icon} {version_state}",
+                                'Service': portdata.get('name', ''),
+                                'Product': portdata.get('product', ''),
+                                'Version': portdata.get('version', ''),
+                                'Extra Info': portdata.get('extrainfo', ''),
+                            })
+                        if version_df:
+                            st.dataframe(pd.DataFrame(version_df))
+                        else:
+                            st.write("No service version info found.")
+                    else:
+                        st.write("No TCP service version info available.")
+                # Traceroute (if supported)
+                if st.button("Run Traceroute", key=f"traceroute_{host}"):
+                    with st.spinner(f"Running traceroute for {host}..."):
+                        error = run_host_scan(host, "traceroute", loopback_mode)
+                    if error:
+                        st.error(f"Error running traceroute for {host}: {error}")
+                tr_result = nmap_scans.latest_host_result(host, nmap_scans.SCAN_PROFILES["traceroute"][1])
+                if tr_result:
+                    st.caption(f"Traceroute from {format_scanned_at(tr_result['scanned_at'])}")
+                    if 'traceroute' in tr_result['data']:
+                        hops = tr_result['data']['traceroute'].get('hops', [])
+                        if hops:
+                            hop_df = []
+                            for hop in hops:
+                                hop_df.append({
+                                    'Hop': hop.get('hop', ''),
+                                    'IP': hop.get('ipaddr', ''),
+                                    'RTT': hop.get('rtt', '')
+                                })
+                            st.dataframe(pd.DataFrame(hop_df))
+                        else:
+                            st.write("No traceroute hops found.")
+                    else:
+                        st.write("Traceroute data not available.")
+                st.divider()
@@ -1,6 +1,7 @@
 import streamlit as st
 import os
-import re
+from api.services.vault_index import get_vault_index
+from api.services.vault_links import rewrite_links
 
 def render(vault_path_default):
     st.warning("This tool will modify your notes. Make sure you have a backup.")
@@ -17,75 +18,27 @@ def render(vault_path_default):
         if not os.path.isdir(vault_path):
             st.error(f"Vault path '{vault_path}' does not exist.")
         else:
-            # Initialize counters and storage
-            total_files = 0
-            files_with_emoji_links = {}
-            links_processed = 0
-
-            # Create progress bar
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-
-            # First pass: count total files
-            for root, _, files in os.walk(vault_path):
-                for file in files:
-                    if file.endswith(".md") and not (ignore_string and ignore_string in file):
-                        total_files += 1
-
-            # Second pass: scan files
-            current_file = 0
-            for root, _, files in os.walk(vault_path):
-                for file in files:
-                    if ignore_string and ignore_string in file:
-                        continue
-                    if file.endswith(".md"):
-                        current_file += 1
-                        file_path = os.path.join(root, file)
-                        rel_path = os.path.relpath(file_path, vault_path)
-
-                        # Update progress
-                        progress = current_file / total_files if total_files else 1
-                        progress_bar.progress(progress)
-                        status_text.write(f"Scanning {current_file} of {total_files}: {rel_path}")
+            # Emoji-prefixed link targets come straight from the link graph
+            index = get_vault_index(vault_path)
+            links = [
+                link for link in index.links_where_target_startswith(emoji)
+                if not (ignore_string and ignore_string in os.path.basename(link['path']))
+            ][:max_process]
+            links_processed = len(links)
 
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-
-                        # Find all wiki-style links
-                        pattern = re.compile(r'\[\[([^\]]+)\]\]')
-                        matches = list(pattern.finditer(content))
-
-                        emoji_links = []
-                        for match in matches:
-                            link_text = match.group(1)
-                            if link_text.startswith(emoji):
-                                if links_processed < max_process:
-                                    emoji_links.append((match.start(), match.end(), link_text))
-                                    links_processed += 1
-                                if links_processed >= max_process:
-                                    break
-
-                        if emoji_links:
-                            files_with_emoji_links[rel_path] = emoji_links
-
-                            # If removal is enabled
-                            if remove_links:
-                                # Sort matches in reverse order to maintain correct indices
-                                emoji_links_sorted = sorted(emoji_links, reverse=True)
-                                new_content = content
-                                for start, end, link_text in emoji_links_sorted:
-                                    # Remove the emoji from the link
-                                    new_link = f"[[{link_text[len(emoji):]}]]"
-                                    new_content = new_content[:start] + new_link + new_content[end:]
-                                # Write changes if any were made
-                                if new_content != content:
-                                    with open(file_path, 'w', encoding='utf-8') as f:
-                                        f.write(new_content)
-                        if links_processed >= max_process:
-                            break
-            # Clear progress indicators
-            progress_bar.empty()
-            status_text.empty()
+            files_with_emoji_links = {}
+            for link in links:
+                link_text = link['target']
+                if link['subpath']:
+                    link_text += f"#{link['subpath']}"
+                if link['display'] is not None:
+                    link_text += f"|{link['display']}"
+                files_with_emoji_links.setdefault(link['path'], []).append(link_text)
+
+            # If removal is enabled, rewrite only the files holding those links
+            if remove_links and links:
+                renames = {link['target']: link['target'][len(emoji):] for link in links}
+                rewrite_links(vault_path, renames, paths=files_with_emoji_links, limit=max_process)
 
             # Display results
             if files_with_emoji_links:
@@ -94,7 +47,7 @@ def render(vault_path_default):
                     st.success(f"Processed {links_processed} links (max {max_process})")
                 for file_path, links in files_with_emoji_links.items():
                     with st.expander(f"{file_path} ({len(links)} links)"):
-                        for _, _, link_text in links:
+                        for link_text in links:
                             st.write(f"`{link_text}`")
             else:
                 st.info("No emoji-prefixed links found in any files.")
\ No newline at end of file
@@ -1,6 +1,7 @@
 import streamlit as st
 import os
-import re
+from api.services.vault_edits import VaultEditError, apply_plan, plan_edits, rollback
+from api.services.vault_index import get_vault_index
 
 def render(vault_path):
     st.warning("This tool will modify your notes. Make sure you have a backup.")
@@ -19,60 +20,41 @@ def render(vault_path):
         elif not old_tag or not new_tag:
             st.error("Both old and new tags must be specified.")
         else:
-            total_files = 0
-            files_with_replacements = {}
-            replacements_done = [0]
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            # Count total files
-            for root, _, files in os.walk(vault_path):
-                for file in files:
-                    if file.endswith(".md") and not (ignore_string and ignore_string in file):
-                        total_files += 1
-            # Scan and replace
-            current_file = 0
-            for root, _, files in os.walk(vault_path):
-                for file in files:
-                    if ignore_string and ignore_string in file:
-                        continue
-                    if file.endswith(".md"):
-                        current_file += 1
-                        file_path = os.path.join(root, file)
-                        rel_path = os.path.relpath(file_path, vault_path)
-                        progress = current_file / total_files if total_files else 1
-                        progress_bar.progress(progress)
-                        status_text.write(f"Scanning {current_file} of {total_files}: {rel_path}")
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        # Find all occurrences of the old tag
-                        tag_pattern = re.escape(old_tag)
-                        matches = list(re.finditer(tag_pattern, content))
-                        if matches:
-                            files_with_replacements[rel_path] = len(matches)
-                            if do_replace and replacements_done[0] < max_replacements:
-                                # Replace only up to the max_replacements limit
-                                def limited_sub(match):
-                                    if replacements_done[0] < max_replacements:
-                                        replacements_done[0] += 1
-                                        return new_tag
-                                    else:
-                                        return match.group(0)
-                                new_content, n = re.subn(tag_pattern, limited_sub, content)
-                                if new_content != content:
-                                    with open(file_path, 'w', encoding='utf-8') as f:
-                                        f.write(new_content)
-                        if replacements_done[0] >= max_replacements:
-                            break
-                if replacements_done[0] >= max_replacements:
-                    break
-            progress_bar.empty()
-            status_text.empty()
-            if files_with_replacements:
-                st.write(f"Found {len(files_with_replacements)} files containing '{old_tag}'")
+            # Only notes the index knows carry the tag (or a nested #tag/child) need reading
+            index = get_vault_index(vault_path)
+            candidates = [
+                n['path'] for n in index.notes_with_tags([old_tag], include_nested=True)
+                if not (ignore_string and ignore_string in os.path.basename(n['path']))
+            ]
+            with st.spinner(f"Scanning {len(candidates)} notes tagged '{old_tag}'..."):
+                plan = plan_edits(vault_path, tags={old_tag: new_tag}, paths=candidates,
+                                  limit=max_replacements if do_replace else None)
+            if plan:
+                st.write(f"Found {len(plan.files)} files containing '{old_tag}'")
                 if do_replace:
-                    st.success(f"Replaced {replacements_done[0]} occurrences of '{old_tag}' with '{new_tag}' (max {max_replacements})")
-                for file_path, count in files_with_replacements.items():
-                    with st.expander(f"{file_path} ({count} matches)"):
-                        st.write(f"{count} occurrence(s) of '{old_tag}' found.")
+                    try:
+                        result = apply_plan(plan)
+                    except VaultEditError as e:
+                        st.error(str(e))
+                    else:
+                        st.session_state['replace_tag_journal'] = result['journal']
+                        st.success(f"Replaced {result['changes']} occurrences of '{old_tag}' with '{new_tag}' (max {max_replacements})")
+                diffs = plan.diff()
+                for file_path, planned in plan.files.items():
+                    with st.expander(f"{file_path} ({planned['matches']} matches)"):
+                        st.write(f"{planned['matches']} occurrence(s) of '{old_tag}' found.")
+                        st.code(diffs[file_path], language="diff")
             else:
-                st.info(f"No files found containing the tag '{old_tag}'.")
\ No newline at end of file
+                st.info(f"No files found containing the tag '{old_tag}'.")
+
+    journal = st.session_state.get('replace_tag_journal')
+    if journal and st.button("Undo last replacement"):
+        try:
+            result = rollback(journal)
+        except VaultEditError as e:
+            st.error(str(e))
+        else:
+            st.session_state.pop('replace_tag_journal', None)
+            st.success(f"Restored {len(result['restored'])} files")
+            if result['conflicts']:
+                st.warning(f"Left {len(result['conflicts'])} files edited since then untouched: {', '.join(result['conflicts'])}")
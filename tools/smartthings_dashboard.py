@@ -1,14 +1,33 @@
 import streamlit as st
-import requests
 import os
 import pandas as pd
 import time
 import json
 from datetime import datetime, timezone, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
 import pytz
 
+from api.services import smartthings_client
+from api.services.smartthings_client import summarize_status
+
+# Only these capabilities are fetched for each section; others get full status
+SECTION_CAPABILITIES = {
+    'Lights': ['switch', 'switchLevel', 'colorControl'],
+    'Switches': ['switch'],
+    'Motion Sensors': ['motionSensor', 'battery', 'temperatureMeasurement'],
+    'Security': ['garageDoorControl', 'doorControl', 'lock'],
+}
+
+
+def _online_icon(state):
+    if state == 'online':
+        return '✅'
+    if state == 'offline':
+        return '❌'
+    if state == 'unknown':
+        return '❓'
+    return state
+
+
 def render():
     # API/Token input
     default_api_url = os.getenv("SMARTTHINGS_API_URL", "https://api.smartthings.com")
@@ -16,25 +35,26 @@ def render():
     with st.expander("API/Token Settings", expanded=False):
         api_url = st.text_input("SmartThings API URL", value=default_api_url, help="e.g. https://api.smartthings.com")
         token = st.text_input("Personal Access Token", value=default_token, type="password")
+        bypass_cache = st.checkbox(
+            "Bypass status cache",
+            value=False,
+            help=f"Statuses are cached for {smartthings_client.STATUS_TTL_SECONDS}s and health for "
+                 f"{smartthings_client.HEALTH_TTL_SECONDS}s across reruns",
+        )
 
     if not api_url or not token:
         st.error("Please provide both the API URL and token, or set them in your .env file as SMARTTHINGS_API_URL and SMARTTHINGS_TOKEN.")
         st.stop()
 
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }
-    endpoint = f"{api_url.rstrip('/')}/v1/devices"
+    # Shared across reruns and sessions, so the device list and statuses are cached
+    client = smartthings_client.get_client(api_url, token)
 
     # Fetch devices on page load
     with st.spinner("Fetching devices from SmartThings..."):
         try:
-            resp = requests.get(endpoint, headers=headers, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()
-            devices = data.get('items', [])
-        except requests.RequestException as e:
+            devices = smartthings_client.run(client.list_devices())
+            data = {'items': devices}
+        except Exception as e:
             st.error(f"Error connecting to SmartThings: {e}")
             return
 
@@ -79,56 +99,40 @@ def render():
         st.session_state['st_dashboard_raw_status'] = {}
 
     def fetch_statuses(devices, section_key):
-        start_time = time.time()
-        statuses = {}
-        raw_status_data = {}
-        progress_bar = st.progress(0, text=f"Fetching {section_key} statuses...")
-        total = len(devices)
-        lock = threading.Lock()
-
-        def fetch_one(idx, d):
-            device_id = d.get('deviceId', '')
-            status = 'Unavailable'
-            local_raw = None
-            if device_id:
-                status_endpoint = f"{api_url.rstrip('/')}/v1/devices/{device_id}/status"
-                try:
-                    status_resp = requests.get(status_endpoint, headers=headers, timeout=10)
-                    status_resp.raise_for_status()
-                    status_data = status_resp.json()
-                    local_raw = status_data
-                    # Try to get a summary of the main component's status
-                    if 'components' in status_data and 'main' in status_data['components']:
-                        main_status = status_data['components']['main']
-                        cap_states = []
-                        for cap, val in main_status.items():
-                            if isinstance(val, dict) and 'value' in val:
-                                cap_states.append(f"{cap}: {val['value']}")
-                            elif isinstance(val, dict):
-                                for k, v in val.items():
-                                    if isinstance(v, dict) and 'value' in v:
-                                        cap_states.append(f"{cap}.{k}: {v['value']}")
-                        status = ", ".join(cap_states) if cap_states else 'OK'
-                except Exception:
-                    status = 'Unavailable'
-            return idx, device_id, status, local_raw
-
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            futures = [executor.submit(fetch_one, idx, d) for idx, d in enumerate(devices)]
-            for i, future in enumerate(as_completed(futures)):
-                idx, device_id, status, local_raw = future.result()
-                with lock:
-                    statuses[device_id] = status
-                    if device_id and local_raw:
-                        raw_status_data[device_id] = local_raw
-                    progress_bar.progress((i + 1) / total, text=f"Fetching {section_key} statuses... ({i + 1}/{total})")
-        progress_bar.empty()
-        elapsed = time.time() - start_time
+        with st.spinner(f"Fetching {section_key} statuses..."):
+            result = smartthings_client.run(client.fetch_statuses(
+                devices, capabilities=SECTION_CAPABILITIES.get(section_key), refresh=bypass_cache,
+            ))
+        raw_status_data = result['statuses']
+        statuses = {device_id: summarize_status(raw) for device_id, raw in raw_status_data.items()}
+        for device_id in result['errors']:
+            statuses[device_id] = 'Unavailable'
         st.session_state['st_dashboard_statuses'][section_key] = statuses
         st.session_state['st_dashboard_raw_status'][section_key] = raw_status_data
         # Store last fetched time (UTC)
         st.session_state[f'st_dashboard_last_fetched_{section_key}'] = time.time()
-        return elapsed
+        st.session_state[f'st_dashboard_fetch_stats_{section_key}'] = result
+        return result['elapsed']
+
+    def show_fetch_stats(section_key):
+        stats = st.session_state.get(f'st_dashboard_fetch_stats_{section_key}')
+        if stats:
+            parts = [f"{stats['cached']} cached", f"{stats['fresh']} fresh"]
+            if stats['revalidated']:
+                parts.append(f"{stats['revalidated']} revalidated")
+            if stats['errors']:
+                parts.append(f"{len(stats['errors'])} failed")
+            st.caption(f"{' · '.join(parts)} — {stats['elapsed'] * 1000:.0f} ms")
+
+    def fetch_health(devs):
+        try:
+            health = smartthings_client.run(client.fetch_health(devs, refresh=bypass_cache))
+        except Exception:
+            health = {}
+        return {d.get('deviceId', ''): _online_icon(health.get(d.get('deviceId', ''), 'unknown')) for d in devs}
+
+    def send_switch_command(device_id, command):
+        smartthings_client.run(client.send_command(device_id, 'switch', command))
 
     # Render each section
     # First, build a list of sections to render, with 'Other' last
@@ -152,6 +156,7 @@ def render():
                         st.session_state['st_dashboard_statuses'][section_key] = st.session_state['st_dashboard_statuses'][section_key]
                         st.session_state['st_dashboard_raw_status'][section_key] = st.session_state['st_dashboard_raw_status'][section_key]
                         st.rerun()
+                    show_fetch_stats(section_key)
                 # Show cards
                 with col2:
                     garage_doors = [d for d in security_devices if get_category(d) == 'Garage Door']
@@ -215,31 +220,15 @@ def render():
                 st.session_state['st_dashboard_statuses'][section] = st.session_state['st_dashboard_statuses'][section]
                 st.session_state['st_dashboard_raw_status'][section] = st.session_state['st_dashboard_raw_status'][section]
                 st.rerun()
+            show_fetch_stats(section)
             # Render toggles always visible
             if not devs:
                 st.info(f"No devices found in {section}.")
                 continue
             statuses = st.session_state['st_dashboard_statuses'].get(section, {})
-            online_status_map = {}
+            online_status_map = fetch_health(devs)
             for d in devs:
                 device_id = d.get('deviceId', '')
-                online = 'Unknown'
-                if device_id:
-                    try:
-                        health_endpoint = f"{api_url.rstrip('/')}/v1/devices/{device_id}/health"
-                        health_resp = requests.get(health_endpoint, headers=headers, timeout=5)
-                        health_resp.raise_for_status()
-                        health_data = health_resp.json()
-                        state = health_data.get('state', '').lower()
-                        if state == 'online':
-                            online = '✅'
-                        elif state == 'offline':
-                            online = '❌'
-                        else:
-                            online = state
-                    except Exception:
-                        online = '❓'
-                online_status_map[device_id] = online
                 status = statuses.get(device_id, '')
                 is_on = False
                 if 'switch: on' in status:
@@ -252,26 +241,9 @@ def render():
                 toggle_label = f"{online_status_map[device_id]} {label}"
                 toggled = st.toggle(toggle_label, value=is_on, key=toggle_key)
                 if toggled != is_on and not st.session_state.get(pending_key, False):
-                    api_url = st.session_state.get('SMARTTHINGS_API_URL', os.getenv('SMARTTHINGS_API_URL', 'https://api.smartthings.com'))
-                    token = st.session_state.get('SMARTTHINGS_TOKEN', os.getenv('SMARTTHINGS_TOKEN', ''))
-                    headers = {
-                        "Authorization": f"Bearer {token}",
-                        "Content-Type": "application/json",
-                    }
                     command = 'on' if toggled else 'off'
-                    command_body = {
-                        "commands": [
-                            {
-                                "component": "main",
-                                "capability": "switch",
-                                "command": command
-                            }
-                        ]
-                    }
-                    endpoint = f"{api_url.rstrip('/')}/v1/devices/{device_id}/commands"
                     try:
-                        resp = requests.post(endpoint, headers=headers, data=json.dumps(command_body), timeout=10)
-                        resp.raise_for_status()
+                        send_switch_command(device_id, command)
                         st.session_state[pending_key] = True
                         st.success(f"Sent '{command}' command to {section[:-1].lower()}.")
                         st.rerun()
@@ -338,6 +310,7 @@ def render():
                     st.session_state['st_dashboard_statuses'][section] = st.session_state['st_dashboard_statuses'][section]
                     st.session_state['st_dashboard_raw_status'][section] = st.session_state['st_dashboard_raw_status'][section]
                     st.rerun()
+                show_fetch_stats(section)
                 if not devs:
                     st.info(f"No devices found in {section}.")
                     continue
@@ -432,7 +405,7 @@ def render():
             if section == 'Lights' and not df.empty:
                 color_types = []
                 toggles = []
-                online_status_map = {}
+                online_status_map = fetch_health(devs)
                 for d in devs:
                     caps = []
                     try:
@@ -443,23 +416,6 @@ def render():
                         pass
                     color_types.append('Color' if 'colorControl' in caps else 'White')
                     device_id = d.get('deviceId', '')
-                    online = 'Unknown'
-                    if device_id:
-                        try:
-                            health_endpoint = f"{api_url.rstrip('/')}/v1/devices/{device_id}/health"
-                            health_resp = requests.get(health_endpoint, headers=headers, timeout=5)
-                            health_resp.raise_for_status()
-                            health_data = health_resp.json()
-                            state = health_data.get('state', '').lower()
-                            if state == 'online':
-                                online = '✅'
-                            elif state == 'offline':
-                                online = '❌'
-                            else:
-                                online = state
-                        except Exception:
-                            online = '❓'
-                    online_status_map[device_id] = online
                     status = st.session_state['st_dashboard_statuses'].get(section, {}).get(device_id, '')
                     is_on = False
                     if 'switch: on' in status:
@@ -472,26 +428,9 @@ def render():
                     toggle_label = f"{online_status_map[device_id]} {light_label}"
                     toggled = st.toggle(toggle_label, value=is_on, key=toggle_key)
                     if toggled != is_on and not st.session_state.get(pending_key, False):
-                        api_url = st.session_state.get('SMARTTHINGS_API_URL', os.getenv('SMARTTHINGS_API_URL', 'https://api.smartthings.com'))
-                        token = st.session_state.get('SMARTTHINGS_TOKEN', os.getenv('SMARTTHINGS_TOKEN', ''))
-                        headers = {
-                            "Authorization": f"Bearer {token}",
-                            "Content-Type": "application/json",
-                        }
                         command = 'on' if toggled else 'off'
-                        command_body = {
-                            "commands": [
-                                {
-                                    "component": "main",
-                                    "capability": "switch",
-                                    "command": command
-                                }
-                            ]
-                        }
-                        endpoint = f"{api_url.rstrip('/')}/v1/devices/{device_id}/commands"
                         try:
-                            resp = requests.post(endpoint, headers=headers, data=json.dumps(command_body), timeout=10)
-                            resp.raise_for_status()
+                            send_switch_command(device_id, command)
                             st.session_state[pending_key] = True
                             st.success(f"Sent '{command}' command to light.")
                             st.rerun()
@@ -507,26 +446,9 @@ def render():
                 st.dataframe(df, use_container_width=True, hide_index=True)
             elif section == 'Switches' and not df.empty:
                 toggles = []
-                online_status_map = {}
+                online_status_map = fetch_health(devs)
                 for d in devs:
                     device_id = d.get('deviceId', '')
-                    online = 'Unknown'
-                    if device_id:
-                        try:
-                            health_endpoint = f"{api_url.rstrip('/')}/v1/devices/{device_id}/health"
-                            health_resp = requests.get(health_endpoint, headers=headers, timeout=5)
-                            health_resp.raise_for_status()
-                            health_data = health_resp.json()
-                            state = health_data.get('state', '').lower()
-                            if state == 'online':
-                                online = '✅'
-                            elif state == 'offline':
-                                online = '❌'
-                            else:
-                                online = state
-                        except Exception:
-                            online = '❓'
-                    online_status_map[device_id] = online
                     status = st.session_state['st_dashboard_statuses'].get(section, {}).get(device_id, '')
                     is_on = False
                     if 'switch: on' in status:
@@ -539,26 +461,9 @@ def render():
                     toggle_label = f"{online_status_map[device_id]} {switch_label}"
                     toggled = st.toggle(toggle_label, value=is_on, key=toggle_key)
                     if toggled != is_on and not st.session_state.get(pending_key, False):
-                        api_url = st.session_state.get('SMARTTHINGS_API_URL', os.getenv('SMARTTHINGS_API_URL', 'https://api.smartthings.com'))
-                        token = st.session_state.get('SMARTTHINGS_TOKEN', os.getenv('SMARTTHINGS_TOKEN', ''))
-                        headers = {
-                            "Authorization": f"Bearer {token}",
-                            "Content-Type": "application/json",
-                        }
                         command = 'on' if toggled else 'off'
-                        command_body = {
-                            "commands": [
-                                {
-                                    "component": "main",
-                                    "capability": "switch",
-                                    "command": command
-                                }
-                            ]
-                        }
-                        endpoint = f"{api_url.rstrip('/')}/v1/devices/{device_id}/commands"
                         try:
-                            resp = requests.post(endpoint, headers=headers, data=json.dumps(command_body), timeout=10)
-                            resp.raise_for_status()
+                            send_switch_command(device_id, command)
                             st.session_state[pending_key] = True
                             st.success(f"Sent '{command}' command to switch.")
                             st.rerun()
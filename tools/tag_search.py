@@ -1,6 +1,6 @@
 import streamlit as st
 import os
-from tools.tag_search_util import find_notes_with_tags
+from api.services.vault_index import get_vault_index
 import urllib.parse
 
 def render(vault_path_default):
@@ -20,58 +20,16 @@ def render(vault_path_default):
         if not os.path.isdir(vault_path):
             st.error(f"Vault path '{vault_path}' does not exist.")
         else:
-            with st.spinner("Counting notes in vault..."):
-                total_files = 0
-                for root, _, files in os.walk(vault_path):
-                    for file in files:
-                        if file.endswith('.md'):
-                            if exclude_templates and file.lower().startswith('template'):
-                                continue
-                            total_files += 1
-            progress_bar = st.progress(0)
-            status_text = st.empty()
+            with st.spinner("Refreshing vault index..."):
+                index = get_vault_index(vault_path)
             found = []
-            scanned = 0
-            for root, _, files in os.walk(vault_path):
-                for file in files:
-                    if file.endswith('.md'):
-                        if exclude_templates and file.lower().startswith('template'):
-                            continue
-                        scanned += 1
-                        file_path = os.path.join(root, file)
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        has_tag = False
-                        yaml_end = -1
-                        if content.startswith('---'):
-                            yaml_end = content.find('---', 3)
-                            if yaml_end != -1:
-                                yaml_block = content[3:yaml_end].strip()
-                                from tools.tag_search_util import parse_yaml_tags
-                                tags_found = parse_yaml_tags(yaml_block)
-                                if set(t.lstrip('#') for t in tags).intersection(t.lstrip('#') for t in tags_found):
-                                    has_tag = True
-                        if not has_tag:
-                            body = content[yaml_end+3:] if yaml_end != -1 else content
-                            from tools.tag_search_util import remove_code_blocks
-                            body_no_code = remove_code_blocks(body)
-                            for tag in tags:
-                                import re
-                                tag_pattern = r'(?<!\\w)#' + re.escape(tag.lstrip('#')) + r'(?![\\w/])'
-                                if re.search(tag_pattern, body_no_code):
-                                    has_tag = True
-                                    break
-                        if has_tag:
-                            rel_path = os.path.relpath(file_path, vault_path)
-                            title = os.path.splitext(os.path.basename(file))[0]
-                            found.append({"title": title, "path": rel_path, "full_path": os.path.abspath(file_path)})
-                        progress = scanned / total_files if total_files else 1
-                        progress_bar.progress(progress)
-                        status_text.text(f"Scanned {scanned} of {total_files} notes...")
+            for note in index.notes_with_tags(tags):
+                if exclude_templates and os.path.basename(note["path"]).lower().startswith('template'):
+                    continue
+                found.append({"title": note["title"], "path": note["path"],
+                              "full_path": os.path.abspath(index.full_path(note["path"]))})
             st.session_state['tag_search_results'] = found
             st.session_state['tag_search_params'] = {'vault_path': vault_path, 'tags': tags, 'exclude_templates': exclude_templates}
-            progress_bar.empty()
-            status_text.empty()
     # Display results
     results = st.session_state.get('tag_search_results', [])
     params = st.session_state.get('tag_search_params', {'vault_path': vault_path, 'tags': tags, 'exclude_templates': True})
@@ -136,7 +136,7 @@ UI_TOOLS_METADATA = [
         "long_title": "Convert List Items to Obsidian Links",
         "category": "Note Taking",
         "description": "Converts a list of items (one per line) into Obsidian-style links ([[item]]).",
-        "requires_vault_path": False
+        "requires_vault_path": True
     },
     {
         "id": "MarkdownStripper",
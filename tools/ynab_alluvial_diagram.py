@@ -1,16 +1,17 @@
 import streamlit as st
 import os
+import re
 import pandas as pd
-import json
 import sqlite3
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Optional
 from collections import defaultdict
 
+from api.services import spending_flow, ynab_export_files
+
 # Import plotly only when needed to avoid import errors
 try:
     import plotly.graph_objects as go
-    import plotly.express as px
     PLOTLY_AVAILABLE = True
 except ImportError:
     PLOTLY_AVAILABLE = False
@@ -27,18 +28,24 @@ def get_db_connection():
     return sqlite3.connect('accounts.db')
 
 def load_data_from_json(filename: str) -> Optional[Dict]:
-    """Load YNAB data from JSON file."""
+    """Load YNAB data from an export file (streaming NDJSON or legacy JSON)."""
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return ynab_export_files.load_export(filename)
     except Exception as e:
-        st.error(f"Error loading JSON file: {e}")
+        st.error(f"Error loading export file: {e}")
         return None
 
 def get_available_json_files() -> List[str]:
-    """Get list of available YNAB JSON export files."""
-    json_files = [f for f in os.listdir('.') if f.startswith('ynab_data_') and f.endswith('.json')]
-    return sorted(json_files, reverse=True)  # Newest first
+    """Get list of available YNAB export files."""
+    return ynab_export_files.list_export_files('.')  # Newest first
+
+def get_export_file_label(filename: str) -> str:
+    """File name with its export time, read from the metadata line only."""
+    try:
+        exported = ynab_export_files.read_metadata(filename).get('export_timestamp')
+        return f"{filename} ({datetime.fromisoformat(exported).strftime('%Y-%m-%d %H:%M')})"
+    except Exception:
+        return f"{filename} (Unknown)"
 
 def get_ynab_client():
     """Get configured YNAB API client."""
@@ -160,52 +167,6 @@ def get_transactions_for_month_from_json(json_data: Dict, year: int, month: int)
 
     return month_transactions
 
-def get_transactions_for_month_from_db(year: int, month: int) -> List[Dict]:
-    """Get all transactions for a specific month from SQLite database."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # Query transactions for the specific month with proper category and payee names
-    cursor.execute("""
-        SELECT t.id, t.date, t.amount, t.memo, t.cleared, t.approved,
-               t.account_id, t.account_name, t.payee_id, t.payee_name,
-               t.category_id, t.category_name, t.transfer_account_id,
-               c.name as category_name_from_cat, c.category_group_name,
-               p.name as payee_name_from_payees
-        FROM ynab_transactions t
-        LEFT JOIN ynab_categories c ON t.category_id = c.id
-        LEFT JOIN ynab_payees p ON t.payee_id = p.id
-        WHERE strftime('%Y', t.date) = ? AND strftime('%m', t.date) = ?
-        AND t.amount != 0 AND t.transfer_account_id IS NULL
-    """, (str(year), f"{month:02d}"))
-
-    transactions_data = cursor.fetchall()
-
-    month_transactions = []
-    for txn in transactions_data:
-        # Use category name from categories table if available, otherwise use transaction's category_name
-        category_name = txn[13] if txn[13] else (txn[11] if txn[11] else '❓ Uncategorized')
-
-        # Use payee name from payees table if available, otherwise use transaction's payee_name
-        payee_name = txn[15] if txn[15] else (txn[8] if txn[8] else 'Unknown Payee')
-
-        month_transactions.append({
-            'id': txn[0],
-            'date': txn[1],
-            'payee_name': payee_name,
-            'memo': txn[3] or '',
-            'amount': txn[2],
-            'category_id': txn[10] or 'uncategorized',
-            'category_name': category_name,
-            'account_id': txn[6],
-            'account_name': txn[7] or 'Unknown Account',
-            'cleared': txn[4],
-            'approved': bool(txn[5])
-        })
-
-    conn.close()
-    return month_transactions
-
 def get_transactions_for_month(budget_id: str, configuration, year: int, month: int) -> List[Dict]:
     """Get all transactions for a specific month."""
     with ynab.ApiClient(configuration) as api_client:
@@ -255,251 +216,78 @@ def get_transactions_for_month(budget_id: str, configuration, year: int, month:
 
         return month_transactions
 
-def is_expense_transaction(txn, account, category):
-    """Check if a transaction is an expense (not income/deposit/transfer)."""
-    # Skip if it's income (positive amount)
-    if txn['amount'] > 0:
-        print(f"🚫 SKIPPED (Income): {txn['payee_name']} - ${abs(txn['amount'])/1000:,.2f} (positive amount)")
-        return False
-
-    # Skip if it's a transfer
-    if txn.get('transfer_account_id') is not None:
-        print(f"🚫 SKIPPED (Transfer): {txn['payee_name']} - ${abs(txn['amount'])/1000:,.2f} (transfer between accounts)")
-        return False
-
-    # Skip if it's from a credit card account
-    if account and account.get('type') == 'creditCard':
-        print(f"🚫 SKIPPED (Credit Card): {txn['payee_name']} - ${abs(txn['amount'])/1000:,.2f} (credit card account)")
-        return False
-
-    # Skip if it's an income category
-    if category and category.get('group_name') in ['Income', 'Ready to Assign', 'Inflow: Ready to Assign']:
-        print(f"🚫 SKIPPED (Income Category): {txn['payee_name']} - ${abs(txn['amount'])/1000:,.2f} (category: {category.get('group_name')})")
-        return False
-
-    # Skip common income payee patterns
-    income_keywords = ['payroll', 'direct deposit', 'salary', 'dividend', 'interest', 'refund', 'ach deposit', 'paycheck', 'wages']
-    payee_lower = txn['payee_name'].lower()
-    for keyword in income_keywords:
-        if keyword in payee_lower:
-            print(f"🚫 SKIPPED (Income Payee): {txn['payee_name']} - ${abs(txn['amount'])/1000:,.2f} (contains '{keyword}')")
-            return False
-
-    return True  # This is an expense transaction
-
-def prepare_alluvial_data(transactions: List[Dict], categories: Dict[str, Dict]) -> Tuple[List[Dict], List[str], List[str], List[str]]:
-    """Prepare data for alluvial diagram with Group → Category → Payee flow."""
-    # Group transactions by payee, category, and group
-    payee_category_flows = defaultdict(lambda: defaultdict(float))  # pylint: disable=unnecessary-lambda
-    category_group_flows = defaultdict(lambda: defaultdict(float))  # pylint: disable=unnecessary-lambda
-    payee_totals = defaultdict(float)
-    category_totals = defaultdict(float)
-    group_totals = defaultdict(float)
-
-    print("🔍 DETAILED TRANSACTION PROCESSING:")
-    print("=" * 80)
-    print("🚨 DEBUG: This is the NEW version with fixes applied!")
-    print("🚨 DEBUG: VERSION 2.0 - Flow filtering added!")
-    print("🚨 DEBUG: VERSION 3.0 - Income/Deposit filtering added!")
-    print("=" * 80)
-
-    # Apply expense filtering
-    filtered_transactions = []
-    skipped_count = 0
-
-    for txn in transactions:
-        # Get category info for filtering
-        category = categories.get(txn['category_id']) if txn.get('category_id') else None
-
-        # Apply expense filter (we don't have account info here, so skip that check)
-        if is_expense_transaction(txn, None, category):
-            filtered_transactions.append(txn)
-        else:
-            skipped_count += 1
-
-    print("=" * 80)
-    print(f"📊 EXPENSE FILTERING RESULTS:")
-    print(f"  • Total transactions: {len(transactions)}")
-    print(f"  • Expense transactions (included): {len(filtered_transactions)}")
-    print(f"  • Income/Transfer transactions (skipped): {skipped_count}")
-    print("=" * 80)
-
-    for i, txn in enumerate(filtered_transactions):
-        category_id = txn['category_id']
-        amount = abs(txn['amount']) / 1000.0  # Convert from milliunits to dollars
-
-        # Ensure we have valid payee name
-        payee = txn['payee_name'] or 'No Payee'
-
-        # Get category and group names - ensure we always have both
-        if category_id == 'uncategorized' or not category_id:
-            category_name = 'No Category'
-            group_name = 'No Group'
-            reason = "uncategorized or no category_id"
-        elif category_id in categories:
-            category_name = categories[category_id]['name']
-            group_name = categories[category_id]['group_name']
-            reason = f"found in categories dict"
-        else:
-            # Fallback to placeholders - never use payee names as category names
-            category_name = 'No Category'
-            group_name = 'No Group'
-            reason = f"category_id '{category_id}' not found in categories dict"
-
-        # Debug specific transaction if it's the problematic one
-        if payee == 'Onetimepayment':
-            print(f"🎯 ONETIMEPAYMENT TRANSACTION #{i+1}:")
-            print(f"   Raw category_id: '{category_id}'")
-            print(f"   Raw payee_name: '{txn['payee_name']}'")
-            print(f"   Raw category_name: '{txn.get('category_name', 'N/A')}'")
-            print(f"   Final category_name: '{category_name}'")
-            print(f"   Final group_name: '{group_name}'")
-            print(f"   Final payee: '{payee}'")
-            print(f"   Reason: {reason}")
-            print(f"   Amount: ${amount:,.2f}")
-            print("-" * 40)
-
-        payee_category_flows[payee][category_name] += amount
-        category_group_flows[category_name][group_name] += amount
-        payee_totals[payee] += amount
-        category_totals[category_name] += amount
-        group_totals[group_name] += amount
-
-    print("=" * 80)
-
-    # Create the flow data
-    flows = []
-    payee_names = sorted(payee_totals.keys(), key=lambda x: payee_totals[x], reverse=True)
-
-    # Debug: Check for payee names in categories
-    print("🔍 DEBUGGING CATEGORY/PAYEE SEPARATION:")
-    print(f"Payee names: {payee_names}")
-    print(f"Category totals keys: {list(category_totals.keys())}")
-
-    # Remove any payee names that accidentally got into categories
-    payee_set = set(payee_names)
-    clean_category_totals = {}
-    for cat_name, amount in category_totals.items():
-        if cat_name not in payee_set:
-            clean_category_totals[cat_name] = amount
-        else:
-            print(f"⚠️  Removing '{cat_name}' from categories (it's a payee)")
-
-    category_names = sorted(clean_category_totals.keys(), key=lambda x: clean_category_totals[x], reverse=True)
-    group_names = sorted(group_totals.keys(), key=lambda x: group_totals[x], reverse=True)
-    print(f"Cleaned category names: {category_names}")
-    print("-" * 80)
-
-    # Create flows between payees and categories
-    print("🔄 FLOW CREATION DEBUG:")
-    for payee in payee_names:
-        if payee == 'Onetimepayment':
-            print(f"🎯 Creating flows for payee: '{payee}'")
-            print(f"   payee_category_flows['{payee}']: {dict(payee_category_flows[payee])}")
-
-        for category, amount in payee_category_flows[payee].items():
-            if amount > 0 and category in clean_category_totals:  # Only include valid categories
-                # Find the group for this category
-                group_name = None
-                for cat_group, cat_amount in category_group_flows[category].items():
-                    if cat_amount > 0:
-                        group_name = cat_group
-                        break
-
-                # Ensure we have a valid group name
-                if not group_name:
-                    group_name = 'No Group'
-
-                if payee == 'Onetimepayment':
-                    print(f"   ✅ Creating flow: {group_name} → {category} → {payee} (${amount:,.2f})")
-
-                flows.append({
-                    'payee': payee,
-                    'category': category,
-                    'group': group_name,
-                    'amount': amount,
-                    'payee_total': payee_totals[payee],
-                    'category_total': clean_category_totals[category],
-                    'group_total': group_totals[group_name]
-                })
-            elif payee == 'Onetimepayment':
-                print(f"   ❌ Skipping flow: {category} → {payee} (${amount:,.2f}) - category not in clean_category_totals")
-
-    print("-" * 80)
-
-    return flows, group_names, category_names, payee_names
-
-def create_simple_diagram(flows: List[Dict], group_names: List[str], category_names: List[str], payee_names: List[str]):
-    """Create a simple diagram with proper 3-column layout."""
-    if not flows:
-        return go.Figure()
+# Spending that isn't an expense: income category groups and income-like payees
+INCOME_CATEGORY_GROUPS = ['Income', 'Ready to Assign', 'Inflow: Ready to Assign']
+INCOME_PAYEE_KEYWORDS = ['payroll', 'direct deposit', 'salary', 'dividend', 'interest', 'refund', 'ach deposit', 'paycheck', 'wages']
 
-    # CRITICAL FIX: Only use categories and payees that are actually in the flows
-    used_groups = set()
-    used_categories = set()
-    used_payees = set()
+def get_flow_rows_from_db(year: int, month: int) -> List[Dict]:
+    """Aggregate a month's expenses to Group → Category → Payee flow rows in SQLite."""
+    date_start, date_end = spending_flow.month_bounds(f"{year}-{month:02d}")
+    payee = "COALESCE(NULLIF(p.name, ''), NULLIF(t.payee_name, ''), 'Unknown Payee')"
+    income_groups = ", ".join("?" for _ in INCOME_CATEGORY_GROUPS)
+    income_payees = " AND ".join(f"instr(LOWER({payee}), ?) = 0" for _ in INCOME_PAYEE_KEYWORDS)
 
-    for flow in flows:
-        used_groups.add(flow['group'])
-        used_categories.add(flow['category'])
-        used_payees.add(flow['payee'])
+    conn = get_db_connection()
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute(spending_flow.flow_sql(
+            source="""ynab_transactions t
+            LEFT JOIN ynab_categories c ON t.category_id = c.id
+            LEFT JOIN ynab_payees p ON t.payee_id = p.id""",
+            group="CASE WHEN c.id IS NULL THEN 'No Group' ELSE COALESCE(c.category_group_name, 'No Group') END",
+            category="COALESCE(c.name, 'No Category')",
+            payee=payee,
+            amount="ABS(t.amount) / 1000.0",
+            where=f"""t.date >= ? AND t.date < ?
+            AND t.amount < 0 AND t.transfer_account_id IS NULL
+            AND COALESCE(c.category_group_name, '') NOT IN ({income_groups})
+            AND {income_payees}""",
+        ), (date_start, date_end, *INCOME_CATEGORY_GROUPS, *INCOME_PAYEE_KEYWORDS)).fetchall()
+        return [dict(r) for r in rows]
+    finally:
+        conn.close()
 
-    # Create filtered lists with only used items
-    filtered_group_names = [g for g in group_names if g in used_groups]
-    filtered_category_names = [c for c in category_names if c in used_categories]
-    filtered_payee_names = [p for p in payee_names if p in used_payees]
+def prepare_alluvial_data(transactions: List[Dict], categories: Dict[str, Dict]) -> List[Dict]:
+    """Aggregate a month's transactions (JSON export or API) to Group → Category → Payee flow rows.
+
+    Same expense filter and labels as get_flow_rows_from_db, as one pandas groupby.
+    """
+    if not transactions:
+        return []
+    df = pd.DataFrame.from_records(transactions, columns=['payee_name', 'amount', 'category_id', 'transfer_account_id'])
+    df = df[(df['amount'] < 0) & df['transfer_account_id'].isna()]
+
+    category_ids = df['category_id']
+    df = df.assign(
+        group_name=category_ids.map({cat_id: cat['group_name'] for cat_id, cat in categories.items()}).fillna('No Group'),
+        category_name=category_ids.map({cat_id: cat['name'] for cat_id, cat in categories.items()}).fillna('No Category'),
+        payee_name=df['payee_name'].fillna('').replace('', 'No Payee'),
+        amount=df['amount'].abs() / 1000.0,  # Convert from milliunits to dollars
+    )
+    income_payee = df['payee_name'].str.lower().str.contains(
+        '|'.join(re.escape(keyword) for keyword in INCOME_PAYEE_KEYWORDS), regex=True)
+    df = df[~df['group_name'].isin(INCOME_CATEGORY_GROUPS) & ~income_payee]
+    return spending_flow.aggregate_frame(df)
+
+def create_simple_diagram(graph: Dict):
+    """Create a 3-column Sankey (Group → Category → Payee) from a spending flow graph."""
+    links = graph['links']
+    if not links:
+        return go.Figure()
 
-    # Create node labels and positioning
-    node_labels = filtered_group_names + filtered_category_names + filtered_payee_names
+    # Only draw nodes that carry a link
+    nodes = graph['nodes']
+    used = sorted({link['source'] for link in links} | {link['target'] for link in links})
+    position = {node: i for i, node in enumerate(used)}
+
+    node_labels = [nodes[i]['name'] for i in used]
     node_x = []
     node_y = []
-
-    # Group nodes (left column) - position 0
-    for i in range(len(filtered_group_names)):
-        node_x.append(0)
-        node_y.append(i / max(1, len(filtered_group_names) - 1))
-
-    # Category nodes (middle column) - position 0.5
-    for i in range(len(filtered_category_names)):
-        node_x.append(0.5)
-        node_y.append(i / max(1, len(filtered_category_names) - 1))
-
-    # Payee nodes (right column) - position 1.0 with better spacing
-    for i in range(len(filtered_payee_names)):
-        node_x.append(1.0)
-        # Add more spacing between payee nodes to prevent overlap
-        spacing = 1.2 if len(filtered_payee_names) > 3 else 1.0
-        node_y.append((i * spacing) / max(1, (len(filtered_payee_names) - 1) * spacing))
-
-    # Create flows
-    source = []
-    target = []
-    value = []
-
-    for flow in flows:
-        group = flow['group']
-        category = flow['category']
-        payee = flow['payee']
-        amount = flow['amount']
-
-        # Only create flows if category is in the filtered category names
-        if category in filtered_category_names:
-            # Find indices
-            group_idx = node_labels.index(group) if group in node_labels else -1
-            category_idx = node_labels.index(category) if category in node_labels else -1
-            payee_idx = node_labels.index(payee) if payee in node_labels else -1
-
-            # Add Group → Category flow
-            if group_idx >= 0 and category_idx >= 0:
-                source.append(group_idx)
-                target.append(category_idx)
-                value.append(amount)
-
-            # Add Category → Payee flow
-            if category_idx >= 0 and payee_idx >= 0:
-                source.append(category_idx)
-                target.append(payee_idx)
-                value.append(amount)
+    for column, x in enumerate((0, 0.5, 1.0)):
+        column_nodes = [i for i in used if nodes[i]['column'] == column]
+        for i in range(len(column_nodes)):
+            node_x.append(x)
+            node_y.append(i / max(1, len(column_nodes) - 1))
 
     # Create the diagram with better spacing
     fig = go.Figure(data=[go.Sankey(
@@ -512,9 +300,9 @@ def create_simple_diagram(flows: List[Dict], group_names: List[str], category_na
             y=node_y
         ),
         link=dict(
-            source=source,
-            target=target,
-            value=value,
+            source=[position[link['source']] for link in links],
+            target=[position[link['target']] for link in links],
+            value=[link['value'] for link in links],
             color="rgba(255,255,255,0.4)",  # Semi-transparent links
             line=dict(color="rgba(0,0,0,0.2)", width=1)
         )
@@ -528,215 +316,21 @@ def create_simple_diagram(flows: List[Dict], group_names: List[str], category_na
 
     return fig
 
-def create_alluvial_diagram(flows: List[Dict], group_names: List[str], category_names: List[str], payee_names: List[str],
-                          min_amount: float = 0):
-    """Create an alluvial diagram using plotly with Group → Category → Payee flow."""
-
-    # DEBUG: Show what we received as parameters
-    print("🔍 FUNCTION PARAMETERS DEBUG:")
-    print(f"Received category_names: {category_names}")
-    print(f"Received payee_names: {payee_names}")
-    print("=" * 80)
-
-    if not PLOTLY_AVAILABLE:
-        st.error("Plotly is not available. Please install it with: pip install plotly")
-        return None
-
-    # Filter flows by minimum amount
-    filtered_flows = [f for f in flows if f['amount'] >= min_amount]
-
-    if not filtered_flows:
-        # Create empty figure with message
-        fig = go.Figure()
-        fig.add_annotation(
-            text="No data to display. Try lowering the minimum amount filter.",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, xanchor='center', yanchor='middle',
-            showarrow=False, font=dict(size=16)
-        )
-        return fig
-
-    # Validate that we have all required data
-    if not group_names or not category_names or not payee_names:
-        fig = go.Figure()
-        fig.add_annotation(
-            text="Insufficient data for visualization. Missing groups, categories, or payees.",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, xanchor='center', yanchor='middle',
-            showarrow=False, font=dict(size=16)
-        )
-        return fig
-
-    # Create node positions for 3-column layout: Group → Category → Payee
-    group_nodes = {group: i for i, group in enumerate(group_names)}
-    category_nodes = {category: i + len(group_names) for i, category in enumerate(category_names)}
-    payee_nodes = {payee: i + len(group_names) + len(category_names) for i, payee in enumerate(payee_names)}
-
-    # DEBUG: Show exactly what nodes are being created
-    print("🔍 NODE CREATION DEBUG:")
-    print(f"Group nodes: {group_nodes}")
-    print(f"Category nodes: {category_nodes}")
-    print(f"Payee nodes: {payee_nodes}")
-    print("=" * 80)
-
-    # Prepare data for sankey diagram
-    source = []
-    target = []
-    value = []
-
-    # DEBUG: Show what we're using for node_labels
-    print("🔍 NODE_LABELS CREATION DEBUG:")
-    print(f"group_names: {group_names}")
-    print(f"category_names: {category_names}")
-    print(f"payee_names: {payee_names}")
-
-    node_labels = group_names + category_names + payee_names
-    node_colors = []
-
-    # Create simple, direct flows: Group → Category → Payee
-    print("📋 CREATING SIMPLE FLOWS:")
-    print("Group | Category | Payee")
-    print("-" * 80)
-
-    # Create flows directly from the filtered_flows data
-    for flow in filtered_flows:
-        group = flow['group']
-        category = flow['category']
-        payee = flow['payee']
-        amount = flow['amount']
-
-        print(f"{group} | {category} | {payee} (${amount:,.2f})")
-
-        # Add Group → Category flow
-        if group in group_nodes and category in category_nodes:
-            source.append(group_nodes[group])
-            target.append(category_nodes[category])
-            value.append(amount)
-
-        # Add Category → Payee flow
-        if category in category_nodes and payee in payee_nodes:
-            source.append(category_nodes[category])
-            target.append(payee_nodes[payee])
-            value.append(amount)
-
-    print("-" * 80)
-    print(f"📊 Created {len(source)} flows total")
-
-    # DEBUG: Show the actual source, target, value arrays being passed to Plotly
-    print("🔍 PLOTLY SANKEY DATA DEBUG:")
-    print(f"source: {source}")
-    print(f"target: {target}")
-    print(f"value: {value}")
-    print(f"node_labels: {node_labels}")
-    print("=" * 80)
-
-    # Create color mapping
-    group_colors = px.colors.qualitative.Set1[:len(group_names)]
-    category_colors = px.colors.qualitative.Set3[:len(category_names)]
-    payee_colors = px.colors.qualitative.Pastel[:len(payee_names)]
-    node_colors = group_colors + category_colors + payee_colors
-
-    # Create node positions for 3-column layout with better spacing
-    node_x = []
-    node_y = []
-
-    # Group nodes (left column) - position 0
-    for i in range(len(group_names)):
-        node_x.append(0)
-        if len(group_names) > 1:
-            node_y.append(i / (len(group_names) - 1))
-        else:
-            node_y.append(0.5)
-
-    # Category nodes (middle column) - position 0.5
-    for i in range(len(category_names)):
-        node_x.append(0.5)
-        if len(category_names) > 1:
-            node_y.append(i / (len(category_names) - 1))
-        else:
-            node_y.append(0.5)
-
-    # Payee nodes (right column) - position 1.0
-    for i in range(len(payee_names)):
-        node_x.append(1.0)
-        if len(payee_names) > 1:
-            node_y.append(i / (len(payee_names) - 1))
-        else:
-            node_y.append(0.5)
-
-    # DEBUG: Show node positioning
-    print("🔍 NODE POSITIONING DEBUG:")
-    print(f"node_x: {node_x}")
-    print(f"node_y: {node_y}")
-    print(f"Total nodes: {len(node_labels)}")
-    print("=" * 80)
-
-    # Create the sankey diagram
-    print("🚨 CREATING PLOTLY SANKEY WITH CORRECT DATA!")
-    print(f"🚨 node_labels: {node_labels}")
-    print(f"🚨 source: {source}")
-    print(f"🚨 target: {target}")
-
-    fig = go.Figure(data=[go.Sankey(
-        node=dict(
-            pad=20,  # Increased padding to reduce overlap
-            thickness=25,  # Increased thickness for better visibility
-            line=dict(color="black", width=1),
-            label=node_labels,
-            color=node_colors,
-            x=node_x,
-            y=node_y
-        ),
-        link=dict(
-            source=source,
-            target=target,
-            value=value,
-            color="rgba(255,255,255,0.4)",  # Semi-transparent white for cleaner look
-            line=dict(color="rgba(0,0,0,0.3)", width=1)  # Subtle border
-        )
-    )])
-
-    fig.update_layout(
-        title="Money Flow: Group → Category → Payee",
-        font_size=11,  # Slightly smaller font to reduce crowding
-        height=900,  # Increased height for better spacing
-        margin=dict(l=80, r=80, t=60, b=60)  # More margin space
-    )
-
-    return fig
-
-def create_summary_statistics(flows: List[Dict], group_names: List[str], category_names: List[str], payee_names: List[str]):
-    """Create summary statistics for the data."""
-    total_amount = sum(f['amount'] for f in flows)
-    total_transactions = len(flows)
-
-    # Top payees
-    payee_totals = defaultdict(float)
-    for flow in flows:
-        payee_totals[flow['payee']] += flow['amount']
-    top_payees = sorted(payee_totals.items(), key=lambda x: x[1], reverse=True)[:10]
-
-    # Top categories
-    category_totals = defaultdict(float)
-    for flow in flows:
-        category_totals[flow['category']] += flow['amount']
-    top_categories = sorted(category_totals.items(), key=lambda x: x[1], reverse=True)[:10]
-
-    # Top groups
-    group_totals = defaultdict(float)
-    for flow in flows:
-        group_totals[flow['group']] += flow['amount']
-    top_groups = sorted(group_totals.items(), key=lambda x: x[1], reverse=True)[:10]
+def create_summary_statistics(graph: Dict):
+    """Create summary statistics for a spending flow graph."""
+    def top(column):
+        return [(node['name'], node['total']) for node in graph['nodes'] if node['column'] == column]
 
+    top_groups, top_categories, top_payees = top(0), top(1), top(2)
     return {
-        'total_amount': total_amount,
-        'total_transactions': total_transactions,
-        'unique_payees': len(payee_names),
-        'unique_categories': len(category_names),
-        'unique_groups': len(group_names),
-        'top_payees': top_payees,
-        'top_categories': top_categories,
-        'top_groups': top_groups
+        'total_amount': graph['total_spending'],
+        'total_transactions': graph['transaction_count'],
+        'unique_payees': len(top_payees),
+        'unique_categories': len(top_categories),
+        'unique_groups': len(top_groups),
+        'top_payees': top_payees[:10],
+        'top_categories': top_categories[:10],
+        'top_groups': top_groups[:10]
     }
 
 def render():
@@ -819,7 +413,7 @@ def render():
         selected_file = st.selectbox(
             "Select JSON file:",
             json_files,
-            format_func=lambda x: f"{x} ({datetime.fromisoformat(load_data_from_json(x).get('metadata', {}).get('export_timestamp', 'Unknown')).strftime('%Y-%m-%d %H:%M') if load_data_from_json(x) else 'Unknown'})"
+            format_func=get_export_file_label
         )
 
         if selected_file:
@@ -929,13 +523,18 @@ def render():
     try:
         with st.spinner("Loading transactions..."):
             if data_source == "🗄️ SQLite Database":
-                transactions = get_transactions_for_month_from_db(year, month)
-            elif data_source == "📁 Cached JSON File" and json_data:
-                transactions = get_transactions_for_month_from_json(json_data, year, month)
+                # Aggregated in SQLite; only expense flows leave the database
+                flow_rows = get_flow_rows_from_db(year, month)
+                transaction_count = sum(row['txn_count'] for row in flow_rows)
             else:
-                transactions = get_transactions_for_month(budget_id, configuration, year, month)
+                if data_source == "📁 Cached JSON File" and json_data:
+                    transactions = get_transactions_for_month_from_json(json_data, year, month)
+                else:
+                    transactions = get_transactions_for_month(budget_id, configuration, year, month)
+                flow_rows = prepare_alluvial_data(transactions, categories)
+                transaction_count = len(transactions)
 
-        if not transactions:
+        if not transaction_count:
             st.warning(f"⚠️ No transactions found for {selected_date.strftime('%B %Y')}")
 
             # Add debugging information
@@ -1125,29 +724,21 @@ def render():
 
             return
 
-        st.success(f"✅ Found {len(transactions)} transactions for {selected_date.strftime('%B %Y')}")
+        st.success(f"✅ Found {transaction_count} transactions for {selected_date.strftime('%B %Y')}")
 
     except (ynab.ApiException, ConnectionError, TimeoutError) as e:
         st.error(f"❌ **Error loading transactions**: {str(e)}")
         return
 
-    # Prepare data for visualization
-    with st.spinner("Preparing data for visualization..."):
-        flows, group_names, category_names, payee_names = prepare_alluvial_data(transactions, categories)
-
-    if not flows:
+    if not flow_rows:
         st.warning("⚠️ No valid flows found for visualization")
 
         # Debug information
         with st.expander("🔍 Debug: Flow Creation", expanded=True):
             st.write("**Debug Information:**")
-            st.write(f"• Total transactions processed: {len(transactions)}")
+            st.write(f"• Total transactions processed: {transaction_count}")
             st.write(f"• Categories available: {len(categories)}")
-
-            if transactions:
-                st.write("**Sample transactions:**")
-                for i, txn in enumerate(transactions[:3]):
-                    st.write(f"{i+1}. Payee: '{txn.get('payee_name', 'None')}', Category ID: '{txn.get('category_id', 'None')}', Amount: {txn.get('amount', 0)}")
+            st.write("• Income, transfers and income-like payees are excluded from the flows")
 
             if categories:
                 st.write("**Sample categories:**")
@@ -1202,47 +793,14 @@ def render():
             help="Limit the number of payees shown"
         )
 
-    # Filter data based on controls
-    filtered_flows = [f for f in flows if f['amount'] >= min_amount]
-
-    # Limit groups, categories, and payees
-    group_totals = defaultdict(float)
-    payee_totals = defaultdict(float)
-    category_totals = defaultdict(float)
-
-    for flow in filtered_flows:
-        group_totals[flow['group']] += flow['amount']
-        payee_totals[flow['payee']] += flow['amount']
-        category_totals[flow['category']] += flow['amount']
-
-    # Clean categories - remove any payee names that got into categories
-    payee_set = set(payee_names)
-    clean_category_totals = {}
-    print(f"🔍 CLEANING DEBUG: payee_set contains {len(payee_set)} payees")
-    print(f"🔍 CLEANING DEBUG: category_totals contains: {list(category_totals.keys())}")
-
-    for cat_name, amount in category_totals.items():
-        if cat_name not in payee_set:
-            clean_category_totals[cat_name] = amount
-        else:
-            print(f"⚠️  Removing '{cat_name}' from categories in diagram (it's a payee)")
-
-    print(f"🔍 CLEANING DEBUG: clean_category_totals contains: {list(clean_category_totals.keys())}")
-
-    top_groups = sorted(group_totals.items(), key=lambda x: x[1], reverse=True)[:max_groups]
-    top_payees = sorted(payee_totals.items(), key=lambda x: x[1], reverse=True)[:max_payees]
-    top_categories = sorted(clean_category_totals.items(), key=lambda x: x[1], reverse=True)[:max_categories]
-
-    top_group_names = [g[0] for g in top_groups]
-    top_payee_names = [p[0] for p in top_payees]
-    top_category_names = [c[0] for c in top_categories]
-
-    # Filter flows to only include top groups, categories, and payees
-    final_flows = [f for f in filtered_flows
-                   if f['group'] in top_group_names and f['payee'] in top_payee_names and f['category'] in top_category_names]
+    # Top-N cut on the aggregated totals, then nodes and links for what's left
+    graph = spending_flow.build_flow_graph(
+        flow_rows, min_amount=min_amount, max_groups=max_groups,
+        max_categories=max_categories, max_payees=max_payees
+    )
 
     # Create summary statistics
-    stats = create_summary_statistics(final_flows, top_group_names, top_category_names, top_payee_names)
+    stats = create_summary_statistics(graph)
 
     # Display summary statistics
     st.subheader("📊 Summary Statistics")
@@ -1251,7 +809,7 @@ def render():
     with col1:
         st.metric("Total Amount", f"${stats['total_amount']:,.2f}")
     with col2:
-        st.metric("Total Flows", f"{stats['total_transactions']:,}")
+        st.metric("Transactions", f"{stats['total_transactions']:,}")
     with col3:
         st.metric("Unique Groups", f"{stats['unique_groups']:,}")
     with col4:
@@ -1266,9 +824,8 @@ def render():
     if st.button("🔄 Force Refresh Diagram", help="Click to force refresh the diagram"):
         st.rerun()
 
-    if final_flows:
-        # Create the main alluvial diagram using the working simple logic
-        main_fig = create_simple_diagram(final_flows, group_names, category_names, payee_names)
+    if graph['links']:
+        main_fig = create_simple_diagram(graph)
         st.plotly_chart(main_fig, use_container_width=True, key="main_alluvial_diagram")
     else:
         st.warning("⚠️ No flows to display with current filters")
@@ -1298,7 +855,7 @@ def render():
     st.subheader("📥 Export Data")
 
     if st.button("📊 Export Flow Data"):
-        df = pd.DataFrame(final_flows)
+        df = pd.DataFrame(flow_rows)
         csv = df.to_csv(index=False)
         st.download_button(
             label="Download CSV",
@@ -1,9 +1,9 @@
 import streamlit as st
 import os
 import time
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime, timedelta
-from .ynab_categorizer_config import load_rules, format_date
+from .ynab_categorizer_config import load_rules, format_date, get_compiled_rules, CompiledRules
 
 # Import ynab only when needed to avoid import errors
 try:
@@ -12,6 +12,12 @@ try:
 except ImportError:
     YNAB_AVAILABLE = False
 
+try:
+    from api.services.dragon_keeper.sync_engine import local_unassigned_transactions
+    DRAGON_KEEPER_AVAILABLE = True
+except ImportError:
+    DRAGON_KEEPER_AVAILABLE = False
+
 def get_ynab_client():
     """Get configured YNAB API client."""
     if not YNAB_AVAILABLE:
@@ -73,6 +79,24 @@ def get_unassigned_transactions(budget_id: str, configuration, force_refresh: bo
                 if datetime.now() - cache_time < timedelta(minutes=5):
                     return cached_transactions['transactions']
 
+    # Local Dragon Keeper database, brought up to date with a delta sync
+    unassigned = local_unassigned_transactions(str(budget_id)) if DRAGON_KEEPER_AVAILABLE else None
+    if unassigned is None:
+        unassigned = get_unassigned_transactions_from_api(budget_id, configuration)
+
+    # Cache the results
+    if 'ynab_transactions_cache' not in st.session_state:
+        st.session_state['ynab_transactions_cache'] = {}
+
+    st.session_state['ynab_transactions_cache'][cache_key] = {
+        'transactions': unassigned,
+        'timestamp': datetime.now().isoformat()
+    }
+
+    return unassigned
+
+def get_unassigned_transactions_from_api(budget_id: str, configuration) -> List[Dict]:
+    """Get unassigned transactions with a full pull from the YNAB API."""
     with ynab.ApiClient(configuration) as api_client:
         from ynab.api.transactions_api import TransactionsApi
         transactions_api = TransactionsApi(api_client)
@@ -108,39 +132,11 @@ def get_unassigned_transactions(budget_id: str, configuration, force_refresh: bo
         if transfer_count > 0:
             st.write(f"ℹ️ **Filtered out {transfer_count} transfer transactions** (cannot be categorized)")
 
-        # Cache the results
-        if 'ynab_transactions_cache' not in st.session_state:
-            st.session_state['ynab_transactions_cache'] = {}
-
-        st.session_state['ynab_transactions_cache'][cache_key] = {
-            'transactions': unassigned,
-            'timestamp': datetime.now().isoformat()
-        }
-
         return unassigned
 
-def match_transaction_to_rule(transaction: Dict, rules: List[Dict]) -> str:
+def match_transaction_to_rule(transaction: Dict, rules: CompiledRules) -> Optional[str]:
     """Match a transaction to a rule and return category_id if found."""
-    payee_name = transaction['payee_name'].lower()
-    memo = transaction['memo'].lower()
-
-    for rule in rules:
-        if not rule.get('category_id'):  # Skip rules without category_id
-            continue
-
-        match_text = rule['match'].lower()
-        match_type = rule['type']
-
-        # Check payee_name and memo
-        for field in [payee_name, memo]:
-            if match_type == 'exact' and field == match_text:
-                return rule['category_id']
-            elif match_type == 'contains' and match_text in field:
-                return rule['category_id']
-            elif match_type == 'startsWith' and field.startswith(match_text):
-                return rule['category_id']
-
-    return None
+    return rules.match(transaction)
 
 def update_transactions(budget_id: str, configuration, updates: List[Dict]) -> bool:
     """Update transactions with new categories."""
@@ -446,7 +442,7 @@ def render():
 
                 # Step 5: Test rule matching
                 st.write("**5. Testing Rule Matching:**")
-                rules = load_rules()
+                compiled_rules = get_compiled_rules()
                 if rules:
                     st.write(f"**Loaded {len(rules)} rules**")
 
@@ -463,7 +459,7 @@ def render():
                                     'memo': txn.memo or ''
                                 }
 
-                                category_id = match_transaction_to_rule(txn_dict, rules)
+                                category_id = match_transaction_to_rule(txn_dict, compiled_rules)
                                 if category_id:
                                     matched_count += 1
                                     st.write(f"✅ **{txn.payee_name}** → Rule matched!")
@@ -484,12 +480,10 @@ def render():
 
     # Find transactions that match rules
     matched_transactions = []
+    compiled_rules = get_compiled_rules()
     for txn in unassigned_transactions:
-        category_id = match_transaction_to_rule(txn, rules)
+        category_id = match_transaction_to_rule(txn, compiled_rules)
         if category_id:
-            # Debug: Log the category ID being used
-            st.write(f"🔍 **DEBUG**: Transaction '{txn['payee_name']}' matched rule with category ID: `{category_id}` (length: {len(category_id)})")
-
             matched_transactions.append({
                 'transaction': txn,
                 'suggested_category_id': category_id,
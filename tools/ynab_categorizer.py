@@ -49,7 +49,13 @@ except ImportError:
 from .llm_utils import get_llm_suggestion, display_llm_logs, clear_llm_logs
 
 # Import config helper
-from .ynab_categorizer_config import load_rules, save_rules, format_date
+from .ynab_categorizer_config import load_rules, save_rules, format_date, get_compiled_rules, CompiledRules
+
+try:
+    from api.services.dragon_keeper.sync_engine import local_unassigned_transactions
+    DRAGON_KEEPER_AVAILABLE = True
+except ImportError:
+    DRAGON_KEEPER_AVAILABLE = False
 
 
 
@@ -249,6 +255,24 @@ def get_unassigned_transactions(budget_id: str, configuration, force_refresh: bo
                     print(f"🔍 DEBUG: Using cached transactions for budget {budget_id}")
                     return cached_transactions['transactions']
 
+    # Local Dragon Keeper database, brought up to date with a delta sync
+    unassigned = local_unassigned_transactions(str(budget_id)) if DRAGON_KEEPER_AVAILABLE else None
+    if unassigned is None:
+        unassigned = get_unassigned_transactions_from_api(budget_id, configuration)
+
+    # Cache the results
+    if 'ynab_transactions_cache' not in st.session_state:
+        st.session_state['ynab_transactions_cache'] = {}
+
+    st.session_state['ynab_transactions_cache'][cache_key] = {
+        'transactions': unassigned,
+        'timestamp': datetime.now().isoformat()
+    }
+
+    return unassigned
+
+def get_unassigned_transactions_from_api(budget_id: str, configuration) -> List[Dict]:
+    """Get unassigned transactions with a full pull from the YNAB API."""
     print(f"🔍 DEBUG: Fetching unassigned transactions for budget {budget_id}")
 
     with ynab.ApiClient(configuration) as api_client:
@@ -289,15 +313,6 @@ def get_unassigned_transactions(budget_id: str, configuration, force_refresh: bo
         for txn in unassigned[:3]:  # Show first 3 for debugging
             print(f"🔍 DEBUG: Unassigned transaction: {txn['id']} - {txn['payee_name']} - Category: {txn['category_id']}")
 
-        # Cache the results
-        if 'ynab_transactions_cache' not in st.session_state:
-            st.session_state['ynab_transactions_cache'] = {}
-
-        st.session_state['ynab_transactions_cache'][cache_key] = {
-            'transactions': unassigned,
-            'timestamp': datetime.now().isoformat()
-        }
-
         return unassigned
 
 def load_categorization_rules() -> List[Dict]:
@@ -311,43 +326,9 @@ def save_categorization_rules(rules: List[Dict], changed_rule_indices: List[int]
     st.session_state.ynab_categorization_rules = rules
     save_rules(rules, changed_rule_indices)
 
-def match_transaction_to_rule(transaction: Dict, rules: List[Dict]) -> Optional[str]:
+def match_transaction_to_rule(transaction: Dict, rules: CompiledRules) -> Optional[str]:
     """Match a transaction to a rule and return category_id if found."""
-    payee_name = transaction['payee_name'].lower()
-    memo = transaction['memo'].lower()
-
-    # Debug output for first few transactions
-    if transaction.get('id', '').startswith('debug_') or len(transaction.get('id', '')) < 10:
-        print(f"🔍 DEBUG: Matching transaction {transaction.get('id', 'N/A')[:8]}...")
-        print(f"🔍 DEBUG: Payee: '{payee_name}', Memo: '{memo}'")
-
-    for rule in rules:
-        if not rule.get('category_id'):  # Skip rules without category_id
-            continue
-
-        match_text = rule['match'].lower()
-        match_type = rule['type']
-
-        # Debug output for first few rules
-        if transaction.get('id', '').startswith('debug_') or len(transaction.get('id', '')) < 10:
-            print(f"🔍 DEBUG: Checking rule: '{match_text}' ({match_type})")
-
-        # Check payee_name and memo
-        for field in [payee_name, memo]:
-            if match_type == 'exact' and field == match_text:
-                if transaction.get('id', '').startswith('debug_') or len(transaction.get('id', '')) < 10:
-                    print(f"🔍 DEBUG: ✅ EXACT MATCH: '{field}' == '{match_text}'")
-                return rule['category_id']
-            elif match_type == 'contains' and match_text in field:
-                if transaction.get('id', '').startswith('debug_') or len(transaction.get('id', '')) < 10:
-                    print(f"🔍 DEBUG: ✅ CONTAINS MATCH: '{match_text}' in '{field}'")
-                return rule['category_id']
-            elif match_type == 'startsWith' and field.startswith(match_text):
-                if transaction.get('id', '').startswith('debug_') or len(transaction.get('id', '')) < 10:
-                    print(f"🔍 DEBUG: ✅ STARTSWITH MATCH: '{field}' starts with '{match_text}'")
-                return rule['category_id']
-
-    return None
+    return rules.match(transaction)
 
 def get_llm_category_suggestion(transaction: Dict, categories: Dict[str, Dict]) -> Tuple[str, str]:
     """Get LLM suggestion for transaction category."""
@@ -813,8 +794,9 @@ def render_matched_transactions(unassigned_transactions: List[Dict], categories:
             st.write(f"{i+1}. Payee: '{txn.get('payee_name', 'N/A')}', Memo: '{txn.get('memo', 'N/A')}'")
 
     matched_transactions = []
+    compiled_rules = get_compiled_rules()
     for txn in unassigned_transactions:
-        category_id = match_transaction_to_rule(txn, rules)
+        category_id = match_transaction_to_rule(txn, compiled_rules)
         if category_id:
             matched_transactions.append({
                 'transaction': txn,
@@ -907,8 +889,9 @@ def render_llm_assisted_transactions(unassigned_transactions: List[Dict], catego
 
     # Filter out transactions that match rules
     unmatched_transactions = []
+    compiled_rules = get_compiled_rules()
     for txn in unassigned_transactions:
-        if not match_transaction_to_rule(txn, rules):
+        if not match_transaction_to_rule(txn, compiled_rules):
             unmatched_transactions.append(txn)
 
     if not unmatched_transactions:
@@ -1268,9 +1251,10 @@ def render():
             st.write(f"Testing {len(rules)} rules against {len(unassigned_transactions)} transactions...")
 
             # Test first 3 transactions
+            compiled_rules = get_compiled_rules()
             for i, txn in enumerate(unassigned_transactions[:3]):
                 st.write(f"**Transaction {i+1}:** {txn['payee_name']} - {txn['memo']}")
-                category_id = match_transaction_to_rule(txn, rules)
+                category_id = match_transaction_to_rule(txn, compiled_rules)
                 if category_id:
                     st.success(f"✅ Matched to category: {category_id}")
                 else:
@@ -1,11 +1,13 @@
 """
 Configuration helper for YNAB Categorizer tool.
-Handles saving/loading of categorization rules.
+Handles saving/loading of categorization rules, and the compiled rule
+matcher shared by the categorizer and apply-rules tools.
 """
 
 import json
 import os
-from typing import List, Dict
+import threading
+from typing import List, Dict, Optional
 from datetime import datetime
 
 CONFIG_FILE = "ynab_categorizer_rules.json"
@@ -89,4 +91,87 @@ def format_date(date_string: str) -> str:
         dt = datetime.fromisoformat(date_string)
         return dt.strftime("%Y-%m-%d %H:%M")
     except (ValueError, TypeError):
-        return "Unknown"
\ No newline at end of file
+        return "Unknown"
+
+class CompiledRules:
+    """Categorization rules compiled for matching.
+
+    A transaction gets the category of the first rule (in file order) whose
+    text matches its payee name or memo, case-insensitively. Exact and
+    startsWith rules become dict lookups (per prefix length for startsWith);
+    only contains rules are scanned, and only those ahead of the best lookup
+    hit. Results are memoized per (payee, memo), which repeat a lot.
+    """
+
+    def __init__(self, rules: List[Dict]):
+        self.exact: Dict[str, int] = {}
+        self.prefixes: Dict[int, Dict[str, int]] = {}
+        self.contains: List[tuple] = []
+        self.categories: List[str] = []
+        for rule in rules:
+            if not rule.get('category_id'):  # Skip rules without category_id
+                continue
+            index = len(self.categories)
+            self.categories.append(rule['category_id'])
+            match_text = (rule.get('match') or '').lower()
+            match_type = rule.get('type')
+            if match_type == 'exact':
+                self.exact.setdefault(match_text, index)
+            elif match_type == 'startsWith':
+                self.prefixes.setdefault(len(match_text), {}).setdefault(match_text, index)
+            elif match_type == 'contains':
+                self.contains.append((index, match_text))
+        self._memo: Dict[tuple, Optional[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    def _first_rule(self, field: str, best: int) -> int:
+        index = self.exact.get(field, best)
+        if index < best:
+            best = index
+        for length, texts in self.prefixes.items():
+            index = texts.get(field[:length], best) if length <= len(field) else best
+            if index < best:
+                best = index
+        for index, match_text in self.contains:
+            if index >= best:
+                break
+            if match_text in field:
+                return index
+        return best
+
+    def match(self, transaction: Dict) -> Optional[str]:
+        """category_id of the first matching rule, or None."""
+        key = ((transaction.get('payee_name') or '').lower(), (transaction.get('memo') or '').lower())
+        if key not in self._memo:
+            best = len(self.categories)
+            for field in key:
+                best = self._first_rule(field, best)
+            self._memo[key] = self.categories[best] if best < len(self.categories) else None
+        return self._memo[key]
+
+
+_compiled_lock = threading.Lock()
+_compiled: Dict[str, tuple] = {}
+
+
+def get_compiled_rules() -> CompiledRules:
+    """Compiled rules from the config file, recompiled only when its mtime changes."""
+    config_path = os.path.abspath(get_config_path())
+    try:
+        stat = os.stat(config_path)
+        version = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        version = None
+    with _compiled_lock:
+        cached = _compiled.get(config_path)
+        if cached is None or cached[0] != version:
+            rules = load_rules()
+            # load_rules may have rewritten the file to add dates
+            if version is not None and os.path.exists(config_path):
+                stat = os.stat(config_path)
+                version = (stat.st_mtime_ns, stat.st_size)
+            cached = (version, CompiledRules(rules))
+            _compiled[config_path] = cached
+        return cached[1]
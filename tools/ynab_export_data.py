@@ -1,9 +1,11 @@
 import streamlit as st
 import os
-import json
 import sqlite3
+import time
 from datetime import datetime, date
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from api.services import ynab_export_files
 
 # Import ynab only when needed to avoid import errors
 try:
@@ -185,257 +187,273 @@ def convert_datetime_to_string(obj):
         return obj
 
 def save_data_to_file(data: Dict[str, Any], filename: str) -> bool:
-    """Save data to JSON file."""
+    """Save data as a streaming export (NDJSON, zstd-compressed when available)."""
     try:
-        # Convert all datetime objects to strings
-        json_data = convert_datetime_to_string(data)
-
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, indent=2, ensure_ascii=False)
+        ynab_export_files.save_export(data, filename)
         return True
-    except (IOError, OSError) as e:
+    except (IOError, OSError, RuntimeError) as e:
         st.error(f"Error saving file: {e}")
         return False
 
 def load_data_from_file(filename: str) -> Dict[str, Any]:
-    """Load data from JSON file."""
+    """Load data from a streaming export or a legacy JSON file."""
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (IOError, OSError, json.JSONDecodeError) as e:
+        return ynab_export_files.load_export(filename)
+    except (IOError, OSError, RuntimeError, ValueError) as e:
         st.error(f"Error loading file: {e}")
         return {}
 
-def import_ynab_data_to_db(data: Dict[str, Any], budget_id: str) -> bool:
-    """Import YNAB data directly into SQLite database."""
+# Tables replaced by an import, and their insert statements
+YNAB_IMPORT_TABLES = {
+    'ynab_budgets': """
+        INSERT INTO ynab_budgets (
+            id, name, last_modified_on, first_month, last_month,
+            date_format_format, currency_format_iso_code,
+            currency_format_example_format, currency_format_decimal_digits,
+            currency_format_decimal_separator, currency_format_symbol_first,
+            currency_format_group_separator, currency_format_currency_symbol,
+            currency_format_display_symbol, updated_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    'ynab_categories': """
+        INSERT INTO ynab_categories (
+            id, name, category_group_id, category_group_name, full_name,
+            hidden, original_category_group_id, note, budgeted, activity,
+            balance, goal_type, goal_creation_month, goal_target,
+            goal_target_month, goal_percentage_complete, deleted, updated_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    'ynab_category_groups': "INSERT INTO ynab_category_groups (id, name, updated_at) VALUES (?, ?, ?)",
+    'ynab_transactions': """
+        INSERT INTO ynab_transactions (
+            id, date, amount, memo, cleared, approved, flag_color, flag_name,
+            account_id, account_name, payee_id, payee_name, category_id,
+            category_name, transfer_account_id, transfer_transaction_id,
+            matched_transaction_id, import_id, import_payee_name,
+            import_payee_name_original, debt_transaction_type, deleted, updated_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    'ynab_subtransactions': """
+        INSERT INTO ynab_subtransactions (
+            id, transaction_id, amount, memo, payee_id, payee_name,
+            category_id, category_name, transfer_account_id, deleted, updated_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    'ynab_payees': "INSERT INTO ynab_payees (id, name, updated_at) VALUES (?, ?, ?)",
+    'ynab_account': """
+        INSERT INTO ynab_account (
+            budget_id, ynab_account_id, name, type, on_budget, closed, note,
+            balance, cleared_balance, uncleared_balance, transfer_payee_id,
+            direct_import_linked, direct_import_in_error, last_reconciled_at,
+            deleted, updated_at_utc
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+}
+
+def build_import_rows(data: Dict[str, Any], budget_id: str) -> Dict[str, list]:
+    """Build insert rows for every YNAB table from export data, keyed by table."""
+    now = datetime.now().isoformat()
+    rows = {table: [] for table in YNAB_IMPORT_TABLES}
+
+    for budget in data.get('budgets', []):
+        date_format = budget.get('date_format') or {}
+        currency_format = budget.get('currency_format') or {}
+        rows['ynab_budgets'].append((
+            budget['id'],
+            budget['name'],
+            budget.get('last_modified_on'),
+            budget.get('first_month'),
+            budget.get('last_month'),
+            date_format.get('format'),
+            currency_format.get('iso_code'),
+            currency_format.get('example_format'),
+            currency_format.get('decimal_digits'),
+            currency_format.get('decimal_separator'),
+            currency_format.get('symbol_first'),
+            currency_format.get('group_separator'),
+            currency_format.get('currency_symbol'),
+            currency_format.get('display_symbol'),
+            now
+        ))
+
+    # Category groups and payees are deduplicated by id
+    category_groups = {}
+    for category in data.get('categories', []):
+        category_groups[category['category_group_id']] = category['category_group_name']
+        rows['ynab_categories'].append((
+            category['id'],
+            category['name'],
+            category['category_group_id'],
+            category['category_group_name'],
+            category.get('full_name'),
+            category.get('hidden', False),
+            category.get('original_category_group_id'),
+            category.get('note'),
+            category.get('budgeted', 0),
+            category.get('activity', 0),
+            category.get('balance', 0),
+            category.get('goal_type'),
+            category.get('goal_creation_month'),
+            category.get('goal_target', 0),
+            category.get('goal_target_month'),
+            category.get('goal_percentage_complete'),
+            category.get('deleted', False),
+            now
+        ))
+    rows['ynab_category_groups'] = [(group_id, name, now) for group_id, name in category_groups.items()]
+
+    payees = {}
+    for transaction in data.get('transactions', []):
+        if transaction.get('payee_id') and transaction.get('payee_name'):
+            payees[transaction['payee_id']] = transaction['payee_name']
+        rows['ynab_transactions'].append((
+            transaction['id'],
+            transaction['date'],
+            transaction['amount'],
+            transaction.get('memo'),
+            transaction.get('cleared'),
+            transaction.get('approved', False),
+            transaction.get('flag_color'),
+            transaction.get('flag_name'),
+            transaction['account_id'],
+            transaction['account_name'],
+            transaction.get('payee_id'),
+            transaction.get('payee_name'),
+            transaction.get('category_id'),
+            transaction.get('category_name'),
+            transaction.get('transfer_account_id'),
+            transaction.get('transfer_transaction_id'),
+            transaction.get('matched_transaction_id'),
+            transaction.get('import_id'),
+            transaction.get('import_payee_name'),
+            transaction.get('import_payee_name_original'),
+            transaction.get('debt_transaction_type'),
+            transaction.get('deleted', False),
+            now
+        ))
+        for subtransaction in transaction.get('subtransactions') or []:
+            rows['ynab_subtransactions'].append((
+                subtransaction['id'],
+                subtransaction['transaction_id'],
+                subtransaction['amount'],
+                subtransaction.get('memo'),
+                subtransaction.get('payee_id'),
+                subtransaction.get('payee_name'),
+                subtransaction.get('category_id'),
+                subtransaction.get('category_name'),
+                subtransaction.get('transfer_account_id'),
+                subtransaction.get('deleted', False),
+                now
+            ))
+    rows['ynab_payees'] = [(payee_id, name, now) for payee_id, name in payees.items()]
+
+    for account in data.get('accounts', []):
+        rows['ynab_account'].append((
+            budget_id,  # Use the budget_id from the function parameter
+            account['id'],
+            account['name'],
+            account['type'],
+            account['on_budget'],
+            account['closed'],
+            account.get('note'),
+            account['balance'],
+            account['cleared_balance'],
+            account['uncleared_balance'],
+            account.get('transfer_payee_id'),
+            account.get('direct_import_linked', False),
+            account.get('direct_import_in_error', False),
+            account.get('last_reconciled_at'),
+            account.get('deleted', False),
+            now
+        ))
+
+    return rows
+
+def import_ynab_data_to_db(data: Dict[str, Any], budget_id: str) -> Optional[Dict[str, Any]]:
+    """Import YNAB data into SQLite in one bulk transaction.
+
+    All rows are built up front and inserted with executemany. Indexes on the
+    YNAB tables are dropped for the load and rebuilt once at the end, so a
+    large history doesn't pay for index maintenance per row. Returns
+    {table: rows, 'balance_snapshot': rows, 'total_rows', 'seconds',
+    'rows_per_sec'}, or None if the import failed (nothing is changed then).
+    """
+    start = time.perf_counter()
+    rows = build_import_rows(data, budget_id)
+
+    conn = get_db_connection()
+    conn.isolation_level = None  # explicit transaction, so the index DDL is rolled back too
+    cursor = conn.cursor()
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor.execute("BEGIN")
 
         # Clear existing YNAB data
-        ynab_tables = ['ynab_transactions', 'ynab_subtransactions', 'ynab_categories',
-                       'ynab_category_groups', 'ynab_payees', 'ynab_account', 'ynab_budgets']
-
-        for table in ynab_tables:
+        for table in YNAB_IMPORT_TABLES:
             cursor.execute(f"DELETE FROM {table}")
 
-        # Import budgets
-        for budget in data.get('budgets', []):
-            cursor.execute("""
-                INSERT INTO ynab_budgets (
-                    id, name, last_modified_on, first_month, last_month,
-                    date_format_format, currency_format_iso_code,
-                    currency_format_example_format, currency_format_decimal_digits,
-                    currency_format_decimal_separator, currency_format_symbol_first,
-                    currency_format_group_separator, currency_format_currency_symbol,
-                    currency_format_display_symbol, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                budget['id'],
-                budget['name'],
-                budget.get('last_modified_on'),
-                budget.get('first_month'),
-                budget.get('last_month'),
-                budget.get('date_format', {}).get('format'),
-                budget.get('currency_format', {}).get('iso_code'),
-                budget.get('currency_format', {}).get('example_format'),
-                budget.get('currency_format', {}).get('decimal_digits'),
-                budget.get('currency_format', {}).get('decimal_separator'),
-                budget.get('currency_format', {}).get('symbol_first'),
-                budget.get('currency_format', {}).get('group_separator'),
-                budget.get('currency_format', {}).get('currency_symbol'),
-                budget.get('currency_format', {}).get('display_symbol'),
-                datetime.now().isoformat()
-            ))
-
-        # Import categories and category groups
-        category_groups = set()
-        for category in data.get('categories', []):
-            # Track category groups
-            category_groups.add((category['category_group_id'], category['category_group_name']))
-
-            cursor.execute("""
-                INSERT INTO ynab_categories (
-                    id, name, category_group_id, category_group_name, full_name,
-                    hidden, original_category_group_id, note, budgeted, activity,
-                    balance, goal_type, goal_creation_month, goal_target,
-                    goal_target_month, goal_percentage_complete, deleted, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                category['id'],
-                category['name'],
-                category['category_group_id'],
-                category['category_group_name'],
-                category.get('full_name'),
-                category.get('hidden', False),
-                category.get('original_category_group_id'),
-                category.get('note'),
-                category.get('budgeted', 0),
-                category.get('activity', 0),
-                category.get('balance', 0),
-                category.get('goal_type'),
-                category.get('goal_creation_month'),
-                category.get('goal_target', 0),
-                category.get('goal_target_month'),
-                category.get('goal_percentage_complete'),
-                category.get('deleted', False),
-                datetime.now().isoformat()
-            ))
+        # Defer index builds until the tables are loaded
+        placeholders = ", ".join("?" for _ in YNAB_IMPORT_TABLES)
+        cursor.execute(f"""
+            SELECT name, sql FROM sqlite_master
+            WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({placeholders})
+        """, tuple(YNAB_IMPORT_TABLES))
+        indexes = cursor.fetchall()
+        for index_name, _ in indexes:
+            cursor.execute(f'DROP INDEX "{index_name}"')
 
-        # Import category groups
-        for group_id, group_name in category_groups:
-            cursor.execute("""
-                INSERT INTO ynab_category_groups (
-                    id, name, updated_at
-                ) VALUES (?, ?, ?)
-            """, (group_id, group_name, datetime.now().isoformat()))
-
-        # Import transactions and payees
-        payees = set()
-        for transaction in data.get('transactions', []):
-            # Track payees
-            if transaction.get('payee_id') and transaction.get('payee_name'):
-                payees.add((transaction['payee_id'], transaction['payee_name']))
-
-            cursor.execute("""
-                INSERT INTO ynab_transactions (
-                    id, date, amount, memo, cleared, approved, flag_color, flag_name,
-                    account_id, account_name, payee_id, payee_name, category_id,
-                    category_name, transfer_account_id, transfer_transaction_id,
-                    matched_transaction_id, import_id, import_payee_name,
-                    import_payee_name_original, debt_transaction_type, deleted, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                transaction['id'],
-                transaction['date'],
-                transaction['amount'],
-                transaction.get('memo'),
-                transaction.get('cleared'),
-                transaction.get('approved', False),
-                transaction.get('flag_color'),
-                transaction.get('flag_name'),
-                transaction['account_id'],
-                transaction['account_name'],
-                transaction.get('payee_id'),
-                transaction.get('payee_name'),
-                transaction.get('category_id'),
-                transaction.get('category_name'),
-                transaction.get('transfer_account_id'),
-                transaction.get('transfer_transaction_id'),
-                transaction.get('matched_transaction_id'),
-                transaction.get('import_id'),
-                transaction.get('import_payee_name'),
-                transaction.get('import_payee_name_original'),
-                transaction.get('debt_transaction_type'),
-                transaction.get('deleted', False),
-                datetime.now().isoformat()
-            ))
+        for table, insert_sql in YNAB_IMPORT_TABLES.items():
+            cursor.executemany(insert_sql, rows[table])
 
-            # Import subtransactions
-            for subtransaction in transaction.get('subtransactions', []):
-                cursor.execute("""
-                    INSERT INTO ynab_subtransactions (
-                        id, transaction_id, amount, memo, payee_id, payee_name,
-                        category_id, category_name, transfer_account_id, deleted, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    subtransaction['id'],
-                    subtransaction['transaction_id'],
-                    subtransaction['amount'],
-                    subtransaction.get('memo'),
-                    subtransaction.get('payee_id'),
-                    subtransaction.get('payee_name'),
-                    subtransaction.get('category_id'),
-                    subtransaction.get('category_name'),
-                    subtransaction.get('transfer_account_id'),
-                    subtransaction.get('deleted', False),
-                    datetime.now().isoformat()
-                ))
-
-        # Import payees
-        for payee_id, payee_name in payees:
-            cursor.execute("""
-                INSERT INTO ynab_payees (
-                    id, name, updated_at
-                ) VALUES (?, ?, ?)
-            """, (payee_id, payee_name, datetime.now().isoformat()))
-
-        # Import accounts
-        for account in data.get('accounts', []):
-            cursor.execute("""
-                INSERT INTO ynab_account (
-                    budget_id, ynab_account_id, name, type, on_budget, closed, note,
-                    balance, cleared_balance, uncleared_balance, transfer_payee_id,
-                    direct_import_linked, direct_import_in_error, last_reconciled_at,
-                    deleted, updated_at_utc
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                budget_id,  # Use the budget_id from the function parameter
-                account['id'],
-                account['name'],
-                account['type'],
-                account['on_budget'],
-                account['closed'],
-                account.get('note'),
-                account['balance'],
-                account['cleared_balance'],
-                account['uncleared_balance'],
-                account.get('transfer_payee_id'),
-                account.get('direct_import_linked', False),
-                account.get('direct_import_in_error', False),
-                account.get('last_reconciled_at'),
-                account.get('deleted', False),
-                datetime.now().isoformat()
-            ))
+        for _, index_sql in indexes:
+            cursor.execute(index_sql)
 
         # Create balance snapshots for linked accounts
         cursor.execute("""
-            SELECT a.id as account_id, a.name as account_name, a.side, a.currency,
+            SELECT a.id as account_id, a.name as account_name, a.side,
                    ya.balance as ynab_balance, ya.cleared_balance, ya.uncleared_balance
             FROM account a
             JOIN account_link_ynab al ON a.id = al.account_id
             JOIN ynab_account ya ON al.ynab_account_id = ya.ynab_account_id
             WHERE ya.budget_id = ?
         """, (budget_id,))
-
-        linked_accounts = cursor.fetchall()
-
-        for linked_account in linked_accounts:
-            account_id = linked_account[0]
-            account_name = linked_account[1]
-            account_side = linked_account[2]
-            account_currency = linked_account[3]
-            ynab_balance = linked_account[4]
-            cleared_balance = linked_account[5]
-            uncleared_balance = linked_account[6]
-
+        as_of_date = datetime.now().strftime('%Y-%m-%d')
+        snapshots = []
+        for account_id, account_name, account_side, ynab_balance, cleared_balance, uncleared_balance in cursor.fetchall():
             # Convert YNAB balance to cents (YNAB uses millidollars, we use cents)
-            balance_cents = int(ynab_balance / 10)  # Convert millidollars to cents
-
+            balance_cents = int(ynab_balance / 10)
             # Adjust balance based on account side (credit accounts show negative balances)
             if account_side == 'credit':
                 balance_cents = -balance_cents
-
-            # Create balance snapshot
-            cursor.execute("""
-                INSERT INTO balance_snapshot (
-                    account_id, amount_cents, as_of_date, source, notes
-                ) VALUES (?, ?, ?, ?, ?)
-            """, (
+            snapshots.append((
                 account_id,
                 balance_cents,
-                datetime.now().strftime('%Y-%m-%d'),
+                as_of_date,
                 'YNAB Import',
                 f'Imported from YNAB account: {account_name} (Cleared: ${cleared_balance/1000:.2f}, Uncleared: ${uncleared_balance/1000:.2f})'
             ))
+        cursor.executemany("""
+            INSERT INTO balance_snapshot (
+                account_id, amount_cents, as_of_date, source, notes
+            ) VALUES (?, ?, ?, ?, ?)
+        """, snapshots)
 
-        conn.commit()
-        conn.close()
-        return True
+        cursor.execute("COMMIT")
 
     except (sqlite3.Error, IOError) as e:
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
         st.error(f"Error importing data to database: {e}")
-        return False
+        return None
+    finally:
+        conn.close()
+
+    seconds = time.perf_counter() - start
+    stats: Dict[str, Any] = {table: len(table_rows) for table, table_rows in rows.items()}
+    stats['balance_snapshot'] = len(snapshots)
+    stats['total_rows'] = sum(len(table_rows) for table_rows in rows.values()) + len(snapshots)
+    stats['seconds'] = round(seconds, 2)
+    stats['rows_per_sec'] = int(stats['total_rows'] / seconds) if seconds > 0 else stats['total_rows']
+    return stats
 
 def get_ynab_data_from_db() -> Dict[str, Any]:
     """Get YNAB data from SQLite database."""
@@ -568,7 +586,7 @@ def get_ynab_data_from_db() -> Dict[str, Any]:
 def render():
     """Main render function for the YNAB Export Data tool."""
     st.title("📥 YNAB Data Export")
-    st.write("Export live YNAB data to JSON files or directly to the database.")
+    st.write("Export live YNAB data to compressed export files or directly to the database.")
 
     # Check API key
     if not os.getenv('YNAB_API_KEY'):
@@ -598,9 +616,9 @@ def render():
     st.subheader("📁 Export Destination")
     export_destination = st.radio(
         "Choose export destination:",
-        ["📄 JSON File", "🗄️ SQLite Database"],
+        ["📄 Export File", "🗄️ SQLite Database"],
         index=0,
-        help="Export to a JSON file or directly import into the SQLite database"
+        help="Export to a file or directly import into the SQLite database"
     )
 
     if export_destination == "🗄️ SQLite Database":
@@ -611,7 +629,7 @@ def render():
             The accounts.db file doesn't exist. Please:
 
             1. **Create the database** using the account management tools
-            2. **Or export to JSON File** instead
+            2. **Or export to a file** instead
             """)
             return
 
@@ -628,7 +646,7 @@ def render():
             No YNAB tables found in the database. Please:
 
             1. **Create YNAB tables** using the database tools
-            2. **Or export to JSON File** instead
+            2. **Or export to a file** instead
             """)
             return
 
@@ -650,27 +668,46 @@ def render():
         # Database import options
         st.subheader("🗄️ Database Import Settings")
 
+        import_source = st.selectbox(
+            "Import from:",
+            ["Live YNAB API"] + ynab_export_files.list_export_files('.'),
+            help="Pull fresh data from YNAB, or bulk-load an existing export file"
+        )
+        from_api = import_source == "Live YNAB API"
+
         col1, col2 = st.columns([2, 1])
         with col1:
             st.write("**Import Options:**")
             st.write("• **Replace existing data**: All YNAB tables will be cleared and repopulated")
-            st.write("• **Fresh data**: Always pulls the latest data from YNAB API")
+            if from_api:
+                st.write("• **Fresh data**: Always pulls the latest data from YNAB API")
+            else:
+                st.write(f"• **Export file**: Loads `{import_source}` without calling the YNAB API")
             st.write("• **Complete import**: Includes budgets, categories, transactions, and accounts")
+            st.write("• **Bulk load**: One transaction, indexes rebuilt once at the end")
 
         with col2:
             st.write("")  # Spacer
             st.write("")  # Spacer
             if st.button("🗄️ Import to Database", type="primary"):
-                with st.spinner("Fetching live YNAB data and importing to database..."):
+                with st.spinner("Fetching YNAB data and importing to database..."):
                     try:
-                        # Fetch all data from live API
-                        data = fetch_all_ynab_data(budget_id, configuration)
+                        if from_api:
+                            # Fetch all data from live API
+                            data = fetch_all_ynab_data(budget_id, configuration)
+                        else:
+                            data = load_data_from_file(import_source)
+                        import_budget_id = budget_id
+                        if not from_api:
+                            import_budget_id = data.get('metadata', {}).get('budget_id') or budget_id
 
                         # Import to database
-                        success = import_ynab_data_to_db(data, budget_id)
+                        import_stats = import_ynab_data_to_db(data, import_budget_id) if data else None
 
-                        if success:
+                        if import_stats:
                             st.success("✅ **Data imported to database successfully!**")
+                            st.write(f"⚡ **{import_stats['total_rows']:,} rows in {import_stats['seconds']:.2f}s** "
+                                     f"({import_stats['rows_per_sec']:,} rows/sec)")
 
                             # Show summary
                             metadata = data.get('metadata', {})
@@ -680,18 +717,8 @@ def render():
                             st.write(f"• **Transactions:** {metadata.get('total_transactions', 0)}")
                             st.write(f"• **Accounts:** {metadata.get('total_accounts', 0)}")
                             st.write(f"• **Import Time:** {metadata.get('export_timestamp', 'Unknown')}")
-                            st.write("• **Data Source:** Live YNAB API")
-
-                            # Show balance snapshots created
-                            conn = get_db_connection()
-                            cursor = conn.cursor()
-                            cursor.execute("""
-                                SELECT COUNT(*) FROM balance_snapshot
-                                WHERE source = 'YNAB Import' AND as_of_date = ?
-                            """, (datetime.now().strftime('%Y-%m-%d'),))
-                            balance_snapshots_count = cursor.fetchone()[0]
-                            st.write(f"• **Balance Snapshots Created:** {balance_snapshots_count}")
-                            conn.close()
+                            st.write(f"• **Data Source:** {'Live YNAB API' if from_api else import_source}")
+                            st.write(f"• **Balance Snapshots Created:** {import_stats['balance_snapshot']}")
 
                             # Show updated database summary
                             conn = get_db_connection()
@@ -712,20 +739,22 @@ def render():
                         st.error(f"❌ **Error importing data**: {str(e)}")
 
     else:
-        # JSON file export (original functionality)
-        st.subheader("📄 JSON File Export Settings")
+        # Export file (streaming NDJSON, zstd-compressed when available)
+        st.subheader("📄 Export File Settings")
 
         col1, col2 = st.columns([3, 1])
         with col1:
             filename = st.text_input(
                 "Export filename",
-                value=f"ynab_data_{budget_name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                help="Filename for the exported JSON data"
+                value=f"ynab_data_{budget_name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ynab_export_files.export_suffix()}",
+                help="Filename for the export (.ndjson.zst, or .ndjson for uncompressed)"
             )
+            if not ynab_export_files.ZSTD_AVAILABLE:
+                st.caption("zstandard not installed, exports are uncompressed. Run: pip install zstandard")
         with col2:
             st.write("")  # Spacer
             st.write("")  # Spacer
-            if st.button("📥 Export to JSON", type="primary"):
+            if st.button("📥 Export to File", type="primary"):
                 with st.spinner("Fetching live YNAB data..."):
                     try:
                         # Fetch all data from live API
@@ -733,8 +762,8 @@ def render():
 
                         # Save to file
                         if save_data_to_file(data, filename):
-                            st.success("✅ **Data exported to JSON successfully!**")
-                            st.write(f"📁 **File saved as:** `{filename}`")
+                            st.success("✅ **Data exported successfully!**")
+                            st.write(f"📁 **File saved as:** `{filename}` ({os.path.getsize(filename) / 1024:,.0f} KB)")
 
                             # Show summary
                             metadata = data.get('metadata', {})
@@ -747,14 +776,14 @@ def render():
                             st.write("• **Data Source:** Live YNAB API")
 
                             # Offer download
-                            with open(filename, 'r', encoding='utf-8') as f:
+                            with open(filename, 'rb') as f:
                                 file_content = f.read()
 
                             st.download_button(
-                                label="📥 Download JSON File",
+                                label="📥 Download Export File",
                                 data=file_content,
                                 file_name=filename,
-                                mime="application/json"
+                                mime=ynab_export_files.export_mime(filename)
                             )
                         else:
                             st.error("❌ **Failed to save data to file**")
@@ -762,20 +791,19 @@ def render():
                     except Exception as e:
                         st.error(f"❌ **Error exporting data**: {str(e)}")
 
-    # Show existing JSON files
-    st.subheader("📋 Existing JSON Export Files")
+    # Show existing export files
+    st.subheader("📋 Existing Export Files")
 
-    # Look for existing YNAB export files
-    json_files = [f for f in os.listdir('.') if f.startswith('ynab_data_') and f.endswith('.json')]
+    # Look for existing YNAB export files (newest first)
+    export_files = ynab_export_files.list_export_files('.')
 
-    if json_files:
-        st.write(f"Found {len(json_files)} existing JSON export files:")
+    if export_files:
+        st.write(f"Found {len(export_files)} existing export files:")
 
-        for file in sorted(json_files, reverse=True):  # Show newest first
+        for file in export_files:
             try:
-                # Load file to show metadata
-                data = load_data_from_file(file)
-                metadata = data.get('metadata', {})
+                # Streaming exports only need their first line for the metadata
+                metadata = ynab_export_files.read_metadata(file)
 
                 col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
                 with col1:
@@ -786,13 +814,13 @@ def render():
                     st.write(f"📂 {metadata.get('total_categories', 0)} cats")
                 with col4:
                     if st.button("📥 Download", key=f"download_{file}"):
-                        with open(file, 'r', encoding='utf-8') as f:
+                        with open(file, 'rb') as f:
                             file_content = f.read()
                         st.download_button(
                             label="📥 Download",
                             data=file_content,
                             file_name=file,
-                            mime="application/json",
+                            mime=ynab_export_files.export_mime(file),
                             key=f"dl_{file}"
                         )
 
@@ -807,11 +835,11 @@ def render():
 
                 st.markdown("---")
 
-            except (IOError, OSError, json.JSONDecodeError) as e:
+            except (IOError, OSError, RuntimeError, ValueError) as e:
                 st.write(f"**{file}** (Error reading: {e})")
                 st.markdown("---")
     else:
-        st.info("No existing JSON export files found. Create your first export above!")
+        st.info("No existing export files found. Create your first export above!")
 
     # Help section
     with st.expander("ℹ️ About this tool"):
@@ -823,7 +851,7 @@ def render():
         - Creates a complete snapshot of your current YNAB data
 
         **Export Destinations:**
-        - **JSON File**: Creates a downloadable JSON file for offline use
+        - **Export File**: Creates a downloadable export file for offline use
         - **SQLite Database**: Directly imports data into your local database and creates balance snapshots for linked accounts
 
         **What's included in the export:**
@@ -835,14 +863,16 @@ def render():
         - **Metadata**: Export timestamp and summary statistics
 
         **How to use the exported data:**
-        - **JSON files**: Other YNAB tools can load this data instead of making API calls
+        - **Export files**: Other YNAB tools can load this data instead of making API calls
         - **Database**: Other tools can query the database directly for faster access
         - **Offline analysis**: Useful when API rate limits are hit or for offline work
         - **Data backup**: Provides consistent data snapshot across all tools
 
         **File format:**
-        - Standard JSON format
-        - Human-readable with proper indentation
+        - Newline-delimited JSON: a metadata line, then one line per budget, category, account and transaction
+        - zstd-compressed (`.ndjson.zst`) when zstandard is installed, plain `.ndjson` otherwise
+        - Written and read as a stream, so large histories don't need the whole file in memory
+        - Legacy `.json` exports still load
         - Includes all transaction details and metadata
         """)
 
@@ -1,5 +1,5 @@
 import { useState, useRef, useEffect, useCallback, type KeyboardEvent } from 'react'
-import { useChatHistory, useSendMessage, useClearChat, type ChatMessage } from '../../hooks/dragon-keeper/use-keeper-chat'
+import { useChatHistory, useStreamMessage, useClearChat, type ChatMessage } from '../../hooks/dragon-keeper/use-keeper-chat'
 import { useToast } from './toast'
 
 const DRAWER_WIDTH = 380
@@ -115,7 +115,7 @@ function MessageBubble({ msg }: { msg: ChatMessage }) {
 export default function KeeperChatDrawer({ open, onClose }: { open: boolean; onClose: () => void }) {
   const { toast } = useToast()
   const { data, isLoading, isError, refetch } = useChatHistory()
-  const sendMutation = useSendMessage()
+  const stream = useStreamMessage()
   const clearMutation = useClearChat()
 
   const [input, setInput] = useState('')
@@ -133,7 +133,7 @@ export default function KeeperChatDrawer({ open, onClose }: { open: boolean; onC
 
   useEffect(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' })
-  }, [data?.messages, sendMutation.isPending])
+  }, [data?.messages, stream.isStreaming, stream.draft])
 
   useEffect(() => {
     if (open && textareaRef.current) {
@@ -150,13 +150,16 @@ export default function KeeperChatDrawer({ open, onClose }: { open: boolean; onC
 
   const handleSend = useCallback(() => {
     const trimmed = input.trim()
-    if (!trimmed || sendMutation.isPending) return
+    if (!trimmed || stream.isStreaming) return
 
-    sendMutation.mutate(trimmed, {
-      onSuccess: () => { setInput(''); textareaRef.current?.focus() },
-      onError: (err) => toast(err.message || 'Failed to send message', 'error'),
-    })
-  }, [input, sendMutation, toast])
+    setInput('')
+    stream.send(trimmed)
+      .then(() => textareaRef.current?.focus())
+      .catch((err: Error) => {
+        setInput(trimmed)
+        toast(err.message || 'Failed to send message', 'error')
+      })
+  }, [input, stream, toast])
 
   const handleKeyDown = useCallback((e: KeyboardEvent<HTMLTextAreaElement>) => {
     if (e.key === 'Enter' && !e.shiftKey) {
@@ -309,7 +312,7 @@ export default function KeeperChatDrawer({ open, onClose }: { open: boolean; onC
             <MessageBubble key={msg.id} msg={msg} />
           ))}
 
-          {sendMutation.isPending && (
+          {stream.isStreaming && (
             <div style={{ display: 'flex', gap: '8px', alignItems: 'flex-start', padding: '2px 0' }}>
               <div style={{
                 width: 26, height: 26, borderRadius: '50%', flexShrink: 0,
@@ -319,11 +322,24 @@ export default function KeeperChatDrawer({ open, onClose }: { open: boolean; onC
               }}>
                 🐉
               </div>
-              <div style={{
-                padding: '8px 12px', borderRadius: '12px 12px 12px 2px',
-                background: 'var(--bg-card)', borderLeft: '3px solid #6366f1',
-              }}>
-                <TypingIndicator />
+              <div style={{ maxWidth: '80%', display: 'flex', flexDirection: 'column', gap: '4px' }}>
+                <div style={{
+                  padding: '8px 12px', borderRadius: '12px 12px 12px 2px',
+                  background: 'var(--bg-card)', borderLeft: '3px solid #6366f1',
+                  color: 'var(--text-primary)', fontSize: '13px', lineHeight: 1.5,
+                  wordBreak: 'break-word',
+                }}>
+                  {stream.draft ? formatContent(stream.draft) : <TypingIndicator />}
+                </div>
+                {stream.activeTools.length > 0 && (
+                  <div style={{
+                    fontSize: '11px', color: 'var(--text-muted)', paddingLeft: 4,
+                    display: 'flex', alignItems: 'center', gap: '4px',
+                  }}>
+                    <span style={{ fontSize: '12px' }}>🔍</span>
+                    Looking up financial data…
+                  </div>
+                )}
               </div>
             </div>
           )}
@@ -342,7 +358,7 @@ export default function KeeperChatDrawer({ open, onClose }: { open: boolean; onC
             onChange={e => { setInput(e.target.value); autoResize() }}
             onKeyDown={handleKeyDown}
             placeholder="Ask the Keeper..."
-            disabled={sendMutation.isPending}
+            disabled={stream.isStreaming}
             rows={1}
             style={{
               flex: 1, resize: 'none', padding: '8px 12px',
@@ -356,7 +372,7 @@ export default function KeeperChatDrawer({ open, onClose }: { open: boolean; onC
           />
           <button
             onClick={handleSend}
-            disabled={sendMutation.isPending || !input.trim()}
+            disabled={stream.isStreaming || !input.trim()}
             aria-label="Send message"
             style={{
               background: input.trim() ? 'var(--accent)' : 'var(--bg-hover)',
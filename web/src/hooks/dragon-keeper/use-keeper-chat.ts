@@ -1,5 +1,6 @@
+import { useState, useCallback } from 'react'
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
-import { apiFetch } from '../../api'
+import { apiFetch, API_BASE } from '../../api'
 
 export interface ChatMessage {
   id: number
@@ -43,6 +44,98 @@ export function useSendMessage() {
   })
 }
 
+interface StreamState {
+  draft: string
+  activeTools: string[]
+  isStreaming: boolean
+}
+
+const IDLE_STREAM: StreamState = { draft: '', activeTools: [], isStreaming: false }
+
+/** Parse one SSE frame ("event: x\ndata: {...}") into its name and JSON payload. */
+function parseSseFrame(frame: string): { event: string; data: any } | null {
+  let event = 'message'
+  const dataLines: string[] = []
+  for (const line of frame.split('\n')) {
+    if (line.startsWith('event:')) event = line.slice(6).trim()
+    else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim())
+  }
+  if (!dataLines.length) return null
+  return { event, data: JSON.parse(dataLines.join('\n')) }
+}
+
+/**
+ * Streaming counterpart to useSendMessage: posts to /chat/stream and exposes
+ * the partially-received answer and in-flight tool calls while the turn runs.
+ */
+export function useStreamMessage() {
+  const qc = useQueryClient()
+  const [state, setState] = useState<StreamState>(IDLE_STREAM)
+
+  const send = useCallback(async (message: string) => {
+    setState({ draft: '', activeTools: [], isStreaming: true })
+    // Show the user's message right away. The server only persists it once the
+    // stream is running, so append it locally; the refetch in `finally` swaps in
+    // the stored copy (or drops it if the request failed).
+    await qc.cancelQueries({ queryKey: ['dragon-keeper', 'chat-history'] })
+    qc.setQueryData<ChatHistoryResponse>(['dragon-keeper', 'chat-history'], old => ({
+      messages: [
+        ...(old?.messages ?? []),
+        { id: -Date.now(), role: 'user', content: message, tool_calls: null, created_at: new Date().toISOString() },
+      ],
+    }))
+    let usedTools = false
+    try {
+      const res = await fetch(`${API_BASE}/dragon-keeper/chat/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ message }),
+      })
+      if (!res.ok || !res.body) {
+        const err = await res.json().catch(() => ({ detail: res.statusText }))
+        throw new Error(err.detail || `HTTP ${res.status}`)
+      }
+
+      const reader = res.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ''
+      for (;;) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+        const frames = buffer.split('\n\n')
+        buffer = frames.pop() ?? ''
+        for (const frame of frames) {
+          const evt = parseSseFrame(frame)
+          if (!evt) continue
+          if (evt.event === 'token') {
+            setState(s => ({ ...s, draft: s.draft + evt.data.delta }))
+          } else if (evt.event === 'tool_start') {
+            usedTools = true
+            // Text streamed before a tool round is provisional
+            setState(s => ({ ...s, draft: '', activeTools: [...s.activeTools, evt.data.name] }))
+          } else if (evt.event === 'tool_end') {
+            setState(s => {
+              const idx = s.activeTools.indexOf(evt.data.name)
+              return idx < 0 ? s : { ...s, activeTools: s.activeTools.filter((_, i) => i !== idx) }
+            })
+          } else if (evt.event === 'error') {
+            throw new Error(evt.data.detail || 'Streaming failed')
+          }
+        }
+      }
+    } finally {
+      await qc.invalidateQueries({ queryKey: ['dragon-keeper', 'chat-history'] })
+      if (usedTools) {
+        qc.invalidateQueries({ queryKey: ['dragon-keeper'] })
+      }
+      setState(IDLE_STREAM)
+    }
+  }, [qc])
+
+  return { ...state, send }
+}
+
 export function useClearChat() {
   const qc = useQueryClient()
   return useMutation<void, Error, void>({
@@ -1,5 +1,5 @@
-import { useState } from 'react'
-import { apiFetch } from '../api'
+import { useEffect, useState } from 'react'
+import { API_BASE, apiFetch } from '../api'
 
 interface Sensor {
     entity_id: string
@@ -30,6 +30,9 @@ export default function HomeAssistantSensors() {
     const [result, setResult] = useState<SensorsResponse | null>(null)
     const [loading, setLoading] = useState(false)
     const [error, setError] = useState('')
+    const [live, setLive] = useState(false)
+    // Filters of the last fetch; the live stream follows these, not the inputs being typed
+    const [appliedParams, setAppliedParams] = useState('')
 
     const fetch = async () => {
         setLoading(true)
@@ -42,6 +45,7 @@ export default function HomeAssistantSensors() {
                 `/home-assistant/sensors?${params}`
             )
             setResult(data)
+            setAppliedParams(params.toString())
         } catch (e: unknown) {
             setError(e instanceof Error ? e.message : 'Failed to fetch sensors')
         } finally {
@@ -49,6 +53,31 @@ export default function HomeAssistantSensors() {
         }
     }
 
+    useEffect(() => {
+        if (!live) return
+        const source = new EventSource(`${API_BASE}/home-assistant/stream?scope=sensors&${appliedParams}`)
+        source.addEventListener('snapshot', e => {
+            setResult(JSON.parse((e as MessageEvent).data))
+        })
+        source.addEventListener('change', e => {
+            const change = JSON.parse((e as MessageEvent).data)
+            setResult(prev => {
+                if (!prev) return prev
+                const others = prev.sensors.filter(s => s.entity_id !== change.entity_id)
+                const sensors = change.removed
+                    ? others
+                    : [...others, change.entity as Sensor].sort((a, b) => a.entity_id.localeCompare(b.entity_id))
+                return { sensors, total: sensors.length }
+            })
+        })
+        source.onerror = () => {
+            if (source.readyState !== EventSource.CLOSED) return
+            setError('Live updates unavailable (Home Assistant state stream is not connected)')
+            setLive(false)
+        }
+        return () => source.close()
+    }, [live, appliedParams])
+
     return (
         <div>
             <div className="info-box">
@@ -90,6 +119,17 @@ export default function HomeAssistantSensors() {
                 ) : '🔍 Fetch Sensors'}
             </button>
 
+            <label style={{ marginLeft: 16, fontSize: 13, color: 'var(--text-muted)' }}>
+                <input
+                    type="checkbox"
+                    checked={live}
+                    disabled={!result}
+                    onChange={e => setLive(e.target.checked)}
+                    style={{ marginRight: 6 }}
+                />
+                Live updates
+            </label>
+
             {error && <div className="error-box" style={{ marginTop: 16 }}>{error}</div>}
 
             {result && (
@@ -1,5 +1,5 @@
 import { useEffect, useRef } from 'react'
-import { apiFetch } from '../api'
+import { API_BASE, apiFetch } from '../api'
 
 interface RoomData {
   id: string
@@ -98,24 +98,70 @@ function WireframeVisualizer() {
   }, [])
 
   useEffect(() => {
+    type MotionEntity = { entity_id: string; state: string; last_changed: string }
+    type LightEntity = { entity_id: string; state: string; friendly_name: string }
+
+    const applySnapshot = (data: { motion_sensors?: MotionEntity[]; lights?: LightEntity[] }) => {
+      const mm = new Map<string, { state: string; last_changed: string }>()
+      ;(data.motion_sensors ?? []).forEach(s => mm.set(s.entity_id, { state: s.state, last_changed: s.last_changed }))
+      motionRef.current = mm
+      const lm = new Map<string, { state: string; name: string }>()
+      ;(data.lights ?? []).forEach(l => lm.set(l.entity_id, { state: l.state, name: l.friendly_name || l.entity_id }))
+      lightStatesRef.current = lm
+      onDeviceUpdateRef.current?.()
+    }
+
     const poll = () =>
-      apiFetch<{
-        motion_sensors: { entity_id: string; state: string; last_changed: string }[]
-        lights: { entity_id: string; state: string; friendly_name: string }[]
-      }>('/home-assistant/entities')
-        .then(data => {
-          const mm = new Map<string, { state: string; last_changed: string }>()
-          ;(data.motion_sensors ?? []).forEach(s => mm.set(s.entity_id, { state: s.state, last_changed: s.last_changed }))
-          motionRef.current = mm
-          const lm = new Map<string, { state: string; name: string }>()
-          ;(data.lights ?? []).forEach(l => lm.set(l.entity_id, { state: l.state, name: l.friendly_name || l.entity_id }))
-          lightStatesRef.current = lm
-          onDeviceUpdateRef.current?.()
-        })
+      apiFetch<{ motion_sensors: MotionEntity[]; lights: LightEntity[] }>('/home-assistant/entities')
+        .then(applySnapshot)
         .catch(() => {})
-    poll()
-    const id = setInterval(poll, 20_000)
-    return () => clearInterval(id)
+
+    // Live updates pushed by the backend; polling only while the stream is unavailable
+    let source: EventSource | null = null
+    let pollId: ReturnType<typeof setInterval> | undefined
+    let retryId: ReturnType<typeof setTimeout> | undefined
+
+    const connect = () => {
+      source = new EventSource(`${API_BASE}/home-assistant/stream?scope=house`)
+      source.addEventListener('snapshot', e => {
+        clearInterval(pollId)
+        pollId = undefined
+        applySnapshot(JSON.parse((e as MessageEvent).data))
+      })
+      source.addEventListener('change', e => {
+        const change = JSON.parse((e as MessageEvent).data)
+        if (change.removed) {
+          motionRef.current.delete(change.entity_id)
+          lightStatesRef.current.delete(change.entity_id)
+        } else if (change.group === 'motion_sensors') {
+          motionRef.current.set(change.entity_id, { state: change.entity.state, last_changed: change.entity.last_changed })
+        } else if (change.group === 'lights') {
+          lightStatesRef.current.set(change.entity_id, {
+            state: change.entity.state,
+            name: change.entity.friendly_name || change.entity_id,
+          })
+        }
+        onDeviceUpdateRef.current?.()
+      })
+      source.onerror = () => {
+        // CONNECTING means the browser is already retrying; CLOSED means the
+        // backend refused the stream (HA stream down), so poll and retry later
+        if (source?.readyState !== EventSource.CLOSED) return
+        source.close()
+        if (pollId === undefined) {
+          poll()
+          pollId = setInterval(poll, 20_000)
+        }
+        retryId = setTimeout(connect, 60_000)
+      }
+    }
+    connect()
+
+    return () => {
+      source?.close()
+      clearInterval(pollId)
+      clearTimeout(retryId)
+    }
   }, [])
 
   useEffect(() => {
@@ -26,6 +26,10 @@ from api.models.dragon_keeper.db import (
     get_balance_snapshot_history,
 )
 
+# Tools that only read from the local database. The Keeper agent memoizes these
+# within a conversation; unannotated tools are treated as mutating.
+READ_ONLY = {"readOnlyHint": True}
+
 mcp = FastMCP(
     name="Codiak YNAB",
     instructions=(
@@ -139,14 +143,14 @@ def approve_transactions(transaction_ids: list[str]) -> dict:
     return tool_approve_transactions(transaction_ids)
 
 
-@mcp.tool()
+@mcp.tool(annotations=READ_ONLY)
 def get_pending_categorizations() -> dict:
     """Get all transactions currently awaiting categorization review."""
     from api.services.dragon_keeper.keeper_tools import tool_get_pending_categorizations
     return tool_get_pending_categorizations()
 
 
-@mcp.tool()
+@mcp.tool(annotations=READ_ONLY)
 def query_spending(
     payee: Optional[str] = None,
     category: Optional[str] = None,
@@ -164,7 +168,7 @@ def query_spending(
     return tool_query_spending(payee, category, days)
 
 
-@mcp.tool()
+@mcp.tool(annotations=READ_ONLY)
 def get_spending_breakdown(days: int = 30) -> dict:
     """
     Get the top spending categories for a time period.
@@ -176,7 +180,7 @@ def get_spending_breakdown(days: int = 30) -> dict:
     return tool_get_spending_breakdown(days)
 
 
-@mcp.tool()
+@mcp.tool(annotations=READ_ONLY)
 def generate_debrief() -> dict:
     """Generate a financial debrief: safe-to-spend, weekly spending, streak, and queue status."""
     from api.services.dragon_keeper.keeper_tools import tool_generate_debrief
@@ -187,7 +191,7 @@ def generate_debrief() -> dict:
 # Budget
 # ---------------------------------------------------------------------------
 
-@mcp.tool()
+@mcp.tool(annotations=READ_ONLY)
 def get_budget() -> dict:
     """Get the active YNAB budget ID stored from the last sync."""
     conn = get_db()
@@ -204,7 +208,7 @@ def get_budget() -> dict:
 # Categories
 # ---------------------------------------------------------------------------
 
-@mcp.tool()
+@mcp.tool(annotations=READ_ONLY)
 def get_category_groups_tool(include_hidden: bool = False) -> list[dict]:
     """
     List all YNAB category groups.
@@ -219,7 +223,7 @@ def get_category_groups_tool(include_hidden: bool = False) -> list[dict]:
         conn.close()
 
 
-@mcp.tool()
+@mcp.tool(annotations=READ_ONLY)
 def get_categories_tool(include_hidden: bool = False) -> list[dict]:
     """
     List all YNAB categories with current budget amounts.
@@ -237,7 +241,7 @@ def get_categories_tool(include_hidden: bool = False) -> list[dict]:
         conn.close()
 
 
-@mcp.tool()
+@mcp.tool(annotations=READ_ONLY)
 def get_category_tool(category_id: str) -> dict:
     """
     Get details for a single YNAB category by ID.
@@ -259,7 +263,7 @@ def get_category_tool(category_id: str) -> dict:
 # Transactions
 # ---------------------------------------------------------------------------
 
-@mcp.tool()
+@mcp.tool(annotations=READ_ONLY)
 def get_transactions_tool(
     limit: int = 50,
     since_date: Optional[str] = None,
@@ -291,7 +295,7 @@ def get_transactions_tool(
         conn.close()
 
 
-@mcp.tool()
+@mcp.tool(annotations=READ_ONLY)
 def get_transaction_tool(transaction_id: str) -> dict:
     """
     Get a single YNAB transaction by ID.
@@ -313,7 +317,7 @@ def get_transaction_tool(transaction_id: str) -> dict:
 # Payees
 # ---------------------------------------------------------------------------
 
-@mcp.tool()
+@mcp.tool(annotations=READ_ONLY)
 def get_payees_tool(limit: int = 200) -> list[dict]:
     """
     List YNAB payees sorted by transaction count, with summary stats.
@@ -330,7 +334,7 @@ def get_payees_tool(limit: int = 200) -> list[dict]:
         conn.close()
 
 
-@mcp.tool()
+@mcp.tool(annotations=READ_ONLY)
 def get_payee_tool(payee_id: str) -> dict:
     """
     Get detailed stats for a single YNAB payee, including category breakdown.
@@ -348,7 +352,7 @@ def get_payee_tool(payee_id: str) -> dict:
         conn.close()
 
 
-@mcp.tool()
+@mcp.tool(annotations=READ_ONLY)
 def get_payee_transactions_tool(
     payee_id: str,
     limit: int = 50,
@@ -373,7 +377,7 @@ def get_payee_transactions_tool(
 # Accounts & Balances
 # ---------------------------------------------------------------------------
 
-@mcp.tool()
+@mcp.tool(annotations=READ_ONLY)
 def get_account_balances_tool() -> list[dict]:
     """List all open YNAB accounts with current balances in dollars."""
     conn = get_db()
@@ -383,14 +387,14 @@ def get_account_balances_tool() -> list[dict]:
         conn.close()
 
 
-@mcp.tool()
+@mcp.tool(annotations=READ_ONLY)
 def get_balances() -> dict:
     """Get all account balances and the current safe-to-spend amount in one call."""
     from api.services.dragon_keeper.keeper_tools import tool_get_balances
     return tool_get_balances()
 
 
-@mcp.tool()
+@mcp.tool(annotations=READ_ONLY)
 def get_account_balance_history_tool(account_id: Optional[str] = None) -> list[dict]:
     """
     Get balance snapshot history, newest first.